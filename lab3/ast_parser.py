@@ -1,7 +1,87 @@
 
 import re
-from typing import List, Optional, Tuple
-from control_flow import ASTNode, ParsingError
+from typing import Any, Dict, Generator, List, Optional, Tuple
+from control_flow import ASTNode, ParsingError, trampoline
+
+
+BRACE = re.compile(r'[{}]')
+
+
+def match_braces(lines: List[str]) -> Dict[Tuple[int, int], int]:
+    """Для каждой '{' (строка, позиция) - строка парной '}'. Один проход по всем
+    строкам: вложенные блоки находят свой конец поиском, а не новым подсчетом скобок"""
+    block_ends = {}
+    stack = []
+    for row, line in enumerate(lines):
+        for match in BRACE.finditer(line):
+            if match.group() == '{':
+                stack.append((row, match.start()))
+            elif stack:
+                block_ends[stack.pop()] = row
+    return block_ends
+
+
+class LineView:
+    """Срез списка строк без копирования: lines[i:] на длинном теле функции
+    не должен копировать оставшиеся строки для каждого оператора.
+    Первая строка среза может начинаться не с начала строки (offset): тело
+    блока начинается сразу после '{'. Таблица парных скобок (match_braces)
+    строится один раз на список и общая для всех срезов"""
+
+    __slots__ = ('lines', 'start', 'stop', 'offset', 'block_ends')
+
+    def __init__(self, lines: List[str], start: int = 0, stop: Optional[int] = None,
+                 offset: int = 0, block_ends: Optional[Dict[Tuple[int, int], int]] = None):
+        self.lines = lines
+        self.start = start
+        self.stop = len(lines) if stop is None else stop
+        self.offset = offset
+        self.block_ends = match_braces(lines) if block_ends is None else block_ends
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self))
+            return LineView(self.lines, self.start + start, self.start + max(start, stop),
+                            self.offset if start == 0 else 0, self.block_ends)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index == 0 and self.offset:
+            return self.lines[self.start][self.offset:]
+        return self.lines[self.start + index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def block_end(self, index: int, pos: int) -> Optional[int]:
+        """Номер строки среза с '}', парной '{' в позиции pos строки index;
+        None, если блок не закрыт в пределах среза"""
+        column = pos + self.offset if index == 0 else pos
+        row = self.block_ends.get((self.start + index, column))
+        if row is None or row >= self.stop:
+            return None
+        return row - self.start
+
+    def block_body(self, index: int, pos: int, end: int) -> 'LineView':
+        """Строки между '{' (строка index, позиция pos) и строкой end с '}':
+        без начальных пробельных символов, как у текста тела после strip()"""
+        row = self.start + index
+        column = pos + 1 + (self.offset if index == 0 else 0)
+        stop = self.start + end
+        while row < stop:
+            rest = self.lines[row][column:]
+            text = rest.lstrip()
+            if text:
+                return LineView(self.lines, row, stop, column + len(rest) - len(text), self.block_ends)
+            row += 1
+            column = 0
+        return LineView(self.lines, stop, stop, 0, self.block_ends)
+
 
 class SimpleParser:
     
@@ -14,10 +94,22 @@ class SimpleParser:
     def parse_file(self, file_name: str, source_code: str) -> ASTNode:
         """Парсинг исходного кода файла"""
         self.errors.clear()
-        
-        lines = self._remove_comments(source_code)
         root = ASTNode(type='program', children=[], line=1, column=1)
         
+        for start_line, func_lines in self.split_functions(source_code):
+            func_node = self.parse_function(file_name, func_lines, start_line)
+            if func_node:
+                root.children.append(func_node)
+        
+        return root
+    
+    def split_functions(self, source_code: str) -> List[Tuple[int, LineView]]:
+        """Делит исходный код на объявления функций: (номер первой строки, строки функции).
+        Функция разбирается только по своим строкам, поэтому куски можно разбирать
+        и кэшировать по отдельности"""
+        lines = LineView(self._remove_comments(source_code))
+        functions = []
+        
         self.current_line = 1
         i = 0
         
@@ -31,18 +123,20 @@ class SimpleParser:
                 continue
             
             if self._is_function_declaration(line):
-                func_node, lines_consumed = self._parse_function_declaration(
-                    lines[i:], self.current_line, file_name
-                )
-                if func_node:
-                    root.children.append(func_node)
+                lines_consumed = self._function_extent(lines[i:])
+                functions.append((self.current_line, lines[i:i + lines_consumed]))
                 i += lines_consumed
                 self.current_line += lines_consumed
             else:
                 i += 1
                 self.current_line += 1
         
-        return root
+        return functions
+    
+    def parse_function(self, file_name: str, lines: LineView, start_line: int) -> Optional[ASTNode]:
+        """Разбор одной функции, выделенной split_functions"""
+        func_node, _ = self._parse_function_declaration(lines, start_line, file_name)
+        return func_node
     
     def _remove_comments(self, source: str) -> List[str]:
         lines = []
@@ -56,15 +150,12 @@ class SimpleParser:
         """Проверка, является ли строка объявлением функции"""
         return line.strip().startswith('function ')
     
-    def _parse_function_declaration(self, lines: List[str], start_line: int, 
-                               file_name: str) -> Tuple[Optional[ASTNode], int]:
-        """Разбор объявления функции с типами параметров"""
-        full_declaration = []
+    def _function_extent(self, lines: LineView) -> int:
+        """Число строк объявления функции: до закрытия скобки тела"""
         brace_count = 0
         lines_consumed = 0
         
         for i, line in enumerate(lines):
-            full_declaration.append(line)
             lines_consumed += 1
             
             brace_count += line.count('{')
@@ -73,7 +164,13 @@ class SimpleParser:
             if brace_count == 0 and i > 0:
                 break
         
-        full_text = '\n'.join(full_declaration)
+        return lines_consumed
+    
+    def _parse_function_declaration(self, lines: List[str], start_line: int, 
+                               file_name: str) -> Tuple[Optional[ASTNode], int]:
+        """Разбор объявления функции с типами параметров"""
+        lines_consumed = self._function_extent(lines)
+        full_text = '\n'.join(lines[:lines_consumed])
         
         # Паттерн для функции с типами параметров: function name(param -> type) -> return_type
         pattern = r'function\s+(\w+)\s*\(([^)]*)\)\s*->\s*(\w+)\s*\{'
@@ -153,21 +250,23 @@ class SimpleParser:
             column=full_text.find('->') + 3 if '->' in full_text else 1
         ))
         
-        body_node = self._parse_function_body(body_text, start_line + full_text[:body_start].count('\n'), file_name)
+        body_node = trampoline(self._parse_function_body(
+            body_text, start_line + full_text[:body_start].count('\n'), file_name))
         if body_node:
             func_node.children.append(body_node)
         
         return func_node, lines_consumed
     
     def _parse_function_body(self, body_text: str, start_line: int, 
-                        file_name: str) -> ASTNode:
-        """Разбор тела функции"""
+                        file_name: str) -> Generator[tuple, Tuple[Optional[ASTNode], int], ASTNode]:
+        """Разбор тела функции. Этот и остальные методы разбора операторов - генераторы
+        для trampoline: вложенный разбор запрашивается через yield, а не рекурсией"""
         body_node = ASTNode(type='function_body', line=start_line, column=1)
         
         if not body_text.strip():
             return body_node
         
-        lines = body_text.split('\n')
+        lines = LineView(body_text.split('\n'))
         
         line_num = start_line
         i = 0
@@ -180,7 +279,7 @@ class SimpleParser:
                 line_num += 1
                 continue
             
-            stmt_node, lines_consumed = self._parse_statement(lines[i:], line_num, file_name)
+            stmt_node, lines_consumed = yield (self._parse_statement, lines[i:], line_num, file_name)
             
             if stmt_node:
                 body_node.children.append(stmt_node)
@@ -191,7 +290,7 @@ class SimpleParser:
         return body_node
     
     def _parse_statement(self, lines: List[str], line_num: int, 
-                    file_name: str) -> Tuple[Optional[ASTNode], int]:
+                    file_name: str) -> Generator[tuple, Any, Tuple[Optional[ASTNode], int]]:
         """Разбор оператора с поддержкой объявления с инициализацией"""
         line = lines[0].strip()
         
@@ -228,16 +327,16 @@ class SimpleParser:
         
         
         if line.startswith('for '):
-            return self._parse_for_statement(lines, line_num, file_name)
+            return (yield from self._parse_for_statement(lines, line_num, file_name))
         
         elif line.startswith('if '):
-            return self._parse_if_statement(lines, line_num, file_name)
+            return (yield from self._parse_if_statement(lines, line_num, file_name))
         
         elif line.startswith('do'):
-            return self._parse_do_while_statement(lines, line_num, file_name)
+            return (yield from self._parse_do_while_statement(lines, line_num, file_name))
         
         elif line.startswith('while '):
-            return self._parse_while_statement(lines, line_num, file_name)
+            return (yield from self._parse_while_statement(lines, line_num, file_name))
         
         elif line.startswith('return '):
             node = ASTNode(type='return', line=line_num, column=1)
@@ -379,7 +478,7 @@ class SimpleParser:
         return None, 1
 
     def _parse_if_statement(self, lines: List[str], line_num: int, 
-                           file_name: str) -> Tuple[Optional[ASTNode], int]:
+                           file_name: str) -> Generator[tuple, Any, Tuple[Optional[ASTNode], int]]:
         """Разбор оператора if (может быть с else/else if)"""
         first_line = lines[0].strip()
         
@@ -409,10 +508,10 @@ class SimpleParser:
         after_if = first_line[match.end():].strip()
         
         if after_if and after_if.startswith('{'):
-            body_text, body_lines = self._extract_block_body(lines, line_num, file_name)
-            if body_text:
+            body, body_lines = self._extract_block_body(lines, line_num, file_name)
+            if body:
                 true_body = ASTNode(type='true_body', line=line_num, column=first_line.find(')') + 2)
-                true_body_children = self._parse_statement_list(body_text, line_num + 1, file_name)
+                true_body_children = yield (self._parse_statement_list, body, line_num + 1, file_name)
                 for child in true_body_children:
                     true_body.children.append(child)
                 if_node.children.append(true_body)
@@ -422,7 +521,7 @@ class SimpleParser:
         else:
             if after_if:
                 true_body = ASTNode(type='true_body', line=line_num, column=first_line.find(')') + 2)
-                stmt_node, _ = self._parse_statement([after_if], line_num, file_name)
+                stmt_node, _ = yield (self._parse_statement, LineView([after_if]), line_num, file_name)
                 if stmt_node:
                     true_body.children.append(stmt_node)
                 if_node.children.append(true_body)
@@ -431,7 +530,7 @@ class SimpleParser:
                 if len(lines) > 1:
                     body_line = lines[1].strip()
                     true_body = ASTNode(type='true_body', line=line_num + 1, column=1)
-                    stmt_node, _ = self._parse_statement([body_line], line_num + 1, file_name)
+                    stmt_node, _ = yield (self._parse_statement, LineView([body_line]), line_num + 1, file_name)
                     if stmt_node:
                         true_body.children.append(stmt_node)
                     if_node.children.append(true_body)
@@ -458,13 +557,14 @@ class SimpleParser:
                 
                 if after_else and after_else.startswith('{'):
                     remaining_lines = lines[i:]
-                    else_body_text, else_lines = self._extract_block_body(
+                    else_body, else_lines = self._extract_block_body(
                         remaining_lines, else_line_num, file_name
                     )
                     
-                    if else_body_text:
+                    if else_body:
                         false_body = ASTNode(type='false_body', line=else_line_num, column=1)
-                        false_body_children = self._parse_statement_list(else_body_text, else_line_num + 1, file_name)
+                        false_body_children = yield (self._parse_statement_list, else_body,
+                                                     else_line_num + 1, file_name)
                         for child in false_body_children:
                             false_body.children.append(child)
                         if_node.children.append(false_body)
@@ -473,9 +573,8 @@ class SimpleParser:
                     
                 elif after_else and after_else.startswith('if'):
                     remaining_lines = lines[i:]
-                    else_if_node, else_if_lines = self._parse_if_statement(
-                        remaining_lines, else_line_num, file_name
-                    )
+                    else_if_node, else_if_lines = yield (self._parse_if_statement,
+                                                         remaining_lines, else_line_num, file_name)
                     if else_if_node:
                         false_body = ASTNode(type='false_body', line=else_line_num, column=1)
                         false_body.children.append(else_if_node)
@@ -485,7 +584,7 @@ class SimpleParser:
                     
                 elif after_else:
                     false_body = ASTNode(type='false_body', line=else_line_num, column=1)
-                    stmt_node, _ = self._parse_statement([after_else], else_line_num, file_name)
+                    stmt_node, _ = yield (self._parse_statement, LineView([after_else]), else_line_num, file_name)
                     if stmt_node:
                         false_body.children.append(stmt_node)
                     if_node.children.append(false_body)
@@ -495,7 +594,8 @@ class SimpleParser:
                     if i + 1 < len(lines):
                         else_body_line = lines[i + 1].strip()
                         false_body = ASTNode(type='false_body', line=else_line_num + 1, column=1)
-                        stmt_node, _ = self._parse_statement([else_body_line], else_line_num + 1, file_name)
+                        stmt_node, _ = yield (self._parse_statement, LineView([else_body_line]),
+                                              else_line_num + 1, file_name)
                         if stmt_node:
                             false_body.children.append(stmt_node)
                         if_node.children.append(false_body)
@@ -513,7 +613,7 @@ class SimpleParser:
         
         return if_node, lines_consumed
     def _parse_while_statement(self, lines: List[str], line_num: int, 
-                              file_name: str) -> Tuple[Optional[ASTNode], int]:
+                              file_name: str) -> Generator[tuple, List[ASTNode], Tuple[Optional[ASTNode], int]]:
         first_line = lines[0]
         
         pattern = r'while\s*\((.*?)\)'
@@ -540,70 +640,47 @@ class SimpleParser:
         ))
         while_node.children.append(cond_node)
         
-        body_text, lines_consumed = self._extract_block_body(lines, line_num, file_name)
-        if body_text:
+        body, lines_consumed = self._extract_block_body(lines, line_num, file_name)
+        if body:
             body_node = ASTNode(type='body', line=line_num, column=first_line.find(')') + 2)
-            body_statements = self._parse_statement_list(body_text, line_num + 1, file_name)
+            body_statements = yield (self._parse_statement_list, body, line_num + 1, file_name)
             body_node.children.extend(body_statements)
             while_node.children.append(body_node)
         
         return while_node, lines_consumed
     
-    def _extract_block_body(self, lines: List[str], line_num: int, 
-                           file_name: str) -> Tuple[Optional[str], int]:
+    def _extract_block_body(self, lines: LineView, line_num: int,
+                           file_name: str) -> Tuple[Optional[LineView], int]:
+        """Тело блока { ... } - срез тех же строк, без копирования текста: на каждом
+        уровне вложенности работа не зависит от размера вложенных блоков"""
         first_line = lines[0]
         
         open_brace_pos = first_line.find('{')
         if open_brace_pos == -1:
             if len(lines) > 1 and lines[1].strip().startswith('{'):
-                first_line = lines[1]
-                open_brace_pos = first_line.find('{')
+                open_brace_pos = lines[1].find('{')
                 start_line = 1
             else:
                 after_paren = first_line[first_line.find(')') + 1:].strip()
                 if after_paren:
-                    return after_paren, 1
+                    return LineView([after_paren]), 1
                 return None, 1
         else:
             start_line = 0
         
-        brace_count = 0
-        lines_consumed = start_line
-        body_lines = []
-        
-        for i in range(start_line, len(lines)):
-            current_line = lines[i]
-            if i == start_line:
-                line_part = current_line[open_brace_pos:]
-            else:
-                line_part = current_line
-            
-            for char in line_part:
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                
-                if brace_count == 0:
-                    body_text = '\n'.join(body_lines).strip()
-                    return body_text, lines_consumed + 1
-            
-            if i == start_line:
-                body_lines.append(current_line[open_brace_pos + 1:])
-            else:
-                body_lines.append(current_line)
-            
-            lines_consumed += 1
-        
-        self.errors.append(ParsingError(
-            file_name=file_name,
-            line=line_num,
-            column=1,
-            message="Незакрытый блок"
-        ))
-        return None, lines_consumed
+        end_line = lines.block_end(start_line, open_brace_pos)
+        if end_line is None:
+            self.errors.append(ParsingError(
+                file_name=file_name,
+                line=line_num,
+                column=1,
+                message="Незакрытый блок"
+            ))
+            return None, len(lines)
+        return lines.block_body(start_line, open_brace_pos, end_line), end_line + 1
+
     def _parse_do_while_statement(self, lines: List[str], line_num: int, 
-                                 file_name: str) -> Tuple[Optional[ASTNode], int]:
+                                 file_name: str) -> Generator[tuple, Tuple[Optional[ASTNode], int], Tuple[Optional[ASTNode], int]]:
         full_text_lines = []
         brace_count = 0
         in_do_block = False
@@ -718,7 +795,7 @@ class SimpleParser:
             )
             
             if '{' in full_text[do_pos:]:
-                body_lines = body_text.split('\n')
+                body_lines = LineView(body_text.split('\n'))
                 body_line_num = line_num + full_text[:body_start].count('\n')
                 
                 j = 0
@@ -730,29 +807,25 @@ class SimpleParser:
                         body_line_num += 1
                         continue
                     
-                    stmt_node, consumed = self._parse_statement(
-                        body_lines[j:], 
-                        body_line_num, 
-                        file_name
-                    )
+                    stmt_node, consumed = yield (self._parse_statement, body_lines[j:],
+                                                 body_line_num, file_name)
                     if stmt_node:
                         body_node.children.append(stmt_node)
                     
                     j += consumed
                     body_line_num += consumed
             else:
-                stmt_node, _ = self._parse_statement([body_text], line_num, file_name)
+                stmt_node, _ = yield (self._parse_statement, LineView([body_text]), line_num, file_name)
                 if stmt_node:
                     body_node.children.append(stmt_node)
             
             do_while_node.children.append(body_node)
         
         return do_while_node, lines_consumed
-    def _parse_statement_list(self, text: str, start_line: int, 
-                             file_name: str) -> List[ASTNode]:
+    def _parse_statement_list(self, lines: LineView, start_line: int,
+                             file_name: str) -> Generator[tuple, Tuple[Optional[ASTNode], int], List[ASTNode]]:
         statements = []
         
-        lines = text.split('\n')
         line_num = start_line
         
         i = 0
@@ -764,7 +837,7 @@ class SimpleParser:
                 line_num += 1
                 continue
             
-            stmt_node, lines_consumed = self._parse_statement(lines[i:], line_num, file_name)
+            stmt_node, lines_consumed = yield (self._parse_statement, lines[i:], line_num, file_name)
             if stmt_node:
                 statements.append(stmt_node)
             
@@ -874,7 +947,7 @@ class SimpleParser:
         return node
     
     def _parse_for_statement(self, lines: List[str], line_num: int, 
-                    file_name: str) -> Tuple[Optional[ASTNode], int]:
+                    file_name: str) -> Generator[tuple, List[ASTNode], Tuple[Optional[ASTNode], int]]:
         """Разбор оператора for"""
         full_text_lines = []
         brace_count = 0
@@ -1003,7 +1076,8 @@ class SimpleParser:
             
             if body_text:
                 body_node = ASTNode(type='body', line=line_num, column=full_text.find(body_text) + 1)
-                body_statements = self._parse_statement_list(body_text, line_num + 1, file_name)
+                body_statements = yield (self._parse_statement_list, LineView(body_text.split('\n')),
+                                         line_num + 1, file_name)
                 
                 for stmt in body_statements:
                     body_node.children.append(stmt)
@@ -0,0 +1,370 @@
+from typing import List, Dict, Optional, Set, Tuple
+from control_flow import FunctionInfo, BasicBlock, Operation, OperationType
+from dominators import DominatorTree, post_dominator_tree
+
+# Вероятности эвристик Ball-Larus (значения из Wu-Larus): вероятность того,
+# что будет выбрана ветвь, которую предсказывает эвристика
+LOOP_BRANCH = 0.88     # Остаться в цикле / перейти на заголовок цикла
+OPCODE = 0.84          # x < 0, x == c - маловероятно
+CALL = 0.78            # Ветвь с вызовом функции (обработка ошибок, вывод)
+LOOP_HEADER = 0.75     # Вход в цикл
+RETURN = 0.72          # Ранний возврат из функции
+GUARD = 0.62           # Ветвь использует переменную из условия
+STORE = 0.55           # Ветвь с присваиванием
+
+# Предел вероятности повтора цикла: частоты остаются конечными
+MAX_CYCLIC = 1.0 - 1.0 / 1024
+
+COMPARISONS = {OperationType.EQ, OperationType.NE, OperationType.LT,
+               OperationType.LE, OperationType.GT, OperationType.GE}
+# Сравнение с нулем, если ноль оказался слева
+MIRRORED = {OperationType.LT: OperationType.GT, OperationType.LE: OperationType.GE,
+            OperationType.GT: OperationType.LT, OperationType.GE: OperationType.LE}
+
+
+def combine(p: float, q: float) -> float:
+    """Объединение двух предсказаний по Демпстеру-Шеферу"""
+    taken = p * q
+    return taken / (taken + (1.0 - p) * (1.0 - q))
+
+
+class BranchProbabilityAnalysis:
+    """Статическая оценка вероятностей переходов и частот блоков без профиля.
+    Результат записывается в BasicBlock.true_probability и BasicBlock.frequency
+    (частота относительно одного вызова функции)"""
+
+    def __init__(self):
+        self.func: Optional[FunctionInfo] = None
+        self.blocks: List[BasicBlock] = []
+        self.successors: Dict[int, List[BasicBlock]] = {}
+        self.preds: Dict[int, List[int]] = {}
+        self.dom: Optional[DominatorTree] = None
+        self.pdom: Optional[DominatorTree] = None
+        # Лес вложенности циклов: тело, внешний цикл и блоки тела в обратном постпорядке
+        self.loops: Dict[int, Set[int]] = {}
+        self.loop_parent: Dict[int, Optional[int]] = {}
+        self.loop_blocks: Dict[int, List[BasicBlock]] = {}
+        self.innermost_loop: Dict[int, Optional[int]] = {}
+
+    def run_program(self, functions: List[FunctionInfo]):
+        for func in functions:
+            self.run(func)
+
+    def run(self, func: FunctionInfo):
+        self.func = func
+        self.blocks = self._reverse_postorder(func.cfg.entry_block)
+        self.successors = {block.id: self._successors(block) for block in self.blocks}
+        self.preds = {block.id: [] for block in self.blocks}
+        for block in self.blocks:
+            for successor in self.successors[block.id]:
+                self.preds[successor.id].append(block.id)
+        self.dom = DominatorTree([block.id for block in self.blocks], self.preds)
+        # -1 - виртуальный выход, в который ведут блоки без преемников
+        self.pdom = post_dominator_tree(
+            self.successors, {block_id: [s.id for s in successors]
+                              for block_id, successors in self.successors.items()}, -1)
+        self.loops = self._find_loops()
+        self._build_loop_forest()
+
+        for block in self.blocks:
+            block.true_probability = self._estimate(block) if self._is_branch(block) else 1.0
+        self._propagate_frequencies()
+
+    # ------------------------------------------------------------------
+    # Структура графа
+    # ------------------------------------------------------------------
+
+    def _is_branch(self, block: BasicBlock) -> bool:
+        return block.true_branch is not None and block.false_branch is not None and \
+               block.next_block is None
+
+    def _successors(self, block: BasicBlock) -> List[BasicBlock]:
+        """Фактические преемники: после return управление уходит на выход функции"""
+        if self._returns(block):
+            exit_block = self.func.cfg.exit_block
+            return [exit_block] if exit_block is not None and exit_block is not block else []
+        if self._is_branch(block):
+            return [block.true_branch, block.false_branch]
+        successor = block.next_block or block.true_branch or block.false_branch
+        return [successor] if successor else []
+
+    def _returns(self, block: BasicBlock) -> bool:
+        return any(op.type == OperationType.RETURN for op in block.operations)
+
+    def _reverse_postorder(self, entry: BasicBlock) -> List[BasicBlock]:
+        order = []
+        visited = {entry.id}
+        stack = [(entry, iter(self._successors(entry)))]
+        while stack:
+            block, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                order.append(block)
+                stack.pop()
+            elif successor.id not in visited:
+                visited.add(successor.id)
+                stack.append((successor, iter(self._successors(successor))))
+        order.reverse()
+        return order
+
+    def _find_loops(self) -> Dict[int, Set[int]]:
+        """Естественные циклы: заголовок -> блоки тела"""
+        loops: Dict[int, Set[int]] = {}
+        for block in self.blocks:
+            for successor in self.successors[block.id]:
+                if self.dom.dominates(successor.id, block.id):
+                    body = loops.setdefault(successor.id, {successor.id})
+                    stack = [block.id]
+                    while stack:
+                        node = stack.pop()
+                        if node in body:
+                            continue
+                        body.add(node)
+                        stack.extend(self.preds[node])
+        return loops
+
+    def _build_loop_forest(self):
+        """Внешний цикл каждого цикла, самый внутренний цикл каждого блока и
+        блоки каждого цикла. Естественные циклы вложены или не пересекаются, а
+        заголовок внешнего цикла доминирует заголовок внутреннего и раньше в
+        обратном постпорядке: при обходе заголовков по порядку внутренний цикл
+        перезаписывает внешний"""
+        self.innermost_loop = {block.id: None for block in self.blocks}
+        self.loop_parent = {}
+        for block in self.blocks:
+            if block.id in self.loops:
+                self.loop_parent[block.id] = self.innermost_loop[block.id]
+                for member in self.loops[block.id]:
+                    self.innermost_loop[member] = block.id
+        self.loop_blocks = {header: [] for header in self.loops}
+        for block in self.blocks:
+            loop = self.innermost_loop[block.id]
+            while loop is not None:
+                self.loop_blocks[loop].append(block)
+                loop = self.loop_parent[loop]
+
+    def _is_back_edge(self, source: BasicBlock, target: BasicBlock) -> bool:
+        return self.dom.dominates(target.id, source.id)
+
+    # ------------------------------------------------------------------
+    # Эвристики
+    # ------------------------------------------------------------------
+
+    def _estimate(self, block: BasicBlock) -> float:
+        """Вероятность перехода по true_branch"""
+        taken, fallthrough = block.true_branch, block.false_branch
+        if taken is fallthrough:
+            return 1.0
+
+        # Ветвление цикла оценивается только по эвристике цикла: иначе остальные
+        # эвристики доводят вероятность повтора почти до 1
+        prediction = self._loop_branch(block, taken, fallthrough)
+        if prediction is not None:
+            return prediction
+
+        probability = 0.5
+        for heuristic in (self._opcode, self._call, self._loop_header,
+                          self._return, self._guard, self._store):
+            prediction = heuristic(block, taken, fallthrough)
+            if prediction is not None:
+                probability = combine(probability, prediction)
+        return probability
+
+    def _predict(self, taken_matches: bool, fallthrough_matches: bool, probability: float) -> Optional[float]:
+        """Эвристика срабатывает, только если признак есть ровно у одной ветви"""
+        if taken_matches == fallthrough_matches:
+            return None
+        return probability if taken_matches else 1.0 - probability
+
+    def _loop_branch(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        prediction = self._predict(self._is_back_edge(block, taken),
+                                   self._is_back_edge(block, fallthrough), LOOP_BRANCH)
+        if prediction is not None:
+            return prediction
+        loop = self.innermost_loop.get(block.id)
+        if loop is None:
+            return None
+        body = self.loops[loop]
+        # Переход, покидающий цикл, маловероятен
+        return self._predict(taken.id in body, fallthrough.id in body, LOOP_BRANCH)
+
+    def _opcode(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        condition = block.operations[-1] if block.operations else None
+        if condition is None or condition.type not in COMPARISONS:
+            return None
+        if condition.type == OperationType.EQ:
+            return 1.0 - OPCODE
+        if condition.type == OperationType.NE:
+            return OPCODE
+
+        kind = condition.type
+        if self._is_zero(condition.left):
+            kind = MIRRORED[kind]
+        elif not self._is_zero(condition.right):
+            return None
+        # x < 0 и x <= 0 обычно ложны
+        return 1.0 - OPCODE if kind in (OperationType.LT, OperationType.LE) else OPCODE
+
+    def _is_zero(self, op: Optional[Operation]) -> bool:
+        return op is not None and op.type == OperationType.NOOP and op.value in ('0', '0.0')
+
+    def _call(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        return self._predict(self._has_call(block, fallthrough), self._has_call(block, taken), CALL)
+
+    def _has_call(self, block: BasicBlock, successor: BasicBlock) -> bool:
+        if self._post_dominates(successor, block):
+            return False
+        return any(self._contains(op, OperationType.CALL) for op in successor.operations)
+
+    def _loop_header(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        return self._predict(self._enters_loop(block, taken), self._enters_loop(block, fallthrough), LOOP_HEADER)
+
+    def _enters_loop(self, block: BasicBlock, successor: BasicBlock) -> bool:
+        if self._post_dominates(successor, block) or self._is_back_edge(block, successor):
+            return False
+        # Заголовок цикла или блок перед ним (инициализация for)
+        if successor.id in self.loops:
+            return True
+        following = self.successors.get(successor.id, [])
+        return len(following) == 1 and following[0].id in self.loops and \
+               not self._is_back_edge(successor, following[0])
+
+    def _return(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        return self._predict(self._leads_to_return(fallthrough), self._leads_to_return(taken), RETURN)
+
+    def _leads_to_return(self, successor: BasicBlock) -> bool:
+        exit_block = self.func.cfg.exit_block
+        return self._returns(successor) or successor is exit_block or \
+               any(s is exit_block for s in self.successors.get(successor.id, []))
+
+    def _guard(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        condition = block.operations[-1] if block.operations else None
+        if condition is None:
+            return None
+        names = self._variables(condition)
+        if not names:
+            return None
+        return self._predict(self._uses_before_def(block, taken, names),
+                             self._uses_before_def(block, fallthrough, names), GUARD)
+
+    def _uses_before_def(self, block: BasicBlock, successor: BasicBlock, names: Set[str]) -> bool:
+        if self._post_dominates(successor, block):
+            return False
+        for op in successor.operations:
+            if op.type == OperationType.ASSIGN:
+                if self._variables(op.right) & names:
+                    return True
+                if op.left is not None and op.left.value in names:
+                    return False
+            elif self._variables(op) & names:
+                return True
+        return False
+
+    def _store(self, block: BasicBlock, taken: BasicBlock, fallthrough: BasicBlock) -> Optional[float]:
+        return self._predict(self._has_store(block, fallthrough), self._has_store(block, taken), STORE)
+
+    def _has_store(self, block: BasicBlock, successor: BasicBlock) -> bool:
+        if self._post_dominates(successor, block):
+            return False
+        return any(op.type == OperationType.ASSIGN for op in successor.operations)
+
+    def _post_dominates(self, successor: BasicBlock, block: BasicBlock) -> bool:
+        # Из блока бесконечного цикла выход недостижим: его постдоминирует любой блок
+        return block.id not in self.pdom or self.pdom.dominates(successor.id, block.id)
+
+    def _contains(self, op: Optional[Operation], op_type: OperationType) -> bool:
+        stack = [op]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.type == op_type:
+                return True
+            stack.extend([node.left, node.right, *node.args])
+        return False
+
+    def _variables(self, op: Optional[Operation]) -> Set[str]:
+        names = set()
+        stack = [op]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.type == OperationType.NOOP and node.value and \
+                    (node.value[0].isalpha() or node.value[0] == '_'):
+                names.add(node.value)
+            stack.extend([node.left, node.right, *node.args])
+        return names
+
+    # ------------------------------------------------------------------
+    # Частоты блоков (Wu-Larus)
+    # ------------------------------------------------------------------
+
+    def _edge_probabilities(self, block: BasicBlock) -> List[Tuple[BasicBlock, float]]:
+        successors = self.successors[block.id]
+        if len(successors) == 2:
+            return [(successors[0], block.true_probability), (successors[1], 1.0 - block.true_probability)]
+        return [(successor, 1.0) for successor in successors]
+
+    def _propagate_frequencies(self):
+        self.frequency: Dict[int, float] = {}
+        self.edge_frequency: Dict[Tuple[int, int], float] = {}
+        self.back_edge_probability: Dict[Tuple[int, int], float] = {}
+
+        # Сначала внутренние циклы: вероятность повтора каждого цикла
+        for header in sorted(self.loops, key=lambda h: len(self.loops[h])):
+            self._propagate(header, self.loop_blocks[header], self.loops[header])
+        self._propagate(self.blocks[0].id, self.blocks, None)
+
+        for block in self.blocks:
+            block.frequency = self.frequency.get(block.id, 0.0)
+
+    def _propagate(self, head: int, blocks: List[BasicBlock], region: Optional[Set[int]]):
+        """Частоты блоков области (blocks в обратном постпорядке) относительно
+        одного входа в head"""
+        for block in blocks:
+            if block.id == head:
+                frequency = 1.0
+            else:
+                frequency = 0.0
+                cyclic = 0.0
+                for pred in self.preds[block.id]:
+                    if region is not None and pred not in region:
+                        continue
+                    if self.dom.dominates(block.id, pred):
+                        cyclic += self.back_edge_probability.get((pred, block.id), 0.0)
+                    else:
+                        frequency += self.edge_frequency.get((pred, block.id), 0.0)
+                frequency /= 1.0 - min(cyclic, MAX_CYCLIC)
+            self.frequency[block.id] = frequency
+
+            totals: Dict[int, float] = {}
+            for successor, probability in self._edge_probabilities(block):
+                totals[successor.id] = totals.get(successor.id, 0.0) + probability * frequency
+            for successor_id, edge_frequency in totals.items():
+                self.edge_frequency[(block.id, successor_id)] = edge_frequency
+                if successor_id == head:
+                    self.back_edge_probability[(block.id, head)] = edge_frequency
+
+
+def estimate_program(functions: List[FunctionInfo]):
+    """Оценивает вероятности переходов и частоты блоков всех функций"""
+    BranchProbabilityAnalysis().run_program(functions)
+
+
+def format_frequencies(functions: List[FunctionInfo]) -> str:
+    """Текстовый отчет по оценкам: частота блока и вероятность ветви true"""
+    lines = []
+    for func in functions:
+        lines.append(f'{func.name}:')
+        seen = set()
+        for block in func.cfg.blocks:
+            if block.id in seen:
+                continue
+            seen.add(block.id)
+            line = f'  block {block.id:>4}  freq {block.frequency:10.3f}'
+            if block.true_branch is not None and block.false_branch is not None and block.next_block is None:
+                line += f'  true {block.true_probability:.2f} -> {block.true_branch.id}, ' \
+                        f'false {1.0 - block.true_probability:.2f} -> {block.false_branch.id}'
+            lines.append(line)
+    return '\n'.join(lines)
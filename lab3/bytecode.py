@@ -0,0 +1,674 @@
+import marshal
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple, Any
+
+from control_flow import FunctionInfo, Operation, OperationType, BasicBlock
+from interpreter import InterpreterError, c_div, c_mod, INT_TYPES, FLOAT_TYPES
+from port.native_io import NativeIO
+from port.identifiers import clean_identifier
+
+# Формат файла: сигнатура, версия, затем marshal-данные программы
+BYTECODE_MAGIC = b'SMBC'
+BYTECODE_VERSION = 1
+
+# Каждая инструкция занимает 4 элемента: код операции и три операнда.
+# Операнды - номера регистров кадра, индексы пула констант или номера инструкций.
+OP_MOVE = 0      # r[a] = r[b]
+OP_ADD = 1       # r[a] = r[b] + r[c]
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_MOD = 5
+OP_EQ = 6        # r[a] = r[b] == r[c]
+OP_NE = 7
+OP_LT = 8
+OP_LE = 9
+OP_GT = 10
+OP_GE = 11
+OP_NOT = 12      # r[a] = not r[b]
+OP_NEG = 13      # r[a] = -r[b]
+OP_INC = 14      # r[a] += b (b - непосредственное значение)
+OP_JMP = 15      # pc = a
+OP_JF = 16       # if not r[a]: pc = b
+OP_JT = 17       # if r[a]: pc = b
+OP_JFEQ = 18     # if not (r[a] == r[b]): pc = c
+OP_JFNE = 19
+OP_JFLT = 20
+OP_JFLE = 21
+OP_JFGT = 22
+OP_JFGE = 23
+OP_CALL = 24     # r[a] = functions[b](r[c], r[c+1], ...)
+OP_CALLN = 25    # r[a] = встроенная функция consts[b] = (id, argc) от r[c]...
+OP_SCAN = 26     # r[a] = scanf(r[c]), цели чтения в consts[b]
+OP_RET = 27      # return r[a]
+OP_TOINT = 28    # r[a] = int(r[b])
+OP_TOFLOAT = 29  # r[a] = float(r[b])
+OP_TOCHAR = 30   # r[a] = int(r[b]) & 0xFF
+
+OPCODE_NAMES = {value: name[3:] for name, value in globals().items() if name.startswith('OP_')}
+
+BUILTIN_PRINTF = 0
+BUILTIN_STRLEN = 1
+
+# Преобразования значений, прочитанных scanf
+SCAN_INT = 0
+SCAN_FLOAT = 1
+SCAN_STRING = 2
+
+BINARY_OPCODES = {
+    OperationType.ADD: OP_ADD,
+    OperationType.SUB: OP_SUB,
+    OperationType.MUL: OP_MUL,
+    OperationType.DIV: OP_DIV,
+    OperationType.MOD: OP_MOD,
+    OperationType.EQ: OP_EQ,
+    OperationType.NE: OP_NE,
+    OperationType.LT: OP_LT,
+    OperationType.LE: OP_LE,
+    OperationType.GT: OP_GT,
+    OperationType.GE: OP_GE,
+}
+
+# Сравнение -> слитая инструкция "перейти, если ложно"
+BRANCH_OPCODES = {
+    OperationType.EQ: OP_JFEQ,
+    OperationType.NE: OP_JFNE,
+    OperationType.LT: OP_JFLT,
+    OperationType.LE: OP_JFLE,
+    OperationType.GT: OP_JFGT,
+    OperationType.GE: OP_JFGE,
+}
+
+
+class BytecodeError(Exception):
+    """Ошибка компиляции или загрузки байткода"""
+    pass
+
+
+@dataclass
+class FunctionCode:
+    """Описание функции в программе байткода"""
+    name: str
+    entry: int
+    register_count: int
+    param_count: int
+    template: int  # индекс начального кадра в пуле констант
+    return_type: str = 'int'
+
+
+@dataclass
+class BytecodeProgram:
+    """Скомпилированная программа: код, пул констант и таблица функций"""
+    code: array = field(default_factory=lambda: array('i'))
+    constants: List[Any] = field(default_factory=list)
+    functions: List[FunctionCode] = field(default_factory=list)
+
+    def find_function(self, name: str) -> Optional[int]:
+        for index, func in enumerate(self.functions):
+            if func.name == name:
+                return index
+        return None
+
+    def dumps(self) -> bytes:
+        """Сериализует программу в байты"""
+        functions = tuple((f.name, f.entry, f.register_count, f.param_count, f.template, f.return_type)
+                          for f in self.functions)
+        payload = marshal.dumps((self.code.itemsize, sys.byteorder, self.code.tobytes(),
+                                 tuple(self.constants), functions))
+        return BYTECODE_MAGIC + bytes([BYTECODE_VERSION]) + payload
+
+    @staticmethod
+    def loads(data: bytes) -> 'BytecodeProgram':
+        """Восстанавливает программу из байтов"""
+        if data[:4] != BYTECODE_MAGIC:
+            raise BytecodeError("Неверная сигнатура файла байткода")
+        if data[4] != BYTECODE_VERSION:
+            raise BytecodeError(f"Неподдерживаемая версия байткода: {data[4]}")
+        itemsize, byteorder, raw, constants, functions = marshal.loads(data[5:])
+        code = array('i')
+        if code.itemsize != itemsize:
+            raise BytecodeError("Размер элемента кода не совпадает с текущей платформой")
+        code.frombytes(raw)
+        if byteorder != sys.byteorder:
+            code.byteswap()
+        return BytecodeProgram(code, list(constants), [FunctionCode(*f) for f in functions])
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.dumps())
+
+    @staticmethod
+    def load(path: str) -> 'BytecodeProgram':
+        with open(path, 'rb') as f:
+            return BytecodeProgram.loads(f.read())
+
+    def disassemble(self) -> str:
+        """Текстовое представление кода для отладки"""
+        starts = {func.entry: func.name for func in self.functions}
+        lines = []
+        for pc in range(len(self.code) // 4):
+            if pc in starts:
+                lines.append(f'{starts[pc]}:')
+            op, a, b, c = self.code[pc * 4:pc * 4 + 4]
+            lines.append(f'  {pc:5d}  {OPCODE_NAMES.get(op, "?"):<8} {a:5d} {b:5d} {c:5d}')
+        return '\n'.join(lines)
+
+
+class BytecodeCompiler:
+    """Компилятор CFG в регистровый байткод"""
+
+    def __init__(self):
+        self.program = BytecodeProgram()
+        self.function_index: Dict[str, int] = {}
+        self.param_types: List[List[str]] = []
+        self.constant_index: Dict[Tuple[type, Any], int] = {}
+        # Состояние текущей функции
+        self.slots: Dict[str, int] = {}
+        self.slot_types: List[str] = []
+        self.template: List[Any] = []
+        self.const_registers: Dict[Tuple[type, Any], int] = {}
+        self.next_temp = 0
+        self.max_register = 0
+        self.return_type = 'int'
+        self.patches: List[Tuple[int, int, int]] = []
+
+    def compile(self, functions: List[FunctionInfo]) -> BytecodeProgram:
+        """Компилирует все функции программы"""
+        for index, func in enumerate(functions):
+            self.function_index[func.name] = index
+            self.param_types.append([param_type for _, param_type in func.parameters])
+            self.program.functions.append(FunctionCode(
+                name=func.name, entry=0, register_count=0,
+                param_count=len(func.parameters), template=0,
+                return_type=func.return_type or 'int'
+            ))
+
+        for index, func in enumerate(functions):
+            self._compile_function(func, self.program.functions[index])
+
+        return self.program
+
+    def _constant(self, value) -> int:
+        """Индекс значения в пуле констант"""
+        key = (type(value), value)
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.program.constants)
+            self.program.constants.append(value)
+        return self.constant_index[key]
+
+    def _emit(self, op: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+        pc = len(self.program.code) // 4
+        self.program.code.extend((op, a, b, c))
+        return pc
+
+    def _patch(self, pc: int, operand: int, value: int):
+        self.program.code[pc * 4 + operand] = value
+
+    _clean_var_name = staticmethod(clean_identifier)
+
+    def _add_slot(self, name: Optional[str], var_type: str, value) -> int:
+        register = len(self.template)
+        if name is not None:
+            self.slots[name] = register
+        self.slot_types.append(var_type)
+        self.template.append(value)
+        return register
+
+    def _default_value(self, var_type: str):
+        if var_type in FLOAT_TYPES:
+            return 0.0
+        if var_type == 'string':
+            return ''
+        return 0
+
+    def _compile_function(self, func: FunctionInfo, code: FunctionCode):
+        """Компилирует одну функцию; константы размещаются в регистрах начального кадра"""
+        self.slots = {}
+        self.slot_types = []
+        self.template = []
+        self.const_registers = {}
+        self.return_type = func.return_type or 'int'
+        self.patches = []
+
+        blocks = func.view.blocks
+
+        for param_name, param_type in func.parameters:
+            self._add_slot(self._clean_var_name(param_name), param_type, self._default_value(param_type))
+        if func.symbol_table:
+            for var_name, var_info in func.symbol_table.variables.items():
+                if var_name not in self.slots:
+                    self._add_slot(var_name, var_info.type, self._default_value(var_info.type))
+        for var_name, var_type in func.view.declarations:
+            if var_name not in self.slots:
+                self._add_slot(var_name, var_type, self._default_value(var_type))
+
+        # Литералы заранее собираются, чтобы временные регистры шли после них
+        for block in blocks:
+            for op in block.operations:
+                self._collect_literals(op)
+
+        self.next_temp = len(self.template)
+        self.max_register = self.next_temp
+        code.entry = len(self.program.code) // 4
+
+        block_pc: Dict[int, int] = {}
+        for index, block in enumerate(blocks):
+            following = blocks[index + 1] if index + 1 < len(blocks) else None
+            block_pc[block.id] = len(self.program.code) // 4
+            self._compile_block(block, following)
+
+        for pc, operand, block_id in self.patches:
+            self._patch(pc, operand, block_pc[block_id])
+
+        self.template.extend([0] * (self.max_register - len(self.template)))
+        code.register_count = len(self.template)
+        code.template = self._constant(tuple(self.template))
+
+    def _collect_literals(self, op: Optional[Operation]):
+        if op is None:
+            return
+        if op.type == OperationType.NOOP and op.value and not op.attributes.get('is_pointer'):
+            literal = self._parse_literal(op.value)
+            if literal is not None:
+                self._const_register(*literal)
+        self._collect_literals(op.left)
+        self._collect_literals(op.right)
+        for arg in op.args:
+            self._collect_literals(arg)
+
+    def _parse_literal(self, value: str) -> Optional[Tuple[Any, str]]:
+        if value in ('true', 'false'):
+            return (1 if value == 'true' else 0), 'bool'
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return value[1:-1], 'string'
+        if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+            content = value[1:-1]
+            if len(content) == 1:
+                return ord(content), 'char'
+            return content, 'string'
+        if value.lstrip('-').isdigit():
+            return int(value), 'int'
+        try:
+            return float(value), 'double'
+        except ValueError:
+            return None
+
+    def _const_register(self, value, value_type: str) -> int:
+        key = (type(value), value)
+        if key not in self.const_registers:
+            self.const_registers[key] = self._add_slot(None, value_type, value)
+        return self.const_registers[key]
+
+    def _temp(self) -> int:
+        register = self.next_temp
+        self.next_temp += 1
+        self.max_register = max(self.max_register, self.next_temp)
+        return register
+
+    def _jump(self, op: int, a: int, b: int, c: int, operand: int, block: BasicBlock):
+        pc = self._emit(op, a, b, c)
+        self.patches.append((pc, operand, block.id))
+
+    def _compile_block(self, block: BasicBlock, following: Optional[BasicBlock]):
+        operations = block.operations
+        is_branch = block.true_branch is not None and block.false_branch is not None and \
+                    block.next_block is None
+        condition = None
+        if is_branch and operations:
+            condition = operations[-1]
+            operations = operations[:-1]
+
+        for op in operations:
+            self.next_temp = len(self.template)
+            if op.type == OperationType.RETURN:
+                self._compile_return(op)
+                return
+            self._compile_statement(op)
+
+        self.next_temp = len(self.template)
+
+        def goto(target: BasicBlock):
+            if following is None or target.id != following.id:
+                self._jump(OP_JMP, 0, 0, 0, 1, target)
+
+        if is_branch:
+            if condition is None:
+                goto(block.true_branch)
+            elif condition.type in BRANCH_OPCODES and condition.left and condition.right:
+                left, _ = self._expr(condition.left)
+                right, _ = self._expr(condition.right)
+                self._jump(BRANCH_OPCODES[condition.type], left, right, 0, 3, block.false_branch)
+                goto(block.true_branch)
+            else:
+                value, _ = self._expr(condition)
+                self._jump(OP_JF, value, 0, 0, 2, block.false_branch)
+                goto(block.true_branch)
+        else:
+            successor = block.next_block or block.true_branch or block.false_branch
+            if successor:
+                goto(successor)
+            else:
+                # Выход из функции без явного return
+                self._emit(OP_RET, self._const_register(0, 'int'))
+
+    def _compile_return(self, op: Operation):
+        if op.left:
+            value, value_type = self._expr(op.left)
+            value = self._coerce(value, value_type, self.return_type)
+        else:
+            value = self._const_register(0, 'int')
+        self._emit(OP_RET, value)
+
+    def _compile_statement(self, op: Operation):
+        if op.type in (OperationType.BREAK, OperationType.CONTINUE, OperationType.NOOP):
+            # Переходы break/continue не отражены в CFG
+            return
+        if op.type == OperationType.DECLARE and not op.left:
+            return
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            slot = self._slot(self._clean_var_name(op.value))
+            self._emit(OP_INC, slot, 1 if op.type == OperationType.INCREMENT else -1)
+            return
+        self._expr(op)
+
+    def _slot(self, var_name: str) -> int:
+        if var_name not in self.slots:
+            raise BytecodeError(f"Неизвестная переменная '{var_name}'")
+        return self.slots[var_name]
+
+    def _coerce(self, register: int, source: str, target: Optional[str], dst: Optional[int] = None) -> int:
+        """Неявное приведение int <-> double"""
+        if target in FLOAT_TYPES and source in INT_TYPES:
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_TOFLOAT, out, register)
+            return out
+        if target in INT_TYPES and source in FLOAT_TYPES:
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_TOINT, out, register)
+            return out
+        if dst is not None and dst != register:
+            self._emit(OP_MOVE, dst, register)
+            return dst
+        return register
+
+    def _expr(self, op: Operation, dst: Optional[int] = None) -> Tuple[int, str]:
+        """Компилирует выражение; возвращает (регистр результата, тип)"""
+        if op.type == OperationType.NOOP:
+            literal = self._parse_literal(op.value or '0')
+            if literal is not None:
+                register, value_type = self._const_register(*literal), literal[1]
+            else:
+                register = self._slot(self._clean_var_name(op.value))
+                value_type = self.slot_types[register]
+            if dst is not None and dst != register:
+                self._emit(OP_MOVE, dst, register)
+                return dst, value_type
+            return register, value_type
+
+        if op.type in BINARY_OPCODES and op.left and op.right:
+            left, left_type = self._expr(op.left)
+            right, right_type = self._expr(op.right)
+            out = dst if dst is not None else self._temp()
+            self._emit(BINARY_OPCODES[op.type], out, left, right)
+            if op.type in BRANCH_OPCODES:
+                return out, 'bool'
+            if left_type in FLOAT_TYPES or right_type in FLOAT_TYPES:
+                return out, 'double'
+            return out, 'int'
+
+        if op.type in (OperationType.AND, OperationType.OR) and op.left and op.right:
+            # Короткое вычисление через переходы
+            out = dst if dst is not None else self._temp()
+            jump = OP_JF if op.type == OperationType.AND else OP_JT
+            short = self._const_register(0 if op.type == OperationType.AND else 1, 'bool')
+            full = self._const_register(1 if op.type == OperationType.AND else 0, 'bool')
+            left, _ = self._expr(op.left)
+            first = self._emit(jump, left)
+            right, _ = self._expr(op.right)
+            second = self._emit(jump, right)
+            self._emit(OP_MOVE, out, full)
+            done = self._emit(OP_JMP)
+            short_pc = len(self.program.code) // 4
+            self._emit(OP_MOVE, out, short)
+            self._patch(first, 2, short_pc)
+            self._patch(second, 2, short_pc)
+            self._patch(done, 1, len(self.program.code) // 4)
+            return out, 'bool'
+
+        if op.type == OperationType.NOT and op.left:
+            value, _ = self._expr(op.left)
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_NOT, out, value)
+            return out, 'bool'
+
+        if op.type == OperationType.NEGATE and op.left:
+            value, value_type = self._expr(op.left)
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_NEG, out, value)
+            return out, value_type
+
+        if op.type == OperationType.CAST and op.left:
+            value, _ = self._expr(op.left)
+            target = op.result_type or 'int'
+            out = dst if dst is not None else self._temp()
+            if target == 'char':
+                self._emit(OP_TOCHAR, out, value)
+            elif target in INT_TYPES:
+                self._emit(OP_TOINT, out, value)
+            elif target in FLOAT_TYPES:
+                self._emit(OP_TOFLOAT, out, value)
+            else:
+                self._emit(OP_MOVE, out, value)
+            return out, target
+
+        if op.type == OperationType.CALL:
+            return self._compile_call(op, dst)
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            slot = self._slot(self._clean_var_name(op.value))
+            step = 1 if op.type == OperationType.INCREMENT else -1
+            if op.attributes.get('prefix'):
+                self._emit(OP_INC, slot, step)
+                return self._coerce(slot, self.slot_types[slot], None, dst), self.slot_types[slot]
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_MOVE, out, slot)
+            self._emit(OP_INC, slot, step)
+            return out, self.slot_types[slot]
+
+        if op.type == OperationType.ASSIGN and op.left and op.right:
+            return self._compile_store(self._clean_var_name(op.left.value), op.right)
+
+        if op.type == OperationType.DECLARE and op.left:
+            return self._compile_store(self._clean_var_name(op.value), op.left)
+
+        raise BytecodeError(f"Операция '{op.type.value}' не поддерживается байткодом")
+
+    def _compile_store(self, var_name: str, value_op: Operation) -> Tuple[int, str]:
+        slot = self._slot(var_name)
+        var_type = self.slot_types[slot]
+        value, value_type = self._expr(value_op, dst=slot)
+        return self._coerce(value, value_type, var_type, slot), var_type
+
+    def _compile_call(self, op: Operation, dst: Optional[int]) -> Tuple[int, str]:
+        """Аргументы размещаются в подряд идущих временных регистрах"""
+        name = op.value
+
+        if name == 'scanf':
+            if not op.args:
+                return self._const_register(0, 'int'), 'int'
+            fmt, _ = self._expr(op.args[0])
+            targets = []
+            for arg in op.args[1:]:
+                slot = self._slot(self._clean_var_name(arg.value))
+                slot_type = self.slot_types[slot]
+                if slot_type in FLOAT_TYPES:
+                    convert = SCAN_FLOAT
+                elif slot_type == 'string':
+                    convert = SCAN_STRING
+                else:
+                    convert = SCAN_INT
+                targets.extend((slot, convert))
+            out = dst if dst is not None else self._temp()
+            self._emit(OP_SCAN, out, self._constant(tuple(targets)), fmt)
+            return out, 'int'
+
+        callee = self.function_index.get(name)
+        if callee is None and name not in ('printf', 'strlen'):
+            raise BytecodeError(f"Функция '{name}' не поддерживается байткодом")
+
+        base = self.next_temp
+        for _ in op.args:
+            self._temp()
+        for index, arg in enumerate(op.args):
+            saved = self.next_temp
+            value, value_type = self._expr(arg, dst=base + index)
+            target = None
+            if callee is not None and index < len(self.param_types[callee]):
+                target = self.param_types[callee][index]
+            self._coerce(value, value_type, target, base + index)
+            self.next_temp = saved
+
+        out = dst if dst is not None else self._temp()
+        if callee is not None:
+            self._emit(OP_CALL, out, callee, base)
+            return out, self.program.functions[callee].return_type
+
+        builtin = BUILTIN_PRINTF if name == 'printf' else BUILTIN_STRLEN
+        self._emit(OP_CALLN, out, self._constant((builtin, len(op.args))), base)
+        return out, 'int'
+
+
+class BytecodeVM:
+    """Виртуальная машина для регистрового байткода"""
+
+    def __init__(self, program: BytecodeProgram, io: Optional[NativeIO] = None):
+        self.program = program
+        self.io = io or NativeIO()
+        # Код раскладывается в список кортежей, чтобы разбор инструкции был одной операцией
+        code = program.code
+        self.instructions = [tuple(code[i:i + 4]) for i in range(0, len(code), 4)]
+
+    def run(self, entry: str = 'main', args: Optional[list] = None) -> int:
+        """Запускает программу и возвращает код завершения"""
+        index = self.program.find_function(entry)
+        if index is None:
+            raise InterpreterError(f"Функция '{entry}' не найдена")
+        try:
+            result = self.call(index, list(args or []))
+        finally:
+            self.io.flush()
+        return int(result) if isinstance(result, (int, float)) else 0
+
+    def call(self, func_index: int, args: list):
+        """Основной цикл выполнения; вызовы обрабатываются без рекурсии Python"""
+        instructions = self.instructions
+        constants = self.program.constants
+        functions = [(f.entry, constants[f.template], f.param_count) for f in self.program.functions]
+        io = self.io
+
+        entry, template, _ = functions[func_index]
+        regs = list(template)
+        regs[:len(args)] = args
+        pc = entry
+        frames = []
+
+        while True:
+            op, a, b, c = instructions[pc]
+            pc += 1
+            if op == OP_MOVE:
+                regs[a] = regs[b]
+            elif op == OP_ADD:
+                regs[a] = regs[b] + regs[c]
+            elif op == OP_SUB:
+                regs[a] = regs[b] - regs[c]
+            elif op == OP_JFEQ:
+                if regs[a] != regs[b]:
+                    pc = c
+            elif op == OP_JFLT:
+                if regs[a] >= regs[b]:
+                    pc = c
+            elif op == OP_JMP:
+                pc = a
+            elif op == OP_CALL:
+                frames.append((regs, pc, a))
+                entry, template, count = functions[b]
+                new_regs = list(template)
+                new_regs[:count] = regs[c:c + count]
+                regs = new_regs
+                pc = entry
+            elif op == OP_RET:
+                value = regs[a]
+                if not frames:
+                    return value
+                regs, pc, dst = frames.pop()
+                regs[dst] = value
+            elif op == OP_INC:
+                regs[a] += b
+            elif op == OP_MUL:
+                regs[a] = regs[b] * regs[c]
+            elif op == OP_JFNE:
+                if regs[a] == regs[b]:
+                    pc = c
+            elif op == OP_JFLE:
+                if regs[a] > regs[b]:
+                    pc = c
+            elif op == OP_JFGT:
+                if regs[a] <= regs[b]:
+                    pc = c
+            elif op == OP_JFGE:
+                if regs[a] < regs[b]:
+                    pc = c
+            elif op == OP_JF:
+                if not regs[a]:
+                    pc = b
+            elif op == OP_JT:
+                if regs[a]:
+                    pc = b
+            elif op == OP_DIV:
+                regs[a] = c_div(regs[b], regs[c])
+            elif op == OP_MOD:
+                regs[a] = c_mod(regs[b], regs[c])
+            elif op == OP_EQ:
+                regs[a] = 1 if regs[b] == regs[c] else 0
+            elif op == OP_NE:
+                regs[a] = 1 if regs[b] != regs[c] else 0
+            elif op == OP_LT:
+                regs[a] = 1 if regs[b] < regs[c] else 0
+            elif op == OP_LE:
+                regs[a] = 1 if regs[b] <= regs[c] else 0
+            elif op == OP_GT:
+                regs[a] = 1 if regs[b] > regs[c] else 0
+            elif op == OP_GE:
+                regs[a] = 1 if regs[b] >= regs[c] else 0
+            elif op == OP_NOT:
+                regs[a] = 0 if regs[b] else 1
+            elif op == OP_NEG:
+                regs[a] = -regs[b]
+            elif op == OP_CALLN:
+                builtin, count = constants[b]
+                if builtin == BUILTIN_PRINTF:
+                    regs[a] = io.printf(regs[c], regs[c + 1:c + count])
+                else:
+                    regs[a] = len(regs[c].encode('utf-8'))
+            elif op == OP_SCAN:
+                targets = constants[b]
+                values = io.scanf(regs[c])
+                for i, value in enumerate(values[:len(targets) // 2]):
+                    slot, convert = targets[2 * i], targets[2 * i + 1]
+                    if convert == SCAN_INT:
+                        regs[slot] = ord(value[0]) if isinstance(value, str) else int(value)
+                    elif convert == SCAN_FLOAT:
+                        regs[slot] = float(ord(value[0])) if isinstance(value, str) else float(value)
+                    else:
+                        regs[slot] = str(value)
+                regs[a] = -1 if not values and io.eof else len(values)
+            elif op == OP_TOINT:
+                regs[a] = int(regs[b])
+            elif op == OP_TOFLOAT:
+                regs[a] = float(regs[b])
+            elif op == OP_TOCHAR:
+                regs[a] = int(regs[b]) & 0xFF
+            else:
+                raise InterpreterError(f"Неизвестная инструкция {op} по адресу {pc - 1}")
@@ -0,0 +1,213 @@
+import io
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, IO
+
+from ast_parser import SimpleParser
+from control_flow import ASTNode, ControlFlowBuilder, FunctionInfo, ParsingError
+from incremental import IncrementalCompiler
+from branch_probability import estimate_program
+from generators.win_x86_gen import WinX86AsmGenerator
+from generators.linux_x86_gen import LinuxX86AsmGenerator
+from generators.linux_runtime import supports_program
+from generators.riscv_gen import RiscV64AsmGenerator
+from generators.riscv_encoder import CodeSizeReport
+from generators.c_gen import CSourceGenerator
+from generators.llvm_gen import LlvmIrGenerator
+from generators.python_gen import PythonSourceGenerator
+
+DEFAULT_FILE_NAME = '<source>'
+
+# Расширение выходного файла для каждого генератора
+OUTPUT_SUFFIXES = {
+    'linux': '.asm',
+    'win': '.asm',
+    'riscv': '.s',
+    'c': '.c',
+    'llvm': '.ll',
+    'python': '.py',
+}
+TARGETS = tuple(OUTPUT_SUFFIXES)
+# Генераторы со встроенным ассемблером
+OBJECT_TARGETS = ('linux', 'riscv')
+# Генераторы, которые пишут текст по функциям (write_program)
+STREAMING_TARGETS = ('linux', 'win', 'riscv')
+
+# Уровни оптимизации:
+# 0 - прямая трансляция;
+# 1 - статическая оценка вероятностей переходов и частот блоков (BasicBlock.frequency);
+# 2 - плюс для linux быстрый runtime: константные форматы printf/scanf
+#     разбираются на этапе компиляции (если runtime не задан явно и runtime
+#     поддерживает все форматы и вызовы программы; иначе остается libc)
+OPT_LEVELS = (0, 1, 2)
+
+
+@dataclass
+class CompileOptions:
+    target: Optional[str] = 'linux'  # None - только разбор и построение CFG
+    opt_level: int = 0
+    emit_object: bool = False
+    runtime: Optional[str] = None  # None - выбирается по уровню оптимизации
+    profile: bool = False
+    freestanding: bool = False
+    opaque_pointers: bool = False
+    hash_consing: bool = False
+    jobs: int = 1  # Процессов генерации кода (0 - по числу ядер)
+
+    def __post_init__(self):
+        if self.target is not None and self.target not in TARGETS:
+            raise ValueError(f'неизвестный генератор "{self.target}"')
+        if self.opt_level not in OPT_LEVELS:
+            raise ValueError(f'неверный уровень оптимизации {self.opt_level}')
+        if self.jobs < 0:
+            raise ValueError(f'неверное число процессов {self.jobs}')
+
+    def resolved_runtime(self, functions: Optional[List[FunctionInfo]] = None) -> str:
+        """Runtime генератора linux. По уровню оптимизации быстрый runtime
+        выбирается, только если он поддерживает все форматы и вызовы программы functions"""
+        if self.runtime is not None:
+            return self.runtime
+        if self.freestanding:
+            return 'fast'
+        if self.opt_level >= 2 and self.target == 'linux' and \
+                (functions is None or supports_program(functions)):
+            return 'fast'
+        return 'libc'
+
+
+@dataclass
+class CompileResult:
+    """Результат компиляции в памяти: AST, функции, код и диагностика.
+    output - текст программы (None, если он записан в приемник или кода нет),
+    object - объектный файл ELF, timings - секунды по этапам"""
+    file_name: str
+    options: CompileOptions
+    ast: Optional[ASTNode] = None
+    functions: List[FunctionInfo] = field(default_factory=list)
+    parser: Optional[SimpleParser] = None
+    builder: Optional[ControlFlowBuilder] = None
+    output: Optional[str] = None
+    object: Optional[bytes] = None
+    code_size: Optional[CodeSizeReport] = None
+    diagnostics: List[ParsingError] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    reused: int = 0  # Функции из кэша инкрементальной сборки
+    rebuilt: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not any(error.severity == 'error' for error in self.diagnostics)
+
+    @property
+    def call_graph(self) -> Dict[str, List[str]]:
+        return self.builder.call_graph if self.builder else {}
+
+
+def create_generator(target: str, profile: bool = False, runtime: str = 'libc',
+                     freestanding: bool = False, opaque_pointers: bool = False, jobs: int = 1):
+    if target == 'linux':
+        return LinuxX86AsmGenerator(profile, runtime=runtime, freestanding=freestanding, jobs=jobs)
+    if target == 'win':
+        return WinX86AsmGenerator(profile, jobs=jobs)
+    if target == 'riscv':
+        return RiscV64AsmGenerator(profile, jobs=jobs)
+    if target == 'c':
+        return CSourceGenerator()
+    if target == 'llvm':
+        return LlvmIrGenerator(opaque_pointers)
+    if target == 'python':
+        return PythonSourceGenerator()
+    raise ValueError(f'неизвестный генератор "{target}"')
+
+
+def compile_source(source_code: str, target: Optional[str] = 'linux', opt_level: int = 0,
+                   file_name: str = DEFAULT_FILE_NAME,
+                   incremental: Optional[IncrementalCompiler] = None,
+                   generators: Optional[Dict[tuple, Any]] = None,
+                   **options) -> CompileResult:
+    """Компиляция текста программы в памяти, без файлов и вывода в консоль.
+    Ошибки исходника и генерации возвращаются в diagnostics; исключение -
+    только для неверных параметров (генератор, уровень оптимизации).
+    generators - кэш экземпляров генераторов между вызовами (см. generate_code).
+    options - остальные поля CompileOptions (emit_object, runtime, profile, ...)"""
+    result = analyze_source(source_code, CompileOptions(target, opt_level, **options),
+                            file_name, incremental)
+    if result.options.target is not None:
+        generate_code(result, generators=generators)
+    return result
+
+
+def analyze_source(source_code: str, options: CompileOptions, file_name: str = DEFAULT_FILE_NAME,
+                   incremental: Optional[IncrementalCompiler] = None) -> CompileResult:
+    """Разбор, построение CFG и анализы уровня оптимизации"""
+    result = CompileResult(file_name, options)
+    start = time.perf_counter()
+    if incremental is not None:
+        if options.hash_consing:
+            raise ValueError('инкрементальная сборка несовместима с hash-consing')
+        built = incremental.compile(file_name, source_code)
+        result.parser, result.builder, result.ast = built.parser, built.builder, built.ast
+        result.functions = built.functions
+        result.reused, result.rebuilt = built.reused, built.rebuilt
+    else:
+        result.parser = SimpleParser()
+        result.ast = result.parser.parse_file(file_name, source_code)
+        result.builder = ControlFlowBuilder(options.hash_consing)
+        result.functions = result.builder.build_from_ast(file_name, result.ast)
+    result.timings['frontend'] = time.perf_counter() - start
+    result.diagnostics = result.parser.errors + result.builder.errors
+
+    if result.ok and result.functions and options.opt_level >= 1:
+        start = time.perf_counter()
+        estimate_program(result.functions)
+        result.timings['analysis'] = time.perf_counter() - start
+    return result
+
+
+def generate_code(result: CompileResult, sink: Optional[IO] = None,
+                  generators: Optional[Dict[tuple, Any]] = None) -> CompileResult:
+    """Генерация кода для результата analyze_source. С приемником sink текст
+    ассемблера пишется в него по функциям и не остается в result.output.
+    generators - словарь уже созданных генераторов по параметрам create_generator:
+    генератор создается один раз и используется следующими компиляциями"""
+    options = result.options
+    if not result.ok or not result.functions or options.target is None:
+        return result
+    start = time.perf_counter()
+    try:
+        key = (options.target, options.profile, options.resolved_runtime(result.functions),
+               options.freestanding, options.opaque_pointers, options.jobs)
+        generator = generators.get(key) if generators is not None else None
+        if generator is None:
+            generator = create_generator(*key)
+            if generators is not None:
+                generators[key] = generator
+        if options.target in STREAMING_TARGETS:
+            buffer = io.StringIO() if sink is None else sink
+            if options.emit_object and options.target in OBJECT_TARGETS:
+                # Один проход генерации: фрагменты идут и в текст, и во встроенный ассемблер
+                result.object = generator.generate_object(result.functions, os.path.basename(result.file_name),
+                                                          sink=buffer)
+                if options.target == 'riscv':
+                    result.code_size = generator.code_size_report
+            else:
+                generator.write_program(result.functions, buffer)
+            if sink is None:
+                result.output = buffer.getvalue()
+        else:
+            text = generator.generate_program(result.functions)
+            if sink is None:
+                result.output = text
+            else:
+                sink.write(text)
+        result.timings['codegen'] = time.perf_counter() - start
+    except Exception as e:
+        # Неподдерживаемый формат для fast runtime, нет main при freestanding и т.п.
+        result.diagnostics.append(ParsingError(
+            file_name=result.file_name,
+            line=0,
+            column=0,
+            message=f"Ошибка генерации кода: {e}"
+        ))
+    return result
@@ -1,5 +1,9 @@
+import copy
+import threading
+from operator import attrgetter
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any, Tuple, Set
+from typing import List, Dict, Optional, Any, Tuple, Set, Generator, Sequence, Mapping, Iterator
+from collections import abc
 from enum import Enum
 from port.builtin_functions import BuiltinFunctions
 from port.type_system import TypeSystem
@@ -37,20 +41,104 @@ class OperationType(Enum):
     ARRAY_ACCESS = "array_access"
     MEMBER_ACCESS = "member_access"
 
-@dataclass
+class _EmptyAttributes(abc.Mapping):
+    """Общий пустой словарь атрибутов только для чтения: у большинства узлов и
+    операций атрибутов нет, и отдельный dict на каждый экземпляр не создается"""
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __repr__(self) -> str:
+        return '{}'
+
+    def __reduce__(self) -> str:
+        # pickle восстанавливает тот же единственный экземпляр
+        return 'EMPTY_ATTRIBUTES'
+
+
+EMPTY_ATTRIBUTES: Mapping[str, Any] = _EmptyAttributes()
+# Аргументы операции без вызова: общий пустой кортеж вместо нового списка
+EMPTY_ARGS: Tuple['Operation', ...] = ()
+
+
+def _empty_attributes() -> Mapping[str, Any]:
+    return EMPTY_ATTRIBUTES
+
+
+@dataclass(slots=True)
 class Operation:
     type: OperationType
     value: Optional[str] = None
     left: Optional['Operation'] = None
     right: Optional['Operation'] = None
-    args: List['Operation'] = field(default_factory=list)
+    args: Sequence['Operation'] = EMPTY_ARGS
     line: int = 0
     column: int = 0
     var_type: Optional[str] = None  # Тип переменной/операции
     result_type: Optional[str] = None  # Тип результата операции
-    attributes: Dict[str, Any] = field(default_factory=dict)  # Добавить эту строку
+    attributes: Mapping[str, Any] = field(default_factory=_empty_attributes)
+    # Номер узла в DAG выражений (OperationFactory с hash_consing), -1 - отдельный объект
+    node_id: int = field(default=-1, compare=False, repr=False)
 
-@dataclass
+# Операции без побочных эффектов: одинаковые по структуре узлы можно разделять
+PURE_OPERATIONS = frozenset({
+    OperationType.NOOP,
+    OperationType.ADD, OperationType.SUB, OperationType.MUL, OperationType.DIV, OperationType.MOD,
+    OperationType.EQ, OperationType.NE, OperationType.LT, OperationType.LE, OperationType.GT, OperationType.GE,
+    OperationType.AND, OperationType.OR, OperationType.NOT, OperationType.NEGATE,
+})
+
+class OperationFactory:
+    """Создание операций выражений.
+    С hash_consing=True чистые узлы с одинаковой структурой (тип, значение, типы,
+    операнды) - один объект: литералы и чтения переменных становятся общими,
+    выражения - DAG, а node_id служит ключом мемоизации для CSE, свертки констант
+    и вывода типов. Вызовы, инкременты и узлы над ними всегда создаются заново.
+    Позиция (line, column) общего узла - от первого вхождения"""
+
+    def __init__(self, hash_consing: bool = False):
+        self.hash_consing = hash_consing
+        self.nodes: Dict[tuple, Operation] = {}
+        self.reused = 0  # Сколько раз вместо нового узла вернулся существующий
+
+    def create(self, type: OperationType, value: Optional[str] = None,
+               left: Optional[Operation] = None, right: Optional[Operation] = None,
+               args: Sequence[Operation] = EMPTY_ARGS, line: int = 0, column: int = 0,
+               var_type: Optional[str] = None, result_type: Optional[str] = None,
+               attributes: Optional[Mapping[str, Any]] = None) -> Operation:
+        if attributes is None:
+            attributes = EMPTY_ATTRIBUTES
+        if not self.hash_consing or type not in PURE_OPERATIONS or args or attributes:
+            return Operation(type, value, left, right, args, line, column, var_type, result_type, attributes)
+        left_id = -1
+        if left is not None:
+            left_id = left.node_id
+            if left_id < 0:
+                return Operation(type, value, left, right, args, line, column, var_type, result_type)
+        right_id = -1
+        if right is not None:
+            right_id = right.node_id
+            if right_id < 0:
+                return Operation(type, value, left, right, args, line, column, var_type, result_type)
+
+        key = (type, value, left_id, right_id, var_type, result_type)
+        op = self.nodes.get(key)
+        if op is not None:
+            self.reused += 1
+            return op
+        op = Operation(type, value, left, right, args, line, column, var_type, result_type,
+                       node_id=len(self.nodes))
+        self.nodes[key] = op
+        return op
+
+@dataclass(slots=True)
 class BasicBlock:
     id: int
     operations: List[Operation] = field(default_factory=list)
@@ -59,6 +147,9 @@ class BasicBlock:
     next_block: Optional['BasicBlock'] = None
     is_loop_start: bool = False
     is_loop_end: bool = False
+    exec_count: int = 0  # Число выполнений блока по загруженному профилю
+    true_probability: float = 0.5  # Оценка вероятности перехода по true_branch
+    frequency: float = 0.0  # Оценка частоты выполнения на один вызов функции
 
 @dataclass
 class ControlFlowGraph:
@@ -69,7 +160,7 @@ class ControlFlowGraph:
     def add_block(self, block: BasicBlock):
         self.blocks.append(block)
 
-@dataclass
+@dataclass(slots=True)
 class VariableInfo:
     """Информация о переменной"""
     name: str
@@ -88,6 +179,15 @@ class SymbolTable:
     variables: Dict[str, VariableInfo] = field(default_factory=dict)
     parent: Optional['SymbolTable'] = None
     scope_name: str = ""
+    level: int = field(default=0, init=False)
+    # Результаты поиска в родительских областях. Объявления добавляются только в
+    # текущую (самую глубокую) область, поэтому, пока область открыта, найденное
+    # в предках не меняется; при выходе из области кэш очищается
+    resolved: Dict[str, Optional[VariableInfo]] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.parent is not None:
+            self.level = self.parent.level + 1
     
     def add_variable(self, name: str, var_type: str, line: int, 
                     is_param: bool = False, offset: int = 0) -> VariableInfo:
@@ -104,25 +204,38 @@ class SymbolTable:
         return var_info
     
     def get_variable(self, name: str) -> Optional[VariableInfo]:
-        """Ищет переменную в текущей и родительских областях видимости"""
-        if name in self.variables:
-            return self.variables[name]
-        elif self.parent:
-            return self.parent.get_variable(name)
-        return None
+        """Ищет переменную в текущей и родительских областях видимости.
+        Результат запоминается во всех пройденных областях: во вложенных блоках
+        поиск доходит до ближайшей области, где имя уже искали"""
+        var_info = self.variables.get(name)
+        if var_info is not None or self.parent is None:
+            return var_info
+        if name in self.resolved:
+            return self.resolved[name]
+        path = [self]
+        table = self.parent
+        while True:
+            var_info = table.variables.get(name)
+            if var_info is not None:
+                break
+            if name in table.resolved:
+                var_info = table.resolved[name]
+                break
+            if table.parent is None:
+                break
+            path.append(table)
+            table = table.parent
+        for table in path:
+            table.resolved[name] = var_info
+        return var_info
     
     def exists(self, name: str) -> bool:
         """Проверяет, существует ли переменная"""
         return self.get_variable(name) is not None
     
     def _get_scope_level(self) -> int:
-        """Вычисляет уровень вложенности области видимости"""
-        level = 0
-        current = self
-        while current.parent:
-            level += 1
-            current = current.parent
-        return level
+        """Уровень вложенности области видимости"""
+        return self.level
 
 @dataclass  
 class FunctionInfo:
@@ -136,6 +249,85 @@ class FunctionInfo:
     symbol_table: SymbolTable = field(default_factory=lambda: SymbolTable(scope_name="global"))
     local_vars_size: int = 0
     param_count: int = 0
+    _view: Optional['FunctionView'] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def view(self) -> 'FunctionView':
+        """Обход CFG строится один раз; после изменения CFG нужен invalidate_view()"""
+        if self._view is None:
+            self._view = build_function_view(self)
+        return self._view
+
+    def invalidate_view(self):
+        self._view = None
+
+@dataclass
+class FunctionView:
+    """Результат одного обхода CFG функции, общий для генераторов и анализов"""
+    blocks: List[BasicBlock]  # Достижимые блоки в порядке генерации кода
+    index: Dict[int, int]  # id блока -> позиция в blocks
+    strings: List[str]  # Строковые и символьные литералы без кавычек, без повторов
+    declarations: List[Tuple[str, str]]  # (имя, тип) из операций DECLARE, первое объявление
+    exit_reachable: bool  # Есть return или путь до exit_block: нужен эпилог
+
+def string_literals(operations: List[Operation]) -> List[str]:
+    """Литералы операций и аргументов вызовов (в том числе вызова в правой части
+    присваивания) в порядке появления, без кавычек"""
+    result = []
+    for op in operations:
+        if op.value and op.value[0] in '"\'':
+            result.append(op.value.strip('"\''))
+        if op.type == OperationType.ASSIGN and op.right is not None and op.right.type == OperationType.CALL:
+            op = op.right
+        if op.type == OperationType.CALL:
+            for arg in op.args:
+                if arg.value and arg.value[0] in '"\'':
+                    result.append(arg.value.strip('"\''))
+    return result
+
+def build_function_view(func: FunctionInfo) -> FunctionView:
+    """Обход в глубину next -> true -> false, как при рекурсивной генерации блоков"""
+    blocks: List[BasicBlock] = []
+    index: Dict[int, int] = {}
+    strings: Dict[str, None] = {}
+    declarations: Dict[str, str] = {}
+    exit_reachable = False
+    stack = [func.cfg.entry_block]
+    while stack:
+        block = stack.pop()
+        if block is None or block.id in index:
+            continue
+        index[block.id] = len(blocks)
+        blocks.append(block)
+        if block is func.cfg.exit_block:
+            exit_reachable = True
+        for op in block.operations:
+            if op.type == OperationType.RETURN:
+                exit_reachable = True
+            elif op.type == OperationType.DECLARE and op.value:
+                name = op.value.split('->')[0].strip()
+                declarations.setdefault(name, op.var_type or 'int')
+        for literal in string_literals(block.operations):
+            strings.setdefault(literal, None)
+        stack.extend([block.false_branch, block.true_branch, block.next_block])
+    return FunctionView(blocks, index, list(strings), list(declarations.items()), exit_reachable)
+
+def trampoline(root: Generator) -> Any:
+    """Выполняет рекурсивный алгоритм, записанный генераторами, на явном стеке.
+    Вместо вложенного вызова генератор выдает кортеж (функция, *аргументы) и получает
+    через yield ее результат; глубина вложенности не ограничена стеком Python"""
+    stack = [root]
+    result = None
+    while stack:
+        try:
+            call = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+        stack.append(call[0](*call[1:]))
+        result = None
+    return result
 
 @dataclass
 class ParsingError:
@@ -145,53 +337,126 @@ class ParsingError:
     message: str
     severity: str = "error"
 
-@dataclass
+@dataclass(slots=True)
 class ASTNode:
     type: str
     value: Optional[str] = None
-    children: List['ASTNode'] = field(default_factory=list)
+    children: List['ASTNode'] = field(default_factory=list)  # Парсер дописывает детей по ходу разбора
     line: int = 0
     column: int = 0
-    attributes: Dict[str, Any] = field(default_factory=dict)
+    attributes: Mapping[str, Any] = field(default_factory=_empty_attributes)
+
+@dataclass
+class BuildContext:
+    """Состояние одной компиляции: результат построения и текущий контекст анализа"""
+    operations: 'OperationFactory'
+    functions: List[FunctionInfo] = field(default_factory=list)
+    errors: List[ParsingError] = field(default_factory=list)
+    current_block_id: int = 0
+    call_graph: Dict[str, Set[str]] = field(default_factory=dict)
+    # Возвращаемые типы всех функций программы (первый проход, до анализа тел)
+    signatures: Dict[str, str] = field(default_factory=dict)
+    current_function_name: Optional[str] = None
+    current_file_name: Optional[str] = None
+    current_symbol_table: Optional[SymbolTable] = None
+    scope_stack: List[SymbolTable] = field(default_factory=list)
+
+
+class _ContextSlot:
+    """Ячейка с контекстом одной компиляции"""
+
+    def __init__(self, context: BuildContext):
+        self.context = context
+
+
+class _ThreadContextSlot(threading.local):
+    """Ячейка, своя в каждом потоке (контекст создается при первом обращении)"""
+
+    def __init__(self, builder: 'ControlFlowBuilder'):
+        self.context = builder.new_context()
+
+
+def _context_field(name: str) -> property:
+    """Поле BuildContext текущего потока как атрибут построителя
+    (чтение через attrgetter - без вызова функции Python на горячем пути)"""
+    def set(self, value):
+        setattr(self._slot.context, name, value)
+
+    return property(attrgetter(f'_slot.context.{name}'), set, doc=f'BuildContext.{name} текущего потока')
+
 
 class ControlFlowBuilder:
-    """Построитель графа потока управления с системой типов"""
+    """Построитель графа потока управления с системой типов.
+    Состояние компиляции хранится в BuildContext, отдельном для каждого потока:
+    один построитель можно использовать из пула потоков, а build_from_ast
+    каждый раз начинает с нового контекста (номера блоков, функции, ошибки).
+    Атрибуты functions, errors, call_graph и т.д. - поля контекста текущего потока.
+    Сначала собираются сигнатуры всех функций (signatures), затем тела строятся
+    по порядку исходника"""
     
-    def __init__(self):
-        self.functions: List[FunctionInfo] = []
-        self.errors: List[ParsingError] = []
-        self.current_block_id = 0
-        self.call_graph: Dict[str, Set[str]] = {}
-        
-        # Текущий контекст анализа
-        self.current_function_name: Optional[str] = None
-        self.current_file_name: Optional[str] = None
-        self.current_symbol_table: Optional[SymbolTable] = None
-        self.scope_stack: List[SymbolTable] = []
+    def __init__(self, hash_consing: bool = False):
+        # Операции выражений; с hash_consing одинаковые подвыражения - общие узлы
+        self.hash_consing = hash_consing
+        self._slot = _ThreadContextSlot(self)
+
+    functions = _context_field('functions')
+    errors = _context_field('errors')
+    current_block_id = _context_field('current_block_id')
+    call_graph = _context_field('call_graph')
+    signatures = _context_field('signatures')
+    operations = _context_field('operations')
+    # Текущий контекст анализа
+    current_function_name = _context_field('current_function_name')
+    current_file_name = _context_field('current_file_name')
+    current_symbol_table = _context_field('current_symbol_table')
+    scope_stack = _context_field('scope_stack')
+
+    def new_context(self) -> BuildContext:
+        return BuildContext(OperationFactory(self.hash_consing))
+
+    @property
+    def context(self) -> BuildContext:
+        """Контекст текущего потока: результат последнего построения"""
+        return self._slot.context
+
+    def begin(self) -> BuildContext:
+        """Начинает новую компиляцию в текущем потоке"""
+        self._slot.context = self.new_context()
+        return self._slot.context
+
+    def _bound(self) -> 'ControlFlowBuilder':
+        """Копия построителя, привязанная к контексту текущего потока: построение
+        обращается к полям контекста напрямую, без поиска по потоку на каждое чтение"""
+        builder = copy.copy(self)
+        builder._slot = _ContextSlot(self._slot.context)
+        return builder
     
     def _create_block(self) -> BasicBlock:
         """Создает новый базовый блок"""
-        block = BasicBlock(id=self.current_block_id)
-        self.current_block_id += 1
+        context = self._slot.context
+        block = BasicBlock(id=context.current_block_id)
+        context.current_block_id += 1
         return block
     
     def _enter_scope(self, scope_name: str = ""):
         """Вход в новую область видимости"""
+        context = self._slot.context
         new_table = SymbolTable(
-            parent=self.current_symbol_table,
+            parent=context.current_symbol_table,
             scope_name=scope_name
         )
-        self.scope_stack.append(new_table)
-        self.current_symbol_table = new_table
+        context.scope_stack.append(new_table)
+        context.current_symbol_table = new_table
     
     def _exit_scope(self):
         """Выход из области видимости"""
-        if self.scope_stack:
-            self.scope_stack.pop()
-            if self.scope_stack:
-                self.current_symbol_table = self.scope_stack[-1]
+        context = self._slot.context
+        if context.scope_stack:
+            context.scope_stack.pop().resolved.clear()
+            if context.scope_stack:
+                context.current_symbol_table = context.scope_stack[-1]
             else:
-                self.current_symbol_table = None
+                context.current_symbol_table = None
     
     def _add_variable_to_symbol_table(self, name: str, var_type: str, line: int, 
                                     is_param: bool = False, offset:int = 0) -> bool:
@@ -250,31 +515,21 @@ class ControlFlowBuilder:
     def _get_variable_type(self, name: str) -> Optional[str]:
         """Возвращает тип переменной из таблицы символов"""
         
-        if not self.current_symbol_table:
-            return None
-        
         current_table = self.current_symbol_table
+        if not current_table:
+            return None
         
-        while current_table:
-            if name in current_table.variables:
-                var_info = current_table.variables[name]
-                return var_info.type
-            
-            var_info = current_table.get_variable(name)
-            if var_info:
-                return var_info.type
-            
-            current_table = current_table.parent
-        
-        return None
+        var_info = current_table.get_variable(name)
+        return var_info.type if var_info else None
     
     def build_from_ast(self, file_name: str, ast: ASTNode) -> List[FunctionInfo]:
+        context = self.begin()
         try:
-            self.current_file_name = file_name
-            self._analyze_file(file_name, ast)
-            return self.functions
+            context.current_file_name = file_name
+            self._bound()._analyze_file(file_name, ast)
+            return context.functions
         except Exception as e:
-            self.errors.append(ParsingError(
+            context.errors.append(ParsingError(
                 file_name=file_name,
                 line=0,
                 column=0,
@@ -283,17 +538,48 @@ class ControlFlowBuilder:
             
             return []
     
-    def _analyze_file(self, file_name: str, ast: ASTNode):
-        for node in ast.children:
-            if node.type == 'function_declaration':
-                self._process_function(file_name, node)
+    def build_function(self, file_name: str, func_node: ASTNode) -> Optional[FunctionInfo]:
+        """Строит одну функцию вслед за уже построенными (инкрементальная сборка)"""
+        context = self._slot.context
+        context.current_file_name = file_name
+        count = len(context.functions)
+        self._bound()._process_function(file_name, func_node)
+        return context.functions[-1] if len(context.functions) > count else None
     
-    def _process_function(self, file_name: str, func_node: ASTNode):
+    def adopt_function(self, func_info: FunctionInfo, first_block_id: int, block_count: int,
+                       calls: Set[str]):
+        """Добавляет готовую функцию вместо построения: блоки перенумеровываются так,
+        как их пронумеровало бы построение с нуля на этом месте"""
+        shift = self.current_block_id - first_block_id
+        if shift:
+            for block in func_info.cfg.blocks:
+                block.id += shift
+            func_info.invalidate_view()
+        self.current_block_id += block_count
+        if calls:
+            self.call_graph.setdefault(func_info.name, set()).update(calls)
+        self.functions.append(func_info)
+    
+    def index_signatures(self, func_nodes: Sequence[ASTNode]):
+        """Первый проход: возвращаемые типы всех функций до анализа тел.
+        Вызов функции, объявленной ниже по файлу, получает ее настоящий тип;
+        из одноименных функций действует первая"""
+        signatures = self.signatures
+        for func_node in func_nodes:
+            func_name, return_type, _ = self._function_signature(func_node)
+            signatures.setdefault(func_name, return_type)
+
+    def _analyze_file(self, file_name: str, ast: ASTNode):
+        func_nodes = [node for node in ast.children if node.type == 'function_declaration']
+        self.index_signatures(func_nodes)
+        for func_node in func_nodes:
+            self._process_function(file_name, func_node)
+
+    def _function_signature(self, func_node: ASTNode) -> Tuple[str, str, List[Tuple[str, str]]]:
+        """Имя, возвращаемый тип и параметры функции из ее узла AST"""
         func_name = "unknown"
         return_type = "void"
         parameters = []
-        
-        # Извлекаем информацию о функции
         for child in func_node.children:
             if child.type == 'function_name':
                 func_name = child.value
@@ -303,6 +589,11 @@ class ControlFlowBuilder:
                 param_name = child.value if child.value else "?"
                 param_type = child.attributes.get('type', 'unknown') if hasattr(child, 'attributes') else 'unknown'
                 parameters.append((param_name, param_type))
+        return func_name, return_type, parameters
+
+    def _process_function(self, file_name: str, func_node: ASTNode):
+        # Извлекаем информацию о функции
+        func_name, return_type, parameters = self._function_signature(func_node)
         
         # Сохраняем текущий контекст
         self.current_function_name = func_name
@@ -365,7 +656,8 @@ class ControlFlowBuilder:
         self._enter_scope("function_body")
         
         current_block = entry_block
-        final_block = self._process_statements(body_node.children, current_block, func_name, file_name, exit_block)
+        final_block = trampoline(self._process_statements(body_node.children, current_block,
+                                                          func_name, file_name, exit_block))
 
         if final_block:
             final_block.next_block = exit_block
@@ -373,10 +665,7 @@ class ControlFlowBuilder:
         # Выходим из области видимости тела функции
         self._exit_scope()
         
-        all_blocks = self._collect_all_blocks(entry_block)
-        all_blocks.append(exit_block)
-        
-        cfg = ControlFlowGraph(entry_block, exit_block, all_blocks)
+        cfg = ControlFlowGraph(entry_block, exit_block)
         
         # Вычисляем размер локальных переменных
         local_vars_size = self._calculate_local_vars_size()
@@ -393,6 +682,10 @@ class ControlFlowBuilder:
             param_count=len(parameters)
         )
         
+        # Список блоков берется из общего обхода функции, он же кэшируется для генераторов
+        cfg.blocks = list(func_info.view.blocks)
+        if exit_block.id not in func_info.view.index:
+            cfg.add_block(exit_block)
         self.functions.append(func_info)
         
         # Выходим из области видимости функции
@@ -462,11 +755,7 @@ class ControlFlowBuilder:
     
     def _build_return_operation(self, node: ASTNode, func_name: str, file_name: str) -> Optional[Operation]:
         # Получаем ожидаемый тип возвращаемого значения
-        expected_type = "void"
-        for func_info in self.functions:
-            if func_info.name == func_name:
-                expected_type = func_info.return_type
-                break
+        expected_type = self.signatures.get(func_name, "void")
         
         if node.children:
             expr_child = node.children[0]
@@ -545,6 +834,12 @@ class ControlFlowBuilder:
     
     def _parse_expression(self, expr: str, line: int, column: int, 
                          func_name: str, file_name: str) -> Operation:
+        return trampoline(self._parse_expression_steps(expr, line, column, func_name, file_name))
+
+    def _parse_expression_steps(self, expr: str, line: int, column: int,
+                                func_name: str, file_name: str) -> Generator[tuple, Operation, Operation]:
+        """Разбор выражения; подвыражения запрашиваются через yield (см. trampoline),
+        поэтому длинные цепочки операций не упираются в глубину рекурсии"""
         expr = expr.strip()
         # Обработка escape-последовательностей
         if (expr.startswith('"') and expr.endswith('"')) or (expr.startswith("'") and expr.endswith("'")):
@@ -556,7 +851,7 @@ class ControlFlowBuilder:
         if literal_type != "unknown":
             # Для char литералов убедимся, что тип определился правильно
             if literal_type == 'char' and expr.startswith("'") and expr.endswith("'"):
-                return Operation(
+                return self.operations.create(
                     type=OperationType.NOOP,
                     value=expr,
                     line=line,
@@ -564,7 +859,7 @@ class ControlFlowBuilder:
                     result_type='char'  # Явно указываем char
                 )
             elif literal_type == 'string':
-                return Operation(
+                return self.operations.create(
                     type=OperationType.NOOP,
                     value=expr,
                     line=line,
@@ -572,7 +867,7 @@ class ControlFlowBuilder:
                     result_type='string'
                 )
             elif literal_type == 'int':
-                return Operation(
+                return self.operations.create(
                     type=OperationType.NOOP,
                     value=expr,
                     line=line,
@@ -580,7 +875,7 @@ class ControlFlowBuilder:
                     result_type='int'
                 )
             elif literal_type == 'bool':
-                return Operation(
+                return self.operations.create(
                     type=OperationType.NOOP,
                     value=expr,
                     line=line,
@@ -605,9 +900,9 @@ class ControlFlowBuilder:
                         pass
                     
                     # Теперь парсим значение (после добавления переменной)
-                    value_op = self._parse_expression(value_part, line, column, func_name, file_name)
+                    value_op = yield (self._parse_expression_steps, value_part, line, column, func_name, file_name)
                     
-                    return Operation(
+                    return self.operations.create(
                         type=OperationType.DECLARE,
                         value=var_name,
                         var_type=var_type,
@@ -621,7 +916,7 @@ class ControlFlowBuilder:
         if expr.endswith('++'):
             var_name = expr[:-2].strip()
             var_type = self._get_variable_type(var_name)
-            return Operation(
+            return self.operations.create(
                 type=OperationType.INCREMENT,
                 value=var_name,
                 line=line,
@@ -647,7 +942,7 @@ class ControlFlowBuilder:
             if not var_type:
                 var_type = 'int'
             
-            return Operation(
+            return self.operations.create(
                 type=OperationType.DECREMENT,
                 value=var_name,
                 line=line,
@@ -660,7 +955,7 @@ class ControlFlowBuilder:
         elif expr.startswith('++'):
             var_name = expr[2:].strip()
             var_type = self._get_variable_type(var_name)
-            return Operation(
+            return self.operations.create(
                 type=OperationType.INCREMENT,
                 value=var_name,
                 line=line,
@@ -673,7 +968,7 @@ class ControlFlowBuilder:
         elif expr.startswith('--'):
             var_name = expr[:2].strip()
             var_type = self._get_variable_type(var_name)
-            return Operation(
+            return self.operations.create(
                 type=OperationType.DECREMENT,
                 value=var_name,
                 line=line,
@@ -685,7 +980,7 @@ class ControlFlowBuilder:
         # Простые идентификаторы
         if self._is_simple_identifier(expr):
             var_type = self._get_variable_type(expr)
-            return Operation(
+            return self.operations.create(
                 type=OperationType.NOOP,
                 value=expr,
                 line=line,
@@ -694,6 +989,11 @@ class ControlFlowBuilder:
                 result_type=var_type
             )
         
+        # Выражение целиком - вызов: знаки операций внутри аргументов (например,
+        # % в формате scanf("%d", x)) не делят его на операнды
+        if self._is_single_call(expr):
+            return (yield (self._parse_call_steps, expr, line, column, func_name, file_name))
+        
         # Операции сравнения
         comparison_ops = [
             ('==', OperationType.EQ),
@@ -711,8 +1011,8 @@ class ControlFlowBuilder:
                     left = parts[0].strip()
                     right = parts[1].strip()
                     
-                    left_op = self._parse_expression(left, line, column, func_name, file_name)
-                    right_op = self._parse_expression(right, line, column, func_name, file_name)
+                    left_op = yield (self._parse_expression_steps, left, line, column, func_name, file_name)
+                    right_op = yield (self._parse_expression_steps, right, line, column, func_name, file_name)
                     
                     # Проверка типов для сравнения
                     if left_op.result_type and right_op.result_type:
@@ -725,7 +1025,7 @@ class ControlFlowBuilder:
                                 message=f"Несовместимые типы для сравнения: '{left_op.result_type}' и '{right_op.result_type}'"
                             ))
                     
-                    return Operation(
+                    return self.operations.create(
                         type=op_type,
                         left=left_op,
                         right=right_op,
@@ -751,8 +1051,8 @@ class ControlFlowBuilder:
                     left = parts[0].strip()
                     right = parts[1].strip()
                     
-                    left_op = self._parse_expression(left, line, column, func_name, file_name)
-                    right_op = self._parse_expression(right, line, column, func_name, file_name)
+                    left_op = yield (self._parse_expression_steps, left, line, column, func_name, file_name)
+                    right_op = yield (self._parse_expression_steps, right, line, column, func_name, file_name)
                     
                     # Определяем результирующий тип
                     result_type = self._check_binary_operation_types(
@@ -760,7 +1060,7 @@ class ControlFlowBuilder:
                         line, column, file_name
                     )
                     
-                    return Operation(
+                    return self.operations.create(
                         type=op_type,
                         left=left_op,
                         right=right_op,
@@ -781,8 +1081,8 @@ class ControlFlowBuilder:
                             left = parts[0].strip()
                             right = parts[1].strip()
                             
-                            left_op = self._parse_expression(left, line, column, func_name, file_name)
-                            right_op = self._parse_expression(right, line, column, func_name, file_name)
+                            left_op = yield (self._parse_expression_steps, left, line, column, func_name, file_name)
+                            right_op = yield (self._parse_expression_steps, right, line, column, func_name, file_name)
                             
                             # Определяем результирующий тип
                             result_type = self._check_binary_operation_types(
@@ -790,7 +1090,7 @@ class ControlFlowBuilder:
                                 line, column, file_name
                             )
                             
-                            return Operation(
+                            return self.operations.create(
                                 type=op_type,
                                 left=left_op,
                                 right=right_op,
@@ -812,8 +1112,8 @@ class ControlFlowBuilder:
                     left = parts[0].strip()
                     right = parts[1].strip()
                     
-                    left_op = self._parse_expression(left, line, column, func_name, file_name)
-                    right_op = self._parse_expression(right, line, column, func_name, file_name)
+                    left_op = yield (self._parse_expression_steps, left, line, column, func_name, file_name)
+                    right_op = yield (self._parse_expression_steps, right, line, column, func_name, file_name)
                     
                     # Проверяем, что оба операнда булевы
                     if left_op.result_type != 'bool' or right_op.result_type != 'bool':
@@ -824,7 +1124,7 @@ class ControlFlowBuilder:
                             message=f"Логическая операция требует булевых операндов, получено: '{left_op.result_type}' и '{right_op.result_type}'"
                         ))
                     
-                    return Operation(
+                    return self.operations.create(
                         type=op_type,
                         left=left_op,
                         right=right_op,
@@ -835,59 +1135,10 @@ class ControlFlowBuilder:
         
         # Вызов функции
         if '(' in expr and ')' in expr:
-            paren_pos = expr.find('(')
-            func_name_call = expr[:paren_pos].strip()
-            # Извлекаем аргументы
-            paren_count = 1
-            end_pos = paren_pos + 1
-            while end_pos < len(expr) and paren_count > 0:
-                if expr[end_pos] == '(':
-                    paren_count += 1
-                elif expr[end_pos] == ')':
-                    paren_count -= 1
-                end_pos += 1
-            
-            args_str = expr[paren_pos+1:end_pos-1].strip()
-            
-            # Парсим аргументы
-            args = []
-            if args_str:
-                arg_parts = self._split_arguments(args_str)
-                for arg in arg_parts:
-                    if arg:
-                        arg_op = self._parse_expression(arg, line, column, func_name, file_name)
-                        args.append(arg_op)
-            
-            # Добавляем в граф вызовов
-            if func_name != func_name_call:
-                if func_name not in self.call_graph:
-                    self.call_graph[func_name] = set()
-                self.call_graph[func_name].add(func_name_call)
-            
-            
-            # Определяем тип возвращаемого значения
-            if BuiltinFunctions.is_standard_function(func_name_call):
-                func_info = BuiltinFunctions.get_function_info(func_name_call)
-                return_type = func_info['return_type']
-            else:
-                # Для пользовательских функций ищем в уже обработанных
-                return_type = 'int'  # по умолчанию
-                for func in self.functions:
-                    if func.name == func_name_call:
-                        return_type = func.return_type
-                        break
-            
-            return Operation(
-                type=OperationType.CALL,
-                value=func_name_call,
-                args=args,
-                line=line,
-                column=column,
-                result_type=return_type
-            )
+            return (yield (self._parse_call_steps, expr, line, column, func_name, file_name))
         
         # Если ничего не подошло
-        return Operation(
+        return self.operations.create(
             type=OperationType.NOOP,
             value=expr,
             line=line,
@@ -895,6 +1146,56 @@ class ControlFlowBuilder:
             result_type='unknown'
         )
     
+    def _parse_call_steps(self, expr: str, line: int, column: int,
+                          func_name: str, file_name: str) -> Generator[tuple, Operation, Operation]:
+        """Разбор вызова функции; аргументы разбираются через yield, как в _parse_expression_steps"""
+        paren_pos = expr.find('(')
+        func_name_call = expr[:paren_pos].strip()
+        # Извлекаем аргументы
+        paren_count = 1
+        end_pos = paren_pos + 1
+        while end_pos < len(expr) and paren_count > 0:
+            if expr[end_pos] == '(':
+                paren_count += 1
+            elif expr[end_pos] == ')':
+                paren_count -= 1
+            end_pos += 1
+        
+        args_str = expr[paren_pos+1:end_pos-1].strip()
+        
+        # Парсим аргументы
+        args = []
+        if args_str:
+            arg_parts = self._split_arguments(args_str)
+            for arg in arg_parts:
+                if arg:
+                    arg_op = yield (self._parse_expression_steps, arg, line, column, func_name, file_name)
+                    args.append(arg_op)
+        
+        # Добавляем в граф вызовов
+        if func_name != func_name_call:
+            if func_name not in self.call_graph:
+                self.call_graph[func_name] = set()
+            self.call_graph[func_name].add(func_name_call)
+        
+        
+        # Определяем тип возвращаемого значения
+        if BuiltinFunctions.is_standard_function(func_name_call):
+            func_info = BuiltinFunctions.get_function_info(func_name_call)
+            return_type = func_info['return_type']
+        else:
+            # Пользовательская функция - по индексу сигнатур, иначе int
+            return_type = self.signatures.get(func_name_call, 'int')
+        
+        return self.operations.create(
+            type=OperationType.CALL,
+            value=func_name_call,
+            args=args,
+            line=line,
+            column=column,
+            result_type=return_type
+        )
+    
     def _check_binary_operation_types(self, op_type: OperationType, 
                                 left_type: Optional[str], right_type: Optional[str],
                                 line: int, column: int, file_name: str) -> str:
@@ -994,7 +1295,30 @@ class ControlFlowBuilder:
                 return False
         
         return True
-    
+
+    def _is_single_call(self, expr: str) -> bool:
+        """Выражение вида name(...), где скобка после имени закрывается в конце;
+        скобки внутри строковых и символьных литералов не учитываются"""
+        paren_pos = expr.find('(')
+        if paren_pos <= 0 or not self._is_simple_identifier(expr[:paren_pos].strip()):
+            return False
+        depth = 0
+        quote = None
+        for pos in range(paren_pos, len(expr)):
+            char = expr[pos]
+            if quote:
+                if char == quote and expr[pos - 1] != '\\':
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth == 0:
+                    return pos == len(expr) - 1
+        return False
+
     def _is_number(self, s: str) -> bool:
         try:
             float(s)
@@ -1003,8 +1327,9 @@ class ControlFlowBuilder:
             return False
     
     def _process_statements(self, statements: List[ASTNode], start_block: BasicBlock,
-                           func_name: str, file_name: str, exit_block: BasicBlock) -> Optional[BasicBlock]:
-        """Обработка списка операторов"""
+                           func_name: str, file_name: str, exit_block: BasicBlock) -> Generator[tuple, Optional[BasicBlock], Optional[BasicBlock]]:
+        """Обработка списка операторов (генератор для trampoline: вложенные тела
+        обрабатываются через yield, а не рекурсией)"""
         current_block = start_block
         
         for stmt in statements:
@@ -1029,25 +1354,25 @@ class ControlFlowBuilder:
                     current_block.operations.append(op)
 
             elif stmt.type == 'if_statement':
-                after_if_block = self._process_if_statement(stmt, current_block, 
-                                                          func_name, file_name, exit_block)
+                after_if_block = yield from self._process_if_statement(stmt, current_block,
+                                                                       func_name, file_name, exit_block)
                 if not after_if_block:
                     return None
                 current_block = after_if_block
 
             elif stmt.type == 'while_statement':
-                after_while_block = self._process_while_statement(stmt, current_block, 
-                                                                func_name, file_name, exit_block)
+                after_while_block = yield from self._process_while_statement(stmt, current_block,
+                                                                             func_name, file_name, exit_block)
                 current_block = after_while_block
 
             elif stmt.type == 'do_while_statement':
-                after_do_while_block = self._process_do_while_statement(stmt, current_block, 
-                                                                    func_name, file_name, exit_block)
+                after_do_while_block = yield from self._process_do_while_statement(stmt, current_block,
+                                                                                   func_name, file_name, exit_block)
                 current_block = after_do_while_block
 
             elif stmt.type == 'for_statement':
-                after_for_block = self._process_for_statement(stmt, current_block,
-                                                            func_name, file_name, exit_block)
+                after_for_block = yield from self._process_for_statement(stmt, current_block,
+                                                                         func_name, file_name, exit_block)
                 if after_for_block:
                     current_block = after_for_block
                 else:
@@ -1088,8 +1413,8 @@ class ControlFlowBuilder:
                     # Входим в новую область видимости для блока
                     self._enter_scope("block")
                     
-                    block_end = self._process_statements(stmt.children, block_start, 
-                                                       func_name, file_name, exit_block)
+                    block_end = yield (self._process_statements, stmt.children, block_start,
+                                       func_name, file_name, exit_block)
                     
                     # Выходим из области видимости блока
                     self._exit_scope()
@@ -1240,10 +1565,7 @@ class ControlFlowBuilder:
             func_info = BuiltinFunctions.get_function_info(call_func_name)
             return_type = func_info['return_type']
         else:
-            for func in self.functions:
-                if func.name == call_func_name:
-                    return_type = func.return_type
-                    break
+            return_type = self.signatures.get(call_func_name, return_type)
         
         op = Operation(
             type=OperationType.CALL,
@@ -1268,7 +1590,7 @@ class ControlFlowBuilder:
     
     # Остальные методы, которые были в оригинальном коде
     def _process_if_statement(self, if_node: ASTNode, current_block: BasicBlock,
-                             func_name: str, file_name: str, exit_block: BasicBlock) -> Optional[BasicBlock]:
+                             func_name: str, file_name: str, exit_block: BasicBlock) -> Generator[tuple, Optional[BasicBlock], Optional[BasicBlock]]:
         """Обработка оператора if"""
         # Создаем блок для условия
         condition_block = self._create_block()
@@ -1311,8 +1633,8 @@ class ControlFlowBuilder:
             # Входим в область видимости true ветки
             self._enter_scope("if_true")
             
-            true_end = self._process_statements(true_body_node.children, true_start, 
-                                               func_name, file_name, after_if)
+            true_end = yield (self._process_statements, true_body_node.children, true_start,
+                              func_name, file_name, after_if)
             
             # Выходим из области видимости true ветки
             self._exit_scope()
@@ -1334,8 +1656,8 @@ class ControlFlowBuilder:
             # Входим в область видимости false ветки
             self._enter_scope("if_false")
             
-            false_end = self._process_statements(false_body_node.children, false_start, 
-                                                func_name, file_name, after_if)
+            false_end = yield (self._process_statements, false_body_node.children, false_start,
+                               func_name, file_name, after_if)
             
             # Выходим из области видимости false ветки
             self._exit_scope()
@@ -1356,7 +1678,7 @@ class ControlFlowBuilder:
         return after_if
     
     def _process_while_statement(self, while_node: ASTNode, current_block: BasicBlock,
-                                func_name: str, file_name: str, exit_block: BasicBlock) -> BasicBlock:
+                                func_name: str, file_name: str, exit_block: BasicBlock) -> Generator[tuple, Optional[BasicBlock], BasicBlock]:
         """Обработка оператора while"""
         condition_block = self._create_block()
         condition_block.is_loop_start = True
@@ -1392,7 +1714,8 @@ class ControlFlowBuilder:
             # Входим в область видимости тела цикла
             self._enter_scope("while_body")
             
-            body_end = self._process_statements(loop_body.children, body_start, func_name, file_name, exit_block)
+            body_end = yield (self._process_statements, loop_body.children, body_start,
+                              func_name, file_name, exit_block)
             
             # Выходим из области видимости тела цикла
             self._exit_scope()
@@ -1409,7 +1732,7 @@ class ControlFlowBuilder:
         return after_loop
     
     def _process_do_while_statement(self, do_while_node: ASTNode, current_block: BasicBlock,
-                                   func_name: str, file_name: str, exit_block: BasicBlock) -> BasicBlock:
+                                   func_name: str, file_name: str, exit_block: BasicBlock) -> Generator[tuple, Optional[BasicBlock], BasicBlock]:
         """Обработка оператора do-while"""
         body_start = self._create_block()
         body_start.is_loop_start = True
@@ -1445,7 +1768,8 @@ class ControlFlowBuilder:
             # Входим в область видимости тела цикла
             self._enter_scope("do_while_body")
             
-            body_end = self._process_statements(loop_body.children, body_start, func_name, file_name, exit_block)
+            body_end = yield (self._process_statements, loop_body.children, body_start,
+                              func_name, file_name, exit_block)
             
             # Выходим из области видимости тела цикла
             self._exit_scope()
@@ -1463,7 +1787,7 @@ class ControlFlowBuilder:
         return after_loop
     
     def _process_for_statement(self, for_node: ASTNode, current_block: BasicBlock,
-                            func_name: str, file_name: str, exit_block: BasicBlock) -> Optional[BasicBlock]:
+                            func_name: str, file_name: str, exit_block: BasicBlock) -> Generator[tuple, Optional[BasicBlock], Optional[BasicBlock]]:
         """Обработка оператора for"""
         # Извлекаем части for: init, condition, increment, body
         init_expr = None
@@ -1533,8 +1857,8 @@ class ControlFlowBuilder:
             # Входим в область видимости тела цикла
             self._enter_scope("for_body")
             
-            body_end = self._process_statements(loop_body.children, body_start, 
-                                            func_name, file_name, exit_block)
+            body_end = yield (self._process_statements, loop_body.children, body_start,
+                              func_name, file_name, exit_block)
             
             # Выходим из области видимости тела цикла
             self._exit_scope()
@@ -1570,28 +1894,6 @@ class ControlFlowBuilder:
         # Возвращаем блок после цикла
         return after_loop
     
-    def _collect_all_blocks(self, start_block: BasicBlock) -> List[BasicBlock]:
-        visited = set()
-        blocks = []
-        stack = [start_block]
-        
-        while stack:
-            block = stack.pop()
-            if block.id in visited:
-                continue
-            
-            visited.add(block.id)
-            blocks.append(block)
-            
-            if block.next_block:
-                stack.append(block.next_block)
-            if block.true_branch:
-                stack.append(block.true_branch)
-            if block.false_branch:
-                stack.append(block.false_branch)
-        
-        return blocks
-    
     def _calculate_stack_offsets(self, func_info: FunctionInfo):
         """Вычисляет смещения переменных в стековом фрейме"""
         # Параметры: положительные смещения от RBP
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+
+def reverse_postorder(entry: Hashable, successors: Callable[[Hashable], Iterable[Hashable]]) -> List[Hashable]:
+    """Узлы, достижимые из entry, в обратном постпорядке (обход в глубину без рекурсии)"""
+    order = []
+    visited = {entry}
+    stack = [(entry, iter(successors(entry)))]
+    while stack:
+        node, following = stack[-1]
+        successor = next(following, None)
+        if successor is None:
+            order.append(node)
+            stack.pop()
+        elif successor not in visited:
+            visited.add(successor)
+            stack.append((successor, iter(successors(successor))))
+    order.reverse()
+    return order
+
+
+class DominatorTree:
+    """Дерево доминаторов (Cooper, Harvey, Kennedy. A Simple, Fast Dominance Algorithm).
+    order - узлы, достижимые из входа, в обратном постпорядке (order[0] - вход),
+    preds[v] - предшественники узла. Недостижимые узлы в дерево не входят.
+    Проверка доминирования - за O(1) по номерам обхода дерева"""
+
+    def __init__(self, order: Sequence[Hashable], preds: Mapping[Hashable, Iterable[Hashable]]):
+        number = {node: index for index, node in enumerate(order)}
+        idom: List[Optional[int]] = [None] * len(order)
+        if order:
+            idom[0] = 0
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while a > b:
+                    a = idom[a]
+                while b > a:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for index in range(1, len(order)):
+                new = None
+                for pred in preds[order[index]]:
+                    pred_index = number.get(pred)
+                    if pred_index is None or idom[pred_index] is None:
+                        continue
+                    new = pred_index if new is None else intersect(pred_index, new)
+                if new != idom[index]:
+                    idom[index] = new
+                    changed = True
+
+        # Непосредственный доминатор узла; у входа - None
+        self.idom: Dict[Hashable, Optional[Hashable]] = {
+            node: order[idom[index]] if index else None for index, node in enumerate(order)}
+
+        children: Dict[Hashable, List[Hashable]] = {node: [] for node in order}
+        for node in order[1:]:
+            children[self.idom[node]].append(node)
+        # Интервалы обхода дерева: a доминирует b, если интервал b вложен в интервал a
+        self.enter: Dict[Hashable, int] = {}
+        self.leave: Dict[Hashable, int] = {}
+        clock = 0
+        stack = [(order[0], iter(children[order[0]]))] if order else []
+        if order:
+            self.enter[order[0]] = clock
+        while stack:
+            node, rest = stack[-1]
+            child = next(rest, None)
+            clock += 1
+            if child is None:
+                self.leave[node] = clock
+                stack.pop()
+            else:
+                self.enter[child] = clock
+                stack.append((child, iter(children[child])))
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self.enter
+
+    def dominates(self, a: Hashable, b: Hashable) -> bool:
+        """a доминирует b (нестрого); False, если один из узлов не в дереве"""
+        enter_a, enter_b = self.enter.get(a), self.enter.get(b)
+        if enter_a is None or enter_b is None:
+            return False
+        return enter_a <= enter_b and self.leave[b] <= self.leave[a]
+
+
+def post_dominator_tree(nodes: Iterable[Hashable], successors: Mapping[Hashable, Sequence[Hashable]],
+                        exit_node: Hashable) -> DominatorTree:
+    """Дерево постдоминаторов: доминаторы обратного графа с виртуальным выходом
+    exit_node, в который ведут узлы без преемников. Узлы, из которых выход
+    недостижим (бесконечный цикл), в дерево не входят"""
+    nodes = list(nodes)
+    # Ребра обратного графа: узел -> предшественники в исходном графе
+    reverse: Dict[Hashable, List[Hashable]] = {node: [] for node in nodes}
+    reverse[exit_node] = []
+    for node in nodes:
+        for successor in successors[node] or (exit_node,):
+            reverse[successor].append(node)
+    order = reverse_postorder(exit_node, reverse.__getitem__)
+    # Предшественники в обратном графе - преемники в исходном
+    forward = {node: successors[node] or (exit_node,) for node in nodes}
+    forward[exit_node] = ()
+    return DominatorTree(order, forward)
@@ -0,0 +1,163 @@
+import re
+from typing import List, Dict, Optional
+from control_flow import FunctionInfo, BasicBlock, Operation, OperationType
+
+# Встроенные операции вывода/ввода, на которые раскладываются вызовы printf/scanf
+PRINT_LITERAL = '__print_literal'   # Строковый литерал
+PRINT_INT = '__print_int'           # %d, %i
+PRINT_CHAR = '__print_char'         # %c
+PRINT_STRING = '__print_string'     # %s с переменной
+SCAN_INT = '__scan_int'             # %d, %i
+SCAN_CHAR = '__scan_char'           # %c
+SKIP_SPACE = '__skip_space'         # Пробельный символ в формате scanf
+
+LOWERED_CALLS = {PRINT_LITERAL, PRINT_INT, PRINT_CHAR, PRINT_STRING, SCAN_INT, SCAN_CHAR, SKIP_SPACE}
+
+PRINTF_SPEC = re.compile(r'%(.?)', re.DOTALL)
+SCANF_SINGLE = re.compile(r'^(\s*)%([dic])(\s*)$')
+INT_LITERAL = re.compile(r'^-?\d+$')
+
+
+class FormatLowering:
+    """Разбор константных форматов printf/scanf на этапе компиляции.
+    Вызов printf с литералом формата заменяется последовательностью встроенных
+    операций (литерал, целое, символ, строка); константные аргументы подставляются
+    в текст, соседние литералы одного блока сливаются в одну запись.
+    Исходный CFG не меняется: результат - новые списки операций по id блока"""
+
+    def lower_program(self, functions: List[FunctionInfo]) -> Dict[int, List[Operation]]:
+        lowered: Dict[int, List[Operation]] = {}
+        for func in functions:
+            lowered.update(self.lower_function(func))
+        return lowered
+
+    def lower_function(self, func: FunctionInfo) -> Dict[int, List[Operation]]:
+        lowered: Dict[int, List[Operation]] = {}
+        for block in func.view.blocks:
+            operations = self.lower_block(block)
+            if operations is not None:
+                lowered[block.id] = operations
+        return lowered
+
+    def lower_block(self, block: BasicBlock) -> Optional[List[Operation]]:
+        """Новые операции блока или None, если блок не изменился"""
+        result: List[Operation] = []
+        changed = False
+        for op in block.operations:
+            replacement = None
+            if op.type == OperationType.CALL and op.value == 'printf':
+                replacement = self._lower_printf(op)
+            elif op.type == OperationType.CALL and op.value == 'scanf':
+                replacement = self._lower_scanf(op)
+            if replacement is None:
+                result.append(op)
+                continue
+            changed = True
+            for new_op in replacement:
+                # Соседние литералы, в том числе из разных вызовов printf, - одна запись
+                if new_op.value == PRINT_LITERAL and result and result[-1].type == OperationType.CALL \
+                        and result[-1].value == PRINT_LITERAL:
+                    text = self._literal_text(result[-1]) + self._literal_text(new_op)
+                    result[-1] = self._call(PRINT_LITERAL, self._string(text), result[-1])
+                else:
+                    result.append(new_op)
+        return result if changed else None
+
+    def _lower_printf(self, op: Operation) -> Optional[List[Operation]]:
+        fmt = self._format(op)
+        if fmt is None:
+            return None
+
+        pieces: List[Operation] = []
+        text: List[str] = []
+        args = op.args[1:]
+        arg_index = 0
+        last = 0
+        for match in PRINTF_SPEC.finditer(fmt):
+            text.append(fmt[last:match.start()])
+            last = match.end()
+            conversion = match.group(1)
+            if conversion == '%':
+                text.append('%')
+                continue
+            if conversion not in ('d', 'i', 'c', 's') or arg_index >= len(args):
+                # Ширина, точность и прочие спецификаторы остаются за printf
+                return None
+            arg = args[arg_index]
+            arg_index += 1
+            if arg.type != OperationType.NOOP or not arg.value:
+                return None
+
+            constant = self._constant_text(conversion, arg.value)
+            if constant is not None:
+                text.append(constant)
+                continue
+            if arg.value[0] in '"\'':
+                return None
+            if ''.join(text):
+                pieces.append(self._call(PRINT_LITERAL, self._string(''.join(text)), op))
+            text = []
+            kind = {'d': PRINT_INT, 'i': PRINT_INT, 'c': PRINT_CHAR, 's': PRINT_STRING}[conversion]
+            pieces.append(self._call(kind, arg, op))
+        if arg_index != len(args):
+            return None
+
+        text.append(fmt[last:])
+        if ''.join(text):
+            pieces.append(self._call(PRINT_LITERAL, self._string(''.join(text)), op))
+        # Генераторы снимают кавычки с литерала целиком: кавычка на краю текста потеряется
+        for piece in pieces:
+            if piece.value == PRINT_LITERAL:
+                literal = self._literal_text(piece)
+                if literal[0] in '"\'' or literal[-1] in '"\'':
+                    return None
+        return pieces
+
+    def _lower_scanf(self, op: Operation) -> Optional[List[Operation]]:
+        """Раскладывается только формат с одним значением: при нескольких значениях
+        scanf останавливается на первой ошибке, отдельные вызовы так не умеют"""
+        fmt = self._format(op)
+        if fmt is None or len(op.args) != 2:
+            return None
+        match = SCANF_SINGLE.match(fmt)
+        arg = op.args[1]
+        if not match or arg.type != OperationType.NOOP or not arg.value or not \
+                (arg.value[0].isalpha() or arg.value[0] == '_'):
+            return None
+
+        leading, conversion, trailing = match.groups()
+        pieces = []
+        if leading:
+            pieces.append(self._call(SKIP_SPACE, None, op))
+        pieces.append(self._call(SCAN_CHAR if conversion == 'c' else SCAN_INT, arg, op))
+        if trailing:
+            pieces.append(self._call(SKIP_SPACE, None, op))
+        return pieces
+
+    def _format(self, op: Operation) -> Optional[str]:
+        if not op.args or op.args[0].type != OperationType.NOOP:
+            return None
+        value = op.args[0].value or ''
+        if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+            return None
+        return value[1:-1]
+
+    def _constant_text(self, conversion: str, value: str) -> Optional[str]:
+        """Текст константного аргумента или None, если значение известно только при выполнении"""
+        if conversion in ('d', 'i') and INT_LITERAL.match(value):
+            return str(int(value))
+        if conversion == 'c' and len(value) == 3 and value[0] == value[2] == "'":
+            return value[1]
+        if conversion == 's' and len(value) >= 2 and value[0] == value[-1] == '"':
+            return value[1:-1]
+        return None
+
+    def _literal_text(self, op: Operation) -> str:
+        return op.args[0].value[1:-1]
+
+    def _string(self, text: str) -> Operation:
+        return Operation(OperationType.NOOP, value=f'"{text}"', var_type='string')
+
+    def _call(self, name: str, arg: Optional[Operation], origin: Operation) -> Operation:
+        return Operation(OperationType.CALL, value=name, args=[arg] if arg is not None else [],
+                         line=origin.line, column=origin.column, result_type='void')
@@ -0,0 +1,56 @@
+import io
+from typing import Iterable, Iterator, List, IO
+
+# Строк за одну запись: временный текст не растет вместе с размером функции
+EMIT_BATCH = 1024
+
+
+class AsmEmitter:
+    """Потоковая запись ассемблерного текста в приемник (файл, сокет, StringIO).
+    Генератор отдает программу фрагментами - заголовок, функции, таблица данных, -
+    и каждый фрагмент сразу уходит в приемник: в памяти держится только текущая функция.
+    Текст совпадает с '\\n'.join по всем строкам программы"""
+
+    def __init__(self, sink: IO, encoding: str = 'utf-8'):
+        self.sink = sink
+        # Двоичный приемник (открытый в режиме 'wb') получает текст в кодировке encoding
+        self.encoding = None if isinstance(sink, io.TextIOBase) else encoding
+        self.line_count = 0
+
+    def emit(self, lines: List[str]):
+        """Записывает фрагмент программы"""
+        for start in range(0, len(lines), EMIT_BATCH):
+            batch = lines[start:start + EMIT_BATCH]
+            if self.line_count:
+                self._write('\n')
+            self._write('\n'.join(batch))
+            self.line_count += len(batch)
+
+    def emit_all(self, chunks: Iterable[List[str]]) -> int:
+        """Записывает все фрагменты по мере генерации; возвращает число строк"""
+        for chunk in chunks:
+            self.emit(chunk)
+        return self.line_count
+
+    def tee(self, chunks: Iterable[List[str]]) -> Iterator[List[str]]:
+        """Фрагменты записываются в приемник и передаются дальше (встроенному
+        ассемблеру): текст и объектный файл получаются из одного прохода генерации"""
+        for chunk in chunks:
+            self.emit(chunk)
+            yield chunk
+
+    def _write(self, text: str):
+        self.sink.write(text.encode(self.encoding) if self.encoding else text)
+
+
+def join_chunks(chunks: Iterable[List[str]]) -> str:
+    """Текст программы целиком - для вызывающих, которым нужна строка"""
+    buffer = io.StringIO()
+    AsmEmitter(buffer).emit_all(chunks)
+    return buffer.getvalue()
+
+
+def iter_lines(chunks: Iterable[List[str]]) -> Iterator[str]:
+    """Строки программы по одной - вход встроенного ассемблера без сборки общего текста"""
+    for chunk in chunks:
+        yield from chunk
@@ -0,0 +1,277 @@
+from typing import List, Dict, Optional, Set
+from control_flow import FunctionInfo, Operation, OperationType, BasicBlock
+from port.identifiers import clean_identifier
+from generators.generator_state import PerCompilationState
+
+
+class CSourceGenerator(PerCompilationState):
+    """Генератор переносимого кода на C (блоки CFG через метки и goto)"""
+
+    # Отображение типов языка Simple в типы C
+    C_TYPES = {
+        'int': 'int',
+        'char': 'char',
+        'bool': 'int',
+        'float': 'float',
+        'double': 'double',
+        'string': 'const char *',
+        'void': 'void',
+    }
+
+    BINARY_OPERATORS = {
+        OperationType.ADD: '+',
+        OperationType.SUB: '-',
+        OperationType.MUL: '*',
+        OperationType.DIV: '/',
+        OperationType.MOD: '%',
+        OperationType.EQ: '==',
+        OperationType.NE: '!=',
+        OperationType.LT: '<',
+        OperationType.LE: '<=',
+        OperationType.GT: '>',
+        OperationType.GE: '>=',
+        OperationType.AND: '&&',
+        OperationType.OR: '||',
+    }
+
+    def __init__(self):
+        self._reset_state()
+
+    def _reset_state(self):
+        self.functions: List[FunctionInfo] = []
+
+    def _c_type(self, type_name: Optional[str]) -> str:
+        return self.C_TYPES.get(type_name or 'int', 'int')
+
+    def _escape_c_string(self, string: str) -> str:
+        """Экранирует содержимое строкового или символьного литерала C"""
+        result = []
+        for char in string:
+            code = ord(char)
+            if char == '\\':
+                result.append('\\\\')
+            elif char == '"':
+                result.append('\\"')
+            elif char == "'":
+                result.append("\\'")
+            elif char == '\n':
+                result.append('\\n')
+            elif char == '\t':
+                result.append('\\t')
+            elif char == '\r':
+                result.append('\\r')
+            elif 32 <= code <= 126:
+                result.append(char)
+            else:
+                for byte in char.encode('utf-8'):
+                    result.append(f'\\{byte:03o}')
+        return ''.join(result)
+
+    def generate_program(self, functions: List[FunctionInfo]) -> str:
+        """Генерирует программу на основе реальных функций"""
+        return self._session()._generate_program(functions)
+
+    def _generate_program(self, functions: List[FunctionInfo]) -> str:
+        self.functions = functions
+
+        c_lines = [
+            '#include <stdio.h>',
+            '#include <stdlib.h>',
+            '',
+        ]
+
+        # Прототипы, чтобы порядок определения функций не имел значения
+        for func in functions:
+            if func.name != 'main':
+                c_lines.append(f'{self._function_signature(func)};')
+        c_lines.append('')
+
+        for func in functions:
+            c_lines.extend(self._generate_function(func))
+
+        return '\n'.join(c_lines)
+
+    def _function_signature(self, func: FunctionInfo) -> str:
+        if func.name == 'main':
+            return 'int main(void)'
+        params = ', '.join(f'{self._c_type(param_type)} {self._clean_var_name(param_name)}'
+                           for param_name, param_type in func.parameters)
+        return f'{self._c_type(func.return_type)} {func.name}({params or "void"})'
+
+    _clean_var_name = staticmethod(clean_identifier)
+
+    def _collect_local_variables(self, func: FunctionInfo) -> Dict[str, str]:
+        """Собирает локальные переменные функции (без параметров)"""
+        params = {self._clean_var_name(name) for name, _ in func.parameters}
+        local_vars = {}
+
+        if func.symbol_table:
+            for var_name, var_info in func.symbol_table.variables.items():
+                if var_name not in params:
+                    local_vars[var_name] = var_info.type
+
+        for var_name, var_type in func.view.declarations:
+            if var_name not in local_vars and var_name not in params:
+                local_vars[var_name] = var_type
+
+        return local_vars
+
+    def _generate_function(self, func: FunctionInfo) -> List[str]:
+        """Генерирует определение функции на основе CFG"""
+        blocks = func.view.blocks
+        local_vars = self._collect_local_variables(func)
+
+        c_lines = [
+            f'/* Function: {func.name}, return type: {func.return_type} */',
+            f'{self._function_signature(func)}',
+            '{',
+        ]
+
+        for var_name, var_type in local_vars.items():
+            c_lines.append(f'    {self._c_type(var_type)} {var_name} = 0;')
+        if local_vars:
+            c_lines.append('')
+
+        targets: Set[int] = set()
+        body = []
+        for index, block in enumerate(blocks):
+            following = blocks[index + 1] if index + 1 < len(blocks) else None
+            body.append((block.id, self._generate_block(block, following, func, targets)))
+
+        # Метки нужны только блокам, на которые есть переходы
+        for block_id, lines in body:
+            if block_id in targets:
+                c_lines.append(f'L{block_id}:;')
+            c_lines.extend(lines)
+
+        c_lines.append('}')
+        c_lines.append('')
+        return c_lines
+
+    def _generate_block(self, block: BasicBlock, following: Optional[BasicBlock],
+                        func: FunctionInfo, targets: Set[int]) -> List[str]:
+        """Генерирует код базового блока и переходы из него"""
+        lines = []
+        operations = block.operations
+        is_branch = block.true_branch is not None and block.false_branch is not None and \
+                    block.next_block is None
+        condition = None
+        if is_branch and operations:
+            condition = operations[-1]
+            operations = operations[:-1]
+
+        for op in operations:
+            lines.extend(self._generate_statement(op, func))
+            if op.type == OperationType.RETURN:
+                return lines
+
+        def goto(target: BasicBlock) -> List[str]:
+            if following is not None and target.id == following.id:
+                return []
+            targets.add(target.id)
+            return [f'    goto L{target.id};']
+
+        if is_branch:
+            cond = self._expression(condition) if condition else '1'
+            targets.add(block.true_branch.id)
+            lines.append(f'    if ({cond}) goto L{block.true_branch.id};')
+            lines.extend(goto(block.false_branch))
+        elif block.next_block:
+            lines.extend(goto(block.next_block))
+        elif block.true_branch:
+            lines.extend(goto(block.true_branch))
+        elif block.false_branch:
+            lines.extend(goto(block.false_branch))
+        else:
+            # Выход из функции без явного return
+            if func.name == 'main' or func.return_type != 'void':
+                lines.append('    return 0;')
+            else:
+                lines.append('    return;')
+
+        return lines
+
+    def _generate_statement(self, op: Operation, func: FunctionInfo) -> List[str]:
+        """Генерирует оператор C для одной операции"""
+        if op.type == OperationType.DECLARE:
+            if op.left:
+                return [f'    {self._clean_var_name(op.value)} = {self._expression(op.left)};']
+            return []
+
+        if op.type == OperationType.RETURN:
+            if op.left:
+                return [f'    return {self._expression(op.left)};']
+            if func.name == 'main':
+                return ['    return 0;']
+            return ['    return;']
+
+        if op.type in (OperationType.BREAK, OperationType.CONTINUE):
+            # Переходы break/continue не отражены в CFG
+            return [f'    /* {op.type.value} */']
+
+        if op.type == OperationType.NOOP and not self._is_value(op):
+            return [f'    /* {op.value} */'] if op.value else []
+
+        return [f'    {self._expression(op)};']
+
+    def _is_value(self, op: Operation) -> bool:
+        """Проверяет, что NOOP является литералом или именем переменной"""
+        value = op.value
+        if not value:
+            return False
+        if value[0] in '"\'' or value in ('true', 'false'):
+            return True
+        if value.lstrip('-').replace('.', '', 1).isdigit():
+            return True
+        clean = self._clean_var_name(value)
+        return clean.replace('_', 'a').isalnum() and not clean[0].isdigit()
+
+    def _literal(self, value: str) -> str:
+        if value in ('true', 'false'):
+            return '1' if value == 'true' else '0'
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return f'"{self._escape_c_string(value[1:-1])}"'
+        if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+            content = value[1:-1]
+            if len(content) == 1:
+                return f"'{self._escape_c_string(content)}'"
+            return f'"{self._escape_c_string(content)}"'
+        return value
+
+    def _expression(self, op: Operation) -> str:
+        """Преобразует дерево операции в выражение C"""
+        if op.type == OperationType.NOOP:
+            if not self._is_value(op):
+                return '0'
+            if op.attributes.get('is_pointer'):
+                return f'&{self._clean_var_name(op.value)}'
+            return self._literal(self._clean_var_name(op.value))
+
+        if op.type in self.BINARY_OPERATORS and op.left and op.right:
+            return f'({self._expression(op.left)} {self.BINARY_OPERATORS[op.type]} {self._expression(op.right)})'
+
+        if op.type == OperationType.NOT and op.left:
+            return f'(!{self._expression(op.left)})'
+
+        if op.type == OperationType.NEGATE and op.left:
+            return f'(-{self._expression(op.left)})'
+
+        if op.type == OperationType.CAST and op.left:
+            return f'(({self._c_type(op.result_type)}){self._expression(op.left)})'
+
+        if op.type == OperationType.CALL:
+            args = ', '.join(self._expression(arg) for arg in op.args)
+            return f'{op.value}({args})'
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            name = self._clean_var_name(op.value)
+            sign = '++' if op.type == OperationType.INCREMENT else '--'
+            return f'{sign}{name}' if op.attributes.get('prefix') else f'{name}{sign}'
+
+        if op.type == OperationType.ASSIGN and op.left and op.right:
+            return f'{self._clean_var_name(op.left.value)} = {self._expression(op.right)}'
+
+        if op.type == OperationType.DECLARE and op.left:
+            return f'{self._clean_var_name(op.value)} = {self._expression(op.left)}'
+
+        return '0'
@@ -0,0 +1,208 @@
+import struct
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+# Типы и флаги ELF, которые нужны для перемещаемых объектных файлов
+ET_REL = 1
+
+EM_X86_64 = 62
+EM_RISCV = 243
+
+SHT_NULL = 0
+SHT_PROGBITS = 1
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHT_RELA = 4
+SHT_NOBITS = 8
+
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+SHF_INFO_LINK = 0x40
+
+STB_LOCAL = 0
+STB_GLOBAL = 1
+
+STT_NOTYPE = 0
+STT_OBJECT = 1
+STT_FUNC = 2
+STT_SECTION = 3
+STT_FILE = 4
+
+SHN_UNDEF = 0
+SHN_ABS = 0xfff1
+
+# Стандартные атрибуты секций по имени
+SECTION_ATTRIBUTES = {
+    '.text': (SHT_PROGBITS, SHF_ALLOC | SHF_EXECINSTR, 16),
+    '.data': (SHT_PROGBITS, SHF_ALLOC | SHF_WRITE, 8),
+    '.rodata': (SHT_PROGBITS, SHF_ALLOC, 8),
+    '.bss': (SHT_NOBITS, SHF_ALLOC | SHF_WRITE, 8),
+}
+
+
+@dataclass
+class ElfSection:
+    name: str
+    data: bytes
+    sh_type: int
+    flags: int
+    align: int
+    size: int = 0
+    index: int = 0
+    relocations: List[Tuple[int, str, int, int]] = field(default_factory=list)
+
+
+@dataclass
+class ElfSymbol:
+    name: str
+    section: Optional[str]
+    value: int = 0
+    size: int = 0
+    binding: int = STB_LOCAL
+    sym_type: int = STT_NOTYPE
+
+
+class ElfObjectWriter:
+    """Запись перемещаемого объектного файла ELF64 (little-endian)"""
+
+    def __init__(self, machine: int, flags: int = 0, source_name: Optional[str] = None):
+        self.machine = machine
+        self.flags = flags
+        self.source_name = source_name
+        self.sections: List[ElfSection] = []
+        self.symbols: Dict[str, ElfSymbol] = {}
+
+    def add_section(self, name: str, data: bytes = b'', size: Optional[int] = None) -> ElfSection:
+        """Добавляет секцию; для .bss передается только размер"""
+        sh_type, flags, align = SECTION_ATTRIBUTES.get(name, (SHT_PROGBITS, SHF_ALLOC, 1))
+        section = ElfSection(
+            name=name,
+            data=bytes(data),
+            sh_type=sh_type,
+            flags=flags,
+            align=align,
+            size=size if size is not None else len(data)
+        )
+        self.sections.append(section)
+        return section
+
+    def get_section(self, name: str) -> Optional[ElfSection]:
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    def add_symbol(self, name: str, section: Optional[str], value: int = 0, size: int = 0,
+                   binding: int = STB_LOCAL, sym_type: int = STT_NOTYPE) -> ElfSymbol:
+        """Добавляет символ; section=None означает внешний (неопределенный) символ"""
+        symbol = ElfSymbol(name, section, value, size, binding, sym_type)
+        self.symbols[name] = symbol
+        return symbol
+
+    def add_relocation(self, section: str, offset: int, symbol: str, rtype: int, addend: int):
+        """Добавляет перемещение; symbol - имя символа или имя секции"""
+        self.get_section(section).relocations.append((offset, symbol, rtype, addend))
+
+    def to_bytes(self) -> bytes:
+        """Формирует итоговое содержимое объектного файла"""
+        # Служебные секции идут после пользовательских
+        headers = [(0, SHT_NULL, 0, 0, 0, 0, 0, 0, 0, b'')]
+        shstrtab = bytearray(b'\0')
+        strtab = bytearray(b'\0')
+
+        def shname(name: str) -> int:
+            pos = len(shstrtab)
+            shstrtab.extend(name.encode() + b'\0')
+            return pos
+
+        def strname(name: str) -> int:
+            pos = len(strtab)
+            strtab.extend(name.encode() + b'\0')
+            return pos
+
+        for i, section in enumerate(self.sections, start=1):
+            section.index = i
+
+        # Таблица символов: сначала локальные, затем глобальные
+        sym_entries: List[Tuple[int, int, int, int, int, int]] = [(0, 0, 0, 0, 0, 0)]
+        sym_index: Dict[str, int] = {}
+
+        if self.source_name:
+            sym_entries.append((strname(self.source_name), (STB_LOCAL << 4) | STT_FILE, 0, SHN_ABS, 0, 0))
+
+        for section in self.sections:
+            sym_index[section.name] = len(sym_entries)
+            sym_entries.append((0, (STB_LOCAL << 4) | STT_SECTION, 0, section.index, 0, 0))
+
+        locals_ = [s for s in self.symbols.values() if s.binding == STB_LOCAL]
+        globals_ = [s for s in self.symbols.values() if s.binding != STB_LOCAL]
+
+        first_global = len(sym_entries) + len(locals_)
+        for symbol in locals_ + globals_:
+            shndx = SHN_UNDEF
+            if symbol.section is not None:
+                shndx = self.get_section(symbol.section).index
+            sym_index[symbol.name] = len(sym_entries)
+            sym_entries.append((strname(symbol.name), (symbol.binding << 4) | symbol.sym_type,
+                                0, shndx, symbol.value, symbol.size))
+
+        symtab = b''.join(struct.pack('<IBBHQQ', *entry) for entry in sym_entries)
+
+        user_count = len(self.sections)
+        symtab_index = user_count + 1
+        strtab_index = user_count + 2
+
+        rela_sections = []
+        for section in self.sections:
+            if not section.relocations:
+                continue
+            data = b''.join(
+                struct.pack('<QQq', offset, (sym_index[symbol] << 32) | rtype, addend)
+                for offset, symbol, rtype, addend in section.relocations
+            )
+            rela_sections.append((section, data))
+
+        for section in self.sections:
+            headers.append((shname(section.name), section.sh_type, section.flags, 0, 0,
+                            section.size, 0, 0, section.align, section.data))
+        headers.append((shname('.symtab'), SHT_SYMTAB, 0, 0, 0, len(symtab),
+                        strtab_index, first_global, 8, symtab))
+        headers.append((shname('.strtab'), SHT_STRTAB, 0, 0, 0, len(strtab), 0, 0, 1, bytes(strtab)))
+        for section, data in rela_sections:
+            headers.append((shname(f'.rela{section.name}'), SHT_RELA, SHF_INFO_LINK, 0, 0,
+                            len(data), symtab_index, section.index, 8, data))
+        # Неисполняемый стек
+        headers.append((shname('.note.GNU-stack'), SHT_PROGBITS, 0, 0, 0, 0, 0, 0, 1, b''))
+        shstrtab_name = shname('.shstrtab')
+        headers.append((shstrtab_name, SHT_STRTAB, 0, 0, 0, len(shstrtab), 0, 0, 1, bytes(shstrtab)))
+
+        # Раскладка содержимого секций после заголовка ELF
+        body = bytearray()
+        offset = 64
+        section_headers = bytearray()
+        for name, sh_type, flags, addr, _, size, link, info, align, data in headers:
+            sh_offset = 0
+            if sh_type not in (SHT_NULL, SHT_NOBITS):
+                padding = (-offset) % max(align, 1)
+                body.extend(b'\0' * padding)
+                offset += padding
+                sh_offset = offset
+                body.extend(data)
+                offset += len(data)
+            entsize = 24 if sh_type in (SHT_SYMTAB, SHT_RELA) else 0
+            section_headers.extend(struct.pack('<IIQQQQIIQQ', name, sh_type, flags, addr,
+                                               sh_offset, size, link, info, align, entsize))
+
+        padding = (-offset) % 8
+        body.extend(b'\0' * padding)
+        shoff = offset + padding
+
+        elf_header = struct.pack(
+            '<4sBBBBB7sHHIQQQIHHHHHH',
+            b'\x7fELF', 2, 1, 1, 0, 0, b'\0' * 7,
+            ET_REL, self.machine, 1, 0, 0, shoff, self.flags,
+            64, 0, 0, 64, len(headers), len(headers) - 1
+        )
+
+        return elf_header + bytes(body) + bytes(section_headers)
@@ -0,0 +1,20 @@
+import abc
+import copy
+
+
+class PerCompilationState(abc.ABC):
+    """Основа генераторов с состоянием одной компиляции (строковые константы,
+    смещения переменных, текущая функция). Настройки задаются конструктором, а
+    каждая генерация программы идет на копии генератора со свежим состоянием:
+    один экземпляр можно переиспользовать между программами и вызывать
+    одновременно из нескольких потоков"""
+
+    @abc.abstractmethod
+    def _reset_state(self):
+        """Начальное состояние компиляции"""
+
+    def _session(self):
+        """Копия генератора с настройками этого экземпляра и пустым состоянием"""
+        session = copy.copy(self)
+        session._reset_state()
+        return session
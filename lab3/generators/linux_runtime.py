@@ -0,0 +1,494 @@
+import re
+from typing import Iterator, List, Tuple
+from control_flow import FunctionInfo, Operation, OperationType
+from format_lowering import (PRINT_LITERAL, PRINT_INT, PRINT_CHAR, PRINT_STRING,
+                             SCAN_INT, SCAN_CHAR, SKIP_SPACE)
+
+# Быстрый runtime для Linux x86-64 (--runtime fast): printf/scanf/exit без libc,
+# буферизованный вывод и ввод на системных вызовах read/write.
+# Код собирается и NASM, и встроенным ассемблером (x86_encoder), поэтому
+# используется только адресация [база + смещение] и [rel символ + смещение]
+
+BUFFER_SIZE = 65536
+
+# Замена стандартных функций на функции runtime
+RUNTIME_FUNCTIONS = {
+    'printf': '__rt_printf',
+    'scanf': '__rt_scanf',
+    'exit': '__rt_exit',
+}
+FLUSH_SYMBOL = '__rt_flush'
+
+# Встроенные операции после разбора форматов (format_lowering)
+LOWERED_FUNCTIONS = {
+    PRINT_LITERAL: '__rt_puts',
+    PRINT_INT: '__rt_put_int',
+    PRINT_CHAR: '__rt_putc',
+    PRINT_STRING: '__rt_puts',
+    SCAN_INT: '__rt_scan_int',
+    SCAN_CHAR: '__rt_scan_char',
+    SKIP_SPACE: '__rt_skip_space',
+}
+
+# Поддерживаемые спецификаторы формата
+PRINTF_CONVERSIONS = 'dics%'
+SCANF_CONVERSIONS = 'dic'
+FORMAT_SPEC = re.compile(r'%(.)?')
+
+
+class UnsupportedFormatError(Exception):
+    """Формат вызова не поддерживается быстрым runtime"""
+
+
+def check_format(func_name: str, fmt: str):
+    """Проверяет на этапе компиляции, что runtime умеет разбирать формат"""
+    allowed = PRINTF_CONVERSIONS if func_name == 'printf' else SCANF_CONVERSIONS
+    for match in FORMAT_SPEC.finditer(fmt):
+        conversion = match.group(1)
+        if conversion is None or conversion not in allowed:
+            raise UnsupportedFormatError(
+                f'{func_name}: спецификатор "{match.group(0)}" в "{fmt}" не поддерживается '
+                f'быстрым runtime (допустимы %{", %".join(allowed)})')
+
+
+def standard_calls(op: Operation) -> Iterator[Tuple[Operation, bool]]:
+    """Вызовы printf/scanf/exit в операции op и признак, что генератор linux вызывает
+    их через runtime: оператор-вызов или вызов в правой части присваивания. Вызов
+    внутри другого выражения (return printf(...) + 1) генерируется как вызов libc"""
+    routed = op.right if op.type == OperationType.ASSIGN else op
+    stack = [op]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.type == OperationType.CALL and node.value in RUNTIME_FUNCTIONS:
+            yield node, node is routed
+        stack.extend([node.left, node.right, *node.args])
+
+
+def supports_program(functions: List[FunctionInfo]) -> bool:
+    """Все вызовы printf/scanf/exit программы идут через runtime, и у printf/scanf
+    литерал формата, который разбирает быстрый runtime"""
+    for func in functions:
+        for block in func.view.blocks:
+            for op in block.operations:
+                for call, routed in standard_calls(op):
+                    if not routed:
+                        return False
+                    if call.value == 'exit':
+                        continue
+                    fmt = call.args[0].value if call.args and call.args[0].value else ''
+                    if not fmt.startswith('"'):
+                        return False
+                    try:
+                        check_format(call.value, fmt.strip('"'))
+                    except UnsupportedFormatError:
+                        return False
+    return True
+
+
+def runtime_lines() -> List[str]:
+    """Ассемблерный код runtime: данные в .bss и функции в .text"""
+    return [
+        f'; {"="*50}',
+        '; Fast runtime: buffered I/O over raw syscalls',
+        f'; {"="*50}',
+        'section .bss',
+        f'    __rt_out_buf resb {BUFFER_SIZE}',
+        '    __rt_out_len resq 1',
+        f'    __rt_in_buf resb {BUFFER_SIZE}',
+        '    __rt_in_pos resq 1',
+        '    __rt_in_len resq 1',
+        '    __rt_digits resb 16',
+        '',
+        'section .text',
+        '',
+        '; Запись буфера вывода: write(1, buf, len) до полной записи',
+        '__rt_flush:',
+        '    push rbx',
+        '    push r12',
+        '    lea rbx, [rel __rt_out_buf]',
+        '    mov r12, [rel __rt_out_len]',
+        '.rt_flush_loop:',
+        '    test r12, r12',
+        '    jle .rt_flush_done',
+        '    mov eax, 1',
+        '    mov edi, 1',
+        '    mov rsi, rbx',
+        '    mov rdx, r12',
+        '    syscall',
+        '    cmp rax, -4 ; EINTR',
+        '    je .rt_flush_loop',
+        '    test rax, rax',
+        '    jle .rt_flush_done',
+        '    add rbx, rax',
+        '    sub r12, rax',
+        '    jmp .rt_flush_loop',
+        '.rt_flush_done:',
+        '    mov qword [rel __rt_out_len], 0',
+        '    pop r12',
+        '    pop rbx',
+        '    ret',
+        '',
+        '; dil - символ',
+        '__rt_putc:',
+        '    mov rax, [rel __rt_out_len]',
+        f'    cmp rax, {BUFFER_SIZE}',
+        '    jb .rt_putc_store',
+        '    push rdi',
+        f'    call {FLUSH_SYMBOL}',
+        '    pop rdi',
+        '    xor eax, eax',
+        '.rt_putc_store:',
+        '    lea rcx, [rel __rt_out_buf]',
+        '    add rcx, rax',
+        '    mov [rcx], dil',
+        '    inc rax',
+        '    mov [rel __rt_out_len], rax',
+        '    mov eax, 1',
+        '    ret',
+        '',
+        '; rdi - строка с нулевым окончанием; eax - число выведенных символов',
+        '__rt_puts:',
+        '    mov rsi, rdi',
+        '    mov r8, rdi',
+        '    lea rdi, [rel __rt_out_buf]',
+        '    add rdi, [rel __rt_out_len]',
+        f'    lea rdx, [rel __rt_out_buf + {BUFFER_SIZE}]',
+        '.rt_puts_loop:',
+        '    movzx eax, byte [rsi]',
+        '    test eax, eax',
+        '    jz .rt_puts_done',
+        '    cmp rdi, rdx',
+        '    jb .rt_puts_store',
+        '    lea rcx, [rel __rt_out_buf]',
+        '    sub rdi, rcx',
+        '    mov [rel __rt_out_len], rdi',
+        '    push rsi',
+        f'    call {FLUSH_SYMBOL}',
+        '    pop rsi',
+        '    movzx eax, byte [rsi]',
+        '    lea rdi, [rel __rt_out_buf]',
+        f'    lea rdx, [rel __rt_out_buf + {BUFFER_SIZE}]',
+        '.rt_puts_store:',
+        '    mov [rdi], al',
+        '    inc rdi',
+        '    inc rsi',
+        '    jmp .rt_puts_loop',
+        '.rt_puts_done:',
+        '    lea rcx, [rel __rt_out_buf]',
+        '    sub rdi, rcx',
+        '    mov [rel __rt_out_len], rdi',
+        '    mov rax, rsi',
+        '    sub rax, r8',
+        '    ret',
+        '',
+        '; edi - целое со знаком',
+        '__rt_put_int:',
+        '    mov eax, edi',
+        '    lea rsi, [rel __rt_digits + 15]',
+        '    mov byte [rsi], 0',
+        '    test eax, eax',
+        '    jns .rt_put_int_loop',
+        '    neg eax',
+        '.rt_put_int_loop:',
+        '    xor edx, edx',
+        '    mov ecx, 10',
+        '    div ecx',
+        "    add dl, '0'",
+        '    dec rsi',
+        '    mov [rsi], dl',
+        '    test eax, eax',
+        '    jnz .rt_put_int_loop',
+        '    test edi, edi',
+        '    jns .rt_put_int_out',
+        '    dec rsi',
+        "    mov byte [rsi], '-'",
+        '.rt_put_int_out:',
+        '    mov rdi, rsi',
+        '    jmp __rt_puts',
+        '',
+        '; rdi - формат, rsi, rdx, rcx, r8, r9 - аргументы (%d, %i, %c, %s, %%)',
+        '; Возвращает число выведенных символов, как printf из libc',
+        '__rt_printf:',
+        '    push rbx',
+        '    push r12',
+        '    push r13',
+        '    push r9',
+        '    push r8',
+        '    push rcx',
+        '    push rdx',
+        '    push rsi',
+        '    mov rbx, rdi',
+        '    mov r12, rsp ; текущий аргумент',
+        '    xor r13d, r13d ; выведено символов',
+        '.rt_printf_loop:',
+        '    movzx eax, byte [rbx]',
+        '    inc rbx',
+        '    test eax, eax',
+        '    jz .rt_printf_done',
+        "    cmp eax, '%'",
+        '    je .rt_printf_spec',
+        '.rt_printf_char:',
+        '    mov edi, eax',
+        '    call __rt_putc',
+        '    inc r13d',
+        '    jmp .rt_printf_loop',
+        '.rt_printf_spec:',
+        '    movzx eax, byte [rbx]',
+        '    test eax, eax',
+        '    jz .rt_printf_done',
+        '    inc rbx',
+        "    cmp eax, 'd'",
+        '    je .rt_printf_int',
+        "    cmp eax, 'i'",
+        '    je .rt_printf_int',
+        "    cmp eax, 'c'",
+        '    je .rt_printf_chr',
+        "    cmp eax, 's'",
+        '    je .rt_printf_str',
+        '    jmp .rt_printf_char ; %%',
+        '.rt_printf_int:',
+        '    mov edi, [r12]',
+        '    add r12, 8',
+        '    call __rt_put_int',
+        '    add r13d, eax',
+        '    jmp .rt_printf_loop',
+        '.rt_printf_chr:',
+        '    movzx edi, byte [r12]',
+        '    add r12, 8',
+        '    call __rt_putc',
+        '    inc r13d',
+        '    jmp .rt_printf_loop',
+        '.rt_printf_str:',
+        '    mov rdi, [r12]',
+        '    add r12, 8',
+        '    call __rt_puts',
+        '    add r13d, eax',
+        '    jmp .rt_printf_loop',
+        '.rt_printf_done:',
+        '    mov eax, r13d',
+        '    add rsp, 40',
+        '    pop r13',
+        '    pop r12',
+        '    pop rbx',
+        '    ret',
+        '',
+        '; Заполнение буфера ввода; перед чтением выводится накопленный вывод',
+        '; (приглашение к вводу). Возвращает число прочитанных байт, 0 - конец ввода',
+        '__rt_fill:',
+        f'    call {FLUSH_SYMBOL}',
+        '.rt_fill_retry:',
+        '    xor eax, eax',
+        '    xor edi, edi',
+        '    lea rsi, [rel __rt_in_buf]',
+        f'    mov edx, {BUFFER_SIZE}',
+        '    syscall',
+        '    cmp rax, -4 ; EINTR',
+        '    je .rt_fill_retry',
+        '    mov qword [rel __rt_in_pos], 0',
+        '    test rax, rax',
+        '    jg .rt_fill_store',
+        '    xor eax, eax',
+        '.rt_fill_store:',
+        '    mov [rel __rt_in_len], rax',
+        '    ret',
+        '',
+        '; Следующий символ ввода без извлечения: eax = символ или -1',
+        '__rt_peek:',
+        '    mov rax, [rel __rt_in_pos]',
+        '    cmp rax, [rel __rt_in_len]',
+        '    jb .rt_peek_ready',
+        '    call __rt_fill',
+        '    test rax, rax',
+        '    jz .rt_peek_eof',
+        '    xor eax, eax',
+        '.rt_peek_ready:',
+        '    lea rcx, [rel __rt_in_buf]',
+        '    add rcx, rax',
+        '    movzx eax, byte [rcx]',
+        '    ret',
+        '.rt_peek_eof:',
+        '    mov eax, -1',
+        '    ret',
+        '',
+        '__rt_skip_space:',
+        '    call __rt_peek',
+        "    cmp eax, ' '",
+        '    je .rt_skip_next',
+        '    mov ecx, eax',
+        '    sub ecx, 9',
+        '    cmp ecx, 4 ; \\t \\n \\v \\f \\r',
+        '    ja .rt_skip_done',
+        '.rt_skip_next:',
+        '    inc qword [rel __rt_in_pos]',
+        '    jmp __rt_skip_space',
+        '.rt_skip_done:',
+        '    ret',
+        '',
+        '; eax - значение, edx - 0 прочитано, 1 нет числа, -1 конец ввода',
+        '__rt_read_int:',
+        '    push rbx',
+        '    push r12',
+        '    push r13',
+        '    call __rt_skip_space',
+        '    xor ebx, ebx',
+        '    xor r12d, r12d',
+        '    xor r13d, r13d',
+        '    call __rt_peek',
+        '    test eax, eax',
+        '    js .rt_read_eof',
+        "    cmp eax, '-'",
+        '    jne .rt_read_plus',
+        '    mov r12d, 1',
+        '    jmp .rt_read_sign',
+        '.rt_read_plus:',
+        "    cmp eax, '+'",
+        '    jne .rt_read_digit',
+        '.rt_read_sign:',
+        '    inc qword [rel __rt_in_pos]',
+        '.rt_read_next:',
+        '    call __rt_peek',
+        '.rt_read_digit:',
+        '    mov ecx, eax',
+        "    sub ecx, '0'",
+        '    cmp ecx, 9',
+        '    ja .rt_read_end',
+        '    imul ebx, ebx, 10',
+        '    add ebx, ecx',
+        '    inc r13d',
+        '    inc qword [rel __rt_in_pos]',
+        '    jmp .rt_read_next',
+        '.rt_read_end:',
+        '    xor edx, edx',
+        '    test r13d, r13d',
+        '    jnz .rt_read_value',
+        '    mov edx, 1',
+        '.rt_read_value:',
+        '    mov eax, ebx',
+        '    test r12d, r12d',
+        '    jz .rt_read_ret',
+        '    neg eax',
+        '.rt_read_ret:',
+        '    pop r13',
+        '    pop r12',
+        '    pop rbx',
+        '    ret',
+        '.rt_read_eof:',
+        '    mov edx, -1',
+        '    jmp .rt_read_ret',
+        '',
+        '; rdi - адрес целого; значение записывается, только если число прочитано',
+        '__rt_scan_int:',
+        '    push rdi',
+        '    call __rt_read_int',
+        '    pop rdi',
+        '    test edx, edx',
+        '    jnz .rt_scan_int_done',
+        '    mov [rdi], eax',
+        '.rt_scan_int_done:',
+        '    ret',
+        '',
+        '; rdi - адрес символа',
+        '__rt_scan_char:',
+        '    push rdi',
+        '    call __rt_peek',
+        '    pop rdi',
+        '    test eax, eax',
+        '    js .rt_scan_char_done',
+        '    inc qword [rel __rt_in_pos]',
+        '    mov [rdi], al',
+        '.rt_scan_char_done:',
+        '    ret',
+        '',
+        '; rdi - формат, rsi, rdx, rcx, r8, r9 - адреса (%d, %i, %c)',
+        '; Возвращает число прочитанных значений, -1 - конец ввода до первого значения',
+        '__rt_scanf:',
+        '    push rbx',
+        '    push r12',
+        '    push r13',
+        '    push r14',
+        '    push r9',
+        '    push r8',
+        '    push rcx',
+        '    push rdx',
+        '    push rsi',
+        '    mov rbx, rdi',
+        '    mov r12, rsp ; текущий адрес',
+        '    xor r13d, r13d ; прочитано значений',
+        '.rt_scanf_loop:',
+        '    movzx eax, byte [rbx]',
+        '    inc rbx',
+        '    test eax, eax',
+        '    jz .rt_scanf_done',
+        "    cmp eax, '%'",
+        '    je .rt_scanf_spec',
+        "    cmp eax, ' '",
+        '    je .rt_scanf_space',
+        '    mov ecx, eax',
+        '    sub ecx, 9',
+        '    cmp ecx, 4',
+        '    jbe .rt_scanf_space',
+        '    mov r14d, eax ; символ формата должен совпасть с вводом',
+        '    call __rt_peek',
+        '    test eax, eax',
+        '    js .rt_scanf_eof',
+        '    cmp eax, r14d',
+        '    jne .rt_scanf_done',
+        '    inc qword [rel __rt_in_pos]',
+        '    jmp .rt_scanf_loop',
+        '.rt_scanf_space:',
+        '    call __rt_skip_space',
+        '    jmp .rt_scanf_loop',
+        '.rt_scanf_spec:',
+        '    movzx eax, byte [rbx]',
+        '    inc rbx',
+        "    cmp eax, 'c'",
+        '    je .rt_scanf_chr',
+        "    cmp eax, 'd'",
+        '    je .rt_scanf_int',
+        "    cmp eax, 'i'",
+        '    je .rt_scanf_int',
+        '    jmp .rt_scanf_done',
+        '.rt_scanf_chr:',
+        '    call __rt_peek',
+        '    test eax, eax',
+        '    js .rt_scanf_eof',
+        '    inc qword [rel __rt_in_pos]',
+        '    mov rcx, [r12]',
+        '    mov [rcx], al',
+        '    add r12, 8',
+        '    inc r13d',
+        '    jmp .rt_scanf_loop',
+        '.rt_scanf_int:',
+        '    call __rt_read_int',
+        '    test edx, edx',
+        '    js .rt_scanf_eof',
+        '    jnz .rt_scanf_done',
+        '    mov rcx, [r12]',
+        '    mov [rcx], eax',
+        '    add r12, 8',
+        '    inc r13d',
+        '    jmp .rt_scanf_loop',
+        '.rt_scanf_eof:',
+        '    test r13d, r13d',
+        '    jnz .rt_scanf_done',
+        '    mov r13d, -1',
+        '.rt_scanf_done:',
+        '    mov eax, r13d',
+        '    add rsp, 40',
+        '    pop r14',
+        '    pop r13',
+        '    pop r12',
+        '    pop rbx',
+        '    ret',
+        '',
+        '; edi - код возврата; буфер вывода сбрасывается перед выходом',
+        '__rt_exit:',
+        '    push rdi',
+        f'    call {FLUSH_SYMBOL}',
+        '    pop rdi',
+        '    mov eax, 231 ; exit_group',
+        '    syscall',
+        '',
+    ]
@@ -1,18 +1,55 @@
 import re
-from typing import List, Dict, Optional, Any, Set, Tuple
-from control_flow import FunctionInfo, Operation, OperationType, VariableInfo, TypeSystem, BasicBlock
+from typing import List, Dict, Optional, Any, Set, Tuple, Iterator, IO
+from control_flow import (FunctionInfo, Operation, OperationType, VariableInfo, TypeSystem, BasicBlock,
+                          string_literals)
+from generators.x86_encoder import build_elf_object
+from generators.asm_emitter import AsmEmitter, join_chunks, iter_lines
+from generators.generator_state import PerCompilationState
+from generators.parallel_codegen import resolve_jobs, use_parallel, generate_in_processes
+from generators.linux_runtime import (RUNTIME_FUNCTIONS, LOWERED_FUNCTIONS, FLUSH_SYMBOL,
+                                      UnsupportedFormatError, check_format, runtime_lines,
+                                      standard_calls)
+from format_lowering import FormatLowering, PRINT_LITERAL, SCAN_INT, SCAN_CHAR
+from profiling import (ProfileLayout, DEFAULT_PROFILE_PATH, COUNTERS_SYMBOL, HEADER_SYMBOL,
+                       PATH_SYMBOL, MODE_SYMBOL, DUMP_SYMBOL, PROFILE_HEADER)
+from port.identifiers import clean_identifier
 
-class LinuxX86AsmGenerator:
+class LinuxX86AsmGenerator(PerCompilationState):
     """Генератор ассемблерного кода x86-64 для Linux"""
     
-    def __init__(self):
+    def __init__(self, profile: bool = False, profile_path: str = DEFAULT_PROFILE_PATH,
+                 runtime: str = 'libc', freestanding: bool = False, jobs: int = 1):
+        # Linux calling convention registers
+        self.arg_registers = ['rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9']
+        # Инструментирование: счетчик выполнений на каждый базовый блок
+        self.profile = profile
+        self.profile_path = profile_path
+        self.profile_layout: Optional[ProfileLayout] = None
+        # Реализация printf/scanf/exit: 'libc' или встроенный буферизованный 'fast'
+        if runtime not in ('libc', 'fast'):
+            raise ValueError(f'неизвестный runtime "{runtime}"')
+        self.runtime = runtime
+        # Своя точка входа _start без стартового кода libc: нужен быстрый runtime
+        if freestanding and runtime != 'fast':
+            raise ValueError('freestanding требует runtime fast')
+        if freestanding and profile:
+            raise ValueError('профилирование использует libc и несовместимо с freestanding')
+        self.freestanding = freestanding
+        # Процессов для генерации функций (0 - по числу ядер)
+        self.jobs = resolve_jobs(jobs)
+        self._reset_state()
+
+    def _reset_state(self):
         self.string_constants: Dict[str, int] = {}
         self.next_const_id = 0
         self.var_offsets: Dict[str, int] = {}
         self.label_counter = 0
         self.functions: List[FunctionInfo] = []  # Список всех функций
-        # Linux calling convention registers
-        self.arg_registers = ['rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9']
+        self.profile_layout: Optional[ProfileLayout] = None
+        # Операции блоков после разбора форматов printf/scanf (только для runtime fast)
+        self.lowered_operations: Dict[int, List[Operation]] = {}
+        # Разобранные операции всех функций для параллельной генерации
+        self.lowered_functions: List[Dict[int, List[Operation]]] = []
     
     def _escape_string_for_nasm(self, string: str) -> str:
         """Экранирует строку для NASM, сохраняя строки как единые литералы"""
@@ -99,74 +136,155 @@ class LinuxX86AsmGenerator:
     
     def generate_program(self, functions: List[FunctionInfo]) -> str:
         """Генерирует программу на основе реальных функций"""
+        return join_chunks(self.emit_program(functions))
+
+    def write_program(self, functions: List[FunctionInfo], sink: IO) -> int:
+        """Пишет программу в приемник по мере генерации функций; возвращает число строк"""
+        return AsmEmitter(sink).emit_all(self.emit_program(functions))
+
+    def emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
+        """Программа фрагментами: заголовок, код каждой функции, затем таблица данных.
+        Строковые константы получают номера по ходу генерации, а секция .data
+        дописывается последней - метки str_N до нее служат заполнителями"""
+        return self._session()._emit_program(functions)
+
+    def _emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
         self.functions = functions  # Сохраняем список функций
+        if self.freestanding:
+            self._check_freestanding(functions)
+        if self.profile:
+            self.profile_layout = ProfileLayout(functions, self.profile_path)
+        lowering = FormatLowering() if self.runtime == 'fast' else None
         
-        # Собираем все строковые константы
-        for func in functions:
-            self._collect_strings_from_function(func)
-        
-        asm_lines = [
+        header = [
             'default rel',
-            'global main',
-            'extern printf, scanf, exit',
+            'global _start' if self.freestanding else 'global main',
+        ]
+        if self.runtime == 'libc':
+            header.append('extern printf, scanf, exit')
+        if self.profile:
+            header.append('extern atexit, fopen, fwrite, fclose')
+        header.extend([
+            '',
+            'section .text',
+            ''
+        ])
+        yield header
+        
+        if use_parallel(self.jobs, len(functions)):
+            # Строки всех функций нумеруются заранее в том же порядке, что и при
+            # последовательной генерации: текст программы не зависит от числа процессов
+            for func in functions:
+                if lowering:
+                    self.lowered_operations = lowering.lower_function(func)
+                    self.lowered_functions.append(self.lowered_operations)
+                self._collect_strings_from_function(func)
+            yield from generate_in_processes(self._generate_function_at, len(functions), self.jobs)
+            self.lowered_functions = []
+        else:
+            # Генерируем функции: разбор форматов и сбор строк - только для текущей функции
+            for func in functions:
+                if lowering:
+                    self.lowered_operations = lowering.lower_function(func)
+                self._collect_strings_from_function(func)
+                yield self._generate_function_asm(func)
+        self.lowered_operations = {}
+        if self.profile:
+            yield self._generate_profile_dump()
+        if self.freestanding:
+            yield self._generate_entry_point()
+        if self.runtime == 'fast':
+            yield runtime_lines()
+        
+        data = [
             '',
             'section .data',
         ]
-        
-        # Добавляем строковые константы
         for string, const_id in sorted(self.string_constants.items(), key=lambda x: x[1]):
             nasm_string = self._escape_string_for_nasm(string)
-            asm_lines.append(f'    str_{const_id} db {nasm_string}, 0')
-        
-        asm_lines.extend([
+            data.append(f'    str_{const_id} db {nasm_string}, 0')
+        if self.profile:
+            data.extend(self._generate_profile_data())
+        data.extend([
             '',
             'section .bss',
             '    ; Global variables',
-            '',
-            'section .text',
-            ''
         ])
-        
-        # Генерируем все функции
-        for func in functions:
-            asm_lines.extend(self._generate_function_asm(func))
-        
-        return '\n'.join(asm_lines)
-    
+        if self.profile:
+            data.append(f'    {COUNTERS_SYMBOL} resq {len(self.profile_layout)}')
+        yield data
+
+    def generate_object(self, functions: List[FunctionInfo], source_name: Optional[str] = None,
+                        sink: Optional[IO] = None) -> bytes:
+        """Генерирует объектный файл ELF64 без вызова внешнего ассемблера.
+        С приемником sink туда же пишется текст программы из того же прохода генерации"""
+        chunks = self.emit_program(functions)
+        if sink is not None:
+            chunks = AsmEmitter(sink).tee(chunks)
+        return build_elf_object(iter_lines(chunks), source_name)
+
+    def _generate_profile_data(self) -> List[str]:
+        """Заголовок файла профиля и аргументы fopen"""
+        header = ', '.join(str(word) for word in self.profile_layout.header_words())
+        return [
+            f'    {HEADER_SYMBOL} dd {header}',
+            f'    {PATH_SYMBOL} db {self._escape_string_for_nasm(self.profile_path)}, 0',
+            f'    {MODE_SYMBOL} db "wb", 0',
+        ]
+
+    def _generate_profile_dump(self) -> List[str]:
+        """Функция записи счетчиков в файл, регистрируется через atexit в main"""
+        return [
+            f'; {"="*50}',
+            '; Profile dump',
+            f'; {"="*50}',
+            f'{DUMP_SYMBOL}:',
+            '    push rbx',
+            f'    lea rdi, [rel {PATH_SYMBOL}]',
+            f'    lea rsi, [rel {MODE_SYMBOL}]',
+            '    call fopen',
+            '    test rax, rax',
+            '    jz .prof_done',
+            '    mov rbx, rax',
+            f'    lea rdi, [rel {HEADER_SYMBOL}]',
+            '    mov esi, 1',
+            f'    mov edx, {PROFILE_HEADER.size}',
+            '    mov rcx, rbx',
+            '    call fwrite',
+            f'    lea rdi, [rel {COUNTERS_SYMBOL}]',
+            '    mov esi, 8',
+            f'    mov edx, {len(self.profile_layout)}',
+            '    mov rcx, rbx',
+            '    call fwrite',
+            '    mov rdi, rbx',
+            '    call fclose',
+            '.prof_done:',
+            '    pop rbx',
+            '    ret',
+            '',
+        ]
+
     def _collect_strings_from_function(self, func: FunctionInfo):
         """Собирает строковые константы из функции"""
-        visited = set()
-        stack = [func.cfg.entry_block]
-        
-        while stack:
-            block = stack.pop()
-            if block.id in visited:
-                continue
-            visited.add(block.id)
-            
-            for op in block.operations:
-                if op.value and (op.value.startswith('"') or op.value.startswith("'")):
-                    string_val = op.value.strip('"\'')
-                    # Уже обработано escape-последовательности в парсере
-                    if string_val not in self.string_constants:
-                        self.string_constants[string_val] = self.next_const_id
-                        self.next_const_id += 1
-                
-                if op.type == OperationType.CALL:
-                    for arg_op in op.args:
-                        if arg_op.value and (arg_op.value.startswith('"') or arg_op.value.startswith("'")):
-                            string_val = arg_op.value.strip('"\'')
-                            if string_val not in self.string_constants:
-                                self.string_constants[string_val] = self.next_const_id
-                                self.next_const_id += 1
-            
-            if block.next_block:
-                stack.append(block.next_block)
-            if block.true_branch:
-                stack.append(block.true_branch)
-            if block.false_branch:
-                stack.append(block.false_branch)
+        if self.lowered_operations:
+            # Разобранные форматы дают новые литералы: проходим по уже упорядоченным блокам
+            strings = []
+            for block in func.view.blocks:
+                strings.extend(string_literals(self._block_operations(block)))
+        else:
+            strings = func.view.strings
+        for string_val in strings:
+            # Уже обработано escape-последовательности в парсере
+            if string_val not in self.string_constants:
+                self.string_constants[string_val] = self.next_const_id
+                self.next_const_id += 1
     
+    def _generate_function_at(self, index: int) -> List[str]:
+        """Код функции с номером index (в процессе параллельной генерации)"""
+        if self.lowered_functions:
+            self.lowered_operations = self.lowered_functions[index]
+        return self._generate_function_asm(self.functions[index])
+
     def _generate_function_asm(self, func: FunctionInfo) -> List[str]:
         """Генерирует ассемблерный код для функции на основе CFG"""
 
@@ -194,13 +312,17 @@ class LinuxX86AsmGenerator:
         
         # Пролог
         asm_lines.extend(self._generate_function_prologue(func, local_vars))
+        if self.profile and func.name == 'main':
+            asm_lines.extend([
+                f'    lea rdi, [rel {DUMP_SYMBOL}]',
+                '    call atexit',
+            ])
         
         # Генерируем код из CFG
-        processed_blocks = set()
-        asm_lines.extend(self._generate_cfg_code(func.cfg.entry_block, processed_blocks, func, local_vars))
+        asm_lines.extend(self._generate_cfg_code(func, local_vars))
         
-        # Если не было выхода из функции, добавляем эпилог
-        if not any(line.startswith(f'.{func.name}_exit') for line in asm_lines):
+        # Эпилог нужен, если управление может выйти из функции
+        if func.view.exit_reachable:
             asm_lines.extend(self._generate_function_epilogue(func))
         
         asm_lines.append('')
@@ -220,42 +342,13 @@ class LinuxX86AsmGenerator:
 
         
         # Также из операций DECLARE в CFG
-        if hasattr(func, 'cfg') and hasattr(func.cfg, 'entry_block'):
-            visited = set()
-            stack = [func.cfg.entry_block]
-            
-            while stack:
-                block = stack.pop()
-                if block.id in visited:
-                    continue
-                visited.add(block.id)
-                
-                for op in block.operations:
-                    if op.type == OperationType.DECLARE and op.value:
-                        var_name = op.value
-                        # Очищаем имя переменной от -> type
-                        var_name = self._clean_var_name(var_name)
-                        var_type = op.var_type if op.var_type else 'int'
-                        if var_name not in local_vars:
-                            local_vars[var_name] = var_type
-                
-                if block.next_block:
-                    stack.append(block.next_block)
-                if block.true_branch:
-                    stack.append(block.true_branch)
-                if block.false_branch:
-                    stack.append(block.false_branch)
+        for var_name, var_type in func.view.declarations:
+            if var_name not in local_vars:
+                local_vars[var_name] = var_type
         
         return local_vars
     
-    def _clean_var_name(self, var_name: str) -> str:
-        """Очищает имя переменной от -> type"""
-        if not var_name:
-            return var_name
-        # Извлекаем только имя переменной до ->
-        if '->' in var_name:
-            return var_name.split('->')[0].strip()
-        return var_name
+    _clean_var_name = staticmethod(clean_identifier)
     
     def _get_var_offset(self, var_name: str) -> Optional[int]:
         """Получает смещение переменной, очищая имя при необходимости"""
@@ -348,45 +441,120 @@ class LinuxX86AsmGenerator:
         """Генерирует эпилог функции"""
         exit_label = f'.{func.name}_exit'
         
-        return [
-            f'{exit_label}:',
+        lines = [f'{exit_label}:']
+        if self.runtime == 'fast' and func.name == 'main':
+            # Буфер быстрого runtime сбрасывается до возврата в стартовый код
+            lines.extend([
+                '    push rax',
+                f'    call {FLUSH_SYMBOL}',
+                '    pop rax',
+            ])
+        lines.extend([
             '    mov rsp, rbp',
             '    pop rbp',
             '    ret'
+        ])
+        return lines
+
+    def _generate_entry_point(self) -> List[str]:
+        """Точка входа: ядро передает управление с выровненным стеком, argc в [rsp]"""
+        return [
+            f'; {"="*50}',
+            '; Entry point',
+            f'; {"="*50}',
+            '_start:',
+            '    xor ebp, ebp ; конец цепочки кадров',
+            '    mov rdi, [rsp] ; argc',
+            '    lea rsi, [rsp + 8] ; argv',
+            '    and rsp, -16',
+            '    call main',
+            '    mov edi, eax',
+            f'    call {RUNTIME_FUNCTIONS["exit"]}',
+            '',
         ]
-    
-    def _generate_cfg_code(self, block: BasicBlock, processed: set, 
-                          func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
-        """Генерирует код из CFG"""
-        if not block or block.id in processed:
-            return []
-        
-        processed.add(block.id)
+
+    def _check_freestanding(self, functions: List[FunctionInfo]):
+        """Без libc программа может вызывать только свои функции и функции runtime"""
+        available = {func.name for func in functions} | set(RUNTIME_FUNCTIONS)
+        if 'main' not in available:
+            raise ValueError('freestanding: в программе нет функции main')
+        for func in functions:
+            for block in func.view.blocks:
+                nodes = list(block.operations)
+                while nodes:
+                    node = nodes.pop()
+                    if node is None:
+                        continue
+                    if node.type == OperationType.CALL and node.value not in available:
+                        raise ValueError(f'freestanding: функция {node.value} (вызов в {func.name}, '
+                                         f'строка {node.line}) не реализована без libc')
+                    nodes.extend([node.left, node.right, *node.args])
+                # Результат стандартной функции внутри выражения генерируется как вызов libc
+                for op in block.operations:
+                    for call, routed in standard_calls(op):
+                        if not routed:
+                            raise ValueError(f'freestanding: {call.value} внутри выражения (вызов в {func.name}, '
+                                             f'строка {call.line}) не реализован без libc')
+
+    def _block_operations(self, block: BasicBlock) -> List[Operation]:
+        return self.lowered_operations.get(block.id, block.operations)
+
+    def _generate_lowered_call(self, op: Operation, func_name: str,
+                               local_vars: Dict[str, str]) -> List[str]:
+        """Вызов функции runtime вместо разобранного на этапе компиляции printf/scanf"""
         lines = []
-        
-        # Добавляем метку блока
-        lines.append(f'.L{func.name}_block_{block.id}:')
-        
-        # Генерируем ВСЕ операции блока
-        for op in block.operations:
-            op_lines = self._generate_operation(op, func, local_vars)
-            if op_lines:
-                lines.extend(op_lines)
+        arg_op = op.args[0] if op.args else None
+        if func_name == PRINT_LITERAL:
+            const_id = self.string_constants.get(arg_op.value.strip('"\''))
+            lines.append(f'    lea rdi, [str_{const_id}]')
+        elif arg_op is not None:
+            value = arg_op.value
+            clean_value = self._clean_var_name(value)
+            offset = self._get_var_offset(clean_value)
+            if offset is None:
+                lines.append(f'    mov edi, {int(value)}')
+            elif func_name in (SCAN_INT, SCAN_CHAR):
+                lines.append(f'    lea rdi, [rbp{offset:+d}] ; &{clean_value}')
+            elif local_vars.get(clean_value) == 'char':
+                lines.append(f'    movsx edi, byte [rbp{offset:+d}] ; {clean_value}')
+            elif local_vars.get(clean_value) == 'int':
+                lines.append(f'    mov edi, [rbp{offset:+d}] ; {clean_value}')
             else:
-                lines.append(f'    ; No code generated for operation {op.type.name}')
-        
-        # Обрабатываем переходы
-        jump_lines = self._generate_block_jumps(block, func)
-        if jump_lines:
-            lines.extend(jump_lines)
-        
-        # Рекурсивно обрабатываем связанные блоки
-        if block.next_block and block.next_block.id not in processed:
-            lines.extend(self._generate_cfg_code(block.next_block, processed, func, local_vars))
-        if block.true_branch and block.true_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.true_branch, processed, func, local_vars))
-        if block.false_branch and block.false_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.false_branch, processed, func, local_vars))
+                lines.append(f'    mov rdi, [rbp{offset:+d}] ; {clean_value}')
+        lines.append(f'    call {LOWERED_FUNCTIONS[func_name]}')
+        return lines
+
+    def _runtime_function(self, op: Operation, func_name: str) -> str:
+        """Имя вызываемой стандартной функции с учетом выбранного runtime"""
+        if self.runtime == 'libc':
+            return func_name
+        if func_name in ('printf', 'scanf'):
+            fmt = op.args[0].value if op.args and op.args[0].value else ''
+            if not fmt.startswith('"'):
+                raise UnsupportedFormatError(f'{func_name}: быстрый runtime требует строковый литерал формата')
+            check_format(func_name, fmt.strip('"'))
+        return RUNTIME_FUNCTIONS[func_name]
+    
+    def _generate_cfg_code(self, func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
+        """Генерирует код из CFG: один проход по блокам в порядке обхода"""
+        lines = []
+        for block in func.view.blocks:
+            # Добавляем метку блока
+            lines.append(f'.L{func.name}_block_{block.id}:')
+            if self.profile:
+                offset = self.profile_layout.offset(func.name, block.id)
+                lines.append(f'    inc qword [rel {COUNTERS_SYMBOL} + {offset}]')
+            
+            # Генерируем ВСЕ операции блока
+            for op in self._block_operations(block):
+                op_lines = self._generate_operation(op, func, local_vars)
+                if op_lines:
+                    lines.extend(op_lines)
+                else:
+                    lines.append(f'    ; No code generated for operation {op.type.name}')
+            
+            # Обрабатываем переходы
+            lines.extend(self._generate_block_jumps(block, func))
         
         return lines
     
@@ -466,7 +634,9 @@ class LinuxX86AsmGenerator:
             # Проверяем, стандартная ли это функция
             is_standard = func_name in ['printf', 'scanf', 'exit']
             
-            if is_standard:
+            if func_name in LOWERED_FUNCTIONS:
+                lines.extend(self._generate_lowered_call(op, func_name, local_vars))
+            elif is_standard:
                 # Стандартные функции
                 arg_code = self._prepare_standard_function_args(op, func_name, local_vars)
                 if arg_code:
@@ -474,7 +644,7 @@ class LinuxX86AsmGenerator:
                     # Для varargs функций (printf, scanf) нужно обнулить AL
                     if func_name in ['printf', 'scanf']:
                         lines.append('    xor eax, eax ; для varargs функций')
-                    lines.append(f'    call {func_name}')
+                    lines.append(f'    call {self._runtime_function(op, func_name)}')
             else:
                 # Пользовательские функции
                 arg_code = self._prepare_user_function_args(op, func_name, local_vars)
@@ -726,7 +896,10 @@ class LinuxX86AsmGenerator:
                         lines.append('    xor eax, eax')
                 
                 # Вызываем функцию
-                lines.append(f'    call {func_name}')
+                if func_name in ['printf', 'scanf', 'exit']:
+                    lines.append(f'    call {self._runtime_function(op.right, func_name)}')
+                else:
+                    lines.append(f'    call {func_name}')
                 
                 # Сохраняем результат
                 if dest_var:
@@ -0,0 +1,506 @@
+from typing import List, Dict, Optional, Tuple
+from control_flow import FunctionInfo, Operation, OperationType, BasicBlock
+from port.builtin_functions import BuiltinFunctions
+from port.identifiers import clean_identifier
+from generators.generator_state import PerCompilationState
+
+
+class LlvmIrGenerator(PerCompilationState):
+    """Генератор текстового LLVM IR (локальные переменные через alloca для mem2reg)"""
+
+    INT_BINARY = {
+        OperationType.ADD: 'add',
+        OperationType.SUB: 'sub',
+        OperationType.MUL: 'mul',
+        OperationType.DIV: 'sdiv',
+        OperationType.MOD: 'srem',
+    }
+
+    FLOAT_BINARY = {
+        OperationType.ADD: 'fadd',
+        OperationType.SUB: 'fsub',
+        OperationType.MUL: 'fmul',
+        OperationType.DIV: 'fdiv',
+        OperationType.MOD: 'frem',
+    }
+
+    INT_COMPARE = {
+        OperationType.EQ: 'eq',
+        OperationType.NE: 'ne',
+        OperationType.LT: 'slt',
+        OperationType.LE: 'sle',
+        OperationType.GT: 'sgt',
+        OperationType.GE: 'sge',
+    }
+
+    FLOAT_COMPARE = {
+        OperationType.EQ: 'oeq',
+        OperationType.NE: 'une',
+        OperationType.LT: 'olt',
+        OperationType.LE: 'ole',
+        OperationType.GT: 'ogt',
+        OperationType.GE: 'oge',
+    }
+
+    INT_BITS = {'i1': 1, 'i8': 8, 'i32': 32, 'i64': 64}
+
+    def __init__(self, opaque_pointers: bool = False):
+        # LLVM до 15 версии по умолчанию использует типизированные указатели
+        self.opaque_pointers = opaque_pointers
+        self.ptr = 'ptr' if opaque_pointers else 'i8*'
+        self._reset_state()
+
+    def _reset_state(self):
+        self.functions: List[FunctionInfo] = []
+        self.string_constants: Dict[str, Tuple[str, int]] = {}
+        self.next_const_id = 0
+        self.used_builtins: List[str] = []
+        # Состояние текущей функции
+        self.lines: List[str] = []
+        self.next_temp = 0
+        self.var_types: Dict[str, str] = {}
+        self.current_func: Optional[FunctionInfo] = None
+
+    def _llvm_type(self, type_name: Optional[str]) -> str:
+        """Отображение типов языка Simple в типы LLVM"""
+        types = {
+            'int': 'i32',
+            'char': 'i8',
+            'bool': 'i32',
+            'float': 'float',
+            'double': 'double',
+            'string': self.ptr,
+            'void*': self.ptr,
+            'void': 'void',
+        }
+        return types.get(type_name or 'int', 'i32')
+
+    def _pointer_to(self, llvm_type: str) -> str:
+        return 'ptr' if self.opaque_pointers else f'{llvm_type}*'
+
+    def _encode_ir_string(self, data: bytes) -> str:
+        """Кодирует байты для строковой константы LLVM"""
+        result = []
+        for byte in data:
+            if 32 <= byte <= 126 and byte not in (ord('"'), ord('\\')):
+                result.append(chr(byte))
+            else:
+                result.append(f'\\{byte:02X}')
+        return ''.join(result)
+
+    def _add_string_constant(self, string: str) -> str:
+        if string not in self.string_constants:
+            name = f'@.str.{self.next_const_id}'
+            self.next_const_id += 1
+            self.string_constants[string] = (name, len(string.encode('utf-8')) + 1)
+        return self.string_constants[string][0]
+
+    def generate_program(self, functions: List[FunctionInfo]) -> str:
+        """Генерирует модуль LLVM IR на основе реальных функций"""
+        return self._session()._generate_program(functions)
+
+    def _generate_program(self, functions: List[FunctionInfo]) -> str:
+        self.functions = functions
+
+        body = []
+        for func in functions:
+            body.extend(self._generate_function(func))
+
+        ir_lines = ["; ModuleID = 'simple'", '']
+
+        for string, (name, size) in self.string_constants.items():
+            encoded = self._encode_ir_string(string.encode('utf-8') + b'\0')
+            ir_lines.append(f'{name} = private unnamed_addr constant [{size} x i8] c"{encoded}", align 1')
+        if self.string_constants:
+            ir_lines.append('')
+
+        for name in self.used_builtins:
+            info = BuiltinFunctions.get_function_info(name)
+            params = [self._llvm_type(param_type) for _, param_type in info['parameters']]
+            if info.get('variadic'):
+                params.append('...')
+            ir_lines.append(f'declare {self._llvm_type(info["return_type"])} @{name}({", ".join(params)})')
+        if self.used_builtins:
+            ir_lines.append('')
+
+        ir_lines.extend(body)
+        return '\n'.join(ir_lines)
+
+    _clean_var_name = staticmethod(clean_identifier)
+
+    def _find_function(self, name: str) -> Optional[FunctionInfo]:
+        for func in self.functions:
+            if func.name == name:
+                return func
+        return None
+
+    def _return_type(self, func: FunctionInfo) -> str:
+        if func.name == 'main':
+            return 'i32'
+        return self._llvm_type(func.return_type)
+
+    def _collect_local_variables(self, func: FunctionInfo) -> Dict[str, str]:
+        """Собирает локальные переменные функции (без параметров)"""
+        params = {self._clean_var_name(name) for name, _ in func.parameters}
+        local_vars = {}
+
+        if func.symbol_table:
+            for var_name, var_info in func.symbol_table.variables.items():
+                if var_name not in params:
+                    local_vars[var_name] = var_info.type
+
+        for var_name, var_type in func.view.declarations:
+            if var_name not in local_vars and var_name not in params:
+                local_vars[var_name] = var_type
+
+        return local_vars
+
+    def _temp(self) -> str:
+        name = f'%.t{self.next_temp}'
+        self.next_temp += 1
+        return name
+
+    def _emit(self, line: str):
+        self.lines.append(f'  {line}')
+
+    def _generate_function(self, func: FunctionInfo) -> List[str]:
+        """Генерирует определение функции на основе CFG"""
+        self.current_func = func
+        self.lines = []
+        self.next_temp = 0
+        self.var_types = {}
+
+        blocks = func.view.blocks
+        local_vars = self._collect_local_variables(func)
+
+        ret_type = self._return_type(func)
+        params = []
+        for param_name, param_type in func.parameters:
+            name = self._clean_var_name(param_name)
+            params.append(f'{self._llvm_type(param_type)} %{name}')
+
+        self.lines.append(f'; Function: {func.name}, return type: {func.return_type}')
+        self.lines.append(f'define {ret_type} @{func.name}({", ".join(params)}) {{')
+        self.lines.append('entry:')
+
+        # Все слоты переменных создаются во входном блоке
+        for param_name, param_type in func.parameters:
+            name = self._clean_var_name(param_name)
+            llvm_type = self._llvm_type(param_type)
+            self.var_types[name] = llvm_type
+            self._emit(f'%{name}.addr = alloca {llvm_type}')
+            self._emit(f'store {llvm_type} %{name}, {self._pointer_to(llvm_type)} %{name}.addr')
+
+        for var_name, var_type in local_vars.items():
+            llvm_type = self._llvm_type(var_type)
+            self.var_types[var_name] = llvm_type
+            self._emit(f'%{var_name}.addr = alloca {llvm_type}')
+            self._emit(f'store {llvm_type} {self._zero(llvm_type)}, {self._pointer_to(llvm_type)} %{var_name}.addr')
+
+        self._emit(f'br label %L{func.cfg.entry_block.id}')
+
+        for block in blocks:
+            self._generate_block(block, func)
+
+        self.lines.append('}')
+        self.lines.append('')
+        return self.lines
+
+    def _zero(self, llvm_type: str) -> str:
+        if llvm_type in ('float', 'double'):
+            return '0.0'
+        if llvm_type == self.ptr:
+            return 'null'
+        return '0'
+
+    def _generate_block(self, block: BasicBlock, func: FunctionInfo):
+        """Генерирует базовый блок LLVM с терминатором"""
+        self.lines.append(f'L{block.id}:')
+
+        operations = block.operations
+        is_branch = block.true_branch is not None and block.false_branch is not None and \
+                    block.next_block is None
+        condition = None
+        if is_branch and operations:
+            condition = operations[-1]
+            operations = operations[:-1]
+
+        for op in operations:
+            self._generate_statement(op)
+            if op.type == OperationType.RETURN:
+                return
+
+        if is_branch:
+            if condition is not None:
+                cond = self._condition(condition)
+            else:
+                cond = 'true'
+            self._emit(f'br i1 {cond}, label %L{block.true_branch.id}, label %L{block.false_branch.id}')
+        elif block.next_block:
+            self._emit(f'br label %L{block.next_block.id}')
+        elif block.true_branch:
+            self._emit(f'br label %L{block.true_branch.id}')
+        elif block.false_branch:
+            self._emit(f'br label %L{block.false_branch.id}')
+        else:
+            # Выход из функции без явного return
+            ret_type = self._return_type(func)
+            if ret_type == 'void':
+                self._emit('ret void')
+            else:
+                self._emit(f'ret {ret_type} {self._zero(ret_type)}')
+
+    def _generate_statement(self, op: Operation):
+        """Генерирует инструкции для одной операции"""
+        if op.type == OperationType.DECLARE:
+            if op.left:
+                self._store(self._clean_var_name(op.value), self._expression(op.left))
+            return
+
+        if op.type == OperationType.RETURN:
+            ret_type = self._return_type(self.current_func)
+            if ret_type == 'void':
+                if op.left:
+                    self._expression(op.left)
+                self._emit('ret void')
+            elif op.left:
+                value = self._convert(self._expression(op.left), ret_type)
+                self._emit(f'ret {ret_type} {value}')
+            else:
+                self._emit(f'ret {ret_type} {self._zero(ret_type)}')
+            return
+
+        if op.type in (OperationType.BREAK, OperationType.CONTINUE):
+            # Переходы break/continue не отражены в CFG
+            self._emit(f'; {op.type.value}')
+            return
+
+        self._expression(op)
+
+    def _store(self, var_name: str, value: Tuple[str, str]):
+        llvm_type = self.var_types.get(var_name)
+        if llvm_type is None:
+            return
+        converted = self._convert(value, llvm_type)
+        self._emit(f'store {llvm_type} {converted}, {self._pointer_to(llvm_type)} %{var_name}.addr')
+
+    def _load(self, var_name: str) -> Tuple[str, str]:
+        llvm_type = self.var_types[var_name]
+        temp = self._temp()
+        self._emit(f'{temp} = load {llvm_type}, {self._pointer_to(llvm_type)} %{var_name}.addr')
+        return temp, llvm_type
+
+    def _convert(self, value: Tuple[str, str], target: str) -> str:
+        """Приводит значение к заданному типу LLVM"""
+        name, source = value
+        if source == target:
+            return name
+        temp = self._temp()
+        if source in self.INT_BITS and target in self.INT_BITS:
+            if self.INT_BITS[source] < self.INT_BITS[target]:
+                op = 'zext' if source == 'i1' else 'sext'
+                self._emit(f'{temp} = {op} {source} {name} to {target}')
+            elif target == 'i1':
+                self._emit(f'{temp} = icmp ne {source} {name}, 0')
+            else:
+                self._emit(f'{temp} = trunc {source} {name} to {target}')
+        elif source in self.INT_BITS and target in ('float', 'double'):
+            op = 'uitofp' if source == 'i1' else 'sitofp'
+            self._emit(f'{temp} = {op} {source} {name} to {target}')
+        elif source in ('float', 'double') and target in self.INT_BITS:
+            self._emit(f'{temp} = fptosi {source} {name} to {target}')
+        elif source == 'float' and target == 'double':
+            self._emit(f'{temp} = fpext float {name} to double')
+        elif source == 'double' and target == 'float':
+            self._emit(f'{temp} = fptrunc double {name} to float')
+        else:
+            return name
+        return temp
+
+    def _condition(self, op: Operation) -> str:
+        """Вычисляет условие перехода как значение i1"""
+        value = self._expression(op)
+        if value[1] == 'i1':
+            return value[0]
+        temp = self._temp()
+        if value[1] in ('float', 'double'):
+            self._emit(f'{temp} = fcmp une {value[1]} {value[0]}, 0.0')
+        elif value[1] == self.ptr:
+            self._emit(f'{temp} = icmp ne {self.ptr} {value[0]}, null')
+        else:
+            self._emit(f'{temp} = icmp ne {value[1]} {value[0]}, 0')
+        return temp
+
+    def _literal(self, value: str) -> Tuple[str, str]:
+        """Преобразует литерал или переменную в значение LLVM"""
+        if value in ('true', 'false'):
+            return ('1' if value == 'true' else '0'), 'i32'
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return self._string_pointer(value[1:-1])
+        if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+            content = value[1:-1]
+            if len(content) == 1 and ord(content) < 128:
+                return str(ord(content)), 'i8'
+            return self._string_pointer(content)
+        if value.lstrip('-').isdigit():
+            return value, 'i32'
+        try:
+            return repr(float(value)), 'double'
+        except ValueError:
+            pass
+        var_name = self._clean_var_name(value)
+        if var_name in self.var_types:
+            return self._load(var_name)
+        return '0', 'i32'
+
+    def _string_pointer(self, string: str) -> Tuple[str, str]:
+        name = self._add_string_constant(string)
+        if self.opaque_pointers:
+            return name, self.ptr
+        size = self.string_constants[string][1]
+        return f'getelementptr inbounds ([{size} x i8], [{size} x i8]* {name}, i64 0, i64 0)', self.ptr
+
+    def _arithmetic_type(self, left: str, right: str) -> str:
+        """Общий тип операндов для арифметики и сравнений"""
+        if 'double' in (left, right):
+            return 'double'
+        if 'float' in (left, right):
+            return 'float'
+        if left == right == 'i8':
+            return 'i32'
+        if 'i64' in (left, right):
+            return 'i64'
+        return 'i32'
+
+    def _expression(self, op: Operation) -> Tuple[str, str]:
+        """Генерирует инструкции для выражения; возвращает (значение, тип)"""
+        if op.type == OperationType.NOOP:
+            if not op.value:
+                return '0', 'i32'
+            if op.attributes.get('is_pointer'):
+                var_name = self._clean_var_name(op.value)
+                if var_name in self.var_types:
+                    return f'%{var_name}.addr', self._pointer_to(self.var_types[var_name])
+            return self._literal(op.value)
+
+        if op.type in self.INT_BINARY and op.left and op.right:
+            left = self._expression(op.left)
+            right = self._expression(op.right)
+            common = self._arithmetic_type(left[1], right[1])
+            lhs = self._convert(left, common)
+            rhs = self._convert(right, common)
+            table = self.FLOAT_BINARY if common in ('float', 'double') else self.INT_BINARY
+            temp = self._temp()
+            self._emit(f'{temp} = {table[op.type]} {common} {lhs}, {rhs}')
+            return temp, common
+
+        if op.type in self.INT_COMPARE and op.left and op.right:
+            left = self._expression(op.left)
+            right = self._expression(op.right)
+            common = self._arithmetic_type(left[1], right[1])
+            lhs = self._convert(left, common)
+            rhs = self._convert(right, common)
+            temp = self._temp()
+            if common in ('float', 'double'):
+                self._emit(f'{temp} = fcmp {self.FLOAT_COMPARE[op.type]} {common} {lhs}, {rhs}')
+            else:
+                self._emit(f'{temp} = icmp {self.INT_COMPARE[op.type]} {common} {lhs}, {rhs}')
+            return temp, 'i1'
+
+        if op.type in (OperationType.AND, OperationType.OR) and op.left and op.right:
+            lhs = self._condition(op.left)
+            rhs = self._condition(op.right)
+            temp = self._temp()
+            self._emit(f'{temp} = {"and" if op.type == OperationType.AND else "or"} i1 {lhs}, {rhs}')
+            return temp, 'i1'
+
+        if op.type == OperationType.NOT and op.left:
+            value = self._condition(op.left)
+            temp = self._temp()
+            self._emit(f'{temp} = xor i1 {value}, true')
+            return temp, 'i1'
+
+        if op.type == OperationType.NEGATE and op.left:
+            value = self._expression(op.left)
+            common = self._arithmetic_type(value[1], value[1])
+            operand = self._convert(value, common)
+            temp = self._temp()
+            if common in ('float', 'double'):
+                self._emit(f'{temp} = fneg {common} {operand}')
+            else:
+                self._emit(f'{temp} = sub {common} 0, {operand}')
+            return temp, common
+
+        if op.type == OperationType.CAST and op.left:
+            target = self._llvm_type(op.result_type)
+            return self._convert(self._expression(op.left), target), target
+
+        if op.type == OperationType.CALL:
+            return self._call(op)
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            var_name = self._clean_var_name(op.value)
+            if var_name not in self.var_types:
+                return '0', 'i32'
+            old = self._load(var_name)
+            temp = self._temp()
+            if old[1] in ('float', 'double'):
+                instr = 'fadd' if op.type == OperationType.INCREMENT else 'fsub'
+                self._emit(f'{temp} = {instr} {old[1]} {old[0]}, 1.0')
+            else:
+                instr = 'add' if op.type == OperationType.INCREMENT else 'sub'
+                self._emit(f'{temp} = {instr} {old[1]} {old[0]}, 1')
+            self._store(var_name, (temp, old[1]))
+            return ((temp, old[1]) if op.attributes.get('prefix') else old)
+
+        if op.type == OperationType.ASSIGN and op.left and op.right:
+            value = self._expression(op.right)
+            self._store(self._clean_var_name(op.left.value), value)
+            return value
+
+        if op.type == OperationType.DECLARE and op.left:
+            value = self._expression(op.left)
+            self._store(self._clean_var_name(op.value), value)
+            return value
+
+        return '0', 'i32'
+
+    def _call(self, op: Operation) -> Tuple[str, str]:
+        """Генерирует вызов пользовательской или встроенной функции"""
+        args = [self._expression(arg) for arg in op.args]
+        callee = self._find_function(op.value)
+
+        if callee is not None:
+            param_types = [self._llvm_type(param_type) for _, param_type in callee.parameters]
+            ret_type = self._return_type(callee)
+            signature = ''
+        else:
+            info = BuiltinFunctions.get_function_info(op.value)
+            if BuiltinFunctions.is_standard_function(op.value) and op.value not in self.used_builtins:
+                self.used_builtins.append(op.value)
+            param_types = [self._llvm_type(param_type) for _, param_type in info['parameters']]
+            ret_type = self._llvm_type(info['return_type'])
+            signature = ''
+            if info.get('variadic'):
+                signature = f' ({", ".join(param_types + ["..."])})'
+
+        arg_values = []
+        for index, value in enumerate(args):
+            if index < len(param_types):
+                target = param_types[index]
+            elif value[1] in ('i1', 'i8'):
+                # Продвижение аргументов по умолчанию для вариадических функций
+                target = 'i32'
+            elif value[1] == 'float':
+                target = 'double'
+            else:
+                target = value[1]
+            arg_values.append(f'{target} {self._convert(value, target)}')
+
+        call = f'call {ret_type}{signature} @{op.value}({", ".join(arg_values)})'
+        if ret_type == 'void':
+            self._emit(call)
+            return '0', 'i32'
+        temp = self._temp()
+        self._emit(f'{temp} = {call}')
+        return temp, ret_type
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+from typing import Callable, Iterator, List, Optional
+
+# Меньше функций - выгоднее генерировать в текущем процессе
+MIN_PARALLEL_FUNCTIONS = 16
+# Функций в одном задании процесса: меньше - ровнее нагрузка, больше - меньше обмена
+CHUNK_SIZE = 8
+
+# Задание генерации в дочернем процессе. Оно не передается через pickle:
+# процессы создаются через fork и получают генератор, функции и таблицу строк
+# копией памяти родителя
+_job: Optional[Callable[[int], List[str]]] = None
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Число процессов генерации; 0 - по числу ядер"""
+    if jobs < 0:
+        raise ValueError(f'неверное число процессов {jobs}')
+    return jobs or os.cpu_count() or 1
+
+
+def use_parallel(jobs: int, function_count: int) -> bool:
+    """Параллельная генерация нужна и возможна (fork есть не на всех платформах)"""
+    return (jobs > 1 and function_count >= MIN_PARALLEL_FUNCTIONS
+            and 'fork' in multiprocessing.get_all_start_methods())
+
+
+def _set_job(job: Callable[[int], List[str]]):
+    global _job
+    _job = job
+
+
+def _run_job(index: int) -> List[str]:
+    return _job(index)
+
+
+def generate_in_processes(job: Callable[[int], List[str]], count: int, jobs: int) -> Iterator[List[str]]:
+    """Код функций 0..count-1 из пула процессов, в порядке номеров функций.
+    job(i) возвращает строки функции i; все общие для программы данные (номера
+    строковых констант, раскладка профиля) должны быть готовы до вызова"""
+    context = multiprocessing.get_context('fork')
+    with context.Pool(min(jobs, count), _set_job, (job,)) as pool:
+        # Порядок результатов imap совпадает с порядком функций
+        yield from pool.imap(_run_job, range(count), CHUNK_SIZE)
@@ -0,0 +1,621 @@
+import keyword
+from itertools import chain
+from types import CodeType
+from typing import List, Dict, Optional, Set, Tuple, Callable
+
+from control_flow import FunctionInfo, Operation, OperationType, BasicBlock, trampoline
+from dominators import DominatorTree, post_dominator_tree, reverse_postorder
+from interpreter import INT_TYPES, FLOAT_TYPES
+from port.native_io import NativeIO
+from port.identifiers import clean_identifier
+from generators.generator_state import PerCompilationState
+
+
+# Пределы компилятора Python: 100 уровней отступа (включая нулевой) и 20
+# вложенных блоков циклов. Более глубокая структура записывается диспетчеризацией
+MAX_INDENT_DEPTH = 99
+MAX_LOOP_DEPTH = 20
+
+
+class StructureError(Exception):
+    """CFG не удается записать структурными циклами и ветвлениями"""
+    pass
+
+
+class PythonSourceGenerator(PerCompilationState):
+    """Генератор исходного кода на Python: структурный код или цикл диспетчеризации блоков"""
+
+    OPERATORS = {
+        OperationType.ADD: '+',
+        OperationType.SUB: '-',
+        OperationType.MUL: '*',
+        OperationType.EQ: '==',
+        OperationType.NE: '!=',
+        OperationType.LT: '<',
+        OperationType.LE: '<=',
+        OperationType.GT: '>',
+        OperationType.GE: '>=',
+    }
+
+    # Имена служебных объектов сгенерированного модуля
+    RESERVED = {'_io', '_div', '_mod', '_n', '_b', 'sys', 'NativeIO'}
+
+    def __init__(self):
+        self._reset_state()
+
+    def _reset_state(self):
+        self.functions: List[FunctionInfo] = []
+        # Функции программы по имени и имена переменных Python: строятся один раз на программу
+        self.function_map: Dict[str, FunctionInfo] = {}
+        self.var_names: Dict[str, str] = {}
+        # Состояние текущей функции
+        self.var_types: Dict[str, str] = {}
+        self.current_func: Optional[FunctionInfo] = None
+        self.pre_lines: List[str] = []
+        self.emitted: Set[int] = set()
+
+    def generate_program(self, functions: List[FunctionInfo]) -> str:
+        """Генерирует модуль Python; функции вызываются напрямую или через main()"""
+        return self._session()._generate_program(functions)[0]
+
+    def _generate_program(self, functions: List[FunctionInfo],
+                          filename: str = '<simple>') -> Tuple[str, CodeType]:
+        """Текст модуля и его байткод. Функция, которую не принимает компилятор
+        Python, заново записывается циклом диспетчеризации"""
+        self.functions = functions
+        self.function_map = {}
+        for func in functions:
+            self.function_map.setdefault(func.name, func)
+        self.var_names = {}
+
+        header = [
+            '# Сгенерировано из программы Simple',
+            'import sys',
+            'from port.native_io import NativeIO',
+            'from interpreter import c_div as _div, c_mod as _mod',
+            '',
+            '_io = NativeIO()',
+            '',
+        ]
+        bodies = [self._generate_function(func) for func in functions]
+        footer = []
+        if 'main' in self.function_map:
+            footer.append("if __name__ == '__main__':")
+            footer.append('    _code = main()')
+            footer.append('    _io.flush()')
+            footer.append('    sys.exit(_code)')
+            footer.append('')
+
+        dispatched = set()
+        while True:
+            source = '\n'.join(chain(header, *bodies, footer))
+            try:
+                return source, compile(source, filename, 'exec')
+            except SyntaxError as error:
+                index = self._function_at(error.lineno, len(header), bodies)
+                if index is None or index in dispatched:
+                    raise
+                dispatched.add(index)
+                bodies[index] = self._generate_function(functions[index], dispatch=True)
+
+    def _function_at(self, lineno: Optional[int], first: int, bodies: List[List[str]]) -> Optional[int]:
+        """Номер функции, которой принадлежит строка модуля (нумерация с 1)"""
+        if lineno is None:
+            return None
+        line = lineno - 1 - first
+        for index, body in enumerate(bodies):
+            if 0 <= line < len(body):
+                return index
+            line -= len(body)
+        return None
+
+    def compile_functions(self, functions: List[FunctionInfo], io: Optional[NativeIO] = None,
+                          filename: str = '<simple>') -> Dict[str, Callable]:
+        """Компилирует программу в функции Python, не записывая файлов"""
+        _, code = self._session()._generate_program(functions, filename)
+        namespace = {'__name__': 'simple_program'}
+        exec(code, namespace)
+        if io is not None:
+            namespace['_io'] = io
+        return {func.name: namespace[self._py_name(func.name)] for func in functions}
+
+    def _py_name(self, name: str) -> str:
+        """Имя, безопасное для Python"""
+        name = self._clean_var_name(name)
+        if keyword.iskeyword(name) or name in self.RESERVED:
+            return name + '_'
+        return name
+
+    def _var_name(self, name: str) -> str:
+        """Имя локальной переменной; не должно перекрывать функции программы"""
+        result = self.var_names.get(name)
+        if result is None:
+            result = self._clean_var_name(name)
+            if keyword.iskeyword(result) or result in self.RESERVED or result in self.function_map:
+                result += '_'
+            self.var_names[name] = result
+        return result
+
+    _clean_var_name = staticmethod(clean_identifier)
+
+    def _successors(self, block: BasicBlock) -> List[BasicBlock]:
+        if self._is_branch(block):
+            return [block.true_branch, block.false_branch]
+        successor = block.next_block or block.true_branch or block.false_branch
+        return [successor] if successor else []
+
+    def _is_branch(self, block: BasicBlock) -> bool:
+        return block.true_branch is not None and block.false_branch is not None and \
+               block.next_block is None
+
+    def _generate_function(self, func: FunctionInfo, dispatch: bool = False) -> List[str]:
+        """Генерирует определение функции; dispatch - сразу цикл диспетчеризации"""
+        self.current_func = func
+        self.var_types = {}
+
+        blocks = func.view.blocks
+
+        params = []
+        for param_name, param_type in func.parameters:
+            name = self._clean_var_name(param_name)
+            self.var_types[name] = param_type
+            params.append(self._var_name(name))
+
+        header = [
+            f'# Function: {func.name}, return type: {func.return_type}',
+            f'def {self._py_name(func.name)}({", ".join(params)}):',
+        ]
+
+        # Локальные переменные инициализируются заранее и остаются быстрыми локальными
+        init = []
+        local_vars = {}
+        if func.symbol_table:
+            for var_name, var_info in func.symbol_table.variables.items():
+                local_vars.setdefault(var_name, var_info.type)
+        for block in blocks:
+            for op in block.operations:
+                if op.type == OperationType.DECLARE and op.value:
+                    local_vars.setdefault(self._clean_var_name(op.value), op.var_type or 'int')
+        for var_name, var_type in local_vars.items():
+            if var_name in self.var_types:
+                continue
+            self.var_types[var_name] = var_type
+            init.append(f'    {self._var_name(var_name)} = {self._default_value(var_type)}')
+
+        body = None
+        if not dispatch:
+            try:
+                body = self._generate_structured(func, blocks)
+            except StructureError:
+                pass
+        if body is None:
+            body = self._generate_dispatch(func, blocks)
+
+        return header + init + body + ['', '']
+
+    def _default_value(self, var_type: str) -> str:
+        if var_type in FLOAT_TYPES:
+            return '0.0'
+        if var_type == 'string':
+            return "''"
+        return '0'
+
+    def _default_return(self) -> str:
+        if self.current_func.return_type == 'void' and self.current_func.name != 'main':
+            return 'return'
+        return 'return 0'
+
+    # Анализ структуры CFG
+
+    def _dominators(self, blocks: List[BasicBlock], entry: BasicBlock) -> DominatorTree:
+        preds: Dict[int, List[int]] = {block.id: [] for block in blocks}
+        for block in blocks:
+            for successor in self._successors(block):
+                preds[successor.id].append(block.id)
+        order = reverse_postorder(entry.id, lambda block_id: [s.id for s in self._successors(self.by_id[block_id])])
+        return DominatorTree(order, preds)
+
+    def _post_dominators(self, blocks: List[BasicBlock]) -> Dict[int, Optional[int]]:
+        """Непосредственные постдоминаторы; None - виртуальный выход из функции"""
+        exit_id = -1
+        succs = {block.id: [s.id for s in self._successors(block)] for block in blocks}
+        tree = post_dominator_tree(succs, succs, exit_id)
+
+        ipdom: Dict[int, Optional[int]] = {}
+        for block in blocks:
+            # Блок не ведет к выходу (бесконечный цикл) или сразу перед выходом
+            parent = tree.idom.get(block.id)
+            ipdom[block.id] = parent if parent is not None and parent != exit_id else None
+        return ipdom
+
+    def _find_loops(self, blocks: List[BasicBlock], entry: BasicBlock) -> Dict[int, Tuple[Set[int], Optional[int]]]:
+        """Естественные циклы: заголовок -> (блоки цикла, единственный выход)"""
+        dom = self._dominators(blocks, entry)
+        self._check_reducible(blocks, entry, dom)
+        by_id = self.by_id
+        preds: Dict[int, List[int]] = {block.id: [] for block in blocks}
+        for block in blocks:
+            for successor in self._successors(block):
+                preds[successor.id].append(block.id)
+
+        loops: Dict[int, Set[int]] = {}
+        for block in blocks:
+            for successor in self._successors(block):
+                if dom.dominates(successor.id, block.id):
+                    body = loops.setdefault(successor.id, {successor.id})
+                    stack = [block.id]
+                    while stack:
+                        node = stack.pop()
+                        if node in body:
+                            continue
+                        body.add(node)
+                        stack.extend(preds[node])
+
+        result = {}
+        for header, body in loops.items():
+            exits = set()
+            for node in body:
+                for successor in self._successors(by_id[node]):
+                    if successor.id not in body:
+                        exits.add(successor.id)
+            if len(exits) > 1:
+                raise StructureError('Цикл с несколькими выходами')
+            result[header] = (body, next(iter(exits)) if exits else None)
+        return result
+
+    def _check_reducible(self, blocks: List[BasicBlock], entry: BasicBlock, dom: DominatorTree):
+        """Каждый обратный переход при обходе в глубину должен вести в доминатор"""
+        on_stack = set()
+        visited = set()
+        stack = [(entry, iter(self._successors(entry)))]
+        visited.add(entry.id)
+        on_stack.add(entry.id)
+        while stack:
+            block, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                on_stack.discard(block.id)
+                stack.pop()
+                continue
+            if successor.id in on_stack:
+                if not dom.dominates(successor.id, block.id):
+                    raise StructureError('Несводимый граф')
+            elif successor.id not in visited:
+                visited.add(successor.id)
+                on_stack.add(successor.id)
+                stack.append((successor, iter(self._successors(successor))))
+
+    def _generate_structured(self, func: FunctionInfo, blocks: List[BasicBlock]) -> List[str]:
+        entry = func.cfg.entry_block
+        self.by_id = {block.id: block for block in blocks}
+        self.loops = self._find_loops(blocks, entry)
+        self.ipdom = self._post_dominators(blocks)
+        self.emitted = set()
+
+        lines: List[str] = []
+        # Вложенные ветвления и циклы выводятся на явном стеке, а не рекурсией Python
+        trampoline(self._emit_sequence(entry, None, None, 1, lines))
+        return lines
+
+    def _emit_sequence(self, block: Optional[BasicBlock], stop: Optional[int],
+                       loop: Optional[Tuple[int, Set[int], Optional[int], int]], depth: int,
+                       lines: List[str], skip_header: bool = False):
+        """Выводит последовательность блоков до блока stop (генератор для trampoline)"""
+        if depth > MAX_INDENT_DEPTH:
+            raise StructureError('Слишком глубокая вложенность')
+        indent = '    ' * depth
+        while True:
+            if block is None:
+                lines.append(f'{indent}{self._default_return()}')
+                return
+            if block.id == stop:
+                return
+            if loop is not None and not skip_header:
+                header, body, loop_exit, _ = loop
+                if block.id == header:
+                    lines.append(f'{indent}continue')
+                    return
+                if block.id == loop_exit:
+                    lines.append(f'{indent}break')
+                    return
+                if block.id not in body:
+                    # Сюда можно попасть только через выход из цикла
+                    return
+
+            if block.id in self.loops and not skip_header:
+                body, loop_exit = self.loops[block.id]
+                yield self._emit_loop, block, body, loop_exit, depth, lines, loop
+                if loop_exit is None:
+                    return
+                block = self.by_id[loop_exit]
+                continue
+            skip_header = False
+
+            if block.id in self.emitted:
+                raise StructureError('Блок выводится повторно')
+            self.emitted.add(block.id)
+
+            operations, condition = self._split_condition(block)
+            for op in operations:
+                if op.type == OperationType.RETURN:
+                    lines.extend(self._return_lines(op, indent))
+                    return
+                lines.extend(self._statement_lines(op, indent))
+
+            if self._is_branch(block):
+                join_id = self.ipdom.get(block.id)
+                cond = self._condition(condition)
+                lines.extend(f'{indent}{line}' for line in self.pre_lines)
+                lines.append(f'{indent}if {cond}:')
+                then_start = len(lines)
+                yield self._emit_sequence, block.true_branch, join_id, loop, depth + 1, lines
+                if len(lines) == then_start:
+                    lines.append(f'{indent}    pass')
+                else_lines: List[str] = []
+                yield self._emit_sequence, block.false_branch, join_id, loop, depth + 1, else_lines
+                if else_lines:
+                    lines.append(f'{indent}else:')
+                    lines.extend(else_lines)
+                if join_id is None:
+                    return
+                block = self.by_id[join_id]
+                continue
+
+            successors = self._successors(block)
+            if not successors:
+                lines.append(f'{indent}{self._default_return()}')
+                return
+            block = successors[0]
+
+    def _emit_loop(self, header: BasicBlock, body: Set[int], loop_exit: Optional[int],
+                   depth: int, lines: List[str], outer: Optional[Tuple[int, Set[int], Optional[int], int]]):
+        """Цикл while; условие заголовка переносится в while, если это возможно"""
+        level = outer[3] + 1 if outer is not None else 1
+        if level > MAX_LOOP_DEPTH:
+            raise StructureError('Слишком много вложенных циклов')
+        indent = '    ' * depth
+        loop = (header.id, body, loop_exit, level)
+        operations, condition = self._split_condition(header)
+
+        cond = None
+        if self._is_branch(header) and not operations and condition is not None and \
+                header.false_branch.id == loop_exit and header.true_branch.id in body:
+            cond = self._condition(condition)
+            if self.pre_lines:
+                cond = None
+
+        if cond is not None:
+            self.emitted.add(header.id)
+            lines.append(f'{indent}while {cond}:')
+            body_lines: List[str] = []
+            yield self._emit_sequence, header.true_branch, None, loop, depth + 1, body_lines
+            if body_lines and body_lines[-1].strip() == 'continue':
+                body_lines.pop()
+            lines.extend(body_lines or [f'{indent}    pass'])
+            return
+
+        lines.append(f'{indent}while True:')
+        body_lines = []
+        yield self._emit_sequence, header, None, loop, depth + 1, body_lines, True
+        if body_lines and body_lines[-1].strip() == 'continue':
+            body_lines.pop()
+        lines.extend(body_lines or [f'{indent}    pass'])
+
+    def _generate_dispatch(self, func: FunctionInfo, blocks: List[BasicBlock]) -> List[str]:
+        """Запасной вариант: цикл с переходом по номеру блока. Блоки - отдельные if
+        с continue, а не цепочка elif: длинную цепочку не принимает компилятор Python"""
+        lines = [f'    _b = {func.cfg.entry_block.id}', '    while True:']
+        for block in blocks:
+            lines.append(f'        if _b == {block.id}:')
+            indent = '            '
+            operations, condition = self._split_condition(block)
+            returned = False
+            for op in operations:
+                if op.type == OperationType.RETURN:
+                    lines.extend(self._return_lines(op, indent))
+                    returned = True
+                    break
+                lines.extend(self._statement_lines(op, indent))
+            if returned:
+                continue
+            if self._is_branch(block):
+                cond = self._condition(condition)
+                lines.extend(f'{indent}{line}' for line in self.pre_lines)
+                lines.append(f'{indent}_b = {block.true_branch.id} if {cond} else {block.false_branch.id}')
+            else:
+                successors = self._successors(block)
+                if successors:
+                    lines.append(f'{indent}_b = {successors[0].id}')
+                else:
+                    lines.append(f'{indent}{self._default_return()}')
+                    continue
+            lines.append(f'{indent}continue')
+        return lines
+
+    # Операции и выражения
+
+    def _split_condition(self, block: BasicBlock) -> Tuple[List[Operation], Optional[Operation]]:
+        operations = block.operations
+        if self._is_branch(block) and operations:
+            return operations[:-1], operations[-1]
+        return operations, None
+
+    def _condition(self, op: Optional[Operation]) -> str:
+        self.pre_lines = []
+        if op is None:
+            return 'True'
+        return self._expression(op)[0]
+
+    def _return_lines(self, op: Operation, indent: str) -> List[str]:
+        if not op.left:
+            return [f'{indent}{self._default_return()}']
+        self.pre_lines = []
+        value = self._coerce(self._expression(op.left), self.current_func.return_type)
+        return [f'{indent}{line}' for line in self.pre_lines] + [f'{indent}return {value}']
+
+    def _statement_lines(self, op: Operation, indent: str) -> List[str]:
+        """Оператор Python для одной операции"""
+        self.pre_lines = []
+        if op.type in (OperationType.BREAK, OperationType.CONTINUE, OperationType.NOOP):
+            # Переходы break/continue не отражены в CFG
+            return []
+        if op.type == OperationType.DECLARE and not op.left:
+            return []
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            name = self._var_name(op.value)
+            sign = '+' if op.type == OperationType.INCREMENT else '-'
+            return [f'{indent}{name} {sign}= 1']
+
+        if op.type in (OperationType.ASSIGN, OperationType.DECLARE):
+            target_op = op.left if op.type == OperationType.ASSIGN else None
+            var_name = self._clean_var_name(target_op.value if target_op else op.value)
+            value_op = op.right if op.type == OperationType.ASSIGN else op.left
+            if value_op is None:
+                return []
+            value = self._coerce(self._expression(value_op), self.var_types.get(var_name))
+            return [f'{indent}{line}' for line in self.pre_lines] + \
+                   [f'{indent}{self._var_name(var_name)} = {value}']
+
+        if op.type == OperationType.CALL and op.value == 'scanf':
+            self._expression(op)
+            return [f'{indent}{line}' for line in self.pre_lines]
+
+        value, _ = self._expression(op)
+        return [f'{indent}{line}' for line in self.pre_lines] + [f'{indent}{value}']
+
+    def _coerce(self, value: Tuple[str, str], target: Optional[str]) -> str:
+        text, value_type = value
+        if target in FLOAT_TYPES and value_type in INT_TYPES:
+            return f'float({text})'
+        if target in INT_TYPES and value_type in FLOAT_TYPES:
+            return f'int({text})'
+        return text
+
+    def _literal(self, value: str) -> Tuple[str, str]:
+        if value in ('true', 'false'):
+            return ('1' if value == 'true' else '0'), 'bool'
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return repr(value[1:-1]), 'string'
+        if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+            content = value[1:-1]
+            if len(content) == 1:
+                return str(ord(content)), 'char'
+            return repr(content), 'string'
+        if value.lstrip('-').isdigit():
+            return (f'({value})' if value.startswith('-') else value), 'int'
+        try:
+            return repr(float(value)), 'double'
+        except ValueError:
+            pass
+        var_name = self._clean_var_name(value)
+        return self._var_name(var_name), self.var_types.get(var_name, 'int')
+
+    def _expression(self, op: Operation) -> Tuple[str, str]:
+        """Выражение Python и его тип; побочные операторы попадают в pre_lines"""
+        if op.type == OperationType.NOOP:
+            return self._literal(op.value or '0')
+
+        if op.type in self.OPERATORS and op.left and op.right:
+            left, left_type = self._expression(op.left)
+            right, right_type = self._expression(op.right)
+            if op.type in (OperationType.ADD, OperationType.SUB, OperationType.MUL):
+                result_type = 'double' if left_type in FLOAT_TYPES or right_type in FLOAT_TYPES else 'int'
+            else:
+                result_type = 'bool'
+            return f'({left} {self.OPERATORS[op.type]} {right})', result_type
+
+        if op.type in (OperationType.DIV, OperationType.MOD) and op.left and op.right:
+            left, left_type = self._expression(op.left)
+            right, right_type = self._expression(op.right)
+            helper = '_div' if op.type == OperationType.DIV else '_mod'
+            result_type = 'double' if left_type in FLOAT_TYPES or right_type in FLOAT_TYPES else 'int'
+            return f'{helper}({left}, {right})', result_type
+
+        if op.type in (OperationType.AND, OperationType.OR) and op.left and op.right:
+            left, _ = self._expression(op.left)
+            right, _ = self._expression(op.right)
+            word = 'and' if op.type == OperationType.AND else 'or'
+            return f'(1 if ({left} {word} {right}) else 0)', 'bool'
+
+        if op.type == OperationType.NOT and op.left:
+            value, _ = self._expression(op.left)
+            return f'(not {value})', 'bool'
+
+        if op.type == OperationType.NEGATE and op.left:
+            value, value_type = self._expression(op.left)
+            return f'(-{value})', value_type
+
+        if op.type == OperationType.CAST and op.left:
+            value, _ = self._expression(op.left)
+            target = op.result_type or 'int'
+            if target == 'char':
+                return f'(int({value}) & 0xFF)', target
+            if target in INT_TYPES:
+                return f'int({value})', target
+            if target in FLOAT_TYPES:
+                return f'float({value})', target
+            return value, target
+
+        if op.type == OperationType.CALL:
+            return self._call(op)
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            var_name = self._clean_var_name(op.value)
+            name = self._var_name(var_name)
+            sign = '+' if op.type == OperationType.INCREMENT else '-'
+            back = '-' if sign == '+' else '+'
+            var_type = self.var_types.get(var_name, 'int')
+            if op.attributes.get('prefix'):
+                return f'({name} := {name} {sign} 1)', var_type
+            return f'(({name} := {name} {sign} 1) {back} 1)', var_type
+
+        if op.type in (OperationType.ASSIGN, OperationType.DECLARE):
+            var_name = self._clean_var_name(op.left.value if op.type == OperationType.ASSIGN else op.value)
+            value_op = op.right if op.type == OperationType.ASSIGN else op.left
+            if value_op is None:
+                return '0', 'int'
+            value = self._coerce(self._expression(value_op), self.var_types.get(var_name))
+            return f'({self._var_name(var_name)} := {value})', self.var_types.get(var_name, 'int')
+
+        raise StructureError(f"Операция '{op.type.value}' не поддерживается")
+
+    def _call(self, op: Operation) -> Tuple[str, str]:
+        name = op.value
+        if name == 'printf':
+            args = [self._expression(arg)[0] for arg in op.args]
+            if not args:
+                return '0', 'int'
+            return f'_io.printf({args[0]}, [{", ".join(args[1:])}])', 'int'
+
+        if name == 'scanf':
+            if not op.args:
+                return '0', 'int'
+            fmt, _ = self._expression(op.args[0])
+            targets = []
+            kinds = []
+            for arg in op.args[1:]:
+                var_name = self._clean_var_name(arg.value)
+                var_type = self.var_types.get(var_name, 'int')
+                targets.append(self._var_name(var_name))
+                kinds.append('f' if var_type in FLOAT_TYPES else 's' if var_type == 'string' else 'i')
+            current = f'({", ".join(targets)},)' if targets else '()'
+            self.pre_lines.append(
+                f'_n, {"".join(t + ", " for t in targets)}= _io.scanf_into({fmt}, {current}, {"".join(kinds)!r})'
+                if targets else f'_n, = _io.scanf_into({fmt}, (), \'\')')
+            return '_n', 'int'
+
+        if name == 'strlen' and len(op.args) == 1:
+            value, _ = self._expression(op.args[0])
+            return f"len({value}.encode('utf-8'))", 'int'
+
+        callee = self.function_map.get(name)
+        args = []
+        for index, arg in enumerate(op.args):
+            value = self._expression(arg)
+            if callee is not None and index < len(callee.parameters):
+                args.append(self._coerce(value, callee.parameters[index][1]))
+            else:
+                args.append(value[0])
+        return_type = callee.return_type if callee else 'int'
+        return f'{self._py_name(name)}({", ".join(args)})', return_type
@@ -0,0 +1,711 @@
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+from generators.elf_writer import (
+    ElfObjectWriter, EM_RISCV, STB_GLOBAL, STB_LOCAL, STT_FUNC, STT_NOTYPE, STT_OBJECT
+)
+
+# Перемещения RISC-V
+R_RISCV_64 = 2
+R_RISCV_CALL_PLT = 19
+R_RISCV_PCREL_HI20 = 23
+R_RISCV_PCREL_LO12_I = 24
+
+# Флаги ELF: сжатые инструкции и ABI lp64d
+EF_RISCV_RVC = 0x1
+EF_RISCV_FLOAT_ABI_DOUBLE = 0x4
+
+REGISTERS: Dict[str, int] = {f'x{i}': i for i in range(32)}
+REGISTERS.update({
+    'zero': 0, 'ra': 1, 'sp': 2, 'gp': 3, 'tp': 4, 't0': 5, 't1': 6, 't2': 7,
+    's0': 8, 'fp': 8, 's1': 9, 'a0': 10, 'a1': 11, 'a2': 12, 'a3': 13, 'a4': 14,
+    'a5': 15, 'a6': 16, 'a7': 17, 's2': 18, 's3': 19, 's4': 20, 's5': 21, 's6': 22,
+    's7': 23, 's8': 24, 's9': 25, 's10': 26, 's11': 27, 't3': 28, 't4': 29, 't5': 30, 't6': 31,
+})
+
+# Формат R: мнемоника -> (opcode, funct3, funct7)
+R_OPS = {
+    'add': (0x33, 0, 0x00), 'sub': (0x33, 0, 0x20), 'sll': (0x33, 1, 0x00),
+    'slt': (0x33, 2, 0x00), 'sltu': (0x33, 3, 0x00), 'xor': (0x33, 4, 0x00),
+    'srl': (0x33, 5, 0x00), 'sra': (0x33, 5, 0x20), 'or': (0x33, 6, 0x00), 'and': (0x33, 7, 0x00),
+    'mul': (0x33, 0, 0x01), 'mulh': (0x33, 1, 0x01), 'div': (0x33, 4, 0x01),
+    'divu': (0x33, 5, 0x01), 'rem': (0x33, 6, 0x01), 'remu': (0x33, 7, 0x01),
+    'addw': (0x3b, 0, 0x00), 'subw': (0x3b, 0, 0x20), 'mulw': (0x3b, 0, 0x01),
+    'divw': (0x3b, 4, 0x01), 'remw': (0x3b, 6, 0x01),
+}
+
+# Формат I (арифметика): мнемоника -> (opcode, funct3)
+I_OPS = {
+    'addi': (0x13, 0), 'slti': (0x13, 2), 'sltiu': (0x13, 3), 'xori': (0x13, 4),
+    'ori': (0x13, 6), 'andi': (0x13, 7), 'addiw': (0x1b, 0),
+}
+
+SHIFT_OPS = {'slli': (1, 0x00), 'srli': (5, 0x00), 'srai': (5, 0x10)}
+
+LOAD_OPS = {'lb': 0, 'lh': 1, 'lw': 2, 'ld': 3, 'lbu': 4, 'lhu': 5, 'lwu': 6}
+STORE_OPS = {'sb': 0, 'sh': 1, 'sw': 2, 'sd': 3}
+
+BRANCH_OPS = {'beq': 0, 'bne': 1, 'blt': 4, 'bge': 5, 'bltu': 6, 'bgeu': 7}
+# Псевдоинструкции ветвления с переставленными операндами
+SWAPPED_BRANCHES = {'bgt': 'blt', 'ble': 'bge', 'bgtu': 'bltu', 'bleu': 'bgeu'}
+# Инверсия условия для длинных переходов
+INVERTED_BRANCHES = {0: 1, 1: 0, 4: 5, 5: 4, 6: 7, 7: 6}
+
+
+class AsmError(Exception):
+    """Ошибка встроенного ассемблера RISC-V"""
+
+
+@dataclass
+class _Branch:
+    kind: str            # 'jal' или 'branch'
+    target: str
+    rd: int = 0
+    funct3: int = 0
+    rs1: int = 0
+    rs2: int = 0
+
+
+@dataclass
+class _Item:
+    section: str
+    data: bytes = b''
+    # (смещение в инструкции, символ, тип перемещения, addend)
+    relocs: List[Tuple[int, str, int, int]] = field(default_factory=list)
+    branch: Optional[_Branch] = None
+    form: int = 0
+    label: Optional[str] = None
+    reserve: int = 0
+    align: int = 0
+    compressed: bool = False
+
+
+@dataclass
+class AssembledObject:
+    """Результат ассемблирования: содержимое секций, символы и перемещения"""
+    sections: Dict[str, bytearray]
+    bss_size: int
+    labels: Dict[str, Tuple[str, int]]
+    globals: List[str]
+    relocations: List[Tuple[str, int, str, int, int]]
+    anchor_labels: List[str]
+    text_size: int
+    compressed_count: int
+    instruction_count: int
+
+
+def _fits(value: int, bits: int) -> bool:
+    return -(1 << (bits - 1)) <= value < (1 << (bits - 1))
+
+
+def _bits(value: int, high: int, low: int) -> int:
+    return (value >> low) & ((1 << (high - low + 1)) - 1)
+
+
+def _is_rvc_reg(reg: int) -> bool:
+    return 8 <= reg <= 15
+
+
+# ----------------------------------------------------------------------
+# Кодирование 32-битных инструкций
+# ----------------------------------------------------------------------
+
+def encode_r(opcode: int, funct3: int, funct7: int, rd: int, rs1: int, rs2: int) -> int:
+    return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def encode_i(opcode: int, funct3: int, rd: int, rs1: int, imm: int) -> int:
+    if not _fits(imm, 12):
+        raise AsmError(f'непосредственный операнд {imm} не помещается в 12 бит')
+    return ((imm & 0xfff) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def encode_s(funct3: int, rs1: int, rs2: int, imm: int) -> int:
+    if not _fits(imm, 12):
+        raise AsmError(f'смещение {imm} не помещается в 12 бит')
+    imm &= 0xfff
+    return (_bits(imm, 11, 5) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | \
+           (_bits(imm, 4, 0) << 7) | 0x23
+
+
+def encode_b(funct3: int, rs1: int, rs2: int, offset: int) -> int:
+    offset &= 0x1fff
+    return (_bits(offset, 12, 12) << 31) | (_bits(offset, 10, 5) << 25) | (rs2 << 20) | \
+           (rs1 << 15) | (funct3 << 12) | (_bits(offset, 4, 1) << 8) | (_bits(offset, 11, 11) << 7) | 0x63
+
+
+def encode_u(opcode: int, rd: int, imm20: int) -> int:
+    return ((imm20 & 0xfffff) << 12) | (rd << 7) | opcode
+
+
+def encode_j(rd: int, offset: int) -> int:
+    offset &= 0x1fffff
+    return (_bits(offset, 20, 20) << 31) | (_bits(offset, 10, 1) << 21) | (_bits(offset, 11, 11) << 20) | \
+           (_bits(offset, 19, 12) << 12) | (rd << 7) | 0x6f
+
+
+# ----------------------------------------------------------------------
+# Кодирование сжатых инструкций (расширение C)
+# ----------------------------------------------------------------------
+
+def encode_cj(offset: int) -> int:
+    o = offset & 0xfff
+    imm = (_bits(o, 11, 11) << 10) | (_bits(o, 4, 4) << 9) | (_bits(o, 9, 8) << 7) | \
+          (_bits(o, 10, 10) << 6) | (_bits(o, 6, 6) << 5) | (_bits(o, 7, 7) << 4) | \
+          (_bits(o, 3, 1) << 1) | _bits(o, 5, 5)
+    return (0b101 << 13) | (imm << 2) | 0b01
+
+
+def encode_cb(funct3: int, rs1: int, offset: int) -> int:
+    o = offset & 0x1ff
+    return (funct3 << 13) | (_bits(o, 8, 8) << 12) | (_bits(o, 4, 3) << 10) | ((rs1 - 8) << 7) | \
+           (_bits(o, 7, 6) << 5) | (_bits(o, 2, 1) << 3) | (_bits(o, 5, 5) << 2) | 0b01
+
+
+def compress(name: str, rd: int, rs1: int, rs2: int, imm: int) -> Optional[int]:
+    """Возвращает 16-битную форму базовой инструкции, если операнды это позволяют"""
+    if name == 'addi':
+        if rd == 0 and rs1 == 0 and imm == 0:
+            return 0x0001  # c.nop
+        if rd != 0 and rs1 == 0 and _fits(imm, 6):
+            return (0b010 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | (_bits(imm, 4, 0) << 2) | 0b01
+        if rd == rs1 == 2 and imm != 0 and imm % 16 == 0 and _fits(imm, 10):
+            return (0b011 << 13) | (_bits(imm, 9, 9) << 12) | (2 << 7) | (_bits(imm, 4, 4) << 6) | \
+                   (_bits(imm, 6, 6) << 5) | (_bits(imm, 8, 7) << 3) | (_bits(imm, 5, 5) << 2) | 0b01
+        if rd == rs1 and rd != 0 and imm != 0 and _fits(imm, 6):
+            return (0b000 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | (_bits(imm, 4, 0) << 2) | 0b01
+        if rs1 == 2 and _is_rvc_reg(rd) and imm > 0 and imm % 4 == 0 and imm < 1024:
+            return (0b000 << 13) | (_bits(imm, 5, 4) << 11) | (_bits(imm, 9, 6) << 7) | \
+                   (_bits(imm, 2, 2) << 6) | (_bits(imm, 3, 3) << 5) | ((rd - 8) << 2) | 0b00
+        if imm == 0 and rd != 0 and rs1 != 0:
+            return (0b100 << 13) | (rd << 7) | (rs1 << 2) | 0b10  # c.mv
+        return None
+
+    if name == 'addiw' and rd == rs1 and rd != 0 and _fits(imm, 6):
+        return (0b001 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | (_bits(imm, 4, 0) << 2) | 0b01
+
+    if name == 'lui' and rd not in (0, 2) and imm != 0 and _fits(imm, 6):
+        return (0b011 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | (_bits(imm, 4, 0) << 2) | 0b01
+
+    if name == 'slli' and rd == rs1 and rd != 0 and 0 < imm < 64:
+        return (0b000 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | (_bits(imm, 4, 0) << 2) | 0b10
+
+    if name in ('srli', 'srai') and rd == rs1 and _is_rvc_reg(rd) and 0 < imm < 64:
+        funct2 = 0b00 if name == 'srli' else 0b01
+        return (0b100 << 13) | (_bits(imm, 5, 5) << 12) | (funct2 << 10) | ((rd - 8) << 7) | \
+               (_bits(imm, 4, 0) << 2) | 0b01
+
+    if name == 'andi' and rd == rs1 and _is_rvc_reg(rd) and _fits(imm, 6):
+        return (0b100 << 13) | (_bits(imm, 5, 5) << 12) | (0b10 << 10) | ((rd - 8) << 7) | \
+               (_bits(imm, 4, 0) << 2) | 0b01
+
+    if name == 'add' and rd != 0 and rs2 != 0:
+        if rs1 == 0:
+            return (0b100 << 13) | (rd << 7) | (rs2 << 2) | 0b10  # c.mv
+        if rd == rs1:
+            return (0b100 << 13) | (1 << 12) | (rd << 7) | (rs2 << 2) | 0b10
+        if rd == rs2:
+            return (0b100 << 13) | (1 << 12) | (rd << 7) | (rs1 << 2) | 0b10
+        return None
+
+    if name in ('sub', 'xor', 'or', 'and', 'subw', 'addw') and rd == rs1 and \
+            _is_rvc_reg(rd) and _is_rvc_reg(rs2):
+        funct = {'sub': (0, 0b00), 'xor': (0, 0b01), 'or': (0, 0b10), 'and': (0, 0b11),
+                 'subw': (1, 0b00), 'addw': (1, 0b01)}[name]
+        return (0b100 << 13) | (funct[0] << 12) | (0b11 << 10) | ((rd - 8) << 7) | \
+               (funct[1] << 5) | ((rs2 - 8) << 2) | 0b01
+
+    if name == 'jalr' and imm == 0 and rs1 != 0:
+        if rd == 0:
+            return (0b100 << 13) | (rs1 << 7) | 0b10          # c.jr
+        if rd == 1:
+            return (0b100 << 13) | (1 << 12) | (rs1 << 7) | 0b10  # c.jalr
+
+    if name in ('ld', 'sd', 'lw', 'sw'):
+        width = 8 if name[1] == 'd' else 4
+        is_load = name[0] == 'l'
+        if imm < 0 or imm % width:
+            return None
+        if rs1 == 2:
+            if is_load and rd == 0:
+                return None
+            if width == 8 and imm < 512:
+                if is_load:
+                    return (0b011 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | \
+                           (_bits(imm, 4, 3) << 5) | (_bits(imm, 8, 6) << 2) | 0b10
+                return (0b111 << 13) | (_bits(imm, 5, 3) << 10) | (_bits(imm, 8, 6) << 7) | (rs2 << 2) | 0b10
+            if width == 4 and imm < 256:
+                if is_load:
+                    return (0b010 << 13) | (_bits(imm, 5, 5) << 12) | (rd << 7) | \
+                           (_bits(imm, 4, 2) << 4) | (_bits(imm, 7, 6) << 2) | 0b10
+                return (0b110 << 13) | (_bits(imm, 5, 2) << 9) | (_bits(imm, 7, 6) << 7) | (rs2 << 2) | 0b10
+            return None
+        reg = rd if is_load else rs2
+        if _is_rvc_reg(rs1) and _is_rvc_reg(reg):
+            funct3 = {'lw': 0b010, 'ld': 0b011, 'sw': 0b110, 'sd': 0b111}[name]
+            if width == 8 and imm < 256:
+                return (funct3 << 13) | (_bits(imm, 5, 3) << 10) | ((rs1 - 8) << 7) | \
+                       (_bits(imm, 7, 6) << 5) | ((reg - 8) << 2) | 0b00
+            if width == 4 and imm < 128:
+                return (funct3 << 13) | (_bits(imm, 5, 3) << 10) | ((rs1 - 8) << 7) | \
+                       (_bits(imm, 2, 2) << 6) | (_bits(imm, 6, 6) << 5) | ((reg - 8) << 2) | 0b00
+    return None
+
+
+def encode_base(name: str, rd: int, rs1: int, rs2: int, imm: int) -> int:
+    """Кодирует базовую (несжатую) инструкцию"""
+    if name in R_OPS:
+        opcode, funct3, funct7 = R_OPS[name]
+        return encode_r(opcode, funct3, funct7, rd, rs1, rs2)
+    if name in I_OPS:
+        opcode, funct3 = I_OPS[name]
+        return encode_i(opcode, funct3, rd, rs1, imm)
+    if name in SHIFT_OPS:
+        funct3, funct6 = SHIFT_OPS[name]
+        return (funct6 << 26) | ((imm & 0x3f) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | 0x13
+    if name in LOAD_OPS:
+        return encode_i(0x03, LOAD_OPS[name], rd, rs1, imm)
+    if name in STORE_OPS:
+        return encode_s(STORE_OPS[name], rs1, rs2, imm)
+    if name == 'jalr':
+        return encode_i(0x67, 0, rd, rs1, imm)
+    if name == 'lui':
+        return encode_u(0x37, rd, imm)
+    if name == 'auipc':
+        return encode_u(0x17, rd, imm)
+    if name == 'ecall':
+        return 0x00000073
+    raise AsmError(f'неподдерживаемая инструкция "{name}"')
+
+
+class RiscVAssembler:
+    """Встроенный ассемблер RV64IMC для подмножества GNU as, которое выдает генератор"""
+
+    def __init__(self, compress: bool = True):
+        self.compress = compress
+        self.items: List[_Item] = []
+        self.section = '.text'
+        self.globals: List[str] = []
+        self.anchor_labels: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Разбор исходного текста
+    # ------------------------------------------------------------------
+
+    def assemble(self, lines: List[str]) -> AssembledObject:
+        """Ассемблирует список строк и возвращает содержимое секций"""
+        for line_no, raw in enumerate(lines, start=1):
+            try:
+                self._assemble_line(raw)
+            except AsmError as e:
+                raise AsmError(f'строка {line_no}: {e}: {raw.strip()}') from None
+        return self._layout()
+
+    def _strip_comment(self, line: str) -> str:
+        in_string = False
+        escaped = False
+        for i, char in enumerate(line):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '#':
+                return line[:i]
+        return line
+
+    def _assemble_line(self, raw: str):
+        line = self._strip_comment(raw).strip()
+        if not line:
+            return
+
+        match = re.match(r'^([A-Za-z_.$][\w.$]*)\s*:\s*(.*)$', line)
+        if match:
+            self.items.append(_Item(self.section, label=match.group(1)))
+            line = match.group(2).strip()
+            if not line:
+                return
+
+        parts = line.split(None, 1)
+        mnemonic = parts[0].lower()
+        rest = parts[1] if len(parts) > 1 else ''
+
+        if mnemonic.startswith('.'):
+            self._directive(mnemonic, rest)
+            return
+
+        operands = [op.strip() for op in rest.split(',')] if rest else []
+        self._instruction(mnemonic, operands)
+
+    def _directive(self, directive: str, rest: str):
+        if directive == '.section':
+            self.section = rest.split(',')[0].strip()
+        elif directive in ('.text', '.data', '.bss', '.rodata'):
+            self.section = directive
+        elif directive in ('.globl', '.global'):
+            self.globals.extend(name.strip() for name in rest.split(','))
+        elif directive in ('.asciz', '.string', '.ascii'):
+            data = self._parse_string(rest.strip())
+            if directive != '.ascii':
+                data += b'\0'
+            self.items.append(_Item(self.section, data=data))
+        elif directive in ('.zero', '.space'):
+            self.items.append(_Item(self.section, reserve=int(rest, 0)))
+        elif directive in ('.byte', '.half', '.word', '.dword', '.quad'):
+            unit = {'.byte': 1, '.half': 2, '.word': 4, '.dword': 8, '.quad': 8}[directive]
+            for value in rest.split(','):
+                self.items.append(_Item(self.section, data=(int(value, 0) & ((1 << (8 * unit)) - 1))
+                                        .to_bytes(unit, 'little')))
+        elif directive in ('.align', '.p2align'):
+            self.items.append(_Item(self.section, align=1 << int(rest.split(',')[0], 0)))
+        elif directive == '.balign':
+            self.items.append(_Item(self.section, align=int(rest.split(',')[0], 0)))
+        elif directive in ('.option', '.attribute', '.file', '.type', '.size', '.ident'):
+            return
+        else:
+            raise AsmError(f'неподдерживаемая директива "{directive}"')
+
+    def _parse_string(self, text: str) -> bytes:
+        if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+            raise AsmError('ожидается строковый литерал')
+        escapes = {'n': 10, 't': 9, 'r': 13, '0': 0, '\\': 92, '"': 34, "'": 39}
+        result = bytearray()
+        content = text[1:-1]
+        i = 0
+        while i < len(content):
+            char = content[i]
+            if char == '\\' and i + 1 < len(content):
+                result.append(escapes.get(content[i + 1], ord(content[i + 1])))
+                i += 2
+            else:
+                result.extend(char.encode('utf-8'))
+                i += 1
+        return bytes(result)
+
+    def _reg(self, text: str) -> int:
+        reg = REGISTERS.get(text.strip().lower())
+        if reg is None:
+            raise AsmError(f'неизвестный регистр "{text}"')
+        return reg
+
+    def _imm(self, text: str) -> int:
+        try:
+            return int(text.strip(), 0)
+        except ValueError:
+            raise AsmError(f'ожидается число, получено "{text}"') from None
+
+    def _mem(self, text: str) -> Tuple[int, int]:
+        match = re.match(r'^(-?\w*)\((\w+)\)$', text.strip())
+        if not match:
+            raise AsmError(f'неверный операнд памяти "{text}"')
+        offset = self._imm(match.group(1)) if match.group(1) else 0
+        return offset, self._reg(match.group(2))
+
+    def _symbol(self, text: str) -> Tuple[str, int]:
+        match = re.match(r'^([A-Za-z_.$][\w.$]*)\s*(?:([+-])\s*(\w+))?$', text.strip())
+        if not match:
+            raise AsmError(f'неверный символ "{text}"')
+        addend = 0
+        if match.group(2):
+            addend = self._imm(match.group(3))
+            if match.group(2) == '-':
+                addend = -addend
+        return match.group(1), addend
+
+    def _emit_base(self, name: str, rd: int = 0, rs1: int = 0, rs2: int = 0, imm: int = 0):
+        if self.compress:
+            short = compress(name, rd, rs1, rs2, imm)
+            if short is not None:
+                self.items.append(_Item(self.section, data=struct.pack('<H', short), compressed=True))
+                return
+        self.items.append(_Item(self.section, data=struct.pack('<I', encode_base(name, rd, rs1, rs2, imm))))
+
+    def _instruction(self, mnemonic: str, ops: List[str]):
+        if mnemonic in R_OPS:
+            self._emit_base(mnemonic, self._reg(ops[0]), self._reg(ops[1]), self._reg(ops[2]))
+        elif mnemonic in I_OPS or mnemonic in SHIFT_OPS:
+            self._emit_base(mnemonic, self._reg(ops[0]), self._reg(ops[1]), imm=self._imm(ops[2]))
+        elif mnemonic in LOAD_OPS:
+            offset, base = self._mem(ops[1])
+            self._emit_base(mnemonic, self._reg(ops[0]), base, imm=offset)
+        elif mnemonic in STORE_OPS:
+            offset, base = self._mem(ops[1])
+            self._emit_base(mnemonic, rs1=base, rs2=self._reg(ops[0]), imm=offset)
+        elif mnemonic in ('lui', 'auipc'):
+            self._emit_base(mnemonic, self._reg(ops[0]), imm=self._imm(ops[1]))
+        elif mnemonic == 'ecall':
+            self._emit_base('ecall')
+        elif mnemonic == 'nop':
+            self._emit_base('addi')
+        elif mnemonic == 'mv':
+            self._emit_base('addi', self._reg(ops[0]), self._reg(ops[1]), imm=0)
+        elif mnemonic == 'neg':
+            self._emit_base('sub', self._reg(ops[0]), 0, self._reg(ops[1]))
+        elif mnemonic == 'ret':
+            self._emit_base('jalr', 0, 1, imm=0)
+        elif mnemonic == 'jr':
+            self._emit_base('jalr', 0, self._reg(ops[0]), imm=0)
+        elif mnemonic == 'jalr':
+            if len(ops) == 1:
+                self._emit_base('jalr', 1, self._reg(ops[0]), imm=0)
+            elif '(' in ops[1]:
+                offset, base = self._mem(ops[1])
+                self._emit_base('jalr', self._reg(ops[0]), base, imm=offset)
+            else:
+                self._emit_base('jalr', self._reg(ops[0]), self._reg(ops[1]), imm=self._imm(ops[2]))
+        elif mnemonic == 'li':
+            self._load_immediate(self._reg(ops[0]), self._imm(ops[1]))
+        elif mnemonic == 'la' or mnemonic == 'lla':
+            self._load_address(self._reg(ops[0]), ops[1])
+        elif mnemonic == 'call':
+            self._call(ops[0])
+        elif mnemonic == 'tail':
+            raise AsmError('tail не поддерживается')
+        elif mnemonic == 'j':
+            self.items.append(_Item(self.section, branch=_Branch('jal', ops[0].strip(), rd=0)))
+        elif mnemonic == 'jal':
+            rd, target = (1, ops[0]) if len(ops) == 1 else (self._reg(ops[0]), ops[1])
+            self.items.append(_Item(self.section, branch=_Branch('jal', target.strip(), rd=rd)))
+        elif mnemonic in BRANCH_OPS or mnemonic in SWAPPED_BRANCHES:
+            rs1, rs2 = self._reg(ops[0]), self._reg(ops[1])
+            if mnemonic in SWAPPED_BRANCHES:
+                mnemonic = SWAPPED_BRANCHES[mnemonic]
+                rs1, rs2 = rs2, rs1
+            self.items.append(_Item(self.section, branch=_Branch(
+                'branch', ops[2].strip(), funct3=BRANCH_OPS[mnemonic], rs1=rs1, rs2=rs2)))
+        elif mnemonic in ('beqz', 'bnez', 'bltz', 'bgez'):
+            funct3 = {'beqz': 0, 'bnez': 1, 'bltz': 4, 'bgez': 5}[mnemonic]
+            self.items.append(_Item(self.section, branch=_Branch(
+                'branch', ops[1].strip(), funct3=funct3, rs1=self._reg(ops[0]), rs2=0)))
+        else:
+            raise AsmError(f'неподдерживаемая инструкция "{mnemonic}"')
+
+    def _load_immediate(self, rd: int, value: int):
+        if _fits(value, 12):
+            self._emit_base('addi', rd, 0, imm=value)
+            return
+        if not _fits(value, 32):
+            raise AsmError(f'константа {value} не помещается в 32 бита')
+        hi = ((value + 0x800) >> 12) & 0xfffff
+        lo = value - (((value + 0x800) >> 12) << 12)
+        self._emit_base('lui', rd, imm=hi if hi < 0x80000 else hi - 0x100000)
+        if lo:
+            self._emit_base('addiw', rd, rd, imm=lo)
+
+    def _load_address(self, rd: int, operand: str):
+        symbol, addend = self._symbol(operand)
+        anchor = f'.Lpcrel_hi{len(self.anchor_labels)}'
+        self.anchor_labels.append(anchor)
+        self.items.append(_Item(self.section, label=anchor))
+        data = struct.pack('<II', encode_u(0x17, rd, 0), encode_i(0x13, 0, rd, rd, 0))
+        self.items.append(_Item(self.section, data=data, relocs=[
+            (0, symbol, R_RISCV_PCREL_HI20, addend),
+            (4, anchor, R_RISCV_PCREL_LO12_I, 0),
+        ]))
+
+    def _call(self, target: str, rd: int = 1):
+        data = struct.pack('<II', encode_u(0x17, rd, 0), encode_i(0x67, 0, rd, rd, 0))
+        self.items.append(_Item(self.section, data=data, relocs=[(0, target.strip(), R_RISCV_CALL_PLT, 0)]))
+
+    # ------------------------------------------------------------------
+    # Раскладка и разрешение переходов
+    # ------------------------------------------------------------------
+
+    def _branch_forms(self, branch: _Branch) -> List[Tuple[int, int]]:
+        """Возможные формы перехода: (размер, максимальная дальность в байтах)"""
+        if branch.kind == 'jal':
+            forms = []
+            if self.compress and branch.rd == 0:
+                forms.append((2, 2048))      # c.j
+            forms.append((4, 1 << 20))       # jal
+            return forms
+        forms = []
+        if self.compress and branch.rs2 == 0 and branch.funct3 in (0, 1) and _is_rvc_reg(branch.rs1):
+            forms.append((2, 256))           # c.beqz / c.bnez
+        forms.append((4, 4096))              # b<cond>
+        forms.append((8, 1 << 20))           # b<!cond> +8; jal
+        return forms
+
+    def _item_size(self, item: _Item, offset: int) -> int:
+        if item.branch:
+            return self._branch_forms(item.branch)[item.form][0]
+        if item.align:
+            return (-offset) % item.align
+        return item.reserve or len(item.data)
+
+    def _compute_offsets(self):
+        positions = []
+        labels: Dict[str, Tuple[str, int]] = {}
+        sizes: Dict[str, int] = {}
+        for item in self.items:
+            offset = sizes.get(item.section, 0)
+            positions.append(offset)
+            if item.label:
+                if item.label in labels and labels[item.label] != (item.section, offset):
+                    raise AsmError(f'метка "{item.label}" определена повторно')
+                labels[item.label] = (item.section, offset)
+            sizes[item.section] = offset + self._item_size(item, offset)
+        return positions, labels, sizes
+
+    def _encode_branch(self, item: _Item, offset: int, target: int) -> bytes:
+        branch = item.branch
+        distance = target - offset
+        if branch.kind == 'jal':
+            if self._branch_forms(branch)[item.form][0] == 2:
+                return struct.pack('<H', encode_cj(distance))
+            return struct.pack('<I', encode_j(branch.rd, distance))
+        size = self._branch_forms(branch)[item.form][0]
+        if size == 2:
+            return struct.pack('<H', encode_cb(0b110 if branch.funct3 == 0 else 0b111, branch.rs1, distance))
+        if size == 4:
+            return struct.pack('<I', encode_b(branch.funct3, branch.rs1, branch.rs2, distance))
+        inverted = INVERTED_BRANCHES[branch.funct3]
+        return struct.pack('<II', encode_b(inverted, branch.rs1, branch.rs2, 8), encode_j(0, distance - 4))
+
+    def _layout(self) -> AssembledObject:
+        # Переходы начинаются с самой короткой формы и расширяются до стабилизации
+        while True:
+            positions, labels, sizes = self._compute_offsets()
+            changed = False
+            for item, offset in zip(self.items, positions):
+                if not item.branch:
+                    continue
+                target = labels.get(item.branch.target)
+                forms = self._branch_forms(item.branch)
+                if target is None or target[0] != item.section:
+                    if item.branch.kind == 'jal' and item.branch.rd in (0, 1):
+                        # Внешний вызов: заменяем на auipc+jalr с перемещением
+                        name = item.branch.target
+                        rd = item.branch.rd
+                        item.branch = None
+                        item.data = struct.pack('<II', encode_u(0x17, 6 if rd == 0 else 1, 0),
+                                                encode_i(0x67, 0, rd, 6 if rd == 0 else 1, 0))
+                        item.relocs = [(0, name, R_RISCV_CALL_PLT, 0)]
+                        changed = True
+                        continue
+                    raise AsmError(f'переход к неизвестной метке "{item.branch.target}"')
+                distance = target[1] - offset
+                size, reach = forms[item.form]
+                if not (-reach <= distance < reach) and item.form + 1 < len(forms):
+                    item.form += 1
+                    changed = True
+            if not changed:
+                break
+
+        sections: Dict[str, bytearray] = {}
+        relocations: List[Tuple[str, int, str, int, int]] = []
+        bss_size = 0
+        compressed_count = 0
+        instruction_count = 0
+
+        for item, offset in zip(self.items, positions):
+            size = self._item_size(item, offset)
+            if item.section == '.bss':
+                bss_size = max(bss_size, offset + size)
+                continue
+            buffer = sections.setdefault(item.section, bytearray())
+            if item.branch:
+                instruction_count += 1
+                if size == 2:
+                    compressed_count += 1
+                buffer.extend(self._encode_branch(item, offset, labels[item.branch.target][1]))
+                continue
+            if item.align:
+                buffer.extend(b'\0' * size)
+                continue
+            if item.reserve:
+                buffer.extend(b'\0' * item.reserve)
+                continue
+            if item.section == '.text' and item.data:
+                instruction_count += 1
+                if item.compressed:
+                    compressed_count += 1
+            buffer.extend(item.data)
+            for rel_offset, symbol, rtype, addend in item.relocs:
+                target = labels.get(symbol)
+                if target is None or symbol in self.globals or symbol in self.anchor_labels \
+                        or rtype == R_RISCV_CALL_PLT:
+                    relocations.append((item.section, offset + rel_offset, symbol, rtype, addend))
+                else:
+                    relocations.append((item.section, offset + rel_offset, target[0], rtype, target[1] + addend))
+
+        return AssembledObject(
+            sections=sections,
+            bss_size=bss_size,
+            labels=labels,
+            globals=self.globals,
+            relocations=relocations,
+            anchor_labels=self.anchor_labels,
+            text_size=len(sections.get('.text', b'')),
+            compressed_count=compressed_count,
+            instruction_count=instruction_count
+        )
+
+
+@dataclass
+class CodeSizeReport:
+    """Сравнение размера кода с расширением C и без него"""
+    text_size: int
+    uncompressed_size: int
+    compressed_count: int
+    instruction_count: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.uncompressed_size - self.text_size
+
+    @property
+    def saved_percent(self) -> float:
+        if not self.uncompressed_size:
+            return 0.0
+        return 100.0 * self.saved_bytes / self.uncompressed_size
+
+
+def build_riscv_object(lines: List[str], source_name: Optional[str] = None,
+                       compress: bool = True) -> Tuple[bytes, CodeSizeReport]:
+    """Ассемблирует текст генератора RISC-V в объектный файл ELF64 и сообщает экономию от RVC"""
+    assembled = RiscVAssembler(compress=compress).assemble(lines)
+    uncompressed_size = assembled.text_size
+    if compress:
+        uncompressed_size = RiscVAssembler(compress=False).assemble(lines).text_size
+
+    flags = EF_RISCV_FLOAT_ABI_DOUBLE | (EF_RISCV_RVC if compress else 0)
+    writer = ElfObjectWriter(EM_RISCV, flags=flags, source_name=source_name)
+    for name, data in assembled.sections.items():
+        writer.add_section(name, bytes(data))
+    if assembled.bss_size:
+        writer.add_section('.bss', size=assembled.bss_size)
+    # Код RISC-V со сжатыми инструкциями выравнивается на 2 байта
+    text = writer.get_section('.text')
+    if text:
+        text.align = 2 if compress else 4
+
+    for name, (section, offset) in assembled.labels.items():
+        # Метки .L не попадают в таблицу символов, кроме якорей %pcrel_lo
+        if name.startswith('.L') and name not in assembled.anchor_labels:
+            continue
+        binding = STB_GLOBAL if name in assembled.globals else STB_LOCAL
+        if name in assembled.anchor_labels:
+            sym_type = STT_NOTYPE
+        else:
+            sym_type = STT_FUNC if section == '.text' else STT_OBJECT
+        writer.add_symbol(name, section, offset, binding=binding, sym_type=sym_type)
+
+    for section, offset, symbol, rtype, addend in assembled.relocations:
+        if symbol not in writer.symbols and writer.get_section(symbol) is None:
+            writer.add_symbol(symbol, None, binding=STB_GLOBAL, sym_type=STT_NOTYPE)
+        writer.add_relocation(section, offset, symbol, rtype, addend)
+
+    report = CodeSizeReport(
+        text_size=assembled.text_size,
+        uncompressed_size=uncompressed_size,
+        compressed_count=assembled.compressed_count,
+        instruction_count=assembled.instruction_count
+    )
+    return writer.to_bytes(), report
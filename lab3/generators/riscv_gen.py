@@ -1,20 +1,37 @@
 import re
-from typing import List, Dict, Optional, Any, Set, Tuple
+from typing import List, Dict, Optional, Any, Set, Tuple, Iterator, IO
 from control_flow import FunctionInfo, Operation, OperationType, VariableInfo, TypeSystem, BasicBlock
+from generators.riscv_encoder import build_riscv_object, CodeSizeReport
+from generators.asm_emitter import AsmEmitter, join_chunks, iter_lines
+from generators.generator_state import PerCompilationState
+from generators.parallel_codegen import resolve_jobs, use_parallel, generate_in_processes
+from profiling import (ProfileLayout, DEFAULT_PROFILE_PATH, COUNTERS_SYMBOL, HEADER_SYMBOL,
+                       PATH_SYMBOL, MODE_SYMBOL, DUMP_SYMBOL, PROFILE_HEADER)
+from port.identifiers import clean_identifier
 
 
-class RiscV64AsmGenerator:
+class RiscV64AsmGenerator(PerCompilationState):
     """Генератор ассемблерного кода RISC-V для Linux"""
     
-    def __init__(self):
+    def __init__(self, profile: bool = False, profile_path: str = DEFAULT_PROFILE_PATH, jobs: int = 1):
+        self.arg_registers = ['a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7']
+        self.temp_registers = ['t0', 't1', 't2', 't3', 't4', 't5', 't6']
+        self.saved_registers = ['s0', 's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11']
+        self.code_size_report: Optional[CodeSizeReport] = None
+        # Инструментирование: счетчик выполнений на каждый базовый блок
+        self.profile = profile
+        self.profile_path = profile_path
+        # Процессов для генерации функций (0 - по числу ядер)
+        self.jobs = resolve_jobs(jobs)
+        self._reset_state()
+
+    def _reset_state(self):
         self.string_constants: Dict[str, int] = {}
         self.next_const_id = 0
         self.var_offsets: Dict[str, int] = {}
         self.label_counter = 0
         self.functions: List[FunctionInfo] = []
-        self.arg_registers = ['a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7']
-        self.temp_registers = ['t0', 't1', 't2', 't3', 't4', 't5', 't6']
-        self.saved_registers = ['s0', 's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11']
+        self.profile_layout: Optional[ProfileLayout] = None
     
     def _escape_string_for_riscv(self, string: str) -> str:
         """Экранирует строку для RISC-V (формат .asciz)"""
@@ -31,64 +48,123 @@ class RiscV64AsmGenerator:
     
     def generate_program(self, functions: List[FunctionInfo]) -> str:
         """Генерирует программу на основе реальных функций"""
+        return join_chunks(self.emit_program(functions))
+
+    def write_program(self, functions: List[FunctionInfo], sink: IO) -> int:
+        """Пишет программу в приемник по мере генерации функций; возвращает число строк"""
+        return AsmEmitter(sink).emit_all(self.emit_program(functions))
+
+    def emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
+        """Программа фрагментами: заголовок, код каждой функции, затем таблица данных
+        (секция .data дописывается последней, номера строк выдаются по ходу генерации)"""
+        return self._session()._emit_program(functions)
+
+    def _emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
         self.functions = functions
+        if self.profile:
+            self.profile_layout = ProfileLayout(functions, self.profile_path)
         
-        for func in functions:
-            self._collect_strings_from_function(func)
+        yield [
+            '.section .text',
+            '.globl main',
+            ''
+        ]
         
-        asm_lines = [
+        if use_parallel(self.jobs, len(functions)):
+            # Строки нумеруются заранее в порядке функций, как при последовательной генерации
+            for func in functions:
+                self._collect_strings_from_function(func)
+            yield from generate_in_processes(self._generate_function_at, len(functions), self.jobs)
+        else:
+            for func in functions:
+                self._collect_strings_from_function(func)
+                yield self._generate_function_asm(func)
+        if self.profile:
+            yield self._generate_profile_dump()
+        
+        data = [
+            '',
             '.section .data',
         ]
-        
         for string, const_id in sorted(self.string_constants.items(), key=lambda x: x[1]):
             escaped = self._escape_string_for_riscv(string)
-            asm_lines.append(f'str_{const_id}: .asciz "{escaped}"')
-        
-        asm_lines.extend([
-            '',
-            '.section .text',
-            '.globl main',
-            ''
-        ])
-        
-        for func in functions:
-            asm_lines.extend(self._generate_function_asm(func))
-        
-        return '\n'.join(asm_lines)
+            data.append(f'str_{const_id}: .asciz "{escaped}"')
+        if self.profile:
+            data.extend(self._generate_profile_data())
+        yield data
+
+    def generate_object(self, functions: List[FunctionInfo], source_name: Optional[str] = None,
+                        compress: bool = True, sink: Optional[IO] = None) -> bytes:
+        """Генерирует объектный файл ELF64 (RV64IMC) без вызова внешнего ассемблера.
+        С приемником sink туда же пишется текст программы из того же прохода генерации"""
+        chunks = self.emit_program(functions)
+        if sink is not None:
+            chunks = AsmEmitter(sink).tee(chunks)
+        # Отчет о размере ассемблирует текст дважды (с RVC и без): нужен список строк
+        lines = list(iter_lines(chunks))
+        obj, self.code_size_report = build_riscv_object(lines, source_name, compress)
+        return obj
     
     def _collect_strings_from_function(self, func: FunctionInfo):
         """Собирает строковые константы из функции"""
-        visited = set()
-        stack = [func.cfg.entry_block]
-        
-        while stack:
-            block = stack.pop()
-            if block.id in visited:
-                continue
-            visited.add(block.id)
-            
-            for op in block.operations:
-                if op.value and (op.value.startswith('"') or op.value.startswith("'")):
-                    string_val = op.value.strip('"\'')
-                    if string_val not in self.string_constants:
-                        self.string_constants[string_val] = self.next_const_id
-                        self.next_const_id += 1
-                
-                if op.type == OperationType.CALL:
-                    for arg_op in op.args:
-                        if arg_op.value and (arg_op.value.startswith('"') or arg_op.value.startswith("'")):
-                            string_val = arg_op.value.strip('"\'')
-                            if string_val not in self.string_constants:
-                                self.string_constants[string_val] = self.next_const_id
-                                self.next_const_id += 1
-            
-            if block.next_block:
-                stack.append(block.next_block)
-            if block.true_branch:
-                stack.append(block.true_branch)
-            if block.false_branch:
-                stack.append(block.false_branch)
+        for string_val in func.view.strings:
+            if string_val not in self.string_constants:
+                self.string_constants[string_val] = self.next_const_id
+                self.next_const_id += 1
     
+    def _generate_profile_data(self) -> List[str]:
+        """Заголовок файла профиля, аргументы fopen и массив счетчиков в .bss"""
+        header = ', '.join(str(word) for word in self.profile_layout.header_words())
+        return [
+            '.align 2',
+            f'{HEADER_SYMBOL}: .word {header}',
+            f'{PATH_SYMBOL}: .asciz "{self._escape_string_for_riscv(self.profile_path)}"',
+            f'{MODE_SYMBOL}: .asciz "wb"',
+            '',
+            '.section .bss',
+            '.align 3',
+            f'{COUNTERS_SYMBOL}: .zero {8 * len(self.profile_layout)}',
+        ]
+
+    def _generate_profile_dump(self) -> List[str]:
+        """Функция записи счетчиков в файл, регистрируется через atexit в main"""
+        return [
+            f'# {"="*50}',
+            '# Profile dump',
+            f'# {"="*50}',
+            f'{DUMP_SYMBOL}:',
+            '    addi sp, sp, -16',
+            '    sd ra, 8(sp)',
+            '    sd s1, 0(sp)',
+            f'    la a0, {PATH_SYMBOL}',
+            f'    la a1, {MODE_SYMBOL}',
+            '    call fopen',
+            '    beqz a0, .Lprof_done',
+            '    mv s1, a0',
+            f'    la a0, {HEADER_SYMBOL}',
+            '    li a1, 1',
+            f'    li a2, {PROFILE_HEADER.size}',
+            '    mv a3, s1',
+            '    call fwrite',
+            f'    la a0, {COUNTERS_SYMBOL}',
+            '    li a1, 8',
+            f'    li a2, {len(self.profile_layout)}',
+            '    mv a3, s1',
+            '    call fwrite',
+            '    mv a0, s1',
+            '    call fclose',
+            '.Lprof_done:',
+            '    ld s1, 0(sp)',
+            '    ld ra, 8(sp)',
+            '    addi sp, sp, 16',
+            '    ret',
+            '',
+        ]
+
+    def _generate_function_at(self, index: int) -> List[str]:
+        """Код функции с номером index (в процессе параллельной генерации)"""
+        return self._generate_function_asm(self.functions[index])
+
     def _generate_function_asm(self, func: FunctionInfo) -> List[str]:
         """Генерирует ассемблерный код для функции на основе CFG"""
         local_vars = self._collect_local_variables(func)
@@ -105,11 +181,15 @@ class RiscV64AsmGenerator:
         ]
         
         asm_lines.extend(self._generate_function_prologue(func, local_vars))
+        if self.profile and func.name == 'main':
+            asm_lines.extend([
+                f'    la a0, {DUMP_SYMBOL}',
+                '    call atexit',
+            ])
         
-        processed_blocks = set()
-        asm_lines.extend(self._generate_cfg_code(func.cfg.entry_block, processed_blocks, func, local_vars))
+        asm_lines.extend(self._generate_cfg_code(func, local_vars))
         
-        if not any(line.startswith(f'{func.name}_exit:') for line in asm_lines):
+        if func.view.exit_reachable:
             asm_lines.extend(self._generate_function_epilogue(func))
         
         asm_lines.append('')
@@ -126,40 +206,13 @@ class RiscV64AsmGenerator:
         
         
         
-        if hasattr(func, 'cfg') and hasattr(func.cfg, 'entry_block'):
-            visited = set()
-            stack = [func.cfg.entry_block]
-            
-            while stack:
-                block = stack.pop()
-                if block.id in visited:
-                    continue
-                visited.add(block.id)
-                
-                for op in block.operations:
-                    if op.type == OperationType.DECLARE and op.value:
-                        var_name = op.value
-                        var_name = self._clean_var_name(var_name)
-                        var_type = op.var_type if op.var_type else 'int'
-                        if var_name not in local_vars:
-                            local_vars[var_name] = var_type
-                
-                if block.next_block:
-                    stack.append(block.next_block)
-                if block.true_branch:
-                    stack.append(block.true_branch)
-                if block.false_branch:
-                    stack.append(block.false_branch)
+        for var_name, var_type in func.view.declarations:
+            if var_name not in local_vars:
+                local_vars[var_name] = var_type
         
         return local_vars
     
-    def _clean_var_name(self, var_name: str) -> str:
-        """Очищает имя переменной от -> type"""
-        if not var_name:
-            return var_name
-        if '->' in var_name:
-            return var_name.split('->')[0].strip()
-        return var_name
+    _clean_var_name = staticmethod(clean_identifier)
     
     def _get_var_offset(self, var_name: str) -> Optional[int]:
         """Получает смещение переменной, очищая имя при необходимости"""
@@ -251,30 +304,25 @@ class RiscV64AsmGenerator:
         
         return lines
     
-    def _generate_cfg_code(self, block: BasicBlock, processed: set, 
-                          func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
-        """Генерирует код из CFG"""
-        if not block or block.id in processed:
-            return []
-        
-        processed.add(block.id)
+    def _generate_cfg_code(self, func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
+        """Генерирует код из CFG: один проход по блокам в порядке обхода"""
         lines = []
-        
-        lines.append(f'.L{func.name}_block_{block.id}:')
-        
-        for i, op in enumerate(block.operations):
-            lines.extend(self._generate_operation(op, func, local_vars))
-        
-        jump_lines = self._generate_block_jumps(block, func)
-        if jump_lines:
-            lines.extend(jump_lines)
-        
-        if block.next_block and block.next_block.id not in processed:
-            lines.extend(self._generate_cfg_code(block.next_block, processed, func, local_vars))
-        if block.true_branch and block.true_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.true_branch, processed, func, local_vars))
-        if block.false_branch and block.false_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.false_branch, processed, func, local_vars))
+        for block in func.view.blocks:
+            lines.append(f'.L{func.name}_block_{block.id}:')
+            if self.profile:
+                # t0/t1 на входе в блок свободны: значения между блоками живут в стеке
+                offset = self.profile_layout.offset(func.name, block.id)
+                lines.extend([
+                    f'    la t0, {COUNTERS_SYMBOL} + {offset}',
+                    '    ld t1, 0(t0)',
+                    '    addi t1, t1, 1',
+                    '    sd t1, 0(t0)',
+                ])
+            
+            for i, op in enumerate(block.operations):
+                lines.extend(self._generate_operation(op, func, local_vars))
+            
+            lines.extend(self._generate_block_jumps(block, func))
         
         return lines
     
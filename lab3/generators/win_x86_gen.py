@@ -1,16 +1,31 @@
 import re
-from typing import List, Dict, Optional, Any, Set, Tuple
+from typing import List, Dict, Optional, Any, Set, Tuple, Iterator, IO
 from control_flow import FunctionInfo, Operation, OperationType, VariableInfo, TypeSystem, BasicBlock
+from generators.asm_emitter import AsmEmitter, join_chunks
+from generators.generator_state import PerCompilationState
+from generators.parallel_codegen import resolve_jobs, use_parallel, generate_in_processes
+from profiling import (ProfileLayout, DEFAULT_PROFILE_PATH, COUNTERS_SYMBOL, HEADER_SYMBOL,
+                       PATH_SYMBOL, MODE_SYMBOL, DUMP_SYMBOL, PROFILE_HEADER)
+from port.identifiers import clean_identifier
 
-class WinX86AsmGenerator:
+class WinX86AsmGenerator(PerCompilationState):
     """Генератор ассемблерного кода x86-64"""
     
-    def __init__(self):
+    def __init__(self, profile: bool = False, profile_path: str = DEFAULT_PROFILE_PATH, jobs: int = 1):
+        # Инструментирование: счетчик выполнений на каждый базовый блок
+        self.profile = profile
+        self.profile_path = profile_path
+        # Процессов для генерации функций (0 - по числу ядер)
+        self.jobs = resolve_jobs(jobs)
+        self._reset_state()
+
+    def _reset_state(self):
         self.string_constants: Dict[str, int] = {}
         self.next_const_id = 0
         self.var_offsets: Dict[str, int] = {}
         self.label_counter = 0
         self.functions: List[FunctionInfo] = []  # Список всех функций
+        self.profile_layout: Optional[ProfileLayout] = None
 
     def _escape_string_for_nasm(self, string: str) -> str:
         """Экранирует строку для NASM, сохраняя строки как единые литералы"""
@@ -98,74 +113,121 @@ class WinX86AsmGenerator:
     
     def generate_program(self, functions: List[FunctionInfo]) -> str:
         """Генерирует программу на основе реальных функций"""
+        return join_chunks(self.emit_program(functions))
+
+    def write_program(self, functions: List[FunctionInfo], sink: IO) -> int:
+        """Пишет программу в приемник по мере генерации функций; возвращает число строк"""
+        return AsmEmitter(sink).emit_all(self.emit_program(functions))
+
+    def emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
+        """Программа фрагментами: заголовок, код каждой функции, затем таблица данных
+        (секция .data дописывается последней, номера строк выдаются по ходу генерации)"""
+        return self._session()._emit_program(functions)
+
+    def _emit_program(self, functions: List[FunctionInfo]) -> Iterator[List[str]]:
         self.functions = functions  # Сохраняем список функций
+        if self.profile:
+            self.profile_layout = ProfileLayout(functions, self.profile_path)
         
-        # Собираем все строковые константы
-        for func in functions:
-            self._collect_strings_from_function(func)
-        
-        asm_lines = [
+        header = [
             'default rel',
             'global main',
             'extern printf, scanf, exit, _getch',
+        ]
+        if self.profile:
+            header.append('extern atexit, fopen, fwrite, fclose')
+        header.extend([
+            '',
+            'section .text',
+            ''
+        ])
+        yield header
+        
+        if use_parallel(self.jobs, len(functions)):
+            # Строки нумеруются заранее в порядке функций, как при последовательной генерации
+            for func in functions:
+                self._collect_strings_from_function(func)
+            yield from generate_in_processes(self._generate_function_at, len(functions), self.jobs)
+        else:
+            # Генерируем функции, строковые константы собираются перед кодом каждой
+            for func in functions:
+                self._collect_strings_from_function(func)
+                yield self._generate_function_asm(func)
+        if self.profile:
+            yield self._generate_profile_dump()
+        
+        data = [
             '',
             'section .data',
         ]
-        
-        # Добавляем строковые константы
         for string, const_id in sorted(self.string_constants.items(), key=lambda x: x[1]):
             nasm_string = self._escape_string_for_nasm(string)
-            asm_lines.append(f'    str_{const_id} db {nasm_string}, 0')
-        
-        asm_lines.extend([
+            data.append(f'    str_{const_id} db {nasm_string}, 0')
+        if self.profile:
+            data.extend(self._generate_profile_data())
+        data.extend([
             '',
             'section .bss',
             '    ; Global variables',
-            '',
-            'section .text',
-            ''
         ])
-        
-        # Генерируем все функции
-        for func in functions:
-            asm_lines.extend(self._generate_function_asm(func))
-        
-        return '\n'.join(asm_lines)
+        if self.profile:
+            data.append(f'    {COUNTERS_SYMBOL} resq {len(self.profile_layout)}')
+        yield data
+
+    def _generate_profile_data(self) -> List[str]:
+        """Заголовок файла профиля и аргументы fopen"""
+        header = ', '.join(str(word) for word in self.profile_layout.header_words())
+        return [
+            f'    {HEADER_SYMBOL} dd {header}',
+            f'    {PATH_SYMBOL} db {self._escape_string_for_nasm(self.profile_path)}, 0',
+            f'    {MODE_SYMBOL} db "wb", 0',
+        ]
+
+    def _generate_profile_dump(self) -> List[str]:
+        """Функция записи счетчиков в файл, регистрируется через atexit в main"""
+        return [
+            f'; {"="*50}',
+            '; Profile dump',
+            f'; {"="*50}',
+            f'{DUMP_SYMBOL}:',
+            '    push rbx',
+            '    sub rsp, 32 ; shadow space',
+            f'    lea rcx, [rel {PATH_SYMBOL}]',
+            f'    lea rdx, [rel {MODE_SYMBOL}]',
+            '    call fopen',
+            '    test rax, rax',
+            '    jz .prof_done',
+            '    mov rbx, rax',
+            f'    lea rcx, [rel {HEADER_SYMBOL}]',
+            '    mov edx, 1',
+            f'    mov r8d, {PROFILE_HEADER.size}',
+            '    mov r9, rbx',
+            '    call fwrite',
+            f'    lea rcx, [rel {COUNTERS_SYMBOL}]',
+            '    mov edx, 8',
+            f'    mov r8d, {len(self.profile_layout)}',
+            '    mov r9, rbx',
+            '    call fwrite',
+            '    mov rcx, rbx',
+            '    call fclose',
+            '.prof_done:',
+            '    add rsp, 32',
+            '    pop rbx',
+            '    ret',
+            '',
+        ]
     
     def _collect_strings_from_function(self, func: FunctionInfo):
         """Собирает строковые константы из функции"""
-        visited = set()
-        stack = [func.cfg.entry_block]
-        
-        while stack:
-            block = stack.pop()
-            if block.id in visited:
-                continue
-            visited.add(block.id)
-            
-            for op in block.operations:
-                if op.value and (op.value.startswith('"') or op.value.startswith("'")):
-                    string_val = op.value.strip('"\'')
-                    # Уже обработано escape-последовательности в парсере
-                    if string_val not in self.string_constants:
-                        self.string_constants[string_val] = self.next_const_id
-                        self.next_const_id += 1
-                
-                if op.type == OperationType.CALL:
-                    for arg_op in op.args:
-                        if arg_op.value and (arg_op.value.startswith('"') or arg_op.value.startswith("'")):
-                            string_val = arg_op.value.strip('"\'')
-                            if string_val not in self.string_constants:
-                                self.string_constants[string_val] = self.next_const_id
-                                self.next_const_id += 1
-            
-            if block.next_block:
-                stack.append(block.next_block)
-            if block.true_branch:
-                stack.append(block.true_branch)
-            if block.false_branch:
-                stack.append(block.false_branch)
+        for string_val in func.view.strings:
+            if string_val not in self.string_constants:
+                self.string_constants[string_val] = self.next_const_id
+                self.next_const_id += 1
     
+    def _generate_function_at(self, index: int) -> List[str]:
+        """Код функции с номером index (в процессе параллельной генерации)"""
+        return self._generate_function_asm(self.functions[index])
+
     def _generate_function_asm(self, func: FunctionInfo) -> List[str]:
         """Генерирует ассемблерный код для функции на основе CFG"""
 
@@ -188,13 +250,17 @@ class WinX86AsmGenerator:
         
         # Пролог
         asm_lines.extend(self._generate_function_prologue(func, local_vars))
+        if self.profile and func.name == 'main':
+            asm_lines.extend([
+                f'    lea rcx, [rel {DUMP_SYMBOL}]',
+                '    call atexit',
+            ])
         
         # Генерируем код из CFG
-        processed_blocks = set()
-        asm_lines.extend(self._generate_cfg_code(func.cfg.entry_block, processed_blocks, func, local_vars))
+        asm_lines.extend(self._generate_cfg_code(func, local_vars))
         
-        # Если не было выхода из функции, добавляем эпилог
-        if not any(line.startswith(f'.{func.name}_exit') for line in asm_lines):
+        # Эпилог нужен, если управление может выйти из функции
+        if func.view.exit_reachable:
             asm_lines.extend(self._generate_function_epilogue(func))
         
         asm_lines.append('')
@@ -213,42 +279,13 @@ class WinX86AsmGenerator:
 
         
         # Также из операций DECLARE в CFG
-        if hasattr(func, 'cfg') and hasattr(func.cfg, 'entry_block'):
-            visited = set()
-            stack = [func.cfg.entry_block]
-            
-            while stack:
-                block = stack.pop()
-                if block.id in visited:
-                    continue
-                visited.add(block.id)
-                
-                for op in block.operations:
-                    if op.type == OperationType.DECLARE and op.value:
-                        var_name = op.value
-                        # Очищаем имя переменной от -> type
-                        var_name = self._clean_var_name(var_name)
-                        var_type = op.var_type if op.var_type else 'int'
-                        if var_name not in local_vars:
-                            local_vars[var_name] = var_type
-                
-                if block.next_block:
-                    stack.append(block.next_block)
-                if block.true_branch:
-                    stack.append(block.true_branch)
-                if block.false_branch:
-                    stack.append(block.false_branch)
+        for var_name, var_type in func.view.declarations:
+            if var_name not in local_vars:
+                local_vars[var_name] = var_type
         
         return local_vars
     
-    def _clean_var_name(self, var_name: str) -> str:
-        """Очищает имя переменной от -> type"""
-        if not var_name:
-            return var_name
-        # Извлекаем только имя переменной до ->
-        if '->' in var_name:
-            return var_name.split('->')[0].strip()
-        return var_name
+    _clean_var_name = staticmethod(clean_identifier)
     
     def _get_var_offset(self, var_name: str) -> Optional[int]:
         """Получает смещение переменной, очищая имя при необходимости"""
@@ -344,38 +381,26 @@ class WinX86AsmGenerator:
             '    ret'
         ]
     
-    def _generate_cfg_code(self, block: BasicBlock, processed: set, 
-                          func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
-        """Генерирует код из CFG"""
-        if not block or block.id in processed:
-            return []
-        
-        processed.add(block.id)
+    def _generate_cfg_code(self, func: FunctionInfo, local_vars: Dict[str, str]) -> List[str]:
+        """Генерирует код из CFG: один проход по блокам в порядке обхода"""
         lines = []
-        
-        # Добавляем метку блока
-        lines.append(f'.L{func.name}_block_{block.id}:')
-        
-        # Генерируем ВСЕ операции блока
-        for op in block.operations:
-            op_lines = self._generate_operation(op, func, local_vars)
-            if op_lines:
-                lines.extend(op_lines)
-            else:
-                lines.append(f'    ; No code generated for operation {op.type.name}')
-        
-        # Обрабатываем переходы
-        jump_lines = self._generate_block_jumps(block, func)
-        if jump_lines:
-            lines.extend(jump_lines)
-        
-        # Рекурсивно обрабатываем связанные блоки
-        if block.next_block and block.next_block.id not in processed:
-            lines.extend(self._generate_cfg_code(block.next_block, processed, func, local_vars))
-        if block.true_branch and block.true_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.true_branch, processed, func, local_vars))
-        if block.false_branch and block.false_branch.id not in processed:
-            lines.extend(self._generate_cfg_code(block.false_branch, processed, func, local_vars))
+        for block in func.view.blocks:
+            # Добавляем метку блока
+            lines.append(f'.L{func.name}_block_{block.id}:')
+            if self.profile:
+                offset = self.profile_layout.offset(func.name, block.id)
+                lines.append(f'    inc qword [rel {COUNTERS_SYMBOL} + {offset}]')
+            
+            # Генерируем ВСЕ операции блока
+            for op in block.operations:
+                op_lines = self._generate_operation(op, func, local_vars)
+                if op_lines:
+                    lines.extend(op_lines)
+                else:
+                    lines.append(f'    ; No code generated for operation {op.type.name}')
+            
+            # Обрабатываем переходы
+            lines.extend(self._generate_block_jumps(block, func))
         
         return lines
     
@@ -603,14 +628,15 @@ class WinX86AsmGenerator:
     
     def _contains_function_call(self, op: Operation) -> bool:
         """Проверяет, содержит ли выражение вызов функции"""
-        if op.type == OperationType.CALL:
-            return True
-        
-        if op.left and self._contains_function_call(op.left):
-            return True
-        
-        if op.right and self._contains_function_call(op.right):
-            return True
+        stack = [op]
+        while stack:
+            node = stack.pop()
+            if node.type == OperationType.CALL:
+                return True
+            if node.left:
+                stack.append(node.left)
+            if node.right:
+                stack.append(node.right)
         
         return False
     
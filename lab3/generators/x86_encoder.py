@@ -0,0 +1,687 @@
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple, Union, Iterable
+
+from generators.elf_writer import (
+    ElfObjectWriter, EM_X86_64, STB_GLOBAL, STB_LOCAL, STT_FUNC, STT_NOTYPE, STT_OBJECT
+)
+
+# Перемещения x86-64
+R_X86_64_64 = 1
+R_X86_64_PC32 = 2
+R_X86_64_PLT32 = 4
+
+# Регистры: имя -> (номер, размер в байтах)
+REGISTERS: Dict[str, Tuple[int, int]] = {}
+for _i, _names in enumerate([
+    ('rax', 'eax', 'al'), ('rcx', 'ecx', 'cl'), ('rdx', 'edx', 'dl'), ('rbx', 'ebx', 'bl'),
+    ('rsp', 'esp', 'spl'), ('rbp', 'ebp', 'bpl'), ('rsi', 'esi', 'sil'), ('rdi', 'edi', 'dil'),
+]):
+    REGISTERS[_names[0]] = (_i, 8)
+    REGISTERS[_names[1]] = (_i, 4)
+    REGISTERS[_names[2]] = (_i, 1)
+for _i in range(8, 16):
+    REGISTERS[f'r{_i}'] = (_i, 8)
+    REGISTERS[f'r{_i}d'] = (_i, 4)
+    REGISTERS[f'r{_i}b'] = (_i, 1)
+
+SIZE_KEYWORDS = {'byte': 1, 'word': 2, 'dword': 4, 'qword': 8}
+
+CONDITION_CODES = {
+    'o': 0x0, 'no': 0x1, 'b': 0x2, 'c': 0x2, 'nae': 0x2, 'ae': 0x3, 'nb': 0x3, 'nc': 0x3,
+    'e': 0x4, 'z': 0x4, 'ne': 0x5, 'nz': 0x5, 'be': 0x6, 'na': 0x6, 'a': 0x7, 'nbe': 0x7,
+    's': 0x8, 'ns': 0x9, 'p': 0xa, 'pe': 0xa, 'np': 0xb, 'po': 0xb,
+    'l': 0xc, 'nge': 0xc, 'ge': 0xd, 'nl': 0xd, 'le': 0xe, 'ng': 0xe, 'g': 0xf, 'nle': 0xf,
+}
+
+# Арифметико-логическая группа: мнемоника -> (базовый опкод, расширение /n)
+ALU_OPS = {
+    'add': (0x00, 0), 'or': (0x08, 1), 'and': (0x20, 4),
+    'sub': (0x28, 5), 'xor': (0x30, 6), 'cmp': (0x38, 7),
+}
+
+# Унарная группа F6/F7 и FE/FF
+UNARY_OPS = {'not': (0xf6, 2), 'neg': (0xf6, 3), 'mul': (0xf6, 4), 'div': (0xf6, 6),
+             'idiv': (0xf6, 7), 'inc': (0xfe, 0), 'dec': (0xfe, 1)}
+
+SHIFT_OPS = {'shl': 4, 'sal': 4, 'shr': 5, 'sar': 7}
+
+SIMPLE_OPS = {'ret': b'\xc3', 'cdq': b'\x99', 'cqo': b'\x48\x99', 'syscall': b'\x0f\x05',
+              'leave': b'\xc9', 'nop': b'\x90'}
+
+
+class AsmError(Exception):
+    """Ошибка встроенного ассемблера"""
+
+
+@dataclass
+class Reg:
+    code: int
+    size: int
+    name: str
+
+
+@dataclass
+class Mem:
+    base: Optional[int] = None
+    disp: int = 0
+    symbol: Optional[str] = None
+    size: Optional[int] = None
+
+
+@dataclass
+class Imm:
+    value: int
+
+
+@dataclass
+class Ref:
+    symbol: str
+
+
+Operand = Union[Reg, Mem, Imm, Ref]
+
+
+@dataclass
+class _Fixup:
+    offset: int           # смещение поля внутри инструкции
+    symbol: str
+    kind: str             # 'pc32' или 'abs64'
+    addend: int
+
+
+@dataclass
+class _Item:
+    section: str
+    data: bytes = b''
+    fixups: List[_Fixup] = field(default_factory=list)
+    # Для переходов к меткам: (короткая форма, длинная форма, цель)
+    branch: Optional[Tuple[bytes, bytes, str]] = None
+    short: bool = True
+    reserve: int = 0
+    align: int = 0
+    label: Optional[str] = None
+
+
+@dataclass
+class AssembledObject:
+    """Результат ассемблирования: содержимое секций, символы и перемещения"""
+    sections: Dict[str, bytearray]
+    bss_size: int
+    labels: Dict[str, Tuple[str, int]]
+    globals: List[str]
+    externs: List[str]
+    relocations: List[Tuple[str, int, str, int, int]]
+
+
+def _fits_i8(value: int) -> bool:
+    return -128 <= value <= 127
+
+
+def _fits_i32(value: int) -> bool:
+    return -2**31 <= value < 2**31
+
+
+class X86Assembler:
+    """Встроенный ассемблер подмножества NASM (x86-64), которое выдают генераторы"""
+
+    def __init__(self):
+        self.items: List[_Item] = []
+        self.section = '.text'
+        self.globals: List[str] = []
+        self.externs: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Разбор исходного текста
+    # ------------------------------------------------------------------
+
+    def assemble(self, lines: Iterable[str]) -> AssembledObject:
+        """Ассемблирует строки за один проход (подходит и поток строк от генератора)
+        и возвращает содержимое секций"""
+        for line_no, raw in enumerate(lines, start=1):
+            try:
+                self._assemble_line(raw)
+            except AsmError as e:
+                raise AsmError(f'строка {line_no}: {e}: {raw.strip()}') from None
+        return self._layout()
+
+    def _strip_comment(self, line: str) -> str:
+        in_string = None
+        for i, char in enumerate(line):
+            if in_string:
+                if char == in_string:
+                    in_string = None
+            elif char in '"\'`':
+                in_string = char
+            elif char == ';':
+                return line[:i]
+        return line
+
+    def _split_operands(self, text: str) -> List[str]:
+        parts, current, depth, in_string = [], [], 0, None
+        for char in text:
+            if in_string:
+                current.append(char)
+                if char == in_string:
+                    in_string = None
+                continue
+            if char in '"\'`':
+                in_string = char
+            elif char == '[':
+                depth += 1
+            elif char == ']':
+                depth -= 1
+            elif char == ',' and depth == 0:
+                parts.append(''.join(current).strip())
+                current = []
+                continue
+            current.append(char)
+        if current and ''.join(current).strip():
+            parts.append(''.join(current).strip())
+        return parts
+
+    def _assemble_line(self, raw: str):
+        line = self._strip_comment(raw).strip()
+        if not line:
+            return
+
+        lowered = line.lower()
+        if lowered.startswith('default '):
+            return
+        if lowered.startswith('section ') or lowered.startswith('segment '):
+            self.section = line.split()[1]
+            return
+        if lowered.startswith('global '):
+            self.globals.extend(name.strip() for name in line[7:].split(','))
+            return
+        if lowered.startswith('extern '):
+            self.externs.extend(name.strip() for name in line[7:].split(','))
+            return
+        if lowered.startswith('align '):
+            self.items.append(_Item(self.section, align=int(line.split()[1], 0)))
+            return
+
+        # Метка, возможно с данными на той же строке: "str_0 db ..." или "name:"
+        match = re.match(r'^([A-Za-z_.$?][\w.$?@]*)\s*:\s*(.*)$', line)
+        if match:
+            self.items.append(_Item(self.section, label=match.group(1)))
+            line = match.group(2).strip()
+            if not line:
+                return
+
+        match = re.match(r'^([A-Za-z_.$?][\w.$?@]*)\s+(db|dw|dd|dq|resb|resw|resd|resq)\b\s*(.*)$',
+                         line, re.IGNORECASE)
+        if match:
+            self.items.append(_Item(self.section, label=match.group(1)))
+            line = f'{match.group(2)} {match.group(3)}'
+
+        parts = line.split(None, 1)
+        mnemonic = parts[0].lower()
+        operands = self._split_operands(parts[1]) if len(parts) > 1 else []
+
+        if mnemonic in ('db', 'dw', 'dd', 'dq'):
+            self._emit_data(mnemonic, operands)
+        elif mnemonic in ('resb', 'resw', 'resd', 'resq'):
+            unit = {'resb': 1, 'resw': 2, 'resd': 4, 'resq': 8}[mnemonic]
+            self.items.append(_Item(self.section, reserve=unit * int(operands[0], 0)))
+        else:
+            self._encode_instruction(mnemonic, [self._parse_operand(op) for op in operands])
+
+    def _emit_data(self, directive: str, operands: List[str]):
+        unit = {'db': 1, 'dw': 2, 'dd': 4, 'dq': 8}[directive]
+        item = _Item(self.section)
+        data = bytearray()
+        for operand in operands:
+            if operand[0] in '"\'`' and operand[-1] == operand[0]:
+                data.extend(operand[1:-1].encode('latin-1'))
+                data.extend(b'\0' * ((-len(operand[1:-1])) % unit))
+            else:
+                try:
+                    value = int(operand, 0)
+                    data.extend((value & ((1 << (8 * unit)) - 1)).to_bytes(unit, 'little'))
+                except ValueError:
+                    if unit != 8:
+                        raise AsmError(f'адрес символа "{operand}" требует dq')
+                    item.fixups.append(_Fixup(len(data), operand, 'abs64', 0))
+                    data.extend(b'\0' * 8)
+        item.data = bytes(data)
+        self.items.append(item)
+
+    def _parse_operand(self, text: str) -> Operand:
+        text = text.strip()
+        lowered = text.lower()
+
+        size = None
+        for keyword, keyword_size in SIZE_KEYWORDS.items():
+            if lowered.startswith(keyword + ' ') or lowered.startswith(keyword + '['):
+                size = keyword_size
+                text = text[len(keyword):].strip()
+                lowered = text.lower()
+                break
+
+        if text.startswith('['):
+            return self._parse_memory(text[1:-1], size)
+
+        if lowered in REGISTERS:
+            code, reg_size = REGISTERS[lowered]
+            return Reg(code, reg_size, lowered)
+
+        if len(text) == 3 and text[0] == text[2] and text[0] in '\'"`':
+            return Imm(ord(text[1]))
+
+        try:
+            return Imm(int(text, 0))
+        except ValueError:
+            pass
+
+        if re.match(r'^[A-Za-z_.$?][\w.$?@]*$', text):
+            return Ref(text)
+
+        raise AsmError(f'неизвестный операнд "{text}"')
+
+    def _parse_memory(self, text: str, size: Optional[int]) -> Mem:
+        mem = Mem(size=size)
+        text = text.strip()
+        if text.lower().startswith('rel '):
+            text = text[4:]
+        for sign, term in re.findall(r'([+-]?)\s*([^+\-\s]+)', text):
+            term_lower = term.lower()
+            if term_lower in REGISTERS:
+                if sign == '-' or mem.base is not None:
+                    raise AsmError(f'неподдерживаемая адресация "[{text}]"')
+                code, reg_size = REGISTERS[term_lower]
+                if reg_size != 8:
+                    raise AsmError('базовый регистр должен быть 64-битным')
+                mem.base = code
+            else:
+                try:
+                    value = int(term, 0)
+                except ValueError:
+                    if mem.symbol is not None or sign == '-':
+                        raise AsmError(f'неподдерживаемая адресация "[{text}]"')
+                    mem.symbol = term
+                    continue
+                mem.disp += -value if sign == '-' else value
+        if mem.base is not None and mem.symbol is not None:
+            raise AsmError(f'неподдерживаемая адресация "[{text}]"')
+        return mem
+
+    # ------------------------------------------------------------------
+    # Кодирование инструкций
+    # ------------------------------------------------------------------
+
+    def _rex(self, w: bool, reg: int, rm: Operand, force: bool = False) -> bytes:
+        rex = 0x40
+        if w:
+            rex |= 0x08
+        if reg >= 8:
+            rex |= 0x04
+        base = rm.code if isinstance(rm, Reg) else rm.base
+        if base is not None and base >= 8:
+            rex |= 0x01
+        if rex != 0x40 or force:
+            return bytes([rex])
+        return b''
+
+    def _needs_rex8(self, *operands: Operand) -> bool:
+        """spl/bpl/sil/dil доступны только с префиксом REX"""
+        return any(isinstance(op, Reg) and op.size == 1 and op.name in ('spl', 'bpl', 'sil', 'dil')
+                   for op in operands)
+
+    def _modrm(self, reg: int, rm: Operand, tail: int = 0) -> Tuple[bytes, Optional[_Fixup]]:
+        """Кодирует ModRM/SIB/смещение; tail - число байтов непосредственного операнда после смещения"""
+        if isinstance(rm, Reg):
+            return bytes([0xc0 | ((reg & 7) << 3) | (rm.code & 7)]), None
+
+        if rm.base is None:
+            # RIP-относительная адресация (default rel)
+            modrm = bytes([((reg & 7) << 3) | 0x5])
+            if rm.symbol is None:
+                raise AsmError('абсолютная адресация не поддерживается')
+            fixup = _Fixup(len(modrm), rm.symbol, 'pc32', rm.disp - 4 - tail)
+            return modrm + b'\0\0\0\0', fixup
+
+        base = rm.base & 7
+        sib = b'\x24' if base == 4 else b''
+        if rm.disp == 0 and base != 5:
+            return bytes([((reg & 7) << 3) | base]) + sib, None
+        if _fits_i8(rm.disp):
+            return bytes([0x40 | ((reg & 7) << 3) | base]) + sib + struct.pack('<b', rm.disp), None
+        return bytes([0x80 | ((reg & 7) << 3) | base]) + sib + struct.pack('<i', rm.disp), None
+
+    def _emit(self, prefix: bytes, opcode: bytes, reg: int, rm: Operand, imm: bytes = b''):
+        modrm, fixup = self._modrm(reg, rm, len(imm))
+        item = _Item(self.section)
+        head = prefix + opcode
+        if fixup:
+            fixup.offset += len(head)
+            item.fixups.append(fixup)
+        item.data = head + modrm + imm
+        self.items.append(item)
+
+    def _operand_size(self, operands: List[Operand]) -> int:
+        for op in operands:
+            if isinstance(op, Reg):
+                return op.size
+        for op in operands:
+            if isinstance(op, Mem) and op.size:
+                return op.size
+        raise AsmError('не удалось определить размер операнда')
+
+    def _prefix(self, size: int, reg: int, rm: Operand, *operands: Operand) -> bytes:
+        prefix = b'\x66' if size == 2 else b''
+        return prefix + self._rex(size == 8, reg, rm, self._needs_rex8(*operands))
+
+    def _imm(self, value: int, size: int) -> bytes:
+        if size == 1:
+            return struct.pack('<B', value & 0xff)
+        if size == 2:
+            return struct.pack('<H', value & 0xffff)
+        if not _fits_i32(value) and not (size == 4 and 0 <= value < 2**32):
+            raise AsmError(f'непосредственный операнд {value} не помещается в 32 бита')
+        return struct.pack('<I', value & 0xffffffff)
+
+    def _encode_instruction(self, mnemonic: str, ops: List[Operand]):
+        if mnemonic in SIMPLE_OPS:
+            self.items.append(_Item(self.section, data=SIMPLE_OPS[mnemonic]))
+            return
+
+        if mnemonic == 'jmp' or (mnemonic.startswith('j') and mnemonic[1:] in CONDITION_CODES):
+            self._encode_branch(mnemonic, ops)
+            return
+
+        if mnemonic == 'call':
+            if len(ops) != 1 or not isinstance(ops[0], Ref):
+                raise AsmError('call поддерживает только прямой вызов')
+            self.items.append(_Item(self.section, data=b'\xe8\0\0\0\0',
+                                    fixups=[_Fixup(1, ops[0].symbol, 'pc32', -4)]))
+            return
+
+        if mnemonic in ('push', 'pop'):
+            if len(ops) != 1 or not isinstance(ops[0], Reg) or ops[0].size != 8:
+                raise AsmError(f'{mnemonic} поддерживает только 64-битные регистры')
+            base = 0x50 if mnemonic == 'push' else 0x58
+            reg = ops[0].code
+            self.items.append(_Item(self.section, data=(b'\x41' if reg >= 8 else b'') + bytes([base + (reg & 7)])))
+            return
+
+        if len(ops) == 2:
+            dst, src = ops
+            if mnemonic == 'mov':
+                self._encode_mov(dst, src)
+                return
+            if mnemonic == 'lea':
+                if not isinstance(dst, Reg) or not isinstance(src, Mem):
+                    raise AsmError('lea требует регистр и память')
+                self._emit(self._prefix(dst.size, dst.code, src), b'\x8d', dst.code, src)
+                return
+            if mnemonic in ALU_OPS:
+                self._encode_alu(mnemonic, dst, src)
+                return
+            if mnemonic == 'test':
+                self._encode_test(dst, src)
+                return
+            if mnemonic == 'imul':
+                if isinstance(src, Imm):
+                    self._encode_imul(dst, dst, src)
+                else:
+                    self._encode_imul(dst, src, None)
+                return
+            if mnemonic in ('movzx', 'movsx'):
+                if not isinstance(dst, Reg) or isinstance(src, (Imm, Ref)) or src.size not in (1, 2):
+                    raise AsmError(f'{mnemonic} требует регистр и 8/16-битный источник')
+                opcode = {('movzx', 1): b'\x0f\xb6', ('movzx', 2): b'\x0f\xb7',
+                          ('movsx', 1): b'\x0f\xbe', ('movsx', 2): b'\x0f\xbf'}[(mnemonic, src.size)]
+                self._emit(self._prefix(dst.size, dst.code, src, src), opcode, dst.code, src)
+                return
+            if mnemonic == 'movsxd':
+                self._emit(self._rex(True, dst.code, src), b'\x63', dst.code, src)
+                return
+            if mnemonic in SHIFT_OPS:
+                if not isinstance(src, Imm):
+                    raise AsmError('сдвиг поддерживает только непосредственный операнд')
+                size = self._operand_size([dst])
+                ext = SHIFT_OPS[mnemonic]
+                prefix = self._prefix(size, 0, dst, dst)
+                if src.value == 1:
+                    self._emit(prefix, b'\xd0' if size == 1 else b'\xd1', ext, dst)
+                else:
+                    self._emit(prefix, b'\xc0' if size == 1 else b'\xc1', ext, dst, bytes([src.value & 0xff]))
+                return
+
+        if len(ops) == 3 and mnemonic == 'imul':
+            self._encode_imul(ops[0], ops[1], ops[2])
+            return
+
+        if len(ops) == 1 and mnemonic in UNARY_OPS:
+            base, ext = UNARY_OPS[mnemonic]
+            size = self._operand_size(ops)
+            self._emit(self._prefix(size, 0, ops[0], ops[0]), bytes([base if size == 1 else base + 1]), ext, ops[0])
+            return
+
+        raise AsmError(f'неподдерживаемая инструкция "{mnemonic}"')
+
+    def _encode_mov(self, dst: Operand, src: Operand):
+        if isinstance(dst, Reg) and isinstance(src, (Reg, Mem)):
+            opcode = b'\x8a' if dst.size == 1 else b'\x8b'
+            self._emit(self._prefix(dst.size, dst.code, src, dst, src), opcode, dst.code, src)
+        elif isinstance(dst, Mem) and isinstance(src, Reg):
+            opcode = b'\x88' if src.size == 1 else b'\x89'
+            self._emit(self._prefix(src.size, src.code, dst, src), opcode, src.code, dst)
+        elif isinstance(dst, Reg) and isinstance(src, Imm):
+            reg = dst.code
+            rex = self._rex(dst.size == 8, 0, dst, self._needs_rex8(dst))
+            if dst.size == 8 and _fits_i32(src.value):
+                self._emit(rex, b'\xc7', 0, dst, self._imm(src.value, 4))
+            elif dst.size == 8:
+                self.items.append(_Item(self.section, data=rex + bytes([0xb8 + (reg & 7)]) +
+                                        struct.pack('<Q', src.value & (2**64 - 1))))
+            else:
+                base = 0xb0 if dst.size == 1 else 0xb8
+                prefix = b'\x66' if dst.size == 2 else b''
+                self.items.append(_Item(self.section, data=prefix + rex + bytes([base + (reg & 7)]) +
+                                        self._imm(src.value, dst.size)))
+        elif isinstance(dst, Mem) and isinstance(src, Imm):
+            if not dst.size:
+                raise AsmError('не указан размер операнда памяти')
+            opcode = b'\xc6' if dst.size == 1 else b'\xc7'
+            self._emit(self._prefix(dst.size, 0, dst), opcode, 0, dst, self._imm(src.value, min(dst.size, 4)))
+        else:
+            raise AsmError('неподдерживаемая форма mov')
+
+    def _encode_alu(self, mnemonic: str, dst: Operand, src: Operand):
+        base, ext = ALU_OPS[mnemonic]
+        if isinstance(src, Imm):
+            size = self._operand_size([dst])
+            prefix = self._prefix(size, 0, dst, dst)
+            if size == 1:
+                self._emit(prefix, b'\x80', ext, dst, self._imm(src.value, 1))
+            elif _fits_i8(src.value):
+                self._emit(prefix, b'\x83', ext, dst, struct.pack('<b', src.value))
+            else:
+                self._emit(prefix, b'\x81', ext, dst, self._imm(src.value, min(size, 4)))
+        elif isinstance(src, Reg):
+            opcode = base if src.size == 1 else base + 1
+            self._emit(self._prefix(src.size, src.code, dst, dst, src), bytes([opcode]), src.code, dst)
+        elif isinstance(dst, Reg) and isinstance(src, Mem):
+            opcode = base + 2 if dst.size == 1 else base + 3
+            self._emit(self._prefix(dst.size, dst.code, src, dst), bytes([opcode]), dst.code, src)
+        else:
+            raise AsmError(f'неподдерживаемая форма {mnemonic}')
+
+    def _encode_test(self, dst: Operand, src: Operand):
+        if isinstance(src, Reg):
+            opcode = b'\x84' if src.size == 1 else b'\x85'
+            self._emit(self._prefix(src.size, src.code, dst, dst, src), opcode, src.code, dst)
+        elif isinstance(src, Imm):
+            size = self._operand_size([dst])
+            opcode = b'\xf6' if size == 1 else b'\xf7'
+            self._emit(self._prefix(size, 0, dst, dst), opcode, 0, dst, self._imm(src.value, min(size, 4)))
+        else:
+            raise AsmError('неподдерживаемая форма test')
+
+    def _encode_imul(self, dst: Operand, src: Operand, imm: Optional[Imm]):
+        if not isinstance(dst, Reg) or dst.size == 1:
+            raise AsmError('imul требует 16/32/64-битный регистр назначения')
+        prefix = self._prefix(dst.size, dst.code, src)
+        if imm is None:
+            self._emit(prefix, b'\x0f\xaf', dst.code, src)
+        elif _fits_i8(imm.value):
+            self._emit(prefix, b'\x6b', dst.code, src, struct.pack('<b', imm.value))
+        else:
+            self._emit(prefix, b'\x69', dst.code, src, self._imm(imm.value, min(dst.size, 4)))
+
+    def _encode_branch(self, mnemonic: str, ops: List[Operand]):
+        if len(ops) != 1 or not isinstance(ops[0], Ref):
+            raise AsmError('переход поддерживает только метки')
+        if mnemonic == 'jmp':
+            short, long = b'\xeb', b'\xe9'
+        else:
+            cc = CONDITION_CODES[mnemonic[1:]]
+            short, long = bytes([0x70 + cc]), bytes([0x0f, 0x80 + cc])
+        self.items.append(_Item(self.section, branch=(short, long, ops[0].symbol)))
+
+    # ------------------------------------------------------------------
+    # Раскладка и разрешение меток
+    # ------------------------------------------------------------------
+
+    def _item_size(self, item: _Item, offset: int) -> int:
+        if item.branch:
+            short, long, _ = item.branch
+            return len(short) + 1 if item.short else len(long) + 4
+        if item.align:
+            return (-offset) % item.align
+        return item.reserve or len(item.data)
+
+    def _compute_offsets(self) -> Tuple[List[int], Dict[str, Tuple[str, int]], Dict[str, int]]:
+        positions = []
+        labels: Dict[str, Tuple[str, int]] = {}
+        section_sizes: Dict[str, int] = {}
+        for item in self.items:
+            offset = section_sizes.get(item.section, 0)
+            positions.append(offset)
+            if item.label:
+                if item.label in labels and labels[item.label] != (item.section, offset):
+                    raise AsmError(f'метка "{item.label}" определена повторно')
+                labels[item.label] = (item.section, offset)
+            section_sizes[item.section] = offset + self._item_size(item, offset)
+        return positions, labels, section_sizes
+
+    def _layout(self) -> AssembledObject:
+        # Все переходы начинаем с короткой формы и расширяем, пока раскладка не стабилизируется
+        while True:
+            positions, labels, section_sizes = self._compute_offsets()
+            changed = False
+            for item, offset in zip(self.items, positions):
+                if not item.branch or not item.short:
+                    continue
+                target = labels.get(item.branch[2])
+                if target is None or target[0] != item.section:
+                    item.short = False
+                    changed = True
+                    continue
+                if not _fits_i8(target[1] - (offset + self._item_size(item, offset))):
+                    item.short = False
+                    changed = True
+            if not changed:
+                break
+
+        sections: Dict[str, bytearray] = {}
+        relocations: List[Tuple[str, int, str, int, int]] = []
+        bss_size = 0
+
+        for item, offset in zip(self.items, positions):
+            if item.section == '.bss':
+                if item.data:
+                    raise AsmError('в .bss допустимо только резервирование памяти')
+                bss_size = max(bss_size, offset + self._item_size(item, offset))
+                continue
+
+            buffer = sections.setdefault(item.section, bytearray())
+            size = self._item_size(item, offset)
+
+            if item.branch:
+                short, long, target_name = item.branch
+                target = labels.get(target_name)
+                if item.short:
+                    buffer.extend(short + struct.pack('<b', target[1] - (offset + size)))
+                else:
+                    buffer.extend(long + b'\0\0\0\0')
+                    self._resolve(item.section, offset + len(long), target_name, 'pc32', -4,
+                                  labels, buffer, relocations)
+                continue
+
+            if item.align:
+                filler = b'\x90' if item.section == '.text' else b'\0'
+                buffer.extend(filler * size)
+                continue
+            if item.reserve:
+                buffer.extend(b'\0' * item.reserve)
+                continue
+
+            buffer.extend(item.data)
+            for fixup in item.fixups:
+                self._resolve(item.section, offset + fixup.offset, fixup.symbol, fixup.kind,
+                              fixup.addend, labels, buffer, relocations)
+
+        return AssembledObject(
+            sections=sections,
+            bss_size=bss_size,
+            labels=labels,
+            globals=self.globals,
+            externs=self.externs,
+            relocations=relocations
+        )
+
+    def _resolve(self, section: str, offset: int, symbol: str, kind: str, addend: int,
+                 labels: Dict[str, Tuple[str, int]], buffer: bytearray,
+                 relocations: List[Tuple[str, int, str, int, int]]):
+        """Разрешает ссылку внутри секции или записывает перемещение"""
+        target = labels.get(symbol)
+        if kind == 'pc32' and target and target[0] == section:
+            buffer[offset:offset + 4] = struct.pack('<i', target[1] + addend - offset)
+            return
+
+        if target is None:
+            if symbol not in self.externs:
+                raise AsmError(f'неопределенный символ "{symbol}"')
+            rtype = R_X86_64_PLT32 if kind == 'pc32' else R_X86_64_64
+            relocations.append((section, offset, symbol, rtype, addend))
+            return
+
+        # Ссылка на символ другой секции: глобальные символы адресуем по имени,
+        # локальные - через символ секции
+        rtype = R_X86_64_PC32 if kind == 'pc32' else R_X86_64_64
+        if symbol in self.globals:
+            relocations.append((section, offset, symbol, rtype, addend))
+        else:
+            relocations.append((section, offset, target[0], rtype, target[1] + addend))
+
+
+def build_elf_object(lines: Iterable[str], source_name: Optional[str] = None) -> bytes:
+    """Ассемблирует текст генератора и упаковывает его в объектный файл ELF64"""
+    assembled = X86Assembler().assemble(lines)
+
+    writer = ElfObjectWriter(EM_X86_64, source_name=source_name)
+    for name, data in assembled.sections.items():
+        writer.add_section(name, bytes(data))
+    if assembled.bss_size:
+        writer.add_section('.bss', size=assembled.bss_size)
+
+    for name, (section, offset) in assembled.labels.items():
+        # Локальные метки NASM (начинаются с точки) в таблицу символов не попадают
+        if name.startswith('.'):
+            continue
+        binding = STB_GLOBAL if name in assembled.globals else STB_LOCAL
+        sym_type = STT_FUNC if section == '.text' else STT_OBJECT
+        writer.add_symbol(name, section, offset, binding=binding, sym_type=sym_type)
+
+    for name in assembled.externs:
+        if name not in assembled.labels:
+            writer.add_symbol(name, None, binding=STB_GLOBAL, sym_type=STT_NOTYPE)
+
+    for section, offset, symbol, rtype, addend in assembled.relocations:
+        writer.add_relocation(section, offset, symbol, rtype, addend)
+
+    return writer.to_bytes()
@@ -0,0 +1,294 @@
+import gc
+import hashlib
+import io
+import os
+import pickle
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Set, Tuple
+
+from ast_parser import SimpleParser, LineView
+from control_flow import (ASTNode, BasicBlock, ControlFlowBuilder, FunctionInfo, Operation,
+                          ParsingError, VariableInfo)
+
+CACHE_VERSION = 2
+
+# Связи между блоками: при сохранении на диск пишутся отдельно, индексами
+BLOCK_LINKS = ('next_block', 'true_branch', 'false_branch')
+SLOTTED_FIELDS = {cls: tuple(f.name for f in fields(cls)) for cls in (Operation, ASTNode, VariableInfo)}
+# Поля, которые заполняют анализы после построения (профиль, оценка переходов):
+# у функции из кэша они сбрасываются к значениям только что построенного блока
+ANALYSIS_DEFAULTS = {f.name: f.default for f in fields(BasicBlock)
+                     if f.name in ('exec_count', 'true_probability', 'frequency')}
+
+
+@dataclass
+class FunctionEntry:
+    """Функция в кэше: AST и, если построение прошло без ошибок, готовый FunctionInfo"""
+    name: str
+    ast: ASTNode
+    start_line: int
+    func: Optional[FunctionInfo] = None
+    first_block_id: int = 0
+    block_count: int = 0  # Сколько номеров блоков заняло построение
+    calls: Set[str] = field(default_factory=set)
+    # Возвращаемые типы функций программы, которые вызываются из этой:
+    # построитель подставляет их в операции, при изменении функция перестраивается
+    callee_types: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+@dataclass
+class IncrementalResult:
+    ast: ASTNode
+    functions: List[FunctionInfo]
+    parser: SimpleParser
+    builder: ControlFlowBuilder
+    reused: int = 0  # Функции, взятые из кэша целиком
+    rebuilt: int = 0  # Функции, построенные заново
+
+
+class IncrementalCompiler:
+    """Инкрементальный разбор и построение CFG.
+    Исходник делится на функции, каждая кэшируется по хэшу своего текста. Для
+    неизменившейся функции AST и FunctionInfo берутся из кэша (номера блоков и строк
+    сдвигаются, как если бы она строилась на новом месте); заново строятся измененные
+    функции и те, у которых поменялся возвращаемый тип вызываемой функции.
+    Объекты из кэша переиспользуются между сборками: результат прошлой сборки
+    меняется следующей. Кэш живет в памяти и, если задан cache_path, на диске.
+    Разные файлы можно собирать из нескольких потоков (ключи функций включают имя
+    файла, общие словари защищены блокировкой); сборки одного файла не должны
+    пересекаться"""
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.entries: Dict[str, FunctionEntry] = {}
+        self.files: Dict[str, List[str]] = {}  # Ключи функций последней сборки каждого файла
+        # Только на поиск и запись в entries/files: сама сборка идет без блокировки
+        self.lock = threading.Lock()
+        if cache_path and os.path.exists(cache_path):
+            self.load()
+
+    def compile(self, file_name: str, source_code: str) -> IncrementalResult:
+        parser = SimpleParser()
+        builder = ControlFlowBuilder()
+        root = ASTNode(type='program', children=[], line=1, column=1)
+        result = IncrementalResult(root, builder.functions, parser, builder)
+
+        chunks = [(start_line, lines, self._key(file_name, lines))
+                  for start_line, lines in parser.split_functions(source_code)]
+        with self.lock:
+            cached = {key: self.entries[key] for _, _, key in chunks if key in self.entries}
+        parsed: List[Tuple[ASTNode, Optional[FunctionEntry]]] = []
+        used: List[str] = []
+        used_keys: Set[str] = set()
+        for start_line, lines, key in chunks:
+            entry = cached.get(key) if key not in used_keys else None
+            if entry is not None:
+                if entry.start_line != start_line:
+                    self._shift_lines(entry, start_line - entry.start_line)
+                func_node = entry.ast
+            else:
+                error_count = len(parser.errors)
+                func_node = parser.parse_function(file_name, lines, start_line)
+                if func_node and len(parser.errors) == error_count and key not in used_keys:
+                    entry = FunctionEntry(func_node.attributes['name'], func_node, start_line)
+                    cached[key] = entry
+            if entry is not None:
+                used.append(key)
+                used_keys.add(key)
+            if func_node:
+                root.children.append(func_node)
+                parsed.append((func_node, entry))
+
+        # Одноименные функции видят друг друга при поиске по имени: их не кэшируем
+        names = Counter(func_node.attributes.get('name') for func_node, _ in parsed)
+        builder.current_file_name = file_name
+        # Сигнатуры всех функций известны до построения: порядок функций не важен
+        builder.index_signatures([func_node for func_node, _ in parsed])
+        signatures = builder.signatures
+        try:
+            for func_node, entry in parsed:
+                cacheable = entry is not None and names[entry.name] == 1
+                if cacheable and entry.func is not None and all(
+                        signatures.get(name) == return_type
+                        for name, return_type in entry.callee_types.items()):
+                    self._reset_analysis(entry.func)
+                    first_block_id = builder.current_block_id
+                    builder.adopt_function(entry.func, entry.first_block_id, entry.block_count, entry.calls)
+                    entry.first_block_id = first_block_id
+                    result.reused += 1
+                else:
+                    first_block_id = builder.current_block_id
+                    error_count = len(builder.errors)
+                    func = builder.build_function(file_name, func_node)
+                    result.rebuilt += 1
+                    if cacheable:
+                        if func is not None and len(builder.errors) == error_count:
+                            entry.func = func
+                            entry.first_block_id = first_block_id
+                            entry.block_count = builder.current_block_id - first_block_id
+                            entry.calls = set(builder.call_graph.get(entry.name, ()))
+                            entry.callee_types = {name: signatures.get(name) for name in entry.calls}
+                        else:
+                            entry.func = None
+        except Exception as e:
+            builder.errors.append(ParsingError(
+                file_name=file_name,
+                line=0,
+                column=0,
+                message=f"Ошибка при анализе файла: {str(e)}"
+            ))
+            result.functions = []
+
+        with self.lock:
+            for key in used:
+                self.entries[key] = cached[key]
+            self.files[file_name] = used
+            self._prune()
+        return result
+
+    def forget(self, file_name: str):
+        """Файл удален: его функции уходят из кэша"""
+        with self.lock:
+            if self.files.pop(file_name, None) is not None:
+                self._prune()
+
+    def _prune(self):
+        live = {key for keys in self.files.values() for key in keys}
+        self.entries = {key: entry for key, entry in self.entries.items() if key in live}
+
+    def _key(self, file_name: str, lines: LineView) -> str:
+        text = file_name + '\0' + '\n'.join(lines)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _shift_lines(self, entry: FunctionEntry, delta: int):
+        """Функция сдвинулась в файле: номера строк в AST, операциях и переменных"""
+        entry.start_line += delta
+        stack = [entry.ast]
+        while stack:
+            node = stack.pop()
+            if node.line > 0:
+                node.line += delta
+            stack.extend(node.children)
+
+        func = entry.func
+        if func is None:
+            return
+        seen = set()
+        stack = [op for block in func.cfg.blocks for op in block.operations]
+        while stack:
+            op = stack.pop()
+            if op is None or id(op) in seen:
+                continue
+            seen.add(id(op))
+            if op.line > 0:
+                op.line += delta
+            stack.append(op.left)
+            stack.append(op.right)
+            stack.extend(op.args)
+        for var_info in func.symbol_table.variables.values():
+            if var_info.declared_at_line > 0:
+                var_info.declared_at_line += delta
+
+    def _reset_analysis(self, func: FunctionInfo):
+        for block in func.cfg.blocks:
+            for name, value in ANALYSIS_DEFAULTS.items():
+                setattr(block, name, value)
+
+    # ------------------------------------------------------------------
+    # Кэш на диске
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Записывает кэш в cache_path; функция, которую не удалось сериализовать
+        (слишком глубокое выражение), просто не попадает на диск"""
+        if not self.cache_path:
+            return
+        with self.lock:
+            cached = list(self.entries.items())
+            files = dict(self.files)
+        entries = {}
+        with _gc_paused():
+            for key, entry in cached:
+                try:
+                    entries[key] = _dump_entry(entry)
+                except RecursionError:
+                    continue
+        data = {'version': CACHE_VERSION, 'entries': entries, 'files': files}
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+
+    def load(self):
+        """Читает кэш; поврежденный или устаревший файл игнорируется"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return
+            with _gc_paused():
+                entries = {key: _load_entry(blob) for key, blob in data['entries'].items()}
+        except Exception:
+            return
+        self.entries = entries
+        self.files = {name: [key for key in keys if key in entries]
+                      for name, keys in data['files'].items()}
+
+
+@contextmanager
+def _gc_paused():
+    """Сборщик циклов на время (де)сериализации: миллионы новых узлов иначе
+    запускают его снова и снова, это большая часть времени загрузки"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _EntryPickler(pickle.Pickler):
+    """Блоки CFG пишутся без ссылок на соседей: длинная цепочка next_block
+    иначе упирается в глубину рекурсии pickle. Связи сохраняются индексами"""
+
+    def reducer_override(self, obj):
+        cls = type(obj)
+        if cls is BasicBlock:
+            state = {f.name: getattr(obj, f.name) for f in fields(BasicBlock) if f.name not in BLOCK_LINKS}
+            return _restore_block, (state,)
+        # Узлы пересоздаются конструктором: быстрее, чем восстановление __slots__ по одному
+        names = SLOTTED_FIELDS.get(cls)
+        if names is not None:
+            return cls, tuple(getattr(obj, name) for name in names)
+        return NotImplemented
+
+
+def _restore_block(state: dict) -> BasicBlock:
+    return BasicBlock(**state)
+
+
+def _dump_entry(entry: FunctionEntry) -> bytes:
+    links = []
+    if entry.func is not None:
+        blocks = entry.func.cfg.blocks
+        index = {id(block): i for i, block in enumerate(blocks)}
+        for block in blocks:
+            links.append(tuple(-1 if getattr(block, name) is None else index[id(getattr(block, name))]
+                               for name in BLOCK_LINKS))
+    buffer = io.BytesIO()
+    _EntryPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump((entry, links))
+    return buffer.getvalue()
+
+
+def _load_entry(blob: bytes) -> FunctionEntry:
+    entry, links = pickle.loads(blob)
+    if entry.func is not None:
+        blocks = entry.func.cfg.blocks
+        for block, targets in zip(blocks, links):
+            for name, target in zip(BLOCK_LINKS, targets):
+                setattr(block, name, blocks[target] if target >= 0 else None)
+    return entry
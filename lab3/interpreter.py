@@ -0,0 +1,438 @@
+import math
+import operator
+import sys
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple, Callable, Any
+
+from control_flow import FunctionInfo, Operation, OperationType, BasicBlock
+from port.native_io import NativeIO
+from port.identifiers import clean_identifier
+
+# Виды завершения блока
+TERM_JUMP = 0
+TERM_BRANCH = 1
+TERM_RETURN = 2
+TERM_EXIT = 3
+
+INT_TYPES = ('int', 'char', 'bool')
+FLOAT_TYPES = ('float', 'double')
+
+
+class InterpreterError(Exception):
+    """Ошибка выполнения программы интерпретатором"""
+    pass
+
+
+@dataclass
+class CompiledExpr:
+    """Скомпилированное выражение: замыкание над кадром и сведения для специализации"""
+    fn: Callable[[list], Any]
+    type: str = 'int'
+    slot: Optional[int] = None
+    const: Any = None
+    is_const: bool = False
+
+
+@dataclass
+class CompiledFunction:
+    """Функция, готовая к выполнению: слоты переменных и массив блоков"""
+    name: str
+    return_type: str
+    param_count: int = 0
+    slots: Dict[str, int] = field(default_factory=dict)
+    slot_types: List[str] = field(default_factory=list)
+    frame_template: List[Any] = field(default_factory=list)
+    # (операторы, вид завершения, условие/значение, цель, цель при ложном условии)
+    blocks: List[Tuple[tuple, int, Optional[Callable], int, int]] = field(default_factory=list)
+    entry: int = 0
+
+
+def c_div(a, b):
+    """Деление с усечением к нулю, как в C"""
+    if isinstance(a, float) or isinstance(b, float):
+        return a / b
+    if b == 0:
+        raise InterpreterError("Деление на ноль")
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def c_mod(a, b):
+    """Остаток со знаком делимого, как в C"""
+    if isinstance(a, float) or isinstance(b, float):
+        return math.fmod(a, b)
+    return a - b * c_div(a, b)
+
+
+def execute(func: CompiledFunction, args: list):
+    """Выполняет скомпилированную функцию с заданными аргументами"""
+    frame = func.frame_template.copy()
+    frame[:len(args)] = args
+    blocks = func.blocks
+    pc = func.entry
+    while True:
+        stmts, kind, expr, target, alternative = blocks[pc]
+        for stmt in stmts:
+            stmt(frame)
+        if kind == TERM_BRANCH:
+            pc = target if expr(frame) else alternative
+        elif kind == TERM_JUMP:
+            pc = target
+        elif kind == TERM_RETURN:
+            return expr(frame)
+        else:
+            return 0
+
+
+class CfgInterpreter:
+    """Интерпретатор CFG: операции заранее превращаются в замыкания над плоским кадром"""
+
+    BINARY = {
+        OperationType.ADD: operator.add,
+        OperationType.SUB: operator.sub,
+        OperationType.MUL: operator.mul,
+        OperationType.DIV: c_div,
+        OperationType.MOD: c_mod,
+        OperationType.EQ: operator.eq,
+        OperationType.NE: operator.ne,
+        OperationType.LT: operator.lt,
+        OperationType.LE: operator.le,
+        OperationType.GT: operator.gt,
+        OperationType.GE: operator.ge,
+    }
+
+    COMPARISONS = (OperationType.EQ, OperationType.NE, OperationType.LT,
+                   OperationType.LE, OperationType.GT, OperationType.GE)
+
+    def __init__(self, functions: List[FunctionInfo], io: Optional[NativeIO] = None):
+        self.io = io or NativeIO()
+        self.compiled: Dict[str, CompiledFunction] = {}
+        self.current: Optional[CompiledFunction] = None
+
+        # Сначала создаются заготовки, чтобы вызовы разрешались напрямую
+        for func in functions:
+            self.compiled[func.name] = self._prepare_function(func)
+        for func in functions:
+            self._compile_function(func, self.compiled[func.name])
+
+    def run(self, entry: str = 'main', args: Optional[list] = None) -> int:
+        """Запускает программу и возвращает код завершения"""
+        if entry not in self.compiled:
+            raise InterpreterError(f"Функция '{entry}' не найдена")
+        old_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(old_limit, 20000))
+        try:
+            result = execute(self.compiled[entry], list(args or []))
+        except RecursionError:
+            raise InterpreterError("Слишком глубокая рекурсия")
+        finally:
+            sys.setrecursionlimit(old_limit)
+            self.io.flush()
+        return int(result) if isinstance(result, (int, float)) else 0
+
+    def call(self, name: str, *args):
+        """Вызывает функцию программы из Python"""
+        return execute(self.compiled[name], list(args))
+
+    _clean_var_name = staticmethod(clean_identifier)
+
+    def _prepare_function(self, func: FunctionInfo) -> CompiledFunction:
+        """Раскладывает параметры и локальные переменные по слотам кадра"""
+        compiled = CompiledFunction(name=func.name, return_type=func.return_type or 'int')
+
+        def add_slot(name: str, var_type: str):
+            if name in compiled.slots:
+                return
+            compiled.slots[name] = len(compiled.slot_types)
+            compiled.slot_types.append(var_type)
+            compiled.frame_template.append(self._default_value(var_type))
+
+        for param_name, param_type in func.parameters:
+            add_slot(self._clean_var_name(param_name), param_type)
+        compiled.param_count = len(compiled.slots)
+
+        if func.symbol_table:
+            for var_name, var_info in func.symbol_table.variables.items():
+                add_slot(var_name, var_info.type)
+
+        for var_name, var_type in func.view.declarations:
+            add_slot(var_name, var_type)
+
+        return compiled
+
+    def _default_value(self, var_type: str):
+        if var_type in FLOAT_TYPES:
+            return 0.0
+        if var_type == 'string':
+            return ''
+        return 0
+
+    def _compile_function(self, func: FunctionInfo, compiled: CompiledFunction):
+        """Компилирует блоки функции в массив кортежей для цикла выполнения"""
+        self.current = compiled
+        blocks = func.view.blocks
+        index = func.view.index
+
+        raw = []
+        for block in blocks:
+            raw.append(self._compile_block(block, index))
+
+        # Переходы через пустые блоки разрешаются заранее
+        def resolve(target: int) -> int:
+            seen = set()
+            while target not in seen:
+                seen.add(target)
+                stmts, kind, _, next_target, _ = raw[target]
+                if stmts or kind != TERM_JUMP:
+                    break
+                target = next_target
+            return target
+
+        compiled.blocks = [
+            (stmts, kind, expr, resolve(target) if kind in (TERM_JUMP, TERM_BRANCH) else target,
+             resolve(alternative) if kind == TERM_BRANCH else alternative)
+            for stmts, kind, expr, target, alternative in raw
+        ]
+        compiled.entry = resolve(0)
+
+    def _compile_block(self, block: BasicBlock, index: Dict[int, int]):
+        operations = block.operations
+        is_branch = block.true_branch is not None and block.false_branch is not None and \
+                    block.next_block is None
+        condition = None
+        if is_branch and operations:
+            condition = operations[-1]
+            operations = operations[:-1]
+
+        stmts = []
+        for op in operations:
+            if op.type == OperationType.RETURN:
+                value = self._compile_return(op)
+                return tuple(stmts), TERM_RETURN, value, 0, 0
+            stmt = self._compile_statement(op)
+            if stmt is not None:
+                stmts.append(stmt)
+
+        if is_branch:
+            if condition is not None:
+                cond = self._compile_expr(condition).fn
+            else:
+                cond = lambda fr: True
+            return tuple(stmts), TERM_BRANCH, cond, index[block.true_branch.id], index[block.false_branch.id]
+
+        successor = block.next_block or block.true_branch or block.false_branch
+        if successor:
+            return tuple(stmts), TERM_JUMP, None, index[successor.id], 0
+        return tuple(stmts), TERM_EXIT, None, 0, 0
+
+    def _compile_return(self, op: Operation) -> Callable:
+        if not op.left:
+            return lambda fr: 0
+        value = self._compile_expr(op.left)
+        return self._coerce(value, self.current.return_type).fn
+
+    def _compile_statement(self, op: Operation) -> Optional[Callable]:
+        if op.type == OperationType.DECLARE and not op.left:
+            return None
+        if op.type in (OperationType.BREAK, OperationType.CONTINUE):
+            # Переходы break/continue не отражены в CFG
+            return None
+        if op.type == OperationType.NOOP:
+            return None
+        return self._compile_expr(op).fn
+
+    def _const(self, value, value_type: str) -> CompiledExpr:
+        return CompiledExpr(lambda fr: value, value_type, const=value, is_const=True)
+
+    def _slot(self, var_name: str) -> int:
+        slot = self.current.slots.get(var_name)
+        if slot is None:
+            raise InterpreterError(f"Неизвестная переменная '{var_name}' в функции '{self.current.name}'")
+        return slot
+
+    def _coerce(self, value: CompiledExpr, target: Optional[str]) -> CompiledExpr:
+        """Неявное приведение значения к типу переменной"""
+        fn = value.fn
+        if target in FLOAT_TYPES and value.type in INT_TYPES:
+            return CompiledExpr(lambda fr: float(fn(fr)), target)
+        if target in INT_TYPES and value.type in FLOAT_TYPES:
+            return CompiledExpr(lambda fr: int(fn(fr)), target)
+        return value
+
+    def _compile_literal(self, value: str) -> CompiledExpr:
+        if value in ('true', 'false'):
+            return self._const(1 if value == 'true' else 0, 'bool')
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return self._const(value[1:-1], 'string')
+        if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+            content = value[1:-1]
+            if len(content) == 1:
+                return self._const(ord(content), 'char')
+            return self._const(content, 'string')
+        if value.lstrip('-').isdigit():
+            return self._const(int(value), 'int')
+        try:
+            return self._const(float(value), 'double')
+        except ValueError:
+            pass
+        slot = self._slot(self._clean_var_name(value))
+        return CompiledExpr(lambda fr: fr[slot], self.current.slot_types[slot], slot=slot)
+
+    def _compile_expr(self, op: Operation) -> CompiledExpr:
+        """Превращает дерево операции в замыкание над кадром"""
+        if op.type == OperationType.NOOP:
+            return self._compile_literal(op.value or '0')
+
+        if op.type in self.BINARY and op.left and op.right:
+            return self._compile_binary(op)
+
+        if op.type in (OperationType.AND, OperationType.OR) and op.left and op.right:
+            left = self._compile_expr(op.left).fn
+            right = self._compile_expr(op.right).fn
+            if op.type == OperationType.AND:
+                return CompiledExpr(lambda fr: 1 if left(fr) and right(fr) else 0, 'bool')
+            return CompiledExpr(lambda fr: 1 if left(fr) or right(fr) else 0, 'bool')
+
+        if op.type == OperationType.NOT and op.left:
+            value = self._compile_expr(op.left).fn
+            return CompiledExpr(lambda fr: 0 if value(fr) else 1, 'bool')
+
+        if op.type == OperationType.NEGATE and op.left:
+            value = self._compile_expr(op.left)
+            fn = value.fn
+            return CompiledExpr(lambda fr: -fn(fr), value.type)
+
+        if op.type == OperationType.CAST and op.left:
+            value = self._compile_expr(op.left)
+            fn = value.fn
+            target = op.result_type or 'int'
+            if target == 'char':
+                return CompiledExpr(lambda fr: int(fn(fr)) & 0xFF, target)
+            if target in INT_TYPES:
+                return CompiledExpr(lambda fr: int(fn(fr)), target)
+            if target in FLOAT_TYPES:
+                return CompiledExpr(lambda fr: float(fn(fr)), target)
+            return value
+
+        if op.type == OperationType.CALL:
+            return self._compile_call(op)
+
+        if op.type in (OperationType.INCREMENT, OperationType.DECREMENT):
+            slot = self._slot(self._clean_var_name(op.value))
+            step = 1 if op.type == OperationType.INCREMENT else -1
+            var_type = self.current.slot_types[slot]
+            if op.attributes.get('prefix'):
+                def pre(fr):
+                    fr[slot] += step
+                    return fr[slot]
+                return CompiledExpr(pre, var_type)
+
+            def post(fr):
+                old = fr[slot]
+                fr[slot] = old + step
+                return old
+            return CompiledExpr(post, var_type)
+
+        if op.type == OperationType.ASSIGN and op.left and op.right:
+            return self._compile_store(self._clean_var_name(op.left.value), op.right)
+
+        if op.type == OperationType.DECLARE and op.left:
+            return self._compile_store(self._clean_var_name(op.value), op.left)
+
+        raise InterpreterError(f"Операция '{op.type.value}' не поддерживается интерпретатором")
+
+    def _compile_store(self, var_name: str, value_op: Operation) -> CompiledExpr:
+        slot = self._slot(var_name)
+        var_type = self.current.slot_types[slot]
+        value = self._coerce(self._compile_expr(value_op), var_type)
+        fn = value.fn
+
+        def store(fr):
+            fr[slot] = result = fn(fr)
+            return result
+        return CompiledExpr(store, var_type)
+
+    def _compile_binary(self, op: Operation) -> CompiledExpr:
+        left = self._compile_expr(op.left)
+        right = self._compile_expr(op.right)
+        fn = self.BINARY[op.type]
+
+        if op.type in self.COMPARISONS:
+            result_type = 'bool'
+        elif left.type in FLOAT_TYPES or right.type in FLOAT_TYPES:
+            result_type = 'double'
+        else:
+            result_type = 'int'
+
+        # Специализация для частых случаев: переменная и константа
+        if left.slot is not None and right.is_const:
+            slot, const = left.slot, right.const
+            return CompiledExpr(lambda fr: fn(fr[slot], const), result_type)
+        if left.slot is not None and right.slot is not None:
+            lslot, rslot = left.slot, right.slot
+            return CompiledExpr(lambda fr: fn(fr[lslot], fr[rslot]), result_type)
+        if right.is_const:
+            lfn, const = left.fn, right.const
+            return CompiledExpr(lambda fr: fn(lfn(fr), const), result_type)
+        lfn, rfn = left.fn, right.fn
+        return CompiledExpr(lambda fr: fn(lfn(fr), rfn(fr)), result_type)
+
+    def _compile_call(self, op: Operation) -> CompiledExpr:
+        """Вызов пользовательской функции или встроенной функции"""
+        name = op.value
+        callee = self.compiled.get(name)
+
+        if callee is not None:
+            args = []
+            for index, arg in enumerate(op.args):
+                value = self._compile_expr(arg)
+                if index < callee.param_count:
+                    value = self._coerce(value, callee.slot_types[index])
+                args.append(value.fn)
+            args = tuple(args)
+
+            if len(args) == 1:
+                arg0 = args[0]
+                return CompiledExpr(lambda fr: execute(callee, [arg0(fr)]), callee.return_type)
+            return CompiledExpr(lambda fr: execute(callee, [arg(fr) for arg in args]), callee.return_type)
+
+        io = self.io
+        if name == 'printf':
+            args = tuple(self._compile_expr(arg).fn for arg in op.args)
+            if not args:
+                return self._const(0, 'int')
+            fmt, rest = args[0], args[1:]
+            return CompiledExpr(lambda fr: io.printf(fmt(fr), [arg(fr) for arg in rest]), 'int')
+
+        if name == 'scanf':
+            if not op.args:
+                return self._const(0, 'int')
+            fmt = self._compile_expr(op.args[0]).fn
+            targets = []
+            for arg in op.args[1:]:
+                slot = self._slot(self._clean_var_name(arg.value))
+                targets.append((slot, self._scan_converter(self.current.slot_types[slot])))
+            targets = tuple(targets)
+
+            def scan(fr):
+                values = io.scanf(fmt(fr))
+                for (slot, convert), value in zip(targets, values):
+                    fr[slot] = convert(value)
+                if not values and io.eof:
+                    return -1
+                return len(values)
+            return CompiledExpr(scan, 'int')
+
+        if name == 'strlen' and len(op.args) == 1:
+            value = self._compile_expr(op.args[0]).fn
+            return CompiledExpr(lambda fr: len(value(fr).encode('utf-8')), 'int')
+
+        raise InterpreterError(f"Функция '{name}' не поддерживается интерпретатором")
+
+    def _scan_converter(self, var_type: str) -> Callable:
+        """Преобразование прочитанного scanf значения к типу переменной"""
+        if var_type in FLOAT_TYPES:
+            return lambda value: float(value) if not isinstance(value, str) else float(ord(value[0]))
+        if var_type == 'string':
+            return str
+        return lambda value: ord(value[0]) if isinstance(value, str) else int(value)
@@ -1,62 +1,132 @@
 import sys
 import os
+import signal
 import subprocess
 from pathlib import Path
+from typing import Callable, Optional
 
-from generators.win_x86_gen import WinX86AsmGenerator
-from generators.linux_x86_gen import LinuxX86AsmGenerator
-from generators.riscv_gen import RiscV64AsmGenerator
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from ast_parser import SimpleParser
-from control_flow import ControlFlowBuilder
+from incremental import IncrementalCompiler
+from watcher import SourceWatcher
+from compiler import CompileOptions, analyze_source, generate_code, OUTPUT_SUFFIXES
+from server import (CompileServer, CompileClient, ServerError, write_outputs,
+                    DEFAULT_SOCKET, DEFAULT_WORKERS)
 from visualizer import GraphVisualizer, HAS_GRAPHVIZ
+from interpreter import CfgInterpreter, InterpreterError
+from bytecode import BytecodeCompiler, BytecodeProgram, BytecodeVM, BytecodeError
+from profiling import load_profile, format_profile, ProfileError
+from branch_probability import estimate_program, format_frequencies
 
 def process_file(file_path: str, output_dir: str = ".", generate_asm = True, 
-                 asm_generator: str = "linux", auto_build: bool = False) -> bool:
+                 asm_generator: str = "linux", auto_build: bool = False,
+                 emit_object: bool = False, opaque_pointers: bool = False,
+                 run_program: bool = False, emit_bytecode: bool = False,
+                 profile: bool = False, use_profile: str = None,
+                 estimate_branches: bool = False, runtime: str = 'libc',
+                 freestanding: bool = False, hash_consing: bool = False,
+                 incremental: Optional[IncrementalCompiler] = None,
+                 render_graph: bool = True, jobs: int = 1) -> bool:
     
     if not os.path.exists(file_path):
         print(f"Ошибка: файл '{file_path}' не найден")
         return False
+
+    # Готовый байткод выполняется без повторного разбора исходника
+    if file_path.endswith('.smbc'):
+        try:
+            exit_code = BytecodeVM(BytecodeProgram.load(file_path)).run()
+            print(f"\n  Программа завершилась с кодом {exit_code}")
+            return True
+        except (BytecodeError, InterpreterError) as e:
+            print(f"  Ошибка выполнения байткода: {e}")
+            return False
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             source_code = f.read()
         
-        parser = SimpleParser()
-        ast = parser.parse_file(file_path, source_code)
-        
-        cfg_builder = ControlFlowBuilder()
-        functions = cfg_builder.build_from_ast(file_path, ast)
+        options = CompileOptions(asm_generator if generate_asm else None, emit_object=emit_object,
+                                 runtime=runtime, profile=profile, freestanding=freestanding,
+                                 opaque_pointers=opaque_pointers, hash_consing=hash_consing, jobs=jobs)
+        result = analyze_source(source_code, options, file_path, incremental)
+        parser, cfg_builder, functions = result.parser, result.builder, result.functions
+        if incremental is not None:
+            # Неизменившиеся функции берутся из кэша
+            print(f"  Инкрементальная сборка: из кэша {result.reused} функций, "
+                  f"построено заново {result.rebuilt}")
+        if hash_consing:
+            factory = cfg_builder.operations
+            print(f"  Hash-consing: {len(factory.nodes)} общих узлов выражений, "
+                  f"повторных использований: {factory.reused}")
 
         if parser.errors or cfg_builder.errors:
             print(f"  Обнаружены ошибки {parser.errors}, {cfg_builder.errors}, граф не будет построен")
             return False
+
+        # Счетчики выполнения блоков из профиля инструментированной сборки
+        if use_profile and functions:
+            try:
+                load_profile(use_profile, functions)
+            except (OSError, ProfileError) as e:
+                print(f"  Ошибка загрузки профиля: {e}")
+                return False
+            print("  Профиль выполнения:")
+            for line in format_profile(functions, limit=10).split('\n'):
+                print(f"    {line}")
+
+        # Статическая оценка частот блоков, когда профиля нет
+        if estimate_branches and functions:
+            estimate_program(functions)
+            print("  Оценка вероятностей переходов и частот блоков:")
+            for line in format_frequencies(functions).split('\n'):
+                print(f"    {line}")
+
+        # Выполнение программы интерпретатором, без сборки
+        if run_program and functions:
+            try:
+                exit_code = CfgInterpreter(functions).run()
+                print(f"\n  Программа завершилась с кодом {exit_code}")
+            except InterpreterError as e:
+                print(f"\n  Ошибка выполнения: {e}")
+                return False
+
+        if emit_bytecode and functions:
+            bytecode_file = Path(output_dir) / f"{Path(file_path).stem}.smbc"
+            BytecodeCompiler().compile(functions).save(str(bytecode_file))
+            print(f"  Байткод сохранен в: {bytecode_file}")
         
         # Генерация ассемблерного кода
         if generate_asm and functions:
-            if asm_generator == "linux":
-                generator = LinuxX86AsmGenerator()
-            elif asm_generator == 'win':
-                generator = WinX86AsmGenerator()
-            elif asm_generator == 'riscv':
-                generator = RiscV64AsmGenerator()
-                
-            asm_code = generator.generate_program(functions)
-            
             source_name = Path(file_path).stem
-            if asm_generator == 'riscv':
-                asm_file = Path(output_dir) / f"{source_name}_{asm_generator}.s"
-            else:
-                asm_file = Path(output_dir) / f"{source_name}_{asm_generator}.asm"
+            asm_file = Path(output_dir) / f"{source_name}_{asm_generator}{OUTPUT_SUFFIXES[asm_generator]}"
             
             with open(asm_file, 'w', encoding='utf-8') as f:
-                f.write(asm_code)
+                # Ассемблер пишется в файл по функциям, без сборки всего текста в памяти
+                generate_code(result, f)
+            if not result.ok:
+                for error in result.diagnostics:
+                    print(f"  {error.message}")
+                return False
             
             print(f"  Ассемблерный код сохранен в: {asm_file}")
+
+            # Объектный файл собирается встроенным ассемблером, без NASM/GCC
+            if result.object is not None:
+                obj_file = Path(output_dir) / f"{source_name}_{asm_generator}.o"
+                with open(obj_file, 'wb') as f:
+                    f.write(result.object)
+                print(f"  Объектный файл сохранен в: {obj_file}")
                 
-        if HAS_GRAPHVIZ:
+                if result.code_size is not None:
+                    report = result.code_size
+                    print(f"  Размер кода: {report.text_size} байт "
+                          f"(без RVC: {report.uncompressed_size} байт, "
+                          f"экономия {report.saved_bytes} байт / {report.saved_percent:.1f}%, "
+                          f"сжато {report.compressed_count} из {report.instruction_count} инструкций)")
+                
+        if HAS_GRAPHVIZ and render_graph:
             source_name = Path(file_path).stem
             output_file = Path(output_dir) / f"{source_name}.png"
             
@@ -112,14 +182,100 @@ def process_file(file_path: str, output_dir: str = ".", generate_asm = True,
         print(f"  Детали: {traceback.format_exc()}")
         return False
 
+def serve(socket_path: str, workers: int, cache_path: Optional[str]):
+    """Сервер компиляции: работает до Ctrl+C, SIGTERM или команды --shutdown"""
+    server = CompileServer(socket_path, workers, cache_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    print(f"Сервер компиляции: {socket_path} (потоков: {workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (ServerError, OSError) as e:
+        print(f"Ошибка сервера: {e}")
+        sys.exit(1)
+    print(f"Сервер остановлен, запросов: {server.requests}")
+
+def watch(directory: str, compile_file: Callable[[str], bool], incremental: IncrementalCompiler):
+    """Слежение за каталогом: пересобираются измененные файлы, а в них - только
+    измененные функции (кэш в памяти живет все время работы)"""
+    watcher = SourceWatcher(directory)
+    print(f"Слежение за {os.path.abspath(directory)}: {len(watcher.files())} файлов, Ctrl+C - выход")
+    for file_path in watcher.files():
+        print(f"Файл: {file_path}")
+        compile_file(file_path)
+        print()
+    incremental.save()
+    try:
+        for changed, removed in watcher.batches():
+            print("=" * 60)
+            for file_path in removed:
+                print(f"Удален: {file_path}")
+                incremental.forget(file_path)
+            for file_path in changed:
+                print(f"Изменен: {file_path}")
+                compile_file(file_path)
+                print()
+            incremental.save()
+    except KeyboardInterrupt:
+        pass
+
+def run_client(input_files, socket_path: str, output_dir: str, asm_generator: str,
+               emit_object: bool, **options) -> int:
+    """Отправляет файлы на сервер компиляции и записывает результат; возвращает число успешных"""
+    success_count = 0
+    try:
+        with CompileClient(socket_path) as client:
+            for file_path in input_files:
+                print(f"Файл: {file_path}")
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        source_code = f.read()
+                except OSError as e:
+                    print(f"  Ошибка: {e}")
+                    continue
+                response = client.compile(os.path.abspath(file_path), source_code,
+                                          asm_generator, emit_object, **options)
+                for error in response['errors']:
+                    print(f"  Строка {error['line']}: {error['message']}")
+                if response['ok']:
+                    for path in write_outputs(response, output_dir):
+                        print(f"  Сохранено: {path}")
+                    success_count += 1
+                print(f"  {response['time_ms']:.1f} мс, из кэша {response.get('reused', 0)} функций, "
+                      f"построено заново {response.get('rebuilt', 0)}")
+    except ServerError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    return success_count
+
 def main():
     if len(sys.argv) < 2:
         print("Использование: python main.py <файл1> [файл2 ...] [опции]")
         print("Опции:")
         print("  --output <директория>    Выходная директория")
-        print("  --generator <linux/win>  Генератор ассемблера (по умолчанию: linux)")
+        print("  --generator <linux/win/riscv/c/llvm/python>  Генератор кода (по умолчанию: linux)")
         print("  --build                  Автоматическая сборка (только для Linux)")
         print("  --no-asm                 Не генерировать ассемблерный код")
+        print("  --obj                    Сразу создать объектный файл ELF (linux/riscv)")
+        print("  --opaque-pointers        LLVM IR с непрозрачными указателями (LLVM 15+)")
+        print("  --run                    Выполнить программу интерпретатором")
+        print("  --bytecode               Сохранить байткод (.smbc); файл .smbc выполняется напрямую")
+        print("  --profile                Счетчики выполнения блоков (linux/win/riscv), пишутся в simple.prof")
+        print("  --use-profile <файл>     Загрузить профиль и показать самые частые блоки")
+        print("  --estimate-branches      Статическая оценка вероятностей переходов и частот блоков")
+        print("  --runtime <libc/fast>    Реализация printf/scanf для linux (fast - без libc, с буфером)")
+        print("  --freestanding           Точка входа _start без libc (linux, включает --runtime fast)")
+        print("  --hash-consing           Одинаковые подвыражения - общие узлы (DAG выражений)")
+        print("  --cache <файл>           Кэш разбора по функциям: перестраиваются только измененные")
+        print("  --watch <каталог>        Следить за .simple в каталоге и пересобирать измененные")
+        print("  --no-graph               Не строить изображения CFG")
+        print("  --serve                  Запустить сервер компиляции (Unix-сокет, кэши в памяти)")
+        print("  --client                 Компилировать файлы на запущенном сервере")
+        print("  --shutdown               Остановить сервер компиляции")
+        print(f"  --socket <путь>          Сокет сервера (по умолчанию {DEFAULT_SOCKET})")
+        print(f"  --workers <число>        Потоков сервера для соединений (по умолчанию {DEFAULT_WORKERS})")
+        print("  --jobs <число>           Процессов для генерации функций (linux/win/riscv, 0 - по числу ядер)")
         sys.exit(1)
     
     input_files = []
@@ -127,6 +283,23 @@ def main():
     generate_asm = True
     asm_generator = "linux"
     auto_build = False
+    emit_object = False
+    opaque_pointers = False
+    run_program = False
+    emit_bytecode = False
+    profile = False
+    use_profile = None
+    estimate_branches = False
+    runtime = 'libc'
+    freestanding = False
+    hash_consing = False
+    cache_path = None
+    server_mode = None
+    socket_path = DEFAULT_SOCKET
+    workers = DEFAULT_WORKERS
+    watch_dir = None
+    render_graph = True
+    jobs = 1
     
     i = 1
     while i < len(sys.argv):
@@ -136,7 +309,7 @@ def main():
             i += 2
         elif arg == '--generator' and i + 1 < len(sys.argv):
             asm_generator = sys.argv[i + 1]
-            if asm_generator not in ['riscv', 'linux', 'win', 'windows']:
+            if asm_generator not in ['riscv', 'linux', 'win', 'windows', 'c', 'llvm', 'python']:
                 print(f"Ошибка: неизвестный генератор '{asm_generator}'")
                 sys.exit(1)
             if asm_generator in ['win', 'windows']:
@@ -148,6 +321,66 @@ def main():
         elif arg == '--no-asm':
             generate_asm = False
             i += 1
+        elif arg == '--obj':
+            emit_object = True
+            i += 1
+        elif arg == '--opaque-pointers':
+            opaque_pointers = True
+            i += 1
+        elif arg == '--run':
+            run_program = True
+            i += 1
+        elif arg == '--bytecode':
+            emit_bytecode = True
+            i += 1
+        elif arg == '--profile':
+            profile = True
+            i += 1
+        elif arg == '--use-profile' and i + 1 < len(sys.argv):
+            use_profile = sys.argv[i + 1]
+            i += 2
+        elif arg == '--estimate-branches':
+            estimate_branches = True
+            i += 1
+        elif arg == '--runtime' and i + 1 < len(sys.argv):
+            runtime = sys.argv[i + 1]
+            if runtime not in ['libc', 'fast']:
+                print(f"Ошибка: неизвестный runtime '{runtime}'")
+                sys.exit(1)
+            i += 2
+        elif arg == '--freestanding':
+            freestanding = True
+            i += 1
+        elif arg == '--hash-consing':
+            hash_consing = True
+            i += 1
+        elif arg == '--cache' and i + 1 < len(sys.argv):
+            cache_path = sys.argv[i + 1]
+            i += 2
+        elif arg == '--watch' and i + 1 < len(sys.argv):
+            watch_dir = sys.argv[i + 1]
+            i += 2
+        elif arg == '--no-graph':
+            render_graph = False
+            i += 1
+        elif arg in ('--serve', '--client', '--shutdown'):
+            server_mode = arg[2:]
+            i += 1
+        elif arg == '--socket' and i + 1 < len(sys.argv):
+            socket_path = sys.argv[i + 1]
+            i += 2
+        elif arg == '--workers' and i + 1 < len(sys.argv):
+            if not sys.argv[i + 1].isdigit() or int(sys.argv[i + 1]) < 1:
+                print(f"Ошибка: неверное число потоков '{sys.argv[i + 1]}'")
+                sys.exit(1)
+            workers = int(sys.argv[i + 1])
+            i += 2
+        elif arg == '--jobs' and i + 1 < len(sys.argv):
+            if not sys.argv[i + 1].isdigit():
+                print(f"Ошибка: неверное число процессов '{sys.argv[i + 1]}'")
+                sys.exit(1)
+            jobs = int(sys.argv[i + 1])
+            i += 2
         elif arg.startswith('-'):
             print(f"Неизвестный параметр: {arg}")
             i += 1
@@ -155,6 +388,42 @@ def main():
             input_files.append(arg)
             i += 1
     
+    if freestanding:
+        if runtime == 'libc' and '--runtime' in sys.argv:
+            print("Ошибка: --freestanding несовместим с --runtime libc")
+            sys.exit(1)
+        if profile:
+            print("Ошибка: --freestanding несовместим с --profile (профиль пишется через libc)")
+            sys.exit(1)
+        runtime = 'fast'
+    
+    if cache_path and hash_consing:
+        print("Ошибка: --cache несовместим с --hash-consing (узлы из кэша не входят в общий DAG)")
+        sys.exit(1)
+    if server_mode == 'serve':
+        if hash_consing:
+            print("Ошибка: сервер компиляции несовместим с --hash-consing")
+            sys.exit(1)
+        serve(socket_path, workers, cache_path)
+        return
+    if server_mode == 'shutdown':
+        try:
+            with CompileClient(socket_path) as client:
+                client.shutdown()
+        except ServerError as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+        return
+    if watch_dir is not None:
+        if hash_consing:
+            print("Ошибка: --watch несовместим с --hash-consing")
+            sys.exit(1)
+        if not os.path.isdir(watch_dir):
+            print(f"Ошибка: каталог '{watch_dir}' не найден")
+            sys.exit(1)
+    # В режиме слежения кэш функций нужен всегда, файл кэша - по желанию
+    incremental = IncrementalCompiler(cache_path) if cache_path or watch_dir is not None else None
+    
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
@@ -164,11 +433,30 @@ def main():
         print("Автосборка: ВКЛЮЧЕНА")
     print("=" * 60)
     
+    if server_mode == 'client':
+        success_count = run_client(input_files, socket_path, output_dir, asm_generator, emit_object,
+                                   profile=profile, runtime=runtime, freestanding=freestanding,
+                                   opaque_pointers=opaque_pointers)
+        print(f"\nУспешно: {success_count} из {len(input_files)}")
+        return
+    
+    def compile_file(file_path: str) -> bool:
+        return process_file(file_path, output_dir, generate_asm, asm_generator, auto_build, emit_object,
+                            opaque_pointers, run_program, emit_bytecode, profile, use_profile,
+                            estimate_branches, runtime, freestanding, hash_consing, incremental,
+                            render_graph, jobs)
+
+    if watch_dir is not None:
+        watch(watch_dir, compile_file, incremental)
+        return
+    
     success_count = 0
     for file_path in input_files:
-        if process_file(file_path, output_dir, generate_asm, asm_generator, auto_build):
+        if compile_file(file_path):
             success_count += 1
         print()
+    if incremental is not None:
+        incremental.save()
     
     if success_count > 0:
         print(f"\nPNG файлы сохранены в: {output_path.absolute()}")
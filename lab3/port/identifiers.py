@@ -0,0 +1,8 @@
+def clean_identifier(var_name: str) -> str:
+    """Имя переменной без '-> тип': 'a -> int' -> 'a'.
+    Общая функция построителя CFG и генераторов; состояния между компиляциями нет"""
+    if not var_name:
+        return var_name
+    if '->' in var_name:
+        return var_name.split('->')[0].strip()
+    return var_name
@@ -0,0 +1,33 @@
+import threading
+from typing import Dict, List, Hashable, Iterable
+
+
+class InternTable:
+    """Интернирование значений: каждое значение получает небольшой целый id,
+    повторное значение - тот же id. Ids идут подряд с нуля и служат индексами массивов.
+    Таблицу можно разделять между потоками: поиск идет без блокировки,
+    новое значение добавляется под блокировкой"""
+
+    def __init__(self, values: Iterable[Hashable] = ()):
+        self.ids: Dict[Hashable, int] = {}
+        self.values: List[Hashable] = []
+        self.lock = threading.Lock()
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value: Hashable) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            with self.lock:
+                value_id = self.ids.get(value)
+                if value_id is None:
+                    value_id = len(self.values)
+                    self.values.append(value)
+                    # id публикуется последним: поиск без блокировки не вернет id,
+                    # для которого значение еще не записано
+                    self.ids[value] = value_id
+        return value_id
+
+    def __len__(self) -> int:
+        return len(self.values)
+
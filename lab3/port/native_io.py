@@ -0,0 +1,176 @@
+import re
+import sys
+from typing import List, Any, Optional, TextIO
+
+
+class NativeIO:
+    """Реализация printf/scanf для выполнения программ без компиляции"""
+
+    # Спецификатор формата C: флаги, ширина, точность, длина, преобразование
+    FORMAT_SPEC = re.compile(r'%([-+ #0]*)(\*|\d+)?(?:\.(\*|\d+))?(hh|h|ll|l|L|z|j|t)?([diouxXeEfFgGcsp%])')
+
+    def __init__(self, stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None):
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def format(self, fmt: str, args: List[Any]) -> str:
+        """Форматирует строку по правилам printf"""
+        result = []
+        arg_index = 0
+        last = 0
+        for match in self.FORMAT_SPEC.finditer(fmt):
+            result.append(fmt[last:match.start()])
+            last = match.end()
+            flags, width, precision, _, conv = match.groups()
+            if conv == '%':
+                result.append('%')
+                continue
+            if width == '*':
+                width = str(args[arg_index])
+                arg_index += 1
+            if precision == '*':
+                precision = str(args[arg_index])
+                arg_index += 1
+            value = args[arg_index] if arg_index < len(args) else 0
+            arg_index += 1
+
+            spec = '%' + flags + (width or '') + ('.' + precision if precision is not None else '')
+            if conv in 'diu':
+                result.append((spec + 'd') % int(value))
+            elif conv in 'oxX':
+                result.append((spec + conv) % (int(value) & 0xFFFFFFFF))
+            elif conv in 'eEfFgG':
+                result.append((spec + conv) % float(value))
+            elif conv == 'c':
+                char = chr(value & 0xFF) if isinstance(value, int) else str(value)[:1]
+                result.append((spec + 's') % char)
+            elif conv == 's':
+                result.append((spec + 's') % value)
+            else:
+                result.append((spec + 'x') % id(value))
+        result.append(fmt[last:])
+        return ''.join(result)
+
+    def printf(self, fmt: str, args: List[Any]) -> int:
+        text = self.format(fmt, args)
+        self.stdout.write(text)
+        return len(text.encode('utf-8'))
+
+    def flush(self):
+        self.stdout.flush()
+
+    def _fill(self) -> bool:
+        """Дочитывает очередную строку ввода; False при конце ввода"""
+        if self.eof:
+            return False
+        line = self.stdin.readline()
+        if not line:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + line
+        self.pos = 0
+        return True
+
+    def _peek(self) -> Optional[str]:
+        while self.pos >= len(self.buffer):
+            if not self._fill():
+                return None
+        return self.buffer[self.pos]
+
+    def _skip_whitespace(self):
+        while True:
+            char = self._peek()
+            if char is None or not char.isspace():
+                return
+            self.pos += 1
+
+    def _read_while(self, allowed) -> str:
+        chars = []
+        while True:
+            char = self._peek()
+            if char is None or not allowed(char, chars):
+                return ''.join(chars)
+            chars.append(char)
+            self.pos += 1
+
+    def scanf_into(self, fmt: str, current: tuple, kinds: str) -> tuple:
+        """scanf для сгенерированного кода: возвращает (количество, новые значения переменных)
+        kinds задает тип каждой переменной: i - целое/символ, f - вещественное, s - строка"""
+        values = self.scanf(fmt)
+        result = list(current)
+        for index, value in enumerate(values[:len(result)]):
+            kind = kinds[index]
+            if kind == 'f':
+                result[index] = float(ord(value[0])) if isinstance(value, str) else float(value)
+            elif kind == 's':
+                result[index] = str(value)
+            else:
+                result[index] = ord(value[0]) if isinstance(value, str) else int(value)
+        count = -1 if not values and self.eof else len(values)
+        return (count, *result)
+
+    def scanf(self, fmt: str) -> List[Any]:
+        """Читает значения по формату scanf; возвращает прочитанные значения"""
+        # Приглашение к вводу должно появиться до блокировки на чтении
+        self.flush()
+        values = []
+        index = 0
+        while index < len(fmt):
+            char = fmt[index]
+            if char.isspace():
+                self._skip_whitespace()
+                index += 1
+                continue
+            if char != '%':
+                if self._peek() != char:
+                    return values
+                self.pos += 1
+                index += 1
+                continue
+
+            match = self.FORMAT_SPEC.match(fmt, index)
+            if not match:
+                return values
+            index = match.end()
+            conv = match.group(5)
+            if conv == '%':
+                self._skip_whitespace()
+                if self._peek() != '%':
+                    return values
+                self.pos += 1
+                continue
+
+            if conv == 'c':
+                char = self._peek()
+                if char is None:
+                    return values
+                self.pos += 1
+                values.append(char)
+                continue
+
+            self._skip_whitespace()
+            if conv in 'diouxX':
+                base = 16 if conv in 'xX' else 8 if conv == 'o' else 10
+                digits = '0123456789abcdefABCDEF'[:base if base <= 10 else 22]
+                text = self._read_while(
+                    lambda c, acc: c in digits or (c in '+-' and not acc))
+                try:
+                    values.append(int(text, base))
+                except ValueError:
+                    return values
+            elif conv in 'eEfFgG':
+                text = self._read_while(
+                    lambda c, acc: c.isdigit() or c in '.eE' or (c in '+-' and (not acc or acc[-1] in 'eE')))
+                try:
+                    values.append(float(text))
+                except ValueError:
+                    return values
+            else:
+                text = self._read_while(lambda c, acc: not c.isspace())
+                if not text:
+                    return values
+                values.append(text)
+        return values
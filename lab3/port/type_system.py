@@ -1,5 +1,20 @@
+from typing import List, Optional, Hashable
+from port.interning import InternTable
+
+# Описание неизвестного типа: как у int
+DEFAULT_TYPE_INFO = {
+    'size': 4,
+    'signed': True,
+    'asm_prefix': 'dword',
+    'register_size': 32,
+}
+
+
 class TypeSystem:
-    """Система типов для языка"""
+    """Система типов для языка.
+    Имена типов интернируются в небольшие целые id; размер, префикс и матрица
+    неявных преобразований хранятся массивами по id, так что проверки типов -
+    это поиск id и индексация вместо разбора строк"""
     
     # Базовые типы
     BUILTIN_TYPES = {
@@ -47,6 +62,43 @@ class TypeSystem:
         },
     }
     
+    # Правила неявного преобразования
+    IMPLICIT_CASTS = {
+        'int': ['float', 'double'],
+        'float': ['double'],
+        'char': ['int', 'float', 'double'],
+    }
+    
+    # Таблицы по id встроенного типа. Заполняются при загрузке модуля и дальше
+    # не меняются: неизвестные имена не интернируются (иначе таблицы и матрица
+    # преобразований растут с каждым новым именем), потоки читают их без блокировки
+    TYPES = InternTable()
+    TYPE_INFO: List[dict] = []
+    SIZES: List[int] = []
+    ASM_PREFIXES: List[Optional[str]] = []
+    CASTS: List[bytearray] = []  # CASTS[from_id][to_id] == 1, если преобразование неявное
+    
+    @staticmethod
+    def type_id(type_name: Hashable) -> Optional[int]:
+        """Id встроенного типа; у неизвестного имени id нет"""
+        return TypeSystem.TYPES.ids.get(type_name)
+    
+    @staticmethod
+    def _init_tables():
+        for type_name, info in TypeSystem.BUILTIN_TYPES.items():
+            TypeSystem.TYPES.intern(type_name)
+            TypeSystem.TYPE_INFO.append(info)
+            TypeSystem.SIZES.append(info['size'])
+            TypeSystem.ASM_PREFIXES.append(info['asm_prefix'])
+        count = len(TypeSystem.TYPES)
+        for type_id in range(count):
+            row = bytearray(count)
+            row[type_id] = 1
+            TypeSystem.CASTS.append(row)
+        for from_type, targets in TypeSystem.IMPLICIT_CASTS.items():
+            for to_type in targets:
+                TypeSystem.CASTS[TypeSystem.type_id(from_type)][TypeSystem.type_id(to_type)] = 1
+    
     @staticmethod
     def is_valid_type(type_name: str) -> bool:
         """Проверяет, является ли тип допустимым"""
@@ -55,34 +107,30 @@ class TypeSystem:
     @staticmethod
     def get_type_info(type_name: str) -> dict:
         """Возвращает информацию о типе"""
-        return TypeSystem.BUILTIN_TYPES.get(type_name, {
-            'size': 4,
-            'signed': True,
-            'asm_prefix': 'dword',
-            'register_size': 32,
-        })
+        type_id = TypeSystem.TYPES.ids.get(type_name)
+        return DEFAULT_TYPE_INFO if type_id is None else TypeSystem.TYPE_INFO[type_id]
     
     @staticmethod
     def get_size(type_name: str) -> int:
         """Возвращает размер типа в байтах"""
-        return TypeSystem.get_type_info(type_name)['size']
+        type_id = TypeSystem.TYPES.ids.get(type_name)
+        return DEFAULT_TYPE_INFO['size'] if type_id is None else TypeSystem.SIZES[type_id]
     
     @staticmethod
     def get_asm_prefix(type_name: str) -> str:
         """Возвращает префикс для ассемблера"""
-        return TypeSystem.get_type_info(type_name)['asm_prefix']
+        type_id = TypeSystem.TYPES.ids.get(type_name)
+        return DEFAULT_TYPE_INFO['asm_prefix'] if type_id is None else TypeSystem.ASM_PREFIXES[type_id]
     
     @staticmethod
     def can_implicit_cast(from_type: str, to_type: str) -> bool:
         """Проверяет возможность неявного преобразования типов"""
-        # Правила неявного преобразования
-        cast_rules = {
-            'int': ['float', 'double'],
-            'float': ['double'],
-            'char': ['int', 'float', 'double'],
-        }
-        
-        if from_type == to_type:
-            return True
-        
-        return to_type in cast_rules.get(from_type, [])
+        ids = TypeSystem.TYPES.ids
+        from_id, to_id = ids.get(from_type), ids.get(to_type)
+        if from_id is None or to_id is None:
+            # Неизвестный тип приводится только к самому себе
+            return from_type == to_type
+        return TypeSystem.CASTS[from_id][to_id] == 1
+
+
+TypeSystem._init_tables()
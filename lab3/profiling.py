@@ -0,0 +1,101 @@
+import struct
+import zlib
+from typing import List, Dict, Tuple, Optional
+from control_flow import FunctionInfo
+
+# Формат файла профиля: заголовок (магия, версия, число счетчиков, контрольная сумма
+# раскладки) и затем счетчики выполнений блоков по 8 байт в little-endian
+PROFILE_MAGIC = b'SPRF'
+PROFILE_VERSION = 1
+PROFILE_HEADER = struct.Struct('<4sIII')
+DEFAULT_PROFILE_PATH = 'simple.prof'
+
+# Символы, которые генераторы добавляют в инструментированную программу
+COUNTERS_SYMBOL = '__prof_counters'
+HEADER_SYMBOL = '__prof_header'
+PATH_SYMBOL = '__prof_path'
+MODE_SYMBOL = '__prof_mode'
+DUMP_SYMBOL = '__prof_dump'
+
+
+class ProfileError(Exception):
+    """Файл профиля поврежден или не соответствует программе"""
+
+
+class ProfileLayout:
+    """Раскладка массива счетчиков: по одной ячейке на каждый блок каждой функции"""
+
+    def __init__(self, functions: List[FunctionInfo], path: str = DEFAULT_PROFILE_PATH):
+        self.path = path
+        self.slots: List[Tuple[str, int]] = []
+        self.index: Dict[Tuple[str, int], int] = {}
+        for func in functions:
+            for block in func.view.blocks:
+                self.index[(func.name, block.id)] = len(self.slots)
+                self.slots.append((func.name, block.id))
+        # Контрольная сумма не дает применить профиль к измененной программе
+        signature = ';'.join(f'{name}:{block_id}' for name, block_id in self.slots)
+        self.checksum = zlib.crc32(signature.encode('utf-8'))
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def offset(self, func_name: str, block_id: int) -> int:
+        """Смещение счетчика блока в байтах от начала массива"""
+        return 8 * self.index[(func_name, block_id)]
+
+    def header_words(self) -> List[int]:
+        """Заголовок файла в виде 32-битных слов для директив данных"""
+        magic, = struct.unpack('<I', PROFILE_MAGIC)
+        return [magic, PROFILE_VERSION, len(self.slots), self.checksum]
+
+
+def read_profile(path: str) -> Tuple[int, List[int]]:
+    """Читает файл профиля; возвращает контрольную сумму и счетчики"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < PROFILE_HEADER.size:
+        raise ProfileError(f'{path}: файл профиля слишком короткий')
+    magic, version, count, checksum = PROFILE_HEADER.unpack_from(data)
+    if magic != PROFILE_MAGIC:
+        raise ProfileError(f'{path}: не является файлом профиля')
+    if version != PROFILE_VERSION:
+        raise ProfileError(f'{path}: неподдерживаемая версия профиля {version}')
+    expected = PROFILE_HEADER.size + 8 * count
+    if len(data) != expected:
+        raise ProfileError(f'{path}: ожидалось {expected} байт, получено {len(data)}')
+    counts = list(struct.unpack_from(f'<{count}Q', data, PROFILE_HEADER.size))
+    return checksum, counts
+
+
+def load_profile(path: str, functions: List[FunctionInfo],
+                 accumulate: bool = False) -> ProfileLayout:
+    """Загружает профиль и записывает счетчики в BasicBlock.exec_count.
+    При accumulate=True счетчики суммируются с уже загруженными (несколько прогонов)"""
+    checksum, counts = read_profile(path)
+    layout = ProfileLayout(functions)
+    if checksum != layout.checksum or len(counts) != len(layout):
+        raise ProfileError(f'{path}: профиль снят с другой версии программы')
+
+    for func in functions:
+        for block in func.view.blocks:
+            count = counts[layout.index[(func.name, block.id)]]
+            block.exec_count = block.exec_count + count if accumulate else count
+    return layout
+
+
+def format_profile(functions: List[FunctionInfo], limit: Optional[int] = None) -> str:
+    """Текстовый отчет: самые часто выполняемые блоки"""
+    rows = []
+    for func in functions:
+        for block in func.view.blocks:
+            rows.append((block.exec_count, func.name, block.id, len(block.operations)))
+    rows.sort(key=lambda row: (-row[0], row[1], row[2]))
+    total = sum(row[0] for row in rows) or 1
+    if limit is not None:
+        rows = rows[:limit]
+
+    lines = [f'{"count":>12}  {"%":>6}  function:block (ops)']
+    for count, name, block_id, ops in rows:
+        lines.append(f'{count:>12}  {100.0 * count / total:>5.1f}%  {name}:{block_id} ({ops})')
+    return '\n'.join(lines)
@@ -0,0 +1,258 @@
+import base64
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from incremental import IncrementalCompiler
+from compiler import compile_source, OUTPUT_SUFFIXES
+
+# Сокет по умолчанию: свой для каждого пользователя
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f'simple-compiler-{os.getuid()}.sock')
+DEFAULT_WORKERS = 4
+
+
+class ServerError(Exception):
+    """Ошибка обмена с сервером компиляции"""
+
+
+class CompileServer:
+    """Сервер компиляции на Unix-сокете.
+    Модули генераторов загружаются один раз, разобранные функции и их CFG живут
+    в IncrementalCompiler между запросами: повторная компиляция файла перестраивает
+    только измененные функции. Соединения обслуживает пул потоков, разные файлы
+    компилируются параллельно: общая блокировка держится только на время поиска
+    и записи в кэше. Объекты из кэша переиспользуются следующей сборкой того же
+    файла, поэтому сборки одного файла идут по очереди (блокировка на имя файла,
+    удаляется, когда запросов к файлу больше нет). Каждый поток пула держит свои
+    экземпляры генераторов и использует их во всех своих запросах.
+
+    Протокол: по одному JSON-объекту на строку в обе стороны, в одном соединении
+    можно отправить несколько запросов. Запрос компиляции:
+    {"file": имя, "source": текст, "generator": "linux", "object": false, ...},
+    ответ: {"ok": ..., "output": текст, "object": base64, "errors": [...], ...}"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, workers: int = DEFAULT_WORKERS,
+                 cache_path: Optional[str] = None):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.incremental = IncrementalCompiler(cache_path)
+        self.lock = threading.Lock()  # Счетчик запросов и словарь блокировок файлов
+        # Имя файла -> [блокировка, число запросов, которые ее ждут или держат]
+        self.file_locks: Dict[str, list] = {}
+        self.local = threading.local()  # Генераторы потока пула (compile_source(generators=...))
+        self.stopping = threading.Event()
+        self.connections: Set[socket.socket] = set()
+        self.connections_lock = threading.Lock()
+        self.requests = 0
+
+    def serve_forever(self):
+        listener = self._bind()
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                try:
+                    while not self.stopping.is_set():
+                        try:
+                            conn, _ = listener.accept()
+                        except socket.timeout:
+                            continue
+                        conn.settimeout(None)
+                        pool.submit(self._serve_connection, conn)
+                finally:
+                    # Открытые соединения закрываются, иначе пул ждет их клиентов
+                    self.stopping.set()
+                    with self.connections_lock:
+                        for conn in self.connections:
+                            try:
+                                conn.shutdown(socket.SHUT_RDWR)
+                            except OSError:
+                                pass
+        finally:
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.incremental.save()
+
+    def stop(self):
+        self.stopping.set()
+
+    def _bind(self) -> socket.socket:
+        if os.path.exists(self.socket_path):
+            # Файл от завершившегося сервера удаляется, работающий сервер - ошибка
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise ServerError(f'сервер уже запущен: {self.socket_path}')
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        listener.listen(64)
+        # Периодическая проверка флага остановки
+        listener.settimeout(0.5)
+        return listener
+
+    def _serve_connection(self, conn: socket.socket):
+        with self.connections_lock:
+            self.connections.add(conn)
+        try:
+            with conn, conn.makefile('rb') as reader, conn.makefile('wb') as writer:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                        if not isinstance(request, dict):
+                            raise ValueError('ожидается объект JSON')
+                        response = self.handle(request)
+                    except ValueError as e:
+                        response = {'ok': False, 'errors': [{'line': 0, 'message': f'неверный запрос: {e}'}]}
+                    except KeyError as e:
+                        response = {'ok': False, 'errors': [{'line': 0, 'message': f'в запросе нет поля {e}'}]}
+                    except Exception as e:
+                        # Ошибка компилятора не должна закрывать соединение и останавливать поток пула
+                        response = {'ok': False, 'errors': [{'line': 0, 'message': f'внутренняя ошибка: {e!r}'}]}
+                    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                    writer.flush()
+                    if self.stopping.is_set():
+                        break
+        except OSError:
+            pass
+        finally:
+            with self.connections_lock:
+                self.connections.discard(conn)
+
+    def handle(self, request: dict) -> dict:
+        command = request.get('command', 'compile')
+        if command == 'compile':
+            return self.compile(request)
+        if command == 'ping':
+            return {'ok': True, 'requests': self.requests, 'cached_functions': len(self.incremental.entries)}
+        if command == 'shutdown':
+            self.stop()
+            return {'ok': True}
+        return {'ok': False, 'errors': [{'line': 0, 'message': f'неизвестная команда "{command}"'}]}
+
+    def compile(self, request: dict) -> dict:
+        file_name = request['file']
+        generator_name = request.get('generator', 'linux')
+        start = time.perf_counter()
+        response = {'ok': False, 'file': file_name, 'generator': generator_name, 'errors': []}
+        generators = getattr(self.local, 'generators', None)
+        if generators is None:
+            generators = self.local.generators = {}
+        with self.lock:
+            self.requests += 1
+            file_lock = self.file_locks.get(file_name)
+            if file_lock is None:
+                file_lock = self.file_locks[file_name] = [threading.Lock(), 0]
+            file_lock[1] += 1
+        try:
+            with file_lock[0]:
+                response.update(self._compile_file(request, generators))
+        finally:
+            with self.lock:
+                file_lock[1] -= 1
+                if not file_lock[1]:
+                    del self.file_locks[file_name]
+        response['time_ms'] = (time.perf_counter() - start) * 1000
+        return response
+
+    def _compile_file(self, request: dict, generators: dict) -> dict:
+        """Компиляция под блокировкой файла: поля ответа, кроме имени и времени"""
+        response = {'ok': False, 'errors': []}
+        try:
+            result = compile_source(
+                request['source'], request.get('generator', 'linux'), request.get('opt_level', 0),
+                request['file'], self.incremental, generators,
+                emit_object=request.get('object', False),
+                runtime=request.get('runtime'),
+                profile=request.get('profile', False),
+                freestanding=request.get('freestanding', False),
+                opaque_pointers=request.get('opaque_pointers', False),
+            )
+        except (ValueError, TypeError) as e:
+            response['errors'].append({'line': 0, 'message': str(e)})
+        else:
+            response['ok'] = result.ok
+            response['reused'] = result.reused
+            response['rebuilt'] = result.rebuilt
+            response['errors'] = [{'line': error.line, 'message': error.message}
+                                  for error in result.diagnostics]
+            if result.output is not None:
+                response['output'] = result.output
+            if result.object is not None:
+                response['object'] = base64.b64encode(result.object).decode('ascii')
+            if result.code_size is not None:
+                response['code_size'] = {'text': result.code_size.text_size,
+                                         'uncompressed': result.code_size.uncompressed_size}
+        return response
+
+
+class CompileClient:
+    """Клиент сервера компиляции; соединение переиспользуется между запросами"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: Optional[float] = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(socket_path)
+        except OSError as e:
+            self.sock.close()
+            raise ServerError(f'нет соединения с сервером {socket_path}: {e}') from e
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, payload: dict) -> dict:
+        self.sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ServerError('сервер закрыл соединение')
+        return json.loads(line)
+
+    def compile(self, file_name: str, source_code: str, generator: str = 'linux',
+                emit_object: bool = False, **options) -> dict:
+        return self.request(dict(options, command='compile', file=file_name, source=source_code,
+                                 generator=generator, object=emit_object))
+
+    def ping(self) -> dict:
+        return self.request({'command': 'ping'})
+
+    def shutdown(self) -> dict:
+        return self.request({'command': 'shutdown'})
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_outputs(response: dict, output_dir: str) -> List[Path]:
+    """Записывает ассемблер и объектный файл из ответа сервера; возвращает пути"""
+    stem = Path(response['file']).stem
+    generator_name = response['generator']
+    written = []
+    if 'output' in response:
+        asm_file = Path(output_dir) / f"{stem}_{generator_name}{OUTPUT_SUFFIXES[generator_name]}"
+        with open(asm_file, 'w', encoding='utf-8') as f:
+            f.write(response['output'])
+        written.append(asm_file)
+    if 'object' in response:
+        obj_file = Path(output_dir) / f"{stem}_{generator_name}.o"
+        with open(obj_file, 'wb') as f:
+            f.write(base64.b64decode(response['object']))
+        written.append(obj_file)
+    return written
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули компилятора импортируются как в main.py: из каталога lab3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,22 @@
+import os
+
+from ast_parser import SimpleParser
+from control_flow import ControlFlowBuilder
+
+TEST_FILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_files')
+
+
+def read_example(name: str) -> str:
+    """Текст примера из test_files"""
+    with open(os.path.join(TEST_FILES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def build_functions(source: str, file_name: str = '<test>'):
+    """Разбор и построение CFG; ошибок быть не должно"""
+    parser = SimpleParser()
+    ast = parser.parse_file(file_name, source)
+    builder = ControlFlowBuilder()
+    functions = builder.build_from_ast(file_name, ast)
+    assert not parser.errors and not builder.errors, parser.errors + builder.errors
+    return functions
@@ -0,0 +1,52 @@
+import time
+
+from branch_probability import estimate_program, BranchProbabilityAnalysis
+from support import build_functions
+
+
+def sequential_function(ifs: int, loops: int) -> str:
+    """Функция из ifs последовательных if и loops последовательных двойных циклов"""
+    lines = ['function main() -> int {', ' x -> int;', ' i -> int;', ' j -> int;', ' x = 0;']
+    for index in range(ifs):
+        lines.extend([f' if (x == {index}) {{', '  x = x + 1;', ' }'])
+    for _ in range(loops):
+        lines.extend([' i = 0;', ' while (i < 10) {', '  j = 0;', '  while (j < 10) {',
+                      '   j = j + 1;', '  }', '  i = i + 1;', ' }'])
+    lines.extend([' return x;', '}'])
+    return '\n'.join(lines) + '\n'
+
+
+def estimate_time(source: str) -> float:
+    functions = build_functions(source)
+    start = time.perf_counter()
+    estimate_program(functions)
+    return time.perf_counter() - start
+
+
+def test_loop_forest():
+    functions = build_functions(sequential_function(1, 2))
+    analysis = BranchProbabilityAnalysis()
+    analysis.run(functions[0])
+    outer = [header for header, parent in analysis.loop_parent.items() if parent is None]
+    inner = [header for header, parent in analysis.loop_parent.items() if parent is not None]
+    assert len(outer) == 2 and len(inner) == 2
+    for header in inner:
+        assert analysis.loops[header] < analysis.loops[analysis.loop_parent[header]]
+        assert all(analysis.innermost_loop[block_id] == header for block_id in analysis.loops[header])
+        # Блоки цикла - в обратном постпорядке функции
+        order = [block.id for block in analysis.blocks]
+        assert [block.id for block in analysis.loop_blocks[header]] == \
+               [block_id for block_id in order if block_id in analysis.loops[header]]
+
+    frequency = {block.id: block.frequency for block in functions[0].cfg.blocks}
+    entry = functions[0].cfg.entry_block.id
+    assert frequency[entry] == 1.0
+    assert all(frequency[header] > frequency[analysis.loop_parent[header]] for header in inner)
+
+
+def test_large_function_time_bounded():
+    # Квадратичные доминаторы и обход всех блоков на каждый цикл давали ~9 с на 2000 if
+    small = estimate_time(sequential_function(1000, 250))
+    large = estimate_time(sequential_function(2000, 500))
+    assert large < 5.0
+    assert large < 4 * small + 0.5
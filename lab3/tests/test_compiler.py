@@ -0,0 +1,70 @@
+from compiler import compile_source, CompileOptions
+from incremental import IncrementalCompiler
+from support import build_functions, read_example
+
+UNSUPPORTED_FORMAT = '''function main() -> int {
+ x -> int;
+ x = 42;
+ printf("%5d\\n", x);
+ return 0;
+}
+'''
+
+ASSIGNED_PRINTF = '''function main() -> int {
+ r -> int;
+ r = printf("hello\\n");
+ return r;
+}
+'''
+
+PRINTF_IN_EXPRESSION = '''function main() -> int {
+ r -> int;
+ r = printf("hello\\n") + 1;
+ return r;
+}
+'''
+
+
+def test_opt2_keeps_libc_for_unsupported_format():
+    result = compile_source(UNSUPPORTED_FORMAT, 'linux', opt_level=2)
+    assert result.ok, result.diagnostics
+    assert 'extern printf' in result.output
+    assert '__rt_' not in result.output
+
+
+def test_opt2_selects_fast_runtime_for_supported_formats():
+    source = read_example('fib.simple')
+    assert CompileOptions('linux', 2).resolved_runtime(build_functions(source)) == 'fast'
+    result = compile_source(source, 'linux', opt_level=2)
+    assert result.ok and '__rt_' in result.output
+
+
+def test_opt2_compiles_assigned_printf_with_fast_runtime():
+    # На O0 программа собирается с libc; O2 не должен ее ломать
+    result = compile_source(ASSIGNED_PRINTF, 'linux', opt_level=2, emit_object=True)
+    assert result.ok, result.diagnostics
+    assert 'call __rt_printf' in result.output and 'extern printf' not in result.output
+
+
+def test_opt2_keeps_libc_for_printf_inside_expression():
+    assert CompileOptions('linux', 2).resolved_runtime(build_functions(PRINTF_IN_EXPRESSION)) == 'libc'
+    result = compile_source(PRINTF_IN_EXPRESSION, 'linux', opt_level=2, emit_object=True)
+    assert result.ok, result.diagnostics
+    assert 'extern printf' in result.output and '__rt_' not in result.output
+
+
+def test_explicit_fast_runtime_still_reports_unsupported_format():
+    result = compile_source(UNSUPPORTED_FORMAT, 'linux', opt_level=2, runtime='fast')
+    assert not result.ok
+    assert '%5' in result.diagnostics[-1].message
+
+
+def test_incremental_reuse_matches_full_build():
+    incremental = IncrementalCompiler()
+    source = read_example('calculator.simple')
+    first = compile_source(source, 'linux', file_name='calc.simple', incremental=incremental)
+    second = compile_source(source, 'linux', file_name='calc.simple', incremental=incremental)
+    assert second.reused == len(second.functions) and second.rebuilt == 0
+    assert first.output == second.output == compile_source(source, 'linux', file_name='calc.simple').output
+    incremental.forget('calc.simple')
+    assert not incremental.entries and not incremental.files
@@ -0,0 +1,99 @@
+from control_flow import ControlFlowBuilder, OperationType
+from support import build_functions
+
+FORWARD_CALL = '''function main() -> int {
+ x -> double;
+ x = half(3);
+ return 0;
+}
+
+function half(n -> int) -> double {
+ y -> double;
+ y = n;
+ return y;
+}
+'''
+
+# Взаимная рекурсия через функцию ниже по файлу, ветвления и цикл
+MUTUAL_RECURSION = '''function is_even(n -> int) -> int {
+ r -> int;
+ if (n == 0) {
+  return 1;
+ }
+ r = n - 1;
+ r = is_odd(r);
+ return r;
+}
+
+function is_odd(n -> int) -> int {
+ r -> int;
+ r = 0;
+ while (n > 1) {
+  n = n - 2;
+ }
+ if (n == 1) {
+  r = 1;
+ } else {
+  r = is_even(n);
+ }
+ return r;
+}
+
+function main() -> int {
+ x -> int;
+ x = is_even(7);
+ printf("%d\\n", x);
+ return 0;
+}
+'''
+
+
+def cfg_shape(functions):
+    """Блоки функций по порядку: номер, переходы и операции"""
+    def block_id(block):
+        return block.id if block is not None else None
+
+    return [(func.name, [(block.id, block_id(block.true_branch), block_id(block.false_branch),
+                          block_id(block.next_block), repr(block.operations))
+                         for block in func.cfg.blocks])
+            for func in functions]
+
+
+def calls(func, name):
+    found = []
+    for block in func.cfg.blocks:
+        stack = list(block.operations)
+        while stack:
+            op = stack.pop()
+            if op is None:
+                continue
+            if op.type == OperationType.CALL and op.value == name:
+                found.append(op)
+            stack.extend([op.left, op.right, *op.args])
+    return found
+
+
+def test_call_to_later_function_gets_its_return_type():
+    main, half = build_functions(FORWARD_CALL)
+    assert [func.name for func in (main, half)] == ['main', 'half']
+    assert [op.result_type for op in calls(main, 'half')] == ['double']
+
+
+def test_functions_and_blocks_in_source_order(monkeypatch):
+    functions = build_functions(MUTUAL_RECURSION)
+    assert [func.name for func in functions] == ['is_even', 'is_odd', 'main']
+    # Номера блоков каждой функции идут подряд после номеров предыдущей
+    ranges = [sorted(block.id for block in func.cfg.blocks) for func in functions]
+    assert sum(ranges, []) == list(range(sum(len(ids) for ids in ranges)))
+
+    # Предварительный проход по сигнатурам не меняет номера и порядок блоков:
+    # результат совпадает с однопроходной сборкой, где сигнатура функции
+    # становится известна только перед ее телом (все функции возвращают int)
+    def sequential(self, file_name, ast):
+        for func_node in ast.children:
+            if func_node.type == 'function_declaration':
+                self.index_signatures([func_node])
+                self._process_function(file_name, func_node)
+
+    monkeypatch.setattr(ControlFlowBuilder, '_analyze_file', sequential)
+    assert cfg_shape(functions) == cfg_shape(build_functions(MUTUAL_RECURSION))
@@ -0,0 +1,69 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ast_parser import SimpleParser
+from compiler import TARGETS, create_generator
+from control_flow import ControlFlowBuilder
+from generators.generator_state import PerCompilationState
+from support import read_example
+
+EXAMPLES = ('fib.simple', 'calculator.simple')
+BROKEN = 'function main() -> int {\n x -> int;\n x = y + 1;\n return x;\n}\n'
+
+
+def build(builder: ControlFlowBuilder, source: str, file_name: str = '<test>'):
+    ast = SimpleParser().parse_file(file_name, source)
+    return builder.build_from_ast(file_name, ast)
+
+
+def fresh_output(target: str, source: str) -> str:
+    return create_generator(target).generate_program(build(ControlFlowBuilder(), source))
+
+
+def test_reset_state_is_abstract():
+    class Incomplete(PerCompilationState):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize('target', TARGETS)
+def test_concurrent_compilations_share_instances(target):
+    sources = [read_example(name) for name in EXAMPLES]
+    expected = [fresh_output(target, source) for source in sources]
+    builder = ControlFlowBuilder()
+    generator = create_generator(target)
+
+    def compile_one(index: int) -> str:
+        return generator.generate_program(build(builder, sources[index % len(sources)]))
+
+    # Частое переключение потоков: компиляции перемешиваются внутри функций
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            outputs = list(pool.map(compile_one, range(32)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert outputs == [expected[index % len(sources)] for index in range(32)]
+
+
+@pytest.mark.parametrize('target', TARGETS)
+def test_warm_instances_do_not_leak_state(target):
+    builder = ControlFlowBuilder()
+    generator = create_generator(target)
+    fib, calculator = (read_example(name) for name in EXAMPLES)
+
+    # Ошибка прошлой компиляции не попадает в следующую
+    build(builder, BROKEN)
+    assert builder.errors
+    first = generator.generate_program(build(builder, fib))
+    assert not builder.errors
+    generator.generate_program(build(builder, calculator))
+    again = generator.generate_program(build(builder, fib))
+    assert first == again == fresh_output(target, fib)
+    # Номера блоков начинаются заново в каждой компиляции
+    assert build(builder, fib)[0].cfg.entry_block.id == build(ControlFlowBuilder(), fib)[0].cfg.entry_block.id
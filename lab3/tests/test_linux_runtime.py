@@ -0,0 +1,79 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+
+from compiler import compile_source
+from support import read_example
+
+ASSIGNED_RESULTS = '''function main() -> int {
+ r -> int;
+ n -> int;
+ x -> int;
+ r = printf("hello %d\\n", 42);
+ n = scanf("%d", x);
+ printf("%d %d %d\\n", r, n, x);
+ return 0;
+}
+'''
+
+PRINTF_IN_EXPRESSION = '''function main() -> int {
+ r -> int;
+ r = printf("hello\\n") + 1;
+ return r;
+}
+'''
+
+
+def undefined_symbols(asm: str) -> set:
+    """Цели call и extern, для которых в тексте нет метки"""
+    labels = set(re.findall(r'^([A-Za-z_]\w*):', asm, re.MULTILINE))
+    used = set(re.findall(r'^\s+call\s+([A-Za-z_]\w*)', asm, re.MULTILINE))
+    for names in re.findall(r'^extern\s+(.+)$', asm, re.MULTILINE):
+        used.update(name.strip() for name in names.split(','))
+    return used - labels
+
+
+def run_static(obj: bytes, stdin: str) -> str:
+    """Статическая сборка объектного файла без libc и запуск"""
+    with tempfile.TemporaryDirectory() as directory:
+        obj_path = os.path.join(directory, 'program.o')
+        exe_path = os.path.join(directory, 'program')
+        with open(obj_path, 'wb') as f:
+            f.write(obj)
+        subprocess.run(['ld', '-static', '-o', exe_path, obj_path], check=True, capture_output=True)
+        return subprocess.run([exe_path], input=stdin, capture_output=True, text=True, check=True).stdout
+
+
+def test_assigned_results_call_fast_runtime():
+    result = compile_source(ASSIGNED_RESULTS, 'linux', runtime='fast', emit_object=True)
+    assert result.ok, result.diagnostics
+    assert 'call __rt_printf' in result.output and 'call __rt_scanf' in result.output
+    assert 'call printf' not in result.output and 'call scanf' not in result.output
+    assert 'extern' not in result.output
+
+
+@pytest.mark.skipif(shutil.which('ld') is None, reason='нужен компоновщик ld')
+def test_fast_printf_returns_printed_length():
+    result = compile_source(ASSIGNED_RESULTS, 'linux', freestanding=True, emit_object=True)
+    assert result.ok, result.diagnostics
+    # Как printf из libc: "hello 42\n" - 9 символов
+    assert run_static(result.object, '7\n') == 'hello 42\n9 1 7\n'
+
+
+@pytest.mark.parametrize('source', [ASSIGNED_RESULTS, read_example('fib.simple'), read_example('calculator.simple')])
+def test_freestanding_output_has_no_undefined_symbols(source):
+    result = compile_source(source, 'linux', freestanding=True)
+    assert result.ok, result.diagnostics
+    assert undefined_symbols(result.output) == set()
+
+
+def test_freestanding_rejects_standard_call_inside_expression():
+    result = compile_source(PRINTF_IN_EXPRESSION, 'linux', freestanding=True)
+    assert not result.ok
+    assert 'printf внутри выражения' in result.diagnostics[-1].message
+    # С libc та же программа собирается
+    assert undefined_symbols(compile_source(PRINTF_IN_EXPRESSION, 'linux').output) == {'printf', 'scanf', 'exit'}
@@ -0,0 +1,38 @@
+import io
+
+import pytest
+
+from compiler import compile_source, create_generator, CompileOptions, analyze_source, generate_code
+from support import read_example
+
+
+@pytest.mark.parametrize('target', ['linux', 'riscv'])
+def test_object_and_text_from_one_pass(target, monkeypatch):
+    source = read_example('fib.simple')
+    generator_class = type(create_generator(target))
+    passes = []
+    emit_program = generator_class._emit_program
+
+    def counting(self, functions):
+        passes.append(len(functions))
+        return emit_program(self, functions)
+
+    monkeypatch.setattr(generator_class, '_emit_program', counting)
+    result = compile_source(source, target, emit_object=True)
+    assert result.ok
+    assert len(passes) == 1
+    assert result.object.startswith(b'\x7fELF')
+
+    # Текст совпадает с генерацией без объектного файла
+    assert result.output == compile_source(source, target).output
+    assert len(passes) == 2
+
+
+def test_object_text_written_to_sink():
+    source = read_example('calculator.simple')
+    result = analyze_source(source, CompileOptions('linux', emit_object=True))
+    sink = io.StringIO()
+    generate_code(result, sink)
+    assert result.output is None
+    assert sink.getvalue() == compile_source(source, 'linux').output
+    assert result.object == compile_source(source, 'linux', emit_object=True).object
@@ -0,0 +1,66 @@
+import pytest
+
+from generators import python_gen
+from generators.python_gen import PythonSourceGenerator
+from support import build_functions, read_example
+
+
+def nested_ifs(depth: int) -> str:
+    """main с depth вложенными if; при x = 0 выполняются все, результат - depth"""
+    lines = ['function main() -> int {', ' x -> int;', ' y -> int;', ' x = 0;', ' y = 0;']
+    for level in range(depth):
+        lines.append(f'if (x < {level + 1}) {{')
+        lines.append(' y = y + 1;')
+    lines.append(' x = x + 1;')
+    lines.extend('}' for _ in range(depth))
+    lines.extend([' return y;', '}'])
+    return '\n'.join(lines) + '\n'
+
+
+def nested_whiles(depth: int) -> str:
+    """main с depth вложенными while; внутренний цикл доводит x до depth"""
+    lines = ['function main() -> int {', ' x -> int;', ' x = 0;']
+    for level in range(depth):
+        lines.append(f'while (x < {level + 1}) {{')
+    lines.append(' x = x + 1;')
+    lines.extend('}' for _ in range(depth))
+    lines.extend([' return x;', '}'])
+    return '\n'.join(lines) + '\n'
+
+
+def run_main(source: str) -> int:
+    return PythonSourceGenerator().compile_functions(build_functions(source))['main']()
+
+
+@pytest.mark.parametrize('depth', [1000, 150])
+def test_deeply_nested_ifs(depth):
+    assert run_main(nested_ifs(depth)) == depth
+
+
+def test_nested_whiles_over_block_limit():
+    # Python допускает не больше 20 вложенных циклов
+    assert run_main(nested_whiles(25)) == 25
+
+
+def test_structured_code_below_limits():
+    source = PythonSourceGenerator().generate_program(build_functions(nested_whiles(python_gen.MAX_LOOP_DEPTH)))
+    assert '_b = ' not in source
+    assert source.count('while ') == python_gen.MAX_LOOP_DEPTH
+
+
+def test_syntax_error_falls_back_to_dispatch(monkeypatch):
+    # Без пределов структурный код не компилируется, и функция переписывается диспетчеризацией
+    monkeypatch.setattr(python_gen, 'MAX_INDENT_DEPTH', 10 ** 6)
+    monkeypatch.setattr(python_gen, 'MAX_LOOP_DEPTH', 10 ** 6)
+    functions = build_functions(nested_whiles(25) + nested_ifs(3).replace('main', 'other'))
+    source = PythonSourceGenerator().generate_program(functions)
+    main_source, other_source = source.split('def other')
+    assert '_b = ' in main_source and '_b = ' not in other_source
+    compiled = PythonSourceGenerator().compile_functions(functions)
+    assert compiled['main']() == 25 and compiled['other']() == 3
+
+
+def test_examples_compile():
+    for name in ('fib.simple', 'calculator.simple'):
+        functions = build_functions(read_example(name))
+        assert set(PythonSourceGenerator().compile_functions(functions)) == {func.name for func in functions}
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+import compiler
+import server
+from server import CompileClient, CompileServer, ServerError
+from support import read_example
+
+
+@pytest.fixture
+def running_server():
+    # Короткий путь: длина пути Unix-сокета ограничена
+    directory = tempfile.mkdtemp(prefix='simple-test-')
+    instance = CompileServer(os.path.join(directory, 'server.sock'), workers=4)
+    thread = threading.Thread(target=instance.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            with CompileClient(instance.socket_path, timeout=10) as client:
+                client.ping()
+            break
+        except ServerError:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    yield instance
+    instance.stop()
+    thread.join(10)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_compiler_exception_returns_error_reply(running_server, monkeypatch):
+    def failing_compile(*args, **kwargs):
+        raise RuntimeError('сбой генератора')
+
+    monkeypatch.setattr(server, 'compile_source', failing_compile)
+    with CompileClient(running_server.socket_path, timeout=10) as client:
+        response = client.compile('broken.simple', 'function main() -> int { return 0; }')
+        assert response['ok'] is False
+        assert 'сбой генератора' in response['errors'][0]['message']
+        # Соединение и поток пула продолжают работать
+        assert client.ping()['ok']
+
+
+def test_files_compile_outside_global_lock(running_server, monkeypatch):
+    release = threading.Event()
+    entered = threading.Event()
+    compile_source = server.compile_source
+
+    def blocking_compile(source_code, target, opt_level, file_name, *args, **kwargs):
+        if file_name == 'slow.simple':
+            entered.set()
+            assert release.wait(10)
+        return compile_source(source_code, target, opt_level, file_name, *args, **kwargs)
+
+    monkeypatch.setattr(server, 'compile_source', blocking_compile)
+    source = read_example('fib.simple')
+    slow_response = {}
+
+    def compile_slow():
+        with CompileClient(running_server.socket_path, timeout=10) as client:
+            slow_response.update(client.compile('slow.simple', source))
+
+    slow = threading.Thread(target=compile_slow)
+    slow.start()
+    try:
+        assert entered.wait(10)
+        # Пока компилируется slow.simple, другой файл собирается без ожидания
+        with CompileClient(running_server.socket_path, timeout=10) as client:
+            fast_response = client.compile('fast.simple', source)
+        assert fast_response['ok'] and not slow_response
+    finally:
+        release.set()
+        slow.join(10)
+    assert slow_response['ok']
+    assert slow_response['output'] == fast_response['output']
+
+
+def test_file_locks_released_after_requests(running_server):
+    source = read_example('fib.simple')
+    with CompileClient(running_server.socket_path, timeout=10) as client:
+        for index in range(20):
+            assert client.compile(f'short-lived-{index}.simple', source)['ok']
+    # Блокировки живут, только пока к файлу есть запросы
+    assert running_server.file_locks == {}
+
+
+def test_worker_reuses_generators(running_server, monkeypatch):
+    created = []
+    create_generator = compiler.create_generator
+
+    def counting(*args, **kwargs):
+        created.append(args)
+        return create_generator(*args, **kwargs)
+
+    monkeypatch.setattr(compiler, 'create_generator', counting)
+    source = read_example('fib.simple')
+    expected = compiler.compile_source(source, 'linux').output
+    created.clear()
+    with CompileClient(running_server.socket_path, timeout=10) as client:
+        # Соединение обслуживает один поток пула: генератор создается один раз
+        outputs = [client.compile(f'warm-{index}.simple', source)['output'] for index in range(3)]
+        assert client.compile('warm-c.simple', source, generator='c')['ok']
+        assert client.compile('warm-0.simple', source)['output'] == expected
+    assert outputs == [expected] * 3
+    assert [args[0] for args in created] == ['linux', 'c']
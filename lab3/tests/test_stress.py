@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+LAB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Компиляция в отдельном процессе: пиковая память процесса не зависит от других тестов
+CHILD = '''
+import resource, sys, time
+sys.path.insert(0, sys.argv[1])
+sys.setrecursionlimit(1000)
+from compiler import compile_source
+ifs, depth = int(sys.argv[2]), int(sys.argv[3])
+lines = ['function main() -> int {', ' x -> int;', ' x = 0;']
+for index in range(ifs):
+    lines.extend([' if (x == %d) {' % index, '  x = x + 1;', ' }'])
+lines.extend(' if (x > %d) {' % level for level in range(depth))
+lines.append('  x = x - 1;')
+lines.extend(' }' for _ in range(depth))
+lines.extend([' printf("%d\\\\n", x);', ' return 0;', '}'])
+source = '\\n'.join(lines) + '\\n'
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+result = compile_source(source, 'linux')
+elapsed = time.perf_counter() - start
+assert result.ok, result.diagnostics
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+print(len(result.functions[0].cfg.blocks), elapsed, peak * 1024)
+'''
+
+
+def compile_in_child(ifs: int, depth: int):
+    output = subprocess.run([sys.executable, '-c', CHILD, LAB_DIR, str(ifs), str(depth)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return int(output[0]), float(output[1]), int(output[2])
+
+
+def test_100k_block_function():
+    # Последовательные if (3 блока на if) и вложенность глубже предела рекурсии
+    small_blocks, small_time, _ = compile_in_child(8500, 1200)
+    blocks, elapsed, peak = compile_in_child(34000, 1200)
+    assert blocks > 100000
+    # В 4 раза больше блоков: линейное время - ~4x, квадратичное - ~16x
+    assert elapsed < 8 * small_time
+    # Около 1.5 КБ на блок (AST, CFG и текст ассемблера)
+    assert peak < 4096 * blocks
+
+
+def test_deep_nesting_time_is_linear():
+    # Разбор тел блоков копированием текста и поиск переменных по цепочке
+    # областей давали O(глубина x размер): 8000 уровней - около минуты
+    _, small_time, _ = compile_in_child(0, 6000)
+    _, elapsed, _ = compile_in_child(0, 12000)
+    # Вдвое глубже: линейное время - ~2x, квадратичное - ~4x
+    assert elapsed < 3 * small_time
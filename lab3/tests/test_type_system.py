@@ -0,0 +1,25 @@
+from port.type_system import TypeSystem, DEFAULT_TYPE_INFO
+
+
+def test_unknown_types_are_not_interned():
+    count = len(TypeSystem.TYPES)
+    rows = [len(row) for row in TypeSystem.CASTS]
+    for index in range(1000):
+        name = f'unknown_{index}'
+        assert TypeSystem.get_type_info(name) is DEFAULT_TYPE_INFO
+        assert TypeSystem.get_size(name) == 4
+        assert TypeSystem.get_asm_prefix(name) == 'dword'
+        assert TypeSystem.can_implicit_cast(name, name)
+        assert not TypeSystem.can_implicit_cast(name, 'int')
+        assert not TypeSystem.can_implicit_cast('int', name)
+    assert len(TypeSystem.TYPES) == count == len(TypeSystem.BUILTIN_TYPES)
+    assert [len(row) for row in TypeSystem.CASTS] == rows
+
+
+def test_builtin_casts():
+    assert TypeSystem.can_implicit_cast('int', 'double')
+    assert TypeSystem.can_implicit_cast('char', 'int')
+    assert TypeSystem.can_implicit_cast('string', 'string')
+    assert not TypeSystem.can_implicit_cast('double', 'int')
+    assert TypeSystem.can_implicit_cast(None, None)
+    assert TypeSystem.get_size('double') == 8 and TypeSystem.get_asm_prefix('void') is None
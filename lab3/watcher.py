@@ -0,0 +1,77 @@
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+# Опрос каталога: период и пауза после последнего изменения перед сборкой
+POLL_INTERVAL = 0.25
+DEBOUNCE_DELAY = 0.2
+
+FileStamp = Tuple[int, int]  # (mtime_ns, размер)
+
+
+class SourceWatcher:
+    """Слежение за исходниками в каталоге опросом os.scandir.
+    За один опрос читаются только метаданные каталогов (mtime и размер из stat),
+    содержимое файлов не читается. Серия сохранений (редактор пишет файл в несколько
+    приемов, сохраняется сразу несколько файлов) объединяется в одну пачку:
+    пачка отдается, когда изменения не появлялись в течение debounce секунд"""
+
+    def __init__(self, directory: str, suffix: str = '.simple',
+                 interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE_DELAY):
+        self.directory = directory
+        self.suffix = suffix
+        self.interval = interval
+        self.debounce = debounce
+        self.stamps: Dict[str, FileStamp] = self.scan()
+
+    def files(self) -> List[str]:
+        return sorted(self.stamps)
+
+    def scan(self) -> Dict[str, FileStamp]:
+        """Текущие отметки всех исходников каталога (с подкаталогами)"""
+        stamps = {}
+        stack = [self.directory]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.name.startswith('.'):
+                            stack.append(entry.path)
+                    elif entry.name.endswith(self.suffix) and entry.is_file():
+                        stat = entry.stat()
+                        stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    # Файл удален между чтением каталога и stat
+                    continue
+        return stamps
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Измененные (и новые) и удаленные файлы с прошлого опроса"""
+        stamps = self.scan()
+        changed = sorted(path for path, stamp in stamps.items() if self.stamps.get(path) != stamp)
+        removed = sorted(path for path in self.stamps if path not in stamps)
+        self.stamps = stamps
+        return changed, removed
+
+    def batches(self) -> Iterator[Tuple[List[str], List[str]]]:
+        """Бесконечный поток пачек изменений (changed, removed) с антидребезгом"""
+        while True:
+            changed, removed = self.poll()
+            if not changed and not removed:
+                time.sleep(self.interval)
+                continue
+            pending_changed, pending_removed = set(changed), set(removed)
+            while True:
+                time.sleep(self.debounce)
+                changed, removed = self.poll()
+                if not changed and not removed:
+                    break
+                pending_changed.update(changed)
+                pending_changed.difference_update(removed)
+                pending_removed.update(removed)
+                pending_removed.difference_update(changed)
+            yield sorted(pending_changed), sorted(pending_removed)